@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-chunk vs batched ingestion.
+
+Builds a synthetic document of heading/body chunks and writes it to a scratch
+ChromaDB collection twice: once one chunk per encode/insert (the old
+run_ingest_job behaviour, batch size 1) and once through the batched path
+(write_chunk_batches with INGEST_BATCH_SIZE). Reports chunks/sec for each.
+
+Usage:
+    python scripts/benchmark_ingest_batching.py [--chunks 2000] [--batch-size 64]
+                                                [--chroma-host HOST --chroma-port PORT]
+
+Without --chroma-host an in-process ephemeral ChromaDB client is used, so the
+numbers exclude network latency (the real gain over HTTP is larger).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "fastapi"))
+
+import chromadb
+
+from services.document_ingestion_service import build_chunk_metadata, write_chunk_batches
+
+WORDS = (
+    "the system shall support ipv6 address autoconfiguration and neighbor discovery "
+    "requirement conformance test procedure interface message packet header router "
+    "host segment acknowledgment window retransmission timer option field value"
+).split()
+
+
+def synthetic_chunks(count: int, seed: int = 7):
+    """Generate alternating heading/body chunks resembling a parsed spec."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        if i % 2 == 0:
+            section = f"{i // 20 + 1}.{(i // 2) % 10 + 1}"
+            text = f"{section} {' '.join(rng.choices(WORDS, k=5)).title()}"
+            chunk_type = "heading"
+        else:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(60, 180))) + "."
+            chunk_type = "body_text"
+        chunks.append({
+            "chunk_type": chunk_type,
+            "page_number": i // 40 + 1,
+            "heading_text": "",
+            "heading_level": 2,
+            "parent_heading": "",
+            "content": text,
+            "chunk_index": i,
+            "images": [],
+            "has_images": False,
+        })
+    return chunks
+
+
+def to_records(chunks, document_id: str):
+    records = []
+    for c in chunks:
+        meta = build_chunk_metadata(c, document_id, "synthetic.pdf", ".pdf", len(chunks), False)
+        chunk_id = f"{document_id}_chunk_{c['chunk_index']}"
+        meta["chunk_id"] = chunk_id
+        records.append({"id": chunk_id, "text": c["content"], "metadata": meta})
+    return records
+
+
+def run(client, chunks, batch_size: int) -> float:
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    coll = client.create_collection(name)
+    records = to_records(chunks, uuid.uuid4().hex)
+    try:
+        start = time.perf_counter()
+        written, failed = write_chunk_batches(coll, records, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        client.delete_collection(name)
+    if failed:
+        print(f"  warning: {failed} chunks failed")
+    return written / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched ingestion")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "64")))
+    parser.add_argument("--chroma-host", default=None)
+    parser.add_argument("--chroma-port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.chroma_host:
+        client = chromadb.HttpClient(host=args.chroma_host, port=args.chroma_port)
+    else:
+        client = chromadb.EphemeralClient()
+
+    chunks = synthetic_chunks(args.chunks)
+    # warm up the encoder so model load time is not counted
+    run(client, chunks[:8], batch_size=8)
+
+    before = run(client, chunks, batch_size=1)
+    after = run(client, chunks, batch_size=args.batch_size)
+
+    print(f"Synthetic document: {len(chunks)} chunks")
+    print(f"  per-chunk (batch=1):        {before:8.1f} chunks/sec")
+    print(f"  batched   (batch={args.batch_size:<4}):    {after:8.1f} chunks/sec")
+    if before:
+        print(f"  speedup:                    {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark LLM invocation overhead with and without the get_llm client registry.
+
+Starts a local mock LLM server (Ollama /api/generate and OpenAI
+/v1/chat/completions, answering instantly) and runs LLMInvoker.invoke against
+it, once building a new client per call (LLM_CLIENT_CACHE_ENABLED=false, the
+old behaviour) and once through the registry. Since the server does no work,
+the time per call is almost entirely client overhead: object construction,
+validation, and TCP connection setup. Reports mean and p95 latency per call,
+throughput, the cost of get_llm() alone, and how many TCP connections the
+server accepted.
+
+Requires the FastAPI service dependencies (langchain-ollama or
+langchain-openai, httpx).
+
+Usage:
+    python scripts/benchmark_llm_clients.py [--provider ollama] [--model NAME]
+                                            [--calls 500] [--threads 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """Answers Ollama and OpenAI completion requests with a fixed reply."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send(b'{"models": []}', "application/json")
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+        model = payload.get("model", "mock")
+
+        if self.path.startswith("/api/"):
+            lines = [
+                {"model": model, "created_at": "2024-01-01T00:00:00Z", "response": "ok", "done": False},
+                {"model": model, "created_at": "2024-01-01T00:00:00Z", "response": "", "done": True,
+                 "done_reason": "stop", "prompt_eval_count": 10, "eval_count": 1},
+            ]
+            if self.path == "/api/chat":
+                for line in lines:
+                    line["message"] = {"role": "assistant", "content": line.pop("response")}
+            if payload.get("stream", True):
+                self._send("".join(json.dumps(line) + "\n" for line in lines).encode(), "application/x-ndjson")
+            else:
+                self._send(json.dumps(dict(lines[1], response="ok")).encode(), "application/json")
+            return
+
+        self._send(json.dumps({
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+        }).encode(), "application/json")
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockLLMHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, llm_utils, invoke, model, calls, threads, server):
+    llm_utils.clear_llm_clients()
+    with server.lock:
+        server.connections = server.requests = 0
+
+    def one(i):
+        start = time.perf_counter()
+        invoke(model_name=model, prompt=f"benchmark prompt {i}", log_timing=False)
+        return time.perf_counter() - start
+
+    invoke(model_name=model, prompt="warm-up", log_timing=False)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(200):
+        llm_utils.get_llm(model)
+    get_llm_us = (time.perf_counter() - start) / 200 * 1e6
+
+    print(f"{label:<10} {statistics.mean(latencies) * 1000:>9.2f} {latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.2f} "
+          f"{calls / elapsed:>10.0f} {get_llm_us:>12.0f} {server.connections:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", default="ollama", choices=["ollama", "openai"])
+    parser.add_argument("--model", help="Model name from llm_config (default: first model of the provider)")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_mock_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    # Read at import time by llm_utils / llm_config
+    os.environ["LLM_OLLAMA_HOST"] = url
+    os.environ["LLM_OPENAI_BASE_URL"] = f"{url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "fastapi"))
+    from services import llm_utils
+    from services.llm_invoker import LLMInvoker
+    from llm_config.llm_config import MODEL_REGISTRY
+
+    model = args.model or next(
+        (name for name, config in MODEL_REGISTRY.items() if config.provider.lower() == args.provider), None
+    )
+    if model is None:
+        parser.error(f"No {args.provider} model in llm_config; pass --model")
+
+    print(f"Mock server {url}, model {model} ({args.provider}), {args.calls} calls on {args.threads} threads")
+    print(f"{'mode':<10} {'mean ms':>9} {'p95 ms':>9} {'calls/s':>10} {'get_llm us':>12} {'connections':>12}")
+
+    llm_utils.LLM_CLIENT_CACHE_ENABLED = False
+    run("new", llm_utils, LLMInvoker.invoke, model, args.calls, args.threads, server)
+    llm_utils.LLM_CLIENT_CACHE_ENABLED = True
+    run("registry", llm_utils, LLMInvoker.invoke, model, args.calls, args.threads, server)
+    print(f"Registry: {llm_utils.llm_client_stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
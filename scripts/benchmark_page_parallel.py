@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark page-parallel PDF parsing and heading-based chunking.
+
+Parses and chunks a PDF sequentially, then with a process pool for each
+requested worker count (the PDF_PAGE_WORKERS mode of run_ingest_job), and
+checks that every parallel run produces exactly the same chunks as the
+sequential one (order, chunk_index, parent_heading carry-over).
+
+Usage:
+    python scripts/benchmark_page_parallel.py PDF [--workers 2 4 8] [--shard-size 50]
+                                              [--repeat-pages N]
+
+--repeat-pages concatenates the PDF with itself until it has at least N pages,
+e.g. --repeat-pages 1000 to measure a 1,000-page document.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "fastapi"))
+
+from services.heading_chunking import chunk_pages
+from services.parsed_pdf import parse_pdf
+
+
+def repeat_pdf(pdf_path: str, min_pages: int, out_dir: str) -> str:
+    """Write a copy of pdf_path repeated until it has at least min_pages pages."""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    while len(writer.pages) < min_pages:
+        for page in reader.pages:
+            writer.add_page(page)
+    out_path = os.path.join(out_dir, f"repeated_{len(writer.pages)}_{Path(pdf_path).name}")
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    return out_path
+
+
+def parse_and_chunk(pdf_path: str, executor=None, shard_size: int = 0):
+    start = time.perf_counter()
+    parsed = parse_pdf(pdf_path, "bench", executor=executor, shard_size=shard_size)
+    chunks = chunk_pages([(p.page_number, p.text) for p in parsed.pages], "bench",
+                         executor=executor, shard_size=shard_size)
+    return time.perf_counter() - start, parsed.page_count, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page-parallel PDF processing")
+    parser.add_argument("pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--shard-size", type=int, default=int(os.getenv("PDF_PAGE_SHARD_SIZE", "50")))
+    parser.add_argument("--repeat-pages", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = repeat_pdf(args.pdf, args.repeat_pages, tmp_dir) if args.repeat_pages else args.pdf
+
+        baseline_s, pages, baseline_chunks = parse_and_chunk(pdf_path)
+        print(f"{os.path.basename(pdf_path)}: {pages} pages, {len(baseline_chunks)} chunks "
+              f"({os.cpu_count()} CPUs)")
+        print(f"  sequential          {baseline_s:7.2f}s  {pages / baseline_s:7.1f} pages/sec")
+
+        for workers in args.workers:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                # warm the pool so interpreter start-up is not counted
+                list(pool.map(abs, range(workers)))
+                elapsed, _, chunks = parse_and_chunk(pdf_path, pool, args.shard_size)
+            status = "identical" if chunks == baseline_chunks else "MISMATCH"
+            print(f"  {workers:2d} workers          {elapsed:7.2f}s  {pages / elapsed:7.1f} pages/sec  "
+                  f"{baseline_s / elapsed:5.2f}x  chunks {status}")
+
+
+if __name__ == "__main__":
+    main()
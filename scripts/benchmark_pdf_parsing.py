@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark multi-pass vs single-pass PDF parsing.
+
+The old PDF ingest path read each file twice: PyPDF2 for position-aware image
+extraction (extract_images_with_positions) and pdfplumber again for
+heading-based chunking. The single-pass path (parse_pdf) opens the file once
+with pdfplumber and shares text, page geometry and images with both stages.
+
+Each mode runs in its own subprocess so peak RSS is measured independently.
+Reports wall-clock time and peak RSS per file.
+
+Usage:
+    python scripts/benchmark_pdf_parsing.py PDF [PDF ...] [--repeat 1]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "fastapi"))
+
+MODES = ("multi-pass", "single-pass")
+
+
+def run_mode(mode: str, pdf_path: str) -> dict:
+    """Parse pdf_path in the given mode and return timing/size stats."""
+    import pdfplumber
+
+    from services.parsed_pdf import parse_pdf
+    from services.position_aware_extraction import extract_images_with_positions
+
+    doc_id = Path(pdf_path).stem
+    with open(pdf_path, "rb") as f:
+        content = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, tempfile.TemporaryDirectory() as images_dir:
+        start = time.perf_counter()
+        if mode == "multi-pass":
+            pages_data = extract_images_with_positions(content, Path(pdf_path).name, tmp_dir, doc_id, images_dir)
+            with pdfplumber.open(pdf_path) as pdf:
+                texts = [page.extract_text() or "" for page in pdf.pages]
+            pages = len(texts)
+            images = sum(len(p["images"]) for p in pages_data)
+        else:
+            parsed = parse_pdf(pdf_path, doc_id, images_dir)
+            pages = parsed.page_count
+            images = parsed.image_count
+        elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seconds": elapsed, "peak_mb": peak_mb, "pages": pages, "images": images}
+
+
+def measure(mode: str, pdf_path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, pdf_path],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass PDF parsing")
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.worker, args.pdfs[0])))
+        return
+
+    if not args.pdfs:
+        parser.error("at least one PDF is required")
+
+    for pdf_path in args.pdfs:
+        print(f"{os.path.basename(pdf_path)}")
+        results = {}
+        for mode in MODES:
+            runs = [measure(mode, pdf_path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            results[mode] = best
+            print(f"  {mode:<12} {best['seconds']:7.2f}s  peak {best['peak_mb']:7.1f} MB  "
+                  f"({best['pages']} pages, {best['images']} images)")
+        before, after = results["multi-pass"], results["single-pass"]
+        if after["seconds"]:
+            print(f"  speedup      {before['seconds'] / after['seconds']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
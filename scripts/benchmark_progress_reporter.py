@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark Redis commands per job with and without the ProgressReporter.
+
+Replays the progress updates run_ingest_job makes for a simulated job
+(per-document status transitions, per-batch chunk counters, vision cache
+counters) against a counting Redis client, once writing each update directly
+and once through a ProgressReporter, and reports commands and round-trips.
+
+By default an in-memory fake client is used; with --redis-url the updates go
+to a real Redis server (use a scratch DB) and wall-clock time is reported too.
+
+Usage:
+    python scripts/benchmark_progress_reporter.py [--documents 10] [--chunks 400]
+                                                  [--batch-size 32] [--redis-url URL]
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "fastapi"))
+
+from services.progress_reporter import ProgressReporter
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the commands progress reporting uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        h = self.data.setdefault(key, {})
+        if field is not None:
+            h[field] = value
+        h.update(mapping or {})
+
+    def hincrby(self, key, field, amount=1):
+        h = self.data.setdefault(key, {})
+        h[field] = int(h.get(field, 0)) + amount
+
+    def expire(self, key, seconds):
+        pass
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+        self.ops = []
+        return results
+
+
+class CountingRedis:
+    """Wraps a client and counts commands and network round-trips."""
+
+    COMMANDS = ("set", "hset", "hincrby", "expire")
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = 0
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in self.COMMANDS:
+            return attr
+
+        def call(*args, **kwargs):
+            self.commands += 1
+            self.round_trips += 1
+            return attr(*args, **kwargs)
+        return call
+
+    def pipeline(self, transaction=True):
+        counter = self
+        pipe = self.client.pipeline(transaction=transaction)
+
+        class CountingPipeline:
+            def __getattr__(self, name):
+                attr = getattr(pipe, name)
+                if name in CountingRedis.COMMANDS:
+                    def queue(*args, **kwargs):
+                        counter.commands += 1
+                        return attr(*args, **kwargs)
+                    return queue
+                return attr
+
+            def execute(self):
+                counter.round_trips += 1
+                return pipe.execute()
+        return CountingPipeline()
+
+
+def simulate_job(writer, job_id: str, documents: int, chunks: int, batch_size: int):
+    """Issue the progress updates of one ingest job through writer."""
+    progress_key = f"job:{job_id}:progress"
+    writer.set(job_id, "running")
+    writer.hset(progress_key, mapping={"total_chunks": 0, "processed_chunks": 0,
+                                       "total_documents": documents, "processed_documents": 0})
+    for i in range(documents):
+        writer.hset(f"job:{job_id}:doc:{i}", mapping={"status": "pending", "chunks_total": 0,
+                                                      "chunks_processed": 0})
+    for i in range(documents):
+        doc_key = f"job:{job_id}:doc:{i}"
+        writer.hset(doc_key, mapping={"status": "processing", "start_time": "now"})
+        writer.hincrby(progress_key, "vision_cache_hits", 3)
+        writer.hincrby(progress_key, "vision_cache_misses", 1)
+        writer.hset(doc_key, mapping={"chunks_total": chunks, "token_stats": "{}"})
+        writer.hincrby(progress_key, "total_chunks", chunks)
+        for start in range(0, chunks, batch_size):
+            n = min(batch_size, chunks - start)
+            writer.hincrby(progress_key, "processed_chunks", n)
+            writer.hincrby(doc_key, "chunks_processed", n)
+        writer.hincrby(progress_key, "chunks_embedded", chunks)
+        writer.hset(doc_key, mapping={"status": "completed", "end_time": "now"})
+        writer.hincrby(progress_key, "processed_documents", 1)
+        if hasattr(writer, "flush"):
+            writer.flush()
+    writer.set(job_id, "success")
+
+
+def run(mode: str, client, args) -> dict:
+    counting = CountingRedis(client)
+    job_id = f"bench-{uuid.uuid4().hex[:8]}"
+    start = time.perf_counter()
+    if mode == "direct":
+        simulate_job(counting, job_id, args.documents, args.chunks, args.batch_size)
+    else:
+        with ProgressReporter(counting, name=job_id) as progress:
+            simulate_job(progress, job_id, args.documents, args.chunks, args.batch_size)
+    elapsed = time.perf_counter() - start
+    return {"commands": counting.commands, "round_trips": counting.round_trips,
+            "seconds": elapsed, "job_id": job_id}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipelined progress reporting")
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=400, help="chunks per document")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--redis-url", help="real Redis to write to (scratch DB)")
+    args = parser.parse_args()
+
+    if args.redis_url:
+        import redis
+        client = redis.from_url(args.redis_url, decode_responses=True)
+    else:
+        client = FakeRedis()
+
+    results = {mode: run(mode, client, args) for mode in ("direct", "pipelined")}
+    if args.redis_url:
+        for r in results.values():
+            keys = [r["job_id"], f"job:{r['job_id']}:progress"]
+            keys += [f"job:{r['job_id']}:doc:{i}" for i in range(args.documents)]
+            client.delete(*keys)
+    else:
+        # Both modes must leave the same progress state behind
+        direct = {k.replace(results["direct"]["job_id"], "J"): v for k, v in client.data.items()
+                  if results["direct"]["job_id"] in k}
+        piped = {k.replace(results["pipelined"]["job_id"], "J"): v for k, v in client.data.items()
+                 if results["pipelined"]["job_id"] in k}
+        print(f"final progress state {'identical' if direct == piped else 'MISMATCH'}")
+
+    print(f"{args.documents} documents x {args.chunks} chunks, batch size {args.batch_size}")
+    for mode, r in results.items():
+        print(f"  {mode:<10} {r['commands']:6d} commands  {r['round_trips']:6d} round-trips  {r['seconds'] * 1000:8.1f} ms")
+    direct, piped = results["direct"], results["pipelined"]
+    print(f"  reduction  {direct['commands'] / max(piped['commands'], 1):6.1f}x commands  "
+          f"{direct['round_trips'] / max(piped['round_trips'], 1):6.1f}x round-trips")
+
+
+if __name__ == "__main__":
+    main()
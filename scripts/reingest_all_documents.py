@@ -6,14 +6,20 @@ This script re-ingests all documents with heading-based chunking enabled.
 It lists all collections, backs up metadata, deletes collections, and
 re-uploads PDFs from the document_backup directory.
 
+With --incremental, nothing is deleted: each PDF is re-uploaded in
+incremental mode, so documents whose bytes and chunking version are unchanged
+are skipped and changed documents only re-embed new or changed chunks.
+
 Usage:
     python scripts/reingest_all_documents.py [--dry-run] [--backup-dir PATH]
+    python scripts/reingest_all_documents.py --incremental [--collection NAME]
 
 Options:
     --dry-run       Preview actions without executing
     --backup-dir    Directory containing PDF backups (default: ./document_backup)
     --api-url       FastAPI URL (default: http://localhost:8000)
     --collection    Only process specific collection (default: all)
+    --incremental   Diff against stored chunk hashes instead of deleting collections
 """
 
 import argparse
@@ -21,6 +27,7 @@ import json
 import logging
 import os
 import sys
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -40,14 +47,21 @@ logger = logging.getLogger(__name__)
 class ReingestionManager:
     """Manages document re-ingestion with heading-based chunking."""
 
-    def __init__(self, api_url: str, backup_dir: Path, dry_run: bool = False):
+    def __init__(self, api_url: str, backup_dir: Path, dry_run: bool = False, incremental: bool = False):
         self.api_url = api_url.rstrip('/')
         self.backup_dir = backup_dir
         self.dry_run = dry_run
+        self.incremental = incremental
         self.stats = {
             'collections_deleted': 0,
             'documents_reingested': 0,
-            'errors': 0
+            'errors': 0,
+            # incremental mode, summed from job status
+            'documents_unchanged': 0,
+            'chunks_embedded': 0,
+            'chunks_metadata_updated': 0,
+            'chunks_unchanged': 0,
+            'chunks_deleted': 0
         }
 
     def check_api_health(self) -> bool:
@@ -150,6 +164,22 @@ class ReingestionManager:
             self.stats['errors'] += 1
             return False
 
+    def wait_for_job(self, job_id: str, poll_interval: float = 2.0, timeout: float = 14400) -> Optional[Dict]:
+        """Poll an ingestion job until it finishes; returns the final job status."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                response = requests.get(f"{self.api_url}/api/vectordb/jobs/{job_id}", timeout=10)
+                response.raise_for_status()
+                job = response.json()
+                if job.get("status") in ("success", "failed"):
+                    return job
+            except RequestException as e:
+                logger.warning(f"Failed to poll job {job_id}: {e}")
+            time.sleep(poll_interval)
+        logger.error(f"Timed out waiting for job {job_id}")
+        return None
+
     def reingest_document(self, pdf_path: Path, collection_name: str) -> bool:
         """Upload and process a document with heading-based chunking."""
         try:
@@ -165,7 +195,8 @@ class ReingestionManager:
                     'chunk_overlap': 200,
                     'store_images': 'true',
                     'vision_models': 'llava_7b',
-                    'enable_ocr': 'false'
+                    'enable_ocr': 'false',
+                    'incremental': 'true' if self.incremental else 'false'
                 }
 
                 logger.info(f"Uploading: {pdf_path.name} ({pdf_path.stat().st_size / 1024:.1f} KB)")
@@ -182,6 +213,20 @@ class ReingestionManager:
                 job_id = result.get('job_id')
                 logger.info(f"Document uploaded successfully. Job ID: {job_id}")
                 self.stats['documents_reingested'] += 1
+
+                if self.incremental and job_id:
+                    job = self.wait_for_job(job_id)
+                    if not job or job.get("status") != "success":
+                        self.stats['errors'] += 1
+                        return False
+                    for key in ('documents_unchanged', 'chunks_embedded', 'chunks_metadata_updated',
+                                'chunks_unchanged', 'chunks_deleted'):
+                        self.stats[key] += int(job.get(key, 0))
+                    logger.info(
+                        f"  {pdf_path.name}: {job.get('chunks_embedded', 0)} embedded, "
+                        f"{job.get('chunks_metadata_updated', 0)} metadata updated, "
+                        f"{job.get('chunks_unchanged', 0)} unchanged, {job.get('chunks_deleted', 0)} deleted"
+                    )
                 return True
 
         except RequestException as e:
@@ -203,6 +248,44 @@ class ReingestionManager:
         logger.info(f"Found {len(pdfs)} PDF files in {self.backup_dir}")
         return sorted(pdfs)
 
+    def run_incremental(self, target_collection: Optional[str] = None):
+        """Re-ingest every PDF in incremental mode without deleting collections."""
+        logger.info("="*70)
+        logger.info("INCREMENTAL DOCUMENT RE-INGESTION")
+        logger.info("="*70)
+
+        if not self.check_api_health():
+            logger.error("API is not accessible. Aborting re-ingestion.")
+            return False
+
+        pdfs = self.find_pdfs_in_backup()
+        if not pdfs:
+            logger.error("No PDF files found in backup directory. Aborting re-ingestion.")
+            return False
+
+        collection_name = target_collection or "uploaded_documents"
+        if not self.dry_run and collection_name not in self.get_all_collections():
+            self.create_collection(collection_name)
+
+        start = time.time()
+        for pdf_path in pdfs:
+            logger.info(f"\n  Processing: {pdf_path.name}")
+            self.reingest_document(pdf_path, collection_name)
+
+        logger.info("\n" + "="*70)
+        logger.info("INCREMENTAL RE-INGESTION SUMMARY")
+        logger.info("="*70)
+        logger.info(f"Documents submitted: {self.stats['documents_reingested']}")
+        logger.info(f"Documents unchanged (skipped): {self.stats['documents_unchanged']}")
+        logger.info(f"Chunks embedded: {self.stats['chunks_embedded']}")
+        logger.info(f"Chunks with metadata-only updates: {self.stats['chunks_metadata_updated']}")
+        logger.info(f"Chunks unchanged: {self.stats['chunks_unchanged']}")
+        logger.info(f"Stale chunks deleted: {self.stats['chunks_deleted']}")
+        logger.info(f"Errors encountered: {self.stats['errors']}")
+        logger.info(f"Elapsed: {time.time() - start:.1f}s")
+        logger.info("="*70)
+        return True
+
     def run_migration(self, target_collection: Optional[str] = None):
         """Execute full migration process."""
         logger.info("="*70)
@@ -318,6 +401,11 @@ def main():
         type=str,
         help='Only process specific collection (default: all collections)'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only re-embed new/changed chunks; do not delete collections'
+    )
 
     args = parser.parse_args()
 
@@ -331,11 +419,15 @@ def main():
     manager = ReingestionManager(
         api_url=args.api_url,
         backup_dir=args.backup_dir,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        incremental=args.incremental
     )
 
     try:
-        success = manager.run_migration(target_collection=args.collection)
+        if args.incremental:
+            success = manager.run_incremental(target_collection=args.collection)
+        else:
+            success = manager.run_migration(target_collection=args.collection)
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         logger.warning("\n\nMigration interrupted by user")
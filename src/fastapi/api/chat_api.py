@@ -4,6 +4,7 @@ from typing import Optional, List
 from datetime import datetime
 import time
 import uuid
+import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -20,8 +21,9 @@ from core.dependencies import (
 )
 from repositories import ChatRepository
 from services.llm_service import LLMService
-from services.rag_service import RAGService
+from services.rag_service import RAGService, save_chat_entry, source_document_names
 from services.llm_invoker import LLMInvoker
+from core.sse import sse_response
 
 # Add parent directory to path to import llm_config module
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -30,6 +32,25 @@ from llm_config.llm_config import validate_model, get_model_config, llm_env
 logger = logging.getLogger("CHAT_API_LOGGER")
 
 chat_api_router = APIRouter(prefix="/chat", tags=["chat"])
+
+
+def _validate_chat_model(model_name: str) -> None:
+    """Raise an HTTPException if the model is unsupported or its provider's API key is missing."""
+    is_valid, validation_error = validate_model(model_name)
+    if not is_valid:
+        logger.error(f"Model validation failed: {validation_error}")
+        raise HTTPException(status_code=400, detail=validation_error)
+
+    # Validate API keys for the model's provider
+    model_config = get_model_config(model_name)
+    keys_valid, key_error = llm_env.validate_provider_keys(model_config.provider)
+    if not keys_valid:
+        logger.error(f"API key validation failed for {model_config.provider}: {key_error}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"{key_error}. Please configure the required API key in your environment."
+        )
+
     
 @chat_api_router.post("", response_model=ChatResponse)
 def chat(
@@ -53,20 +74,7 @@ def chat(
         # ========================================================================
         # EARLY MODEL VALIDATION - Fail fast if model is unsupported or misconfigured
         # ========================================================================
-        is_valid, validation_error = validate_model(request.model_name)
-        if not is_valid:
-            logger.error(f"Model validation failed: {validation_error}")
-            raise HTTPException(status_code=400, detail=validation_error)
-
-        # Validate API keys for the model's provider
-        model_config = get_model_config(request.model_name)
-        keys_valid, key_error = llm_env.validate_provider_keys(model_config.provider)
-        if not keys_valid:
-            logger.error(f"API key validation failed for {model_config.provider}: {key_error}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"{key_error}. Please configure the required API key in your environment."
-            )
+        _validate_chat_model(request.model_name)
 
         # Determine if RAG is needed based on query_type
         use_rag = request.query_type in [QueryType.RAG, QueryType.RAG_ENHANCED]
@@ -75,10 +83,11 @@ def chat(
 
         if use_rag and request.collection_name:
             # RAG mode: fetch docs via RAGService, then run a retrieval chain
-            answer, response_time, metadata_list, formatted_citations = rag_service.process_query_with_rag(
+            answer, response_time, metadata_list, formatted_citations, cache_hit = rag_service.process_query_with_rag_cached(
                 query_text=request.query,
                 collection_name=request.collection_name,
                 model_name=request.model_name,
+                use_answer_cache=request.use_answer_cache,
             )
 
             # Save chat history using repository
@@ -89,22 +98,18 @@ def chat(
                 collection_name=request.collection_name,
                 query_type=request.query_type.value,
                 response_time_ms=response_time,
-                session_id=session_id
+                session_id=session_id,
+                cache_hit=cache_hit
             )
             db.commit()
 
             # Extract source document names for response
-            source_documents = []
-            if metadata_list:
-                for meta in metadata_list:
-                    doc_name = meta.get("metadata", {}).get("document_name", "")
-                    if doc_name and doc_name not in source_documents:
-                        source_documents.append(doc_name)
+            source_documents = source_document_names(metadata_list)
 
             # Return standardized ChatResponse
             return ChatResponse(
                 success=True,
-                message="Query processed successfully with RAG",
+                message="Query answered from cache" if cache_hit else "Query processed successfully with RAG",
                 response=answer,
                 model_used=request.model_name,
                 query_type=request.query_type.value,
@@ -112,7 +117,8 @@ def chat(
                 session_id=session_id,
                 formatted_citations=formatted_citations,
                 source_documents=source_documents,
-                documents_found=len(metadata_list) if metadata_list else 0
+                documents_found=len(metadata_list) if metadata_list else 0,
+                cache_hit=cache_hit
             )
         else:
             # Direct LLM mode - Using LLMInvoker utility for simplified invocation
@@ -161,6 +167,98 @@ def chat(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
 
+@chat_api_router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+
+    Sends "token" events with the response text as the model generates it,
+    then a "done" event with the same fields as POST /chat plus
+    time_to_first_token_ms. The complete response is saved to chat history
+    before "done" is sent. RAG queries are not served from the answer cache.
+    """
+    _validate_chat_model(request.model_name)
+    session_id = request.session_id or str(uuid.uuid4())
+    use_rag = request.query_type in [QueryType.RAG, QueryType.RAG_ENHANCED]
+
+    logger.info(f"Processing streaming chat request with model={request.model_name}, query_type={request.query_type}")
+
+    if use_rag and request.collection_name:
+        events = _rag_chat_events(request, session_id, rag_service)
+    else:
+        events = _direct_chat_events(request, session_id)
+    return sse_response(events)
+
+
+async def _rag_chat_events(request: ChatRequest, session_id: str, rag_service: RAGService):
+    async for event, data in rag_service.astream_query_with_rag(
+        query_text=request.query,
+        collection_name=request.collection_name,
+        model_name=request.model_name,
+        session_id=session_id,
+        query_type=request.query_type.value
+    ):
+        if event != "done":
+            yield event, data
+            continue
+        yield "done", {
+            "success": True,
+            "message": "Query processed successfully with RAG",
+            "response": data["answer"],
+            "model_used": request.model_name,
+            "query_type": request.query_type.value,
+            "response_time_ms": data["response_time_ms"],
+            "time_to_first_token_ms": data["time_to_first_token_ms"],
+            "session_id": session_id,
+            "formatted_citations": data["formatted_citations"],
+            "source_documents": data["source_documents"],
+            "documents_found": len(data["metadata_list"]),
+            "cache_hit": False
+        }
+
+
+async def _direct_chat_events(request: ChatRequest, session_id: str):
+    start_time = time.time()
+    first_token_ms = None
+    parts = []
+    async for text in LLMInvoker.astream(
+        model_name=request.model_name,
+        prompt=request.query,
+        temperature=request.temperature
+    ):
+        if first_token_ms is None:
+            first_token_ms = int((time.time() - start_time) * 1000)
+        parts.append(text)
+        yield "token", text
+
+    answer = "".join(parts)
+    response_time_ms = int((time.time() - start_time) * 1000)
+    await asyncio.to_thread(
+        save_chat_entry,
+        user_query=request.query,
+        response=answer,
+        model_used=request.model_name,
+        collection_name=None,
+        query_type=request.query_type.value,
+        response_time_ms=response_time_ms,
+        session_id=session_id
+    )
+    yield "done", {
+        "success": True,
+        "message": "Query processed successfully",
+        "response": answer,
+        "model_used": request.model_name,
+        "query_type": request.query_type.value,
+        "response_time_ms": response_time_ms,
+        "time_to_first_token_ms": first_token_ms,
+        "session_id": session_id,
+        "documents_found": 0
+    }
+
+
 @chat_api_router.get("/history", response_model=DataResponse)
 def get_chat_history(
     limit: int = 100,
@@ -191,7 +289,8 @@ def get_chat_history(
             "query_type": entry.query_type,
             "response_time_ms": entry.response_time_ms,
             "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
-            "session_id": entry.session_id
+            "session_id": entry.session_id,
+            "cache_hit": bool(entry.cache_hit)
         }
         for entry in history
     ]
@@ -2353,29 +2353,24 @@ async def query_test_cards(req: QueryTestCardsRequest):
             # This handles cases where IDs might not match across systems
             if req.test_plan_id and not result.get("ids"):
                 logger.info(f"No results for test_plan_id={req.test_plan_id}, trying fallback search")
-                # Get all test cards and filter client-side (less efficient but more robust)
-                all_result = collection.get(
-                    limit=1000,
-                    include=["documents", "metadatas"]
+                # Match plan IDs against the collection's distinct test plan IDs,
+                # kept in the document catalog, then fetch just the matching cards
+                from services.document_catalog import get_test_plan_ids
+                plan_ids = get_test_plan_ids(collection)
+                # Check for exact match, partial match, or if the test_plan_id contains our query ID
+                matched_plan_ids = sorted(
+                    plan_id for plan_id in plan_ids
+                    if plan_id and (req.test_plan_id in plan_id or plan_id in req.test_plan_id)
                 )
-                # Filter by partial ID match or by presence of test cards for this plan
-                filtered_ids = []
-                filtered_docs = []
-                filtered_metas = []
-                for idx, doc_id in enumerate(all_result.get("ids", [])):
-                    meta = all_result.get("metadatas", [])[idx] if idx < len(all_result.get("metadatas", [])) else {}
-                    stored_plan_id = meta.get("test_plan_id", "")
-                    # Check for exact match, partial match, or if the test_plan_id contains our query ID
-                    if (stored_plan_id == req.test_plan_id or
-                        req.test_plan_id in stored_plan_id or
-                        stored_plan_id in req.test_plan_id):
-                        filtered_ids.append(doc_id)
-                        filtered_docs.append(all_result.get("documents", [])[idx] if idx < len(all_result.get("documents", [])) else "")
-                        filtered_metas.append(meta)
-
-                if filtered_ids:
-                    logger.info(f"Fallback search found {len(filtered_ids)} test cards")
-                    result = {"ids": filtered_ids, "documents": filtered_docs, "metadatas": filtered_metas}
+
+                if matched_plan_ids:
+                    result = collection.get(
+                        where={"test_plan_id": {"$in": matched_plan_ids}},
+                        limit=1000,
+                        include=["documents", "metadatas"]
+                    )
+                    logger.info(f"Fallback search found {len(result.get('ids', []))} test cards "
+                                f"for test plans {matched_plan_ids}")
         else:
             # If no filters, get recent test cards only
             result = collection.get(
@@ -2842,6 +2837,7 @@ async def bulk_update_test_cards(req: BulkUpdateTestCardsRequest):
         logger.info(f"Bulk updating {len(req.updates)} test cards in collection: {req.collection_name}")
 
         from integrations.chromadb_client import get_chroma_client
+        from services.document_catalog import record_test_plan_ids
         chroma_client = get_chroma_client()
         collection = chroma_client.get_collection(name=req.collection_name)
 
@@ -2886,6 +2882,8 @@ async def bulk_update_test_cards(req: BulkUpdateTestCardsRequest):
 
                 # Update the document in ChromaDB
                 collection.update(**update_params)
+                if "test_plan_id" in updates:
+                    record_test_plan_ids(req.collection_name, [updated_metadata])
 
                 updated_count += 1
                 logger.debug(f"Updated test card: {document_id}")
@@ -14,6 +14,10 @@ from core.database import get_database_health
 from services.llm_service import LLMService
 from services.rag_assessment_service import RAGAssessmentService
 from services.rag_service import RAGService
+from services.llm_utils import llm_client_stats
+from services.async_stage_executor import get_stage_executor
+from services.llm_rate_limiter import get_rate_limiter
+from services.llm_response_cache import get_response_cache
 from datetime import datetime, timezone
 import os
 import logging 
@@ -54,6 +58,10 @@ async def health_status(
     # LLM + Chroma status
     try:
         llm_health = llm_service.health_check()
+        llm_health["clients"] = llm_client_stats()
+        llm_health["stage_executor"] = get_stage_executor().stats()
+        llm_health["rate_limiter"] = get_rate_limiter().stats()
+        llm_health["response_cache"] = get_response_cache().stats()
         services["llm_service"] = llm_health
         if llm_health.get("status") != "healthy":
             overall_status = "degraded"
@@ -75,6 +83,8 @@ async def health_status(
         services["rag_service"] = {
             "status": "healthy" if rag_ok else "unhealthy",
             "chromadb_connection": f"{chroma_host}:{chroma_port}",
+            "query_embedding_cache": rag_service.query_cache.stats(),
+            "answer_cache": rag_service.answer_cache.stats(),
         }
         if not rag_ok:
             overall_status = "degraded"
@@ -4,12 +4,19 @@ from sqlalchemy.orm import Session
 from core.dependencies import get_db, get_rag_service, get_rag_assessment_service
 from services.rag_service import RAGService
 from services.rag_assessment_service import RAGAssessmentService
+from services.query_embedding_cache import get_query_embedding_cache
+from services.answer_cache import get_answer_cache
+from core.sse import sse_response
+from llm_config.llm_config import validate_model
 from schemas import (
     RAGCheckRequest, RAGDebateSequenceRequest, RAGAssessmentResponse,
     RAGAssessmentRequest, RAGAnalyticsRequest, RAGBenchmarkRequest,
-    RAGMetricsExportRequest
+    RAGMetricsExportRequest, RAGBatchRetrievalRequest,
+    RAGQueryStreamRequest, RAGAgentStreamRequest
 )
+import asyncio
 import logging
+import uuid
 
 # Get logger without configuring (let uvicorn handle logging configuration)
 logger = logging.getLogger("RAG_API_LOGGER")
@@ -56,6 +63,117 @@ async def rag_debate_sequence(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@rag_api_router.post("/query/stream")
+async def rag_query_stream(
+    request: RAGQueryStreamRequest,
+    rag_service: RAGService = Depends(get_rag_service)):
+    """
+    Answer a RAG query as Server-Sent Events: "token" events carry the
+    answer text as it is generated, then a "done" event carries the full
+    answer, citations, response and time-to-first-token. The answer is
+    saved to chat history before "done" is sent.
+    """
+    is_valid, validation_error = validate_model(request.model_name)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=validation_error)
+
+    return sse_response(rag_service.astream_query_with_rag(
+        query_text=request.query,
+        collection_name=request.collection_name,
+        model_name=request.model_name,
+        session_id=request.session_id or str(uuid.uuid4()),
+        top_k=request.top_k,
+        where=request.where
+    ))
+
+
+@rag_api_router.post("/agent/stream")
+async def rag_agent_stream(
+    request: RAGAgentStreamRequest,
+    rag_service: RAGService = Depends(get_rag_service)):
+    """
+    Single-agent RAG analysis as Server-Sent Events: a "session" event, then
+    "token" events with the agent's response as it is generated, then a
+    "done" event with the logged result (response with citations appended,
+    as /rag/check returns it).
+    """
+    # Validate before streaming starts, while an error status can still be sent
+    agent = await asyncio.to_thread(rag_service.get_compliance_agent, request.agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail=f"Agent {request.agent_id} not found")
+
+    return sse_response(rag_service.astream_agent_with_rag(
+        agent=agent,
+        query_text=request.query_text,
+        collection_name=request.collection_name
+    ))
+
+
+@rag_api_router.get("/embedding-cache/stats")
+async def query_embedding_cache_stats():
+    """
+    Query embedding cache metrics for this worker process: lookups, hits per
+    tier (in-process LRU / Redis), hit rate and estimated latency saved.
+    """
+    return get_query_embedding_cache().stats()
+
+
+@rag_api_router.get("/answer-cache/stats")
+async def answer_cache_stats():
+    """
+    Semantic answer cache metrics for this worker process: lookups, hits,
+    hit rate, stores and Redis errors.
+    """
+    return get_answer_cache().stats()
+
+
+@rag_api_router.post("/retrieve-batch")
+def rag_retrieve_batch(
+    request: RAGBatchRetrievalRequest,
+    rag_service: RAGService = Depends(get_rag_service)):
+    """
+    Retrieve for many queries against one collection with a single embedding
+    call and a single ChromaDB query. Results are returned in query order.
+    Synchronous, so FastAPI runs the embedding and ChromaDB work in its
+    threadpool instead of on the event loop.
+    """
+    if request.mode not in (None, "vector", "hybrid"):
+        raise HTTPException(status_code=400, detail=f"Unknown retrieval mode: {request.mode}")
+    if request.rerank not in (None, "none", "mmr"):
+        raise HTTPException(status_code=400, detail=f"Unknown re-ranking: {request.rerank}")
+    try:
+        existing_names = [getattr(c, "name", c) for c in rag_service.chroma_client.list_collections()]
+        if request.collection_name not in existing_names:
+            raise HTTPException(status_code=404, detail=f"Collection '{request.collection_name}' not found.")
+        retrieved = rag_service.get_relevant_documents_batch(
+            queries=request.queries,
+            collection_name=request.collection_name,
+            top_k=request.top_k,
+            where=request.where,
+            include_metadata=True,
+            mode=request.mode,
+            rerank=request.rerank,
+            raise_errors=True
+        )
+        return {
+            "collection_name": request.collection_name,
+            "results": [
+                {
+                    "query": query,
+                    "found": found,
+                    "documents": docs,
+                    "metadata": metadata_list
+                }
+                for query, (docs, found, metadata_list) in zip(request.queries, retrieved)
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch retrieval failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch retrieval failed: {str(e)}")
+
+
 @rag_api_router.post("/assessment", response_model=RAGAssessmentResponse)
 async def rag_assessment(
     request: RAGAssessmentRequest,
@@ -1,9 +1,24 @@
-from fastapi import Query, BackgroundTasks, UploadFile, File, Request, Response
+from fastapi import Query, UploadFile, File, Request, Response
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
-from services.document_ingestion_service import run_ingest_job
+from services.document_ingestion_service import (
+    run_ingest_job, spool_job_dir, cleanup_spooled_job, stash_job_api_key, discard_job_api_key
+)
+from services.heading_chunking import join_sub_chunks
+from services.lexical_index import get_lexical_index
+from services.answer_cache import bump_collection_version
+from services.document_catalog import (
+    get_catalog,
+    locate_documents,
+    iter_collection_pages,
+    invalidate_catalog,
+    record_test_plan_ids,
+    drop_catalog,
+    rename_catalog,
+)
+from tasks.ingest_tasks import ingest_documents as ingest_documents_task
 from integrations.chromadb_client import get_chroma_client
 
 # Lazy initialization helper - returns client on first actual use
@@ -53,6 +68,46 @@ VISION_CONFIG = {
 USE_POSITION_AWARE_RECONSTRUCTION = os.getenv("USE_POSITION_AWARE_RECONSTRUCTION", "true").lower() == "true"
 logger.info(f"Position-aware reconstruction: {'ENABLED' if USE_POSITION_AWARE_RECONSTRUCTION else 'DISABLED'}")
 
+### Lexical (BM25) index maintenance ###
+# Index failures are logged, not raised: the Chroma write already succeeded and
+# the index can be rebuilt with POST /vectordb/collection/lexical-index/rebuild.
+# Each change also bumps the collection version, invalidating cached answers,
+# and marks the document catalog stale (chunk writes do not say which documents
+# they complete) or drops it with the collection.
+
+def _lexical_upsert(collection_name: str, ids: List[str], documents: List[str]):
+    try:
+        index = get_lexical_index(collection_name)
+        if index is not None:
+            index.upsert(ids, documents)
+    except Exception as e:
+        logger.warning(f"Lexical index update failed for '{collection_name}': {e}")
+    bump_collection_version(collection_name)
+    invalidate_catalog(collection_name)
+
+
+def _lexical_delete(collection_name: str, ids: List[str]):
+    try:
+        index = get_lexical_index(collection_name)
+        if index is not None:
+            index.delete(ids)
+    except Exception as e:
+        logger.warning(f"Lexical index delete failed for '{collection_name}': {e}")
+    bump_collection_version(collection_name)
+    invalidate_catalog(collection_name)
+
+
+def _lexical_drop(collection_name: str):
+    try:
+        index = get_lexical_index(collection_name)
+        if index is not None:
+            index.drop()
+    except Exception as e:
+        logger.warning(f"Lexical index drop failed for '{collection_name}': {e}")
+    bump_collection_version(collection_name)
+    drop_catalog(collection_name)
+
+
 ### ChromaDB Collection Endpoints ###
 @vectordb_api_router.get("/collections")
 def list_collections():
@@ -132,6 +187,7 @@ def delete_collection(collection_name: str = Query(...)):
             )
 
         chroma_client().delete_collection(collection_name)
+        _lexical_drop(collection_name)
         logger.info(f"Deleted collection: {collection_name}")
         return {"deleted": collection_name}
         
@@ -166,16 +222,24 @@ def edit_collection_name(old_name: str = Query(...), new_name: str = Query(...))
         # Retrieve the old collection
         collection = chroma_client().get_collection(name=old_name)
 
-        # Create a new collection with the new name
-        new_collection = chroma_client().create_collection(name=new_name)
-
-        # Retrieve all documents from the old collection
-        old_docs = collection.get()
-        if old_docs and "ids" in old_docs and "documents" in old_docs:
-            new_collection.add(ids=old_docs["ids"], documents=old_docs["documents"])
+        # Create a new collection with the new name, keeping the old one's
+        # metadata (embedding model stamp, index settings)
+        new_collection = chroma_client().create_collection(name=new_name, metadata=collection.metadata or None)
+
+        # Copy the chunks page by page, keeping their metadata and embeddings
+        for page in iter_collection_pages(collection, include=["documents", "metadatas", "embeddings"]):
+            new_collection.add(
+                ids=page["ids"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+                embeddings=page["embeddings"]
+            )
+            _lexical_upsert(new_name, page["ids"], page["documents"])
+        rename_catalog(old_name, new_name)
 
         # Delete the old collection
         chroma_client().delete_collection(old_name)
+        _lexical_drop(old_name)
 
         return {"old_name": old_name, "new_name": new_name}
         
@@ -186,6 +250,102 @@ def edit_collection_name(old_name: str = Query(...), new_name: str = Query(...))
         raise HTTPException(status_code=500, detail=f"Error editing collection: {str(e)}")
 
 
+@vectordb_api_router.post("/collection/lexical-index/rebuild")
+def rebuild_lexical_index(collection_name: str = Query(...)):
+    """
+    Rebuild a collection's BM25 index from its stored chunks (for collections
+    ingested before hybrid retrieval, or after an index update failed).
+    """
+    try:
+        existing_names = chroma_client().list_collections()
+        if collection_name not in existing_names:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found.")
+
+        index = get_lexical_index(collection_name)
+        if index is None:
+            raise HTTPException(status_code=400, detail="Lexical index is disabled (LEXICAL_INDEX_ENABLED=false)")
+
+        indexed = index.rebuild(chroma_client().get_collection(name=collection_name))
+        return {"collection": collection_name, "indexed_chunks": indexed}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rebuilding lexical index: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error rebuilding lexical index: {str(e)}")
+
+
+### Document Catalog Endpoints ###
+@vectordb_api_router.get("/catalog")
+def list_catalog(
+    collection_name: str = Query(...),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+    prefix: Optional[str] = Query(None, description="Only documents whose name starts with this (case-insensitive)")
+):
+    """
+    Page through the documents of a collection, sorted by name, from the
+    document catalog (one entry per document, not per chunk).
+    """
+    try:
+        existing_names = chroma_client().list_collections()
+        if collection_name not in existing_names:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found.")
+
+        catalog = get_catalog()
+        catalog.ensure(chroma_client().get_collection(name=collection_name))
+        total, documents = catalog.page(collection_name, offset=offset, limit=limit, prefix=prefix)
+        return {
+            "collection": collection_name,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "documents": documents,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing document catalog: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error listing document catalog: {str(e)}")
+
+
+@vectordb_api_router.get("/catalog/locate")
+def locate_document(
+    document: str = Query(..., description="Document ID, exact name, or part of a name"),
+    collection_name: Optional[List[str]] = Query(None, description="Collections to search (default: all)")
+):
+    """
+    Find which collections hold a document. Matches a document ID exactly,
+    else a name exactly, else names containing the given text.
+    """
+    try:
+        matches = locate_documents(chroma_client(), document, collection_name)
+        return {"document": document, "matches": matches}
+
+    except Exception as e:
+        logger.error(f"Error locating document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error locating document: {str(e)}")
+
+
+@vectordb_api_router.post("/catalog/rebuild")
+def rebuild_catalog(collection_name: str = Query(...)):
+    """Rebuild a collection's document catalog from its chunk metadata."""
+    try:
+        existing_names = chroma_client().list_collections()
+        if collection_name not in existing_names:
+            raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found.")
+
+        documents = get_catalog().rebuild(chroma_client().get_collection(name=collection_name))
+        return {"collection": collection_name, "documents": documents}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rebuilding document catalog: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error rebuilding document catalog: {str(e)}")
+
+
 ### Document Endpoints ###
 class DocumentAddRequest(BaseModel):
     collection_name: str
@@ -216,6 +376,8 @@ def add_documents(req: DocumentAddRequest):
             embeddings=req.embeddings,
             metadatas=req.metadatas
         )
+        _lexical_upsert(req.collection_name, req.ids, req.documents)
+        record_test_plan_ids(req.collection_name, req.metadatas)
         return {
             "collection": req.collection_name,
             "added_count": len(req.documents),
@@ -254,6 +416,8 @@ def upsert_documents(req: DocumentAddRequest):
             embeddings=req.embeddings,
             metadatas=req.metadatas
         )
+        _lexical_upsert(req.collection_name, req.ids, req.documents)
+        record_test_plan_ids(req.collection_name, req.metadatas)
         return {
             "collection": req.collection_name,
             "upserted_count": len(req.documents),
@@ -300,6 +464,7 @@ def remove_documents(req: DocumentRemoveRequest):
 
         # Delete the specified document(s)
         collection.delete(ids=req.ids)
+        _lexical_delete(req.collection_name, req.ids)
         
         return {
             "collection": req.collection_name,
@@ -346,6 +511,7 @@ def edit_document(req: DocumentEditRequest):
         # Delete the old document and re-add with new content
         collection.delete(ids=[req.doc_id])
         collection.add(documents=[req.new_document], ids=[req.doc_id])
+        _lexical_upsert(req.collection_name, [req.doc_id], [req.new_document])
 
         return {
             "collection": req.collection_name,
@@ -360,9 +526,14 @@ def edit_document(req: DocumentEditRequest):
 
 
 @vectordb_api_router.get("/documents")
-def list_documents(collection_name: str = Query(...)):
+def list_documents(
+    collection_name: str = Query(...),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default: every chunk)"),
+    offset: int = Query(0, ge=0)
+):
     """
-    Get all documents (and their IDs) in a collection.
+    Get the chunks (and their IDs) in a collection, all of them or one page.
+    To find or list documents, use GET /vectordb/catalog instead.
     """
     try:
         # Check if the collection exists first
@@ -375,8 +546,9 @@ def list_documents(collection_name: str = Query(...)):
         collection = chroma_client().get_collection(name=collection_name)
 
         # Retrieve documents
-        docs = collection.get()
-        return docs
+        if limit is None:
+            return collection.get()
+        return collection.get(limit=limit, offset=offset)
         
     except HTTPException:
         raise
@@ -443,9 +615,27 @@ async def upload_debug(request: Request):
         logger.error(f"[DEBUG] Error: {e}")
         return {"error": str(e)}
 
+# Read uploads in 1 MiB pieces while spooling them to disk
+UPLOAD_SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+async def _spool_upload(upload: UploadFile, job_dir: str, index: int) -> str:
+    """Stream an UploadFile to the job's spool directory and return its path."""
+    safe_name = Path(upload.filename or f"upload_{index}").name
+    # Prefix with the index so two uploads with the same name don't collide
+    path = os.path.join(job_dir, f"{index:04d}_{safe_name}")
+    with open(path, "wb") as out:
+        while True:
+            piece = await upload.read(UPLOAD_SPOOL_CHUNK_BYTES)
+            if not piece:
+                break
+            out.write(piece)
+    await upload.close()
+    return path
+
+
 @vectordb_api_router.post("/documents/upload-and-process")
 async def upload_and_process_documents(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),  # Changed from File(None) to File(...) to make it required
     collection_name: str = Query(...),
     chunk_size: int = Query(1000),
@@ -454,6 +644,8 @@ async def upload_and_process_documents(
     model_name: str = Query("none"),
     vision_models: str = Query(""),
     enable_ocr: bool = Query(False),
+    incremental: bool = Query(False),
+    document_ids: str = Query(""),
     request: Request = None,
 ):
     # Enhanced logging for debugging
@@ -478,36 +670,65 @@ async def upload_and_process_documents(
 
     # 2) Generate a single job_id
     job_id = uuid.uuid4().hex
-    # jobs[job_id] = "pending"
-    redis_client.set(job_id, "pending")
-
-    # 3) Slurp each UploadFile into memory so we can hand off raw bytes
-    payloads: List[Dict[str,Any]] = []
-    for f in files:
-        content = await f.read()
-        payloads.append({"filename": f.filename, "content": content})
+    # "queued" until a Celery worker picks the job up and run_ingest_job marks it "running"
+    redis_client.set(job_id, "queued")
+
+    # 3) Stream each UploadFile to the shared spool directory; workers read by path
+    job_dir = spool_job_dir(job_id)
+    # Optional comma-separated IDs (by file position) of stored documents to re-ingest
+    target_ids = [d.strip() for d in document_ids.split(",")] if document_ids else []
+    payloads: List[Dict[str, Any]] = []
+    try:
+        for idx, f in enumerate(files):
+            path = await _spool_upload(f, job_dir, idx)
+            payload = {"filename": f.filename, "path": path}
+            if idx < len(target_ids) and target_ids[idx]:
+                payload["document_id"] = target_ids[idx]
+            payloads.append(payload)
+    except Exception as e:
+        logger.error(f"Failed to spool uploads for job {job_id}: {e}")
+        cleanup_spooled_job(job_id)
+        redis_client.set(job_id, "failed")
+        raise HTTPException(status_code=500, detail=f"Failed to store uploaded files: {str(e)}")
 
-    # 4) Kick off the background task
+    # 4) Queue the ingestion on Celery
     selected_models = [m.strip() for m in vision_models.split(",") if m.strip()]
     allowed_models = {"llava_7b", "llava_13b", "granite_vision_2b"}
     selected_models = [m for m in selected_models if m in allowed_models]
     if not selected_models:
         selected_models = ["llava_7b"]
-    background_tasks.add_task(
-        run_ingest_job,
-        job_id,
-        payloads,
-        collection_name,
-        chunk_size,
-        chunk_overlap,
-        store_images,
-        selected_models,
-        request.headers.get("X-OpenAI-API-Key") or openai_api_key,
-        enable_ocr,
-    )
+
+    # Only forward a per-request key; otherwise the worker uses its own environment.
+    # It goes through a short-lived Redis key, never the task arguments, which
+    # the broker and result backend store in plain text
+    request_api_key = request.headers.get("X-OpenAI-API-Key") if request else None
+
+    try:
+        stash_job_api_key(job_id, request_api_key)
+        celery_task = ingest_documents_task.apply_async(
+            args=[
+                job_id,
+                payloads,
+                collection_name,
+                chunk_size,
+                chunk_overlap,
+                store_images,
+                selected_models,
+            ],
+            kwargs={"enable_ocr": enable_ocr, "incremental": incremental},
+            task_id=f"celery_ingest_{job_id}",
+        )
+    except Exception as e:
+        logger.error(f"Failed to queue ingestion job {job_id}: {e}")
+        cleanup_spooled_job(job_id)
+        discard_job_api_key(job_id)
+        redis_client.set(job_id, "failed")
+        raise HTTPException(status_code=500, detail=f"Failed to queue ingestion job: {str(e)}")
+
+    logger.info(f"Ingestion job queued: {job_id} (Celery Task ID: {celery_task.id})")
 
     # 5) Return immediately with the job ID
-    return {"job_id": job_id}
+    return {"job_id": job_id, "celery_task_id": celery_task.id}
 
 
 
@@ -816,7 +1037,7 @@ def get_page_content(
                     "content": results["documents"][idx]
                 }
             else:
-                headings[heading_text]["body_chunks"].append(results["documents"][idx])
+                headings[heading_text]["body_chunks"].append((meta, results["documents"][idx]))
 
         # Build response
         response_headings = []
@@ -825,7 +1046,7 @@ def get_page_content(
                 "heading_text": heading_text,
                 "heading_level": data["heading_chunk"]["heading_level"] if data["heading_chunk"] else 1,
                 "heading_content": data["heading_chunk"]["content"] if data["heading_chunk"] else heading_text,
-                "body_text": "\n\n".join(data["body_chunks"])
+                "body_text": "\n\n".join(join_sub_chunks(data["body_chunks"]))
             })
 
         return {
@@ -891,7 +1112,8 @@ def get_job_status(job_id: str):
                 "chunks_processed": int(doc_status.get("chunks_processed", 0)),
                 "start_time": doc_status.get("start_time", ""),
                 "end_time": doc_status.get("end_time", ""),
-                "error_message": doc_status.get("error_message", "")
+                "error_message": doc_status.get("error_message", ""),
+                "token_stats": json.loads(doc_status.get("token_stats") or "{}")
             })
     
     return {
@@ -901,7 +1123,16 @@ def get_job_status(job_id: str):
         "processed_chunks": int(prog.get("processed_chunks", 0)),
         "total_documents": int(prog.get("total_documents", 0)),
         "processed_documents": int(prog.get("processed_documents", 0)),
-        "documents": documents
+        "vision_cache_hits": int(prog.get("vision_cache_hits", 0)),
+        "vision_cache_misses": int(prog.get("vision_cache_misses", 0)),
+        "documents_unchanged": int(prog.get("documents_unchanged", 0)),
+        "chunks_embedded": int(prog.get("chunks_embedded", 0)),
+        "chunks_reused": int(prog.get("chunks_reused", 0)),
+        "chunks_metadata_updated": int(prog.get("chunks_metadata_updated", 0)),
+        "chunks_unchanged": int(prog.get("chunks_unchanged", 0)),
+        "chunks_deleted": int(prog.get("chunks_deleted", 0)),
+        "documents": documents,
+        "error": prog.get("error", "")
     }
     
 ## html scraping 
@@ -23,7 +23,7 @@ celery_app = Celery(
     "test_card_generation",
     broker=BROKER_URL,
     backend=RESULT_BACKEND,
-    include=["tasks.test_card_tasks"]  # Import task modules
+    include=["tasks.test_card_tasks", "tasks.ingest_tasks"]  # Import task modules
 )
 
 # Celery configuration
@@ -44,6 +44,11 @@ celery_app.conf.update(
     task_reject_on_worker_lost=True,  # Requeue tasks if worker dies
     task_track_started=True,  # Track when task starts
 
+    # Broker settings - with acks_late, Redis redelivers any task still unacked
+    # after the visibility timeout, so keep it above the longest task hard limit
+    # (ingest_documents: 4 hours) to avoid running the same task twice
+    broker_transport_options={"visibility_timeout": 18000},  # 5 hours
+
     # Worker settings
     worker_prefetch_multiplier=1,  # Only prefetch one task at a time (good for long-running tasks)
     worker_max_tasks_per_child=50,  # Restart worker after 50 tasks to prevent memory leaks
@@ -0,0 +1,41 @@
+"""
+Server-Sent Events helpers for streaming endpoints.
+
+Streaming services yield (event, data) pairs; sse_response() sends each as
+
+    event: <event>
+    data: <JSON>
+
+with "token" text wrapped as {"text": ...}. An exception while streaming
+becomes a final "error" event, since the response status has already been
+sent by then.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger("SSE")
+
+# Keep proxies (nginx) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """Stream (event, data) pairs to the client as Server-Sent Events."""
+    async def body():
+        try:
+            async for event, data in events:
+                yield sse_event(event, {"text": data} if event == "token" else data)
+        except Exception as e:
+            logger.error(f"Streaming response failed: {e}", exc_info=True)
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
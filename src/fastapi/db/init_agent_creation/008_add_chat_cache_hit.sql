@@ -0,0 +1,14 @@
+-- ============================================================================
+-- ADD ANSWER CACHE FLAG TO CHAT HISTORY
+-- ============================================================================
+-- Marks chat responses that were served from the semantic answer cache
+-- instead of being generated.
+--
+-- Date: 2026-10-16
+-- Version: 1.0
+-- ============================================================================
+
+ALTER TABLE chat_history
+ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN DEFAULT FALSE;
+
+COMMENT ON COLUMN chat_history.cache_hit IS 'True when the response was served from the answer cache';
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 load_dotenv()
 from fastapi import FastAPI
 from core.database import init_db
+from services.embedding_service import get_embedding_service, EMBEDDING_WARMUP
 import uvicorn
 import logging
 from api.chat_api import chat_api_router
@@ -40,6 +41,10 @@ def on_startup():
 
     init_db()
 
+    # Load the embedding model off the request path
+    if EMBEDDING_WARMUP:
+        get_embedding_service().warm_up(background=True)
+
 app.include_router(chat_api_router, prefix="/api")
 app.include_router(agent_api_router, prefix="/api")
 app.include_router(rag_api_router, prefix="/api")
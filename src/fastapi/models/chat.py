@@ -5,7 +5,7 @@ This module contains the ChatHistory model for storing conversation history.
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Index
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Boolean, Index
 
 from models.base import Base
 
@@ -28,6 +28,7 @@ class ChatHistory(Base):
         timestamp: Query timestamp
         session_id: Session identifier for grouping related queries
         source_documents: JSON array of source documents used
+        cache_hit: Whether the response was served from the answer cache
     """
     __tablename__ = "chat_history"
 
@@ -41,6 +42,7 @@ class ChatHistory(Base):
     timestamp = Column(DateTime, default=datetime.now(timezone.utc), index=True)
     session_id = Column(String, index=True)
     source_documents = Column(JSON)
+    cache_hit = Column(Boolean, default=False)
 
 
 # Composite indexes for better query performance
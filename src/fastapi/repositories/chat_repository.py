@@ -40,7 +40,8 @@ class ChatRepository(BaseRepository[ChatHistory]):
         query_type: str,
         response_time_ms: int,
         session_id: str,
-        source_documents: Optional[List[Dict[str, Any]]] = None
+        source_documents: Optional[List[Dict[str, Any]]] = None,
+        cache_hit: bool = False
     ) -> ChatHistory:
         """
         Create a new chat history entry.
@@ -54,6 +55,7 @@ class ChatRepository(BaseRepository[ChatHistory]):
             response_time_ms: Response time in milliseconds
             session_id: Session identifier
             source_documents: Source documents (if RAG)
+            cache_hit: Response was served from the answer cache
 
         Returns:
             Created ChatHistory entry
@@ -67,7 +69,8 @@ class ChatRepository(BaseRepository[ChatHistory]):
                 query_type=query_type,
                 response_time_ms=response_time_ms,
                 session_id=session_id,
-                source_documents=source_documents
+                source_documents=source_documents,
+                cache_hit=cache_hit
             )
             created_chat = self.create(chat)
             logger.info(f"Chat entry created: session={session_id}, type={query_type}")
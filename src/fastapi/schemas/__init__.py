@@ -50,6 +50,10 @@ from schemas.rag import (
     RAGDebateSequenceRequest,
     RAGDebateSequenceResponse,
 
+    # Streaming
+    RAGQueryStreamRequest,
+    RAGAgentStreamRequest,
+
     # Evaluation
     EvaluateRequest,
     EvaluateResponse,
@@ -65,6 +69,7 @@ from schemas.rag import (
     # Analytics
     RAGAnalyticsRequest,
     RAGBenchmarkRequest,
+    RAGBatchRetrievalRequest,
     CollectionPerformanceRequest,
     RAGMetricsExportRequest,
 )
@@ -148,6 +153,8 @@ __all__ = [
     "RAGCheckResponse",
     "RAGDebateSequenceRequest",
     "RAGDebateSequenceResponse",
+    "RAGQueryStreamRequest",
+    "RAGAgentStreamRequest",
     "EvaluateRequest",
     "EvaluateResponse",
     "RAGAssessmentRequest",
@@ -158,6 +165,7 @@ __all__ = [
     "RAGClassificationMetricsResponse",
     "RAGAnalyticsRequest",
     "RAGBenchmarkRequest",
+    "RAGBatchRetrievalRequest",
     "CollectionPerformanceRequest",
     "RAGMetricsExportRequest",
 
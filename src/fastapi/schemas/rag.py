@@ -76,6 +76,44 @@ class RAGDebateSequenceResponse(BaseModel):
     final_consensus: Optional[str] = None
 
 
+# ============================================================================
+# RAG Streaming Schemas
+# ============================================================================
+
+class RAGQueryStreamRequest(BaseModel):
+    """
+    Request schema for a streamed RAG query.
+
+    Attributes:
+        query: User query
+        collection_name: ChromaDB collection to query
+        model_name: LLM model to answer with
+        top_k: Number of documents to retrieve (defaults to the service setting)
+        where: Optional metadata filter
+        session_id: Chat session identifier (generated if omitted)
+    """
+    query: str = Field(..., min_length=1, description="User query")
+    collection_name: str = Field(..., description="ChromaDB collection name")
+    model_name: str = Field(..., description="LLM model to use")
+    top_k: Optional[int] = Field(None, ge=1, le=100, description="Number of documents to retrieve")
+    where: Optional[Dict[str, Any]] = Field(None, description="Metadata filter")
+    session_id: Optional[str] = Field(None, description="Session identifier")
+
+
+class RAGAgentStreamRequest(BaseModel):
+    """
+    Request schema for a streamed single-agent RAG analysis.
+
+    Attributes:
+        query_text: Query for the agent to analyze
+        collection_name: ChromaDB collection to query
+        agent_id: Compliance agent to run
+    """
+    query_text: str = Field(..., min_length=1, description="Query for RAG analysis")
+    collection_name: str = Field(..., description="ChromaDB collection name")
+    agent_id: int = Field(..., description="Agent ID to use for the analysis")
+
+
 # ============================================================================
 # RAG Evaluation Schemas
 # ============================================================================
@@ -328,6 +366,26 @@ class RAGBenchmarkRequest(BaseModel):
     configurations: List[Dict[str, Any]] = Field(..., min_items=1, description="List of configurations to test")
 
 
+class RAGBatchRetrievalRequest(BaseModel):
+    """
+    Request schema for batched retrieval.
+
+    Attributes:
+        queries: Queries to retrieve for (embedded and searched in one call)
+        collection_name: Collection to search
+        top_k: Number of results per query (defaults to the service setting)
+        where: Optional metadata filter applied to every query
+        mode: Retrieval mode, "vector" or "hybrid" (defaults to RAG_RETRIEVAL_MODE)
+        rerank: Re-ranking, "none" or "mmr" (defaults to RAG_RERANK)
+    """
+    queries: List[str] = Field(..., min_items=1, description="Queries to retrieve for")
+    collection_name: str = Field(..., description="Collection to search")
+    top_k: Optional[int] = Field(None, ge=1, le=100, description="Number of results per query")
+    where: Optional[Dict[str, Any]] = Field(None, description="Metadata filter applied to every query")
+    mode: Optional[str] = Field(None, description="Retrieval mode: vector or hybrid")
+    rerank: Optional[str] = Field(None, description="Re-ranking: none or mmr")
+
+
 class CollectionPerformanceRequest(BaseModel):
     """
     Request schema for collection performance analysis.
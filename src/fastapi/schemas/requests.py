@@ -51,6 +51,7 @@ class ChatRequest(BaseModel):
     agent_id: Optional[int] = Field(None, description="Agent ID if using agent")
     temperature: Optional[float] = Field(None, ge=0.0, le=2.0, description="Model temperature")
     max_tokens: Optional[int] = Field(None, ge=1, le=32000, description="Maximum tokens")
+    use_answer_cache: Optional[bool] = Field(None, description="Reuse cached answers to near-identical RAG queries (defaults to server setting)")
 
     model_config = ConfigDict(json_schema_extra={
         "example": {
@@ -81,6 +81,7 @@ class ChatResponse(BaseResponse):
     formatted_citations: Optional[str] = Field(None, description="Formatted citation text")
     source_documents: Optional[List[str]] = Field(None, description="Source document names")
     documents_found: int = Field(0, description="Number of documents retrieved")
+    cache_hit: bool = Field(False, description="Response was served from the answer cache")
 
     model_config = ConfigDict(json_schema_extra={
         "example": {
@@ -29,9 +29,10 @@ from datetime import datetime
 import redis
 import requests
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 
 from services.llm_invoker import LLMInvoker
+from services.async_stage_executor import get_stage_executor
 from services.llm_service import LLMService
 from services.rag_service import RAGService
 from repositories.agent_set_repository import AgentSetRepository
@@ -619,25 +620,33 @@ class AgentPipelineService:
         section_content: str,
         context_vars: Dict[str, str]
     ) -> List[AgentExecutionResult]:
-        """Execute agents in parallel"""
+        """Execute agents in parallel on the shared stage executor"""
+        return get_stage_executor().run(
+            self._aexecute_agents_parallel(agent_ids, section_title, section_content, context_vars)
+        )
+
+    async def _aexecute_agents_parallel(
+        self,
+        agent_ids: List[int],
+        section_title: str,
+        section_content: str,
+        context_vars: Dict[str, str]
+    ) -> List[AgentExecutionResult]:
         results = []
 
-        with ThreadPoolExecutor(max_workers=min(len(agent_ids), 5)) as executor:
-            futures = []
-            for agent_id in agent_ids:
-                future = executor.submit(
-                    self._execute_agent_by_id,
-                    agent_id, section_title, section_content, context_vars
-                )
-                futures.append(future)
+        outcomes = await get_stage_executor().gather(
+            self._aexecute_agent_by_id(
+                agent_id, section_title, section_content, context_vars,
+                timeout=300  # 5 minute timeout per agent LLM call
+            )
+            for agent_id in agent_ids
+        )
 
-            for future in as_completed(futures):
-                try:
-                    result = future.result(timeout=300)  # 5 minute timeout
-                    if result:
-                        results.append(result)
-                except Exception as e:
-                    logger.error(f"Agent execution failed: {e}")
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                logger.error(f"Agent execution failed: {outcome!r}")
+            elif outcome:
+                results.append(outcome)
 
         return results
 
@@ -661,14 +670,14 @@ class AgentPipelineService:
 
         return results
 
-    def _execute_agent_by_id(
+    def _prepare_agent_call(
         self,
         agent_id: int,
         section_title: str,
         section_content: str,
         context_vars: Dict[str, str] = None
-    ) -> Optional[AgentExecutionResult]:
-        """Execute a single agent by database ID"""
+    ) -> Optional[Dict[str, Any]]:
+        """Load an agent by database ID and build its LLM call (None if missing or inactive)"""
         db = None
         try:
             # Load agent from database
@@ -692,81 +701,128 @@ class AgentPipelineService:
             agent_user_prompt_template = agent.user_prompt_template
             agent_temperature = agent.temperature
             agent_max_tokens = agent.max_tokens
-
+        finally:
             # Close database session BEFORE making LLM call
-            db.close()
-            db = None
+            if db is not None:
+                db.close()
 
-            start_time = time.time()
+        # Prepare prompt based on agent's template
+        format_vars = {
+            'section_title': section_title,
+            'section_content': section_content,
+            'context': context_vars.get('context', '') if context_vars else '',
+            'actor_outputs': context_vars.get('actor_outputs', '') if context_vars else '',
+            'critic_output': context_vars.get('critic_output', '') if context_vars else '',
+            'actor_outputs_summary': context_vars.get('actor_outputs_summary', '') if context_vars else '',
+            'synthesized_rules': context_vars.get('synthesized_rules', '') if context_vars else '',
+            'previous_sections_summary': context_vars.get('previous_sections_summary', '') if context_vars else '',
+        }
 
-            # Prepare prompt based on agent's template
-            format_vars = {
-                'section_title': section_title,
-                'section_content': section_content,
-                'context': context_vars.get('context', '') if context_vars else '',
-                'actor_outputs': context_vars.get('actor_outputs', '') if context_vars else '',
-                'critic_output': context_vars.get('critic_output', '') if context_vars else '',
-                'actor_outputs_summary': context_vars.get('actor_outputs_summary', '') if context_vars else '',
-                'synthesized_rules': context_vars.get('synthesized_rules', '') if context_vars else '',
-                'previous_sections_summary': context_vars.get('previous_sections_summary', '') if context_vars else '',
-            }
+        # Use simple string replacement to avoid issues with JSON in templates
+        user_prompt = agent_user_prompt_template
+        for key, value in format_vars.items():
+            user_prompt = user_prompt.replace(f'{{{key}}}', str(value))
 
-            # Use simple string replacement to avoid issues with JSON in templates
-            user_prompt = agent_user_prompt_template
-            for key, value in format_vars.items():
-                user_prompt = user_prompt.replace(f'{{{key}}}', str(value))
+        logger.info(f"      Executing agent: {agent_name} (ID: {agent_id}, Type: {agent_type}, Model: {agent_model_name})")
 
-            logger.info(f"      Executing agent: {agent_name} (ID: {agent_id}, Type: {agent_type}, Model: {agent_model_name})")
+        # Dynamic token limit adjustment
+        adjusted_max_tokens = self._calculate_safe_max_tokens(
+            model_name=agent_model_name,
+            system_prompt=agent_system_prompt,
+            user_prompt=user_prompt,
+            requested_max_tokens=agent_max_tokens
+        )
 
-            # Dynamic token limit adjustment
-            adjusted_max_tokens = self._calculate_safe_max_tokens(
-                model_name=agent_model_name,
-                system_prompt=agent_system_prompt,
-                user_prompt=user_prompt,
-                requested_max_tokens=agent_max_tokens
-            )
+        return {
+            "agent_name": agent_name,
+            "agent_type": agent_type,
+            "invoke_args": {
+                "model_name": agent_model_name,
+                "prompt": user_prompt,
+                "system_prompt": agent_system_prompt,
+                "temperature": agent_temperature,
+                "max_tokens": adjusted_max_tokens,
+            },
+        }
 
+    def _execute_agent_by_id(
+        self,
+        agent_id: int,
+        section_title: str,
+        section_content: str,
+        context_vars: Dict[str, str] = None
+    ) -> Optional[AgentExecutionResult]:
+        """Execute a single agent by database ID"""
+        try:
+            call = self._prepare_agent_call(agent_id, section_title, section_content, context_vars)
+            if call is None:
+                return None
+
+            start_time = time.time()
             # Execute via LLM
-            response = LLMInvoker.invoke(
-                model_name=agent_model_name,
-                prompt=user_prompt,
-                system_prompt=agent_system_prompt,
-                temperature=agent_temperature,
-                max_tokens=adjusted_max_tokens
-            )
+            response = LLMInvoker.invoke(**call["invoke_args"])
+            return self._agent_result(agent_id, call, section_title, response, time.time() - start_time)
 
-            processing_time = time.time() - start_time
+        except Exception as e:
+            return self._agent_failure(agent_id, section_title, e)
 
-            return AgentExecutionResult(
-                agent_id=agent_id,
-                agent_name=agent_name,
-                agent_type=agent_type,
-                model_name=agent_model_name,
-                section_title=section_title,
-                output=response,
-                processing_time=processing_time,
-                success=True
-            )
+    async def _aexecute_agent_by_id(
+        self,
+        agent_id: int,
+        section_title: str,
+        section_content: str,
+        context_vars: Dict[str, str] = None,
+        timeout: Optional[int] = None
+    ) -> Optional[AgentExecutionResult]:
+        """Async _execute_agent_by_id(): the database read runs off the loop, the LLM call (bounded by timeout) via LLMInvoker.ainvoke"""
+        try:
+            call = await asyncio.to_thread(self._prepare_agent_call, agent_id, section_title, section_content, context_vars)
+            if call is None:
+                return None
+
+            start_time = time.time()
+            response = await LLMInvoker.ainvoke(**call["invoke_args"], timeout=timeout)
+            return self._agent_result(agent_id, call, section_title, response, time.time() - start_time)
 
         except Exception as e:
-            import traceback
-            logger.error(f"Failed to execute agent ID {agent_id}: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            return self._agent_failure(agent_id, section_title, e)
 
-            return AgentExecutionResult(
-                agent_id=agent_id,
-                agent_name="Unknown",
-                agent_type="Unknown",
-                model_name="Unknown",
-                section_title=section_title,
-                output="",
-                processing_time=0,
-                success=False,
-                error=str(e)
-            )
-        finally:
-            if db is not None:
-                db.close()
+    @staticmethod
+    def _agent_result(
+        agent_id: int,
+        call: Dict[str, Any],
+        section_title: str,
+        response: str,
+        processing_time: float
+    ) -> AgentExecutionResult:
+        return AgentExecutionResult(
+            agent_id=agent_id,
+            agent_name=call["agent_name"],
+            agent_type=call["agent_type"],
+            model_name=call["invoke_args"]["model_name"],
+            section_title=section_title,
+            output=response,
+            processing_time=processing_time,
+            success=True
+        )
+
+    @staticmethod
+    def _agent_failure(agent_id: int, section_title: str, error: Exception) -> AgentExecutionResult:
+        import traceback
+        logger.error(f"Failed to execute agent ID {agent_id}: {error}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+
+        return AgentExecutionResult(
+            agent_id=agent_id,
+            agent_name="Unknown",
+            agent_type="Unknown",
+            model_name="Unknown",
+            section_title=section_title,
+            output="",
+            processing_time=0,
+            success=False,
+            error=str(error)
+        )
 
     def _calculate_safe_max_tokens(
         self,
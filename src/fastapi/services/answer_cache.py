@@ -0,0 +1,214 @@
+"""
+Answer Cache
+Semantic cache of RAG answers for repeated questions.
+
+Answers are cached per (collection, collection version, model, retrieval
+parameters) bucket and matched by the cosine similarity of query embeddings,
+so near-identical rewordings of a question reuse the stored answer when the
+similarity is at least ANSWER_CACHE_SIMILARITY.
+
+Every write to a collection (ingest, upsert, edit, delete) calls
+bump_collection_version(), which moves lookups to a new, empty bucket; the
+old buckets simply expire after ANSWER_CACHE_TTL seconds.
+
+Redis layout:
+    collection_version:{collection}                    counter
+    answer:{collection}:{version}:{model}:{params}:emb  hash  entry_id -> float32 query embedding
+    answer:{collection}:{version}:{model}:{params}:val  hash  entry_id -> JSON answer, citations, metadata
+
+The cache is opt-in (ANSWER_CACHE_ENABLED, or per request). Redis errors are
+logged and treated as misses.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import redis
+
+logger = logging.getLogger("ANSWER_CACHE")
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_VERSION_PREFIX = "collection_version"
+_KEY_PREFIX = "answer"
+
+
+class AnswerCache:
+    """Embedding-matched RAG answer cache, invalidated by collection version."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+        ttl: int = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        enabled: bool = ANSWER_CACHE_ENABLED
+    ):
+        # Embeddings are stored as raw bytes, so this client must not decode responses
+        self.redis = redis_client if redis_client is not None else redis.from_url(REDIS_URL)
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    # Collection versions
+    # ------------------------------------------------------------------
+
+    def collection_version(self, collection_name: str) -> int:
+        return int(self.redis.get(f"{_VERSION_PREFIX}:{collection_name}") or 0)
+
+    def bump_collection_version(self, collection_name: str) -> None:
+        self.redis.incr(f"{_VERSION_PREFIX}:{collection_name}")
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def bucket(self, collection_name: str, model_name: str, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Key prefix for answers to the current version of a collection, or None
+        if Redis is unavailable. Take it before generating an answer and store
+        the answer under it, so an answer racing a collection write is filed
+        under the version it was generated from.
+        """
+        try:
+            version = self.collection_version(collection_name)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Answer cache unavailable for '{collection_name}': {e}")
+            return None
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        return f"{_KEY_PREFIX}:{collection_name}:{version}:{model_name}:{digest}"
+
+    def lookup(self, bucket: str, query_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry in bucket whose query is most similar to
+        query_embedding, if at least self.similarity, with 'similarity' added.
+        """
+        try:
+            stored = self.redis.hgetall(f"{bucket}:emb")
+            best_id, best_score = None, -1.0
+            if stored:
+                ids = list(stored)
+                matrix = np.stack([np.frombuffer(stored[i], dtype=np.float32) for i in ids])
+                q = np.asarray(query_embedding, dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+                scores = matrix @ q / np.where(norms == 0, 1.0, norms)
+                best = int(np.argmax(scores))
+                best_id, best_score = ids[best], float(scores[best])
+
+            entry = None
+            if best_id is not None and best_score >= self.similarity:
+                raw = self.redis.hget(f"{bucket}:val", best_id)
+                if raw is not None:
+                    entry = json.loads(raw)
+                    entry["similarity"] = round(best_score, 4)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Answer cache lookup failed for {bucket}: {e}")
+            entry = None
+
+        with self._lock:
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def store(
+        self,
+        bucket: str,
+        query: str,
+        query_embedding: List[float],
+        answer: str,
+        metadata_list: List[Dict[str, Any]],
+        formatted_citations: str
+    ) -> None:
+        """Cache an answer in bucket."""
+        try:
+            entry_id = f"{time.time_ns():x}"
+            value = json.dumps({
+                "query": query,
+                "answer": answer,
+                "metadata_list": metadata_list,
+                "formatted_citations": formatted_citations,
+                "created_at": time.time(),
+            }, default=str)
+
+            if self.redis.hlen(f"{bucket}:emb") >= self.max_entries:
+                # Entry IDs are creation timestamps; evict the oldest
+                oldest = min(self.redis.hkeys(f"{bucket}:emb"))
+                self.redis.hdel(f"{bucket}:emb", oldest)
+                self.redis.hdel(f"{bucket}:val", oldest)
+
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(f"{bucket}:emb", entry_id, np.asarray(query_embedding, dtype=np.float32).tobytes())
+            pipe.hset(f"{bucket}:val", entry_id, value)
+            pipe.expire(f"{bucket}:emb", self.ttl)
+            pipe.expire(f"{bucket}:val", self.ttl)
+            pipe.execute()
+            with self._lock:
+                self.stores += 1
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Answer cache store failed for {bucket}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "similarity_threshold": self.similarity,
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "errors": self.errors,
+            }
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+    return _answer_cache
+
+
+def bump_collection_version(collection_name: str) -> None:
+    """
+    Record that a collection's contents changed, invalidating its cached
+    answers. Failures are logged, not raised; the collection write has
+    already succeeded.
+    """
+    try:
+        get_answer_cache().bump_collection_version(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not bump version of collection '{collection_name}': {e}")
@@ -0,0 +1,193 @@
+"""
+Async Stage Executor
+One process-wide asyncio event loop for running agent stages.
+
+Agent stages used to start a ThreadPoolExecutor per stage, section or pair
+and block a thread on every LLM call, nested inside the section pool. Stages
+now run as coroutines on a single background event loop: LLM calls go
+through LLMInvoker.ainvoke (the LangChain async APIs), and the short
+blocking work around them (database reads, Redis writes, retrieval) runs on
+the loop's bounded default executor.
+
+Every LLM call made on the loop holds a slot of two semaphores, a global one
+(LLM_MAX_CONCURRENCY) and one per provider (LLM_MAX_CONCURRENCY_OLLAMA,
+_OPENAI, _ANTHROPIC), so concurrency toward each backend stays predictable
+however many sections and agents are in flight.
+
+Synchronous callers submit coroutines with run(); it must not be called
+from the loop itself.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+
+from services.llm_utils import get_model_config
+
+logger = logging.getLogger("ASYNC_STAGE_EXECUTOR")
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+PROVIDER_MAX_CONCURRENCY = {
+    "ollama": int(os.getenv("LLM_MAX_CONCURRENCY_OLLAMA", "4")),
+    "openai": int(os.getenv("LLM_MAX_CONCURRENCY_OPENAI", "16")),
+    "anthropic": int(os.getenv("LLM_MAX_CONCURRENCY_ANTHROPIC", "8")),
+}
+# Threads for blocking work (DB, Redis, retrieval) awaited from stage coroutines
+STAGE_EXECUTOR_BLOCKING_WORKERS = int(os.getenv("STAGE_EXECUTOR_BLOCKING_WORKERS", "16"))
+
+
+def provider_of(model_name: str) -> str:
+    config = get_model_config(model_name)
+    return config.provider.lower() if config else "unknown"
+
+
+class StageExecutor:
+    """Background event loop with global and per-provider LLM concurrency limits."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        provider_limits: Optional[Dict[str, int]] = None,
+        blocking_workers: int = STAGE_EXECUTOR_BLOCKING_WORKERS
+    ):
+        self.max_concurrency = max_concurrency
+        self.provider_limits = dict(PROVIDER_MAX_CONCURRENCY if provider_limits is None else provider_limits)
+        self.blocking_workers = blocking_workers
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Semaphores bind to the loop they are used on; keep one set per loop
+        # so ainvoke also works on loops other than ours (e.g. FastAPI's)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+        self._stats_lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._peak: Dict[str, int] = {}
+        self._calls: Dict[str, int] = {}
+        self._wait_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(
+                        ThreadPoolExecutor(max_workers=self.blocking_workers, thread_name_prefix="stage-blocking")
+                    )
+                    ready = threading.Event()
+
+                    def _run():
+                        asyncio.set_event_loop(loop)
+                        loop.call_soon(ready.set)
+                        loop.run_forever()
+
+                    self._thread = threading.Thread(target=_run, name="stage-executor", daemon=True)
+                    self._thread.start()
+                    ready.wait()
+                    self._loop = loop
+                    logger.info(f"Stage executor started (LLM concurrency {self.max_concurrency}, "
+                                f"per provider {self.provider_limits})")
+        return self._loop
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the executor's loop and wait for its result."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("StageExecutor.run() called from its own event loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    # ------------------------------------------------------------------
+    # Concurrency limits
+    # ------------------------------------------------------------------
+
+    def _loop_semaphores(self) -> Dict[str, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = {"*": asyncio.Semaphore(self.max_concurrency)}
+            semaphores.update({p: asyncio.Semaphore(n) for p, n in self.provider_limits.items()})
+            self._semaphores[loop] = semaphores
+        return semaphores
+
+    @asynccontextmanager
+    async def llm_slot(self, model_name: str):
+        """Hold a per-provider and a global slot for one LLM call."""
+        provider = provider_of(model_name)
+        semaphores = self._loop_semaphores()
+        provider_semaphore = semaphores.get(provider)
+
+        waited = time.perf_counter()
+        # Provider slot first, so calls queued for a saturated backend do not
+        # hold global slots other providers could use
+        if provider_semaphore is not None:
+            await provider_semaphore.acquire()
+        try:
+            async with semaphores["*"]:
+                with self._stats_lock:
+                    self._wait_seconds += time.perf_counter() - waited
+                    self._calls[provider] = self._calls.get(provider, 0) + 1
+                    self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+                    self._peak[provider] = max(self._peak.get(provider, 0), self._in_flight[provider])
+                try:
+                    yield
+                finally:
+                    with self._stats_lock:
+                        self._in_flight[provider] -= 1
+        finally:
+            if provider_semaphore is not None:
+                provider_semaphore.release()
+
+    @staticmethod
+    async def gather(coros: Iterable[Awaitable[Any]], limit: Optional[int] = None) -> List[Any]:
+        """
+        Await coroutines concurrently (at most limit at a time, if given).
+        Results are in input order; exceptions are returned, not raised.
+        """
+        if limit is None:
+            return await asyncio.gather(*coros, return_exceptions=True)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def _limited(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(_limited(c) for c in coros), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "running": self._loop is not None,
+                "max_concurrency": self.max_concurrency,
+                "provider_limits": dict(self.provider_limits),
+                "calls": dict(self._calls),
+                "in_flight": dict(self._in_flight),
+                "peak_in_flight": dict(self._peak),
+                "slot_wait_seconds": round(self._wait_seconds, 3),
+            }
+
+
+_stage_executor: Optional[StageExecutor] = None
+_stage_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> StageExecutor:
+    """Return the process-wide stage executor."""
+    global _stage_executor
+    if _stage_executor is None:
+        with _stage_executor_lock:
+            if _stage_executor is None:
+                _stage_executor = StageExecutor()
+    return _stage_executor
@@ -0,0 +1,184 @@
+"""
+Context Packer
+Fits retrieved chunks into a model's context window for RAG prompts.
+
+Chunks are packed greedily in relevance order (the order retrieval returned
+them) until the budget is spent:
+
+    budget = context window - answer reserve - prompt tokens - overhead
+             (capped at RAG_CONTEXT_MAX_TOKENS when that is > 0)
+
+The context window comes from llm_config (max_context_tokens); Ollama models
+are further limited to OLLAMA_NUM_CTX, the window the server actually runs
+them with. A chunk that does not fit is trimmed to a sentence boundary if at
+least MIN_TRIMMED_CHUNK_TOKENS of budget remain, otherwise dropped; later,
+shorter chunks may still fit. PackedContext.report() says what was trimmed
+and dropped.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from services.llm_utils import get_model_config
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger("CONTEXT_PACKER")
+
+# Upper bound on context tokens per prompt, whatever the model window (0 = no cap)
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "6000"))
+# Tokens kept free for the answer when the caller does not pass max_tokens
+RAG_ANSWER_RESERVE_TOKENS = int(os.getenv("RAG_ANSWER_RESERVE_TOKENS", "1024"))
+# Context window Ollama serves models with (its num_ctx), regardless of the model's maximum
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+
+DEFAULT_CONTEXT_TOKENS = 8192
+PROMPT_OVERHEAD_TOKENS = 100
+MIN_TRIMMED_CHUNK_TOKENS = 64
+TRIM_SUFFIX = " [...]"
+
+_SENTENCE_END_RE = re.compile(r"[.!?](?=\s|$)")
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken (cl100k_base), or ~4 characters per token without it."""
+    global _encoding
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def trim_to_sentence(text: str, max_chars: int, suffix: str = "") -> str:
+    """
+    Cut text to at most max_chars (plus suffix), preferring the last sentence
+    end, then the last paragraph break, in the final third of the allowance.
+    """
+    if len(text) <= max_chars:
+        return text
+    truncated = text[:max_chars]
+    keep = max_chars * 2 // 3
+
+    sentence_ends = [m.end() for m in _SENTENCE_END_RE.finditer(truncated)]
+    if sentence_ends and sentence_ends[-1] > keep:
+        return text[:sentence_ends[-1]] + suffix
+    last_paragraph = truncated.rfind("\n\n")
+    if last_paragraph > keep:
+        return text[:last_paragraph] + suffix
+    return truncated + "..." + suffix
+
+
+def context_window(model_name: str) -> int:
+    """Context window of a model in tokens."""
+    config = get_model_config(model_name)
+    window = config.max_context_tokens if config and config.max_context_tokens else DEFAULT_CONTEXT_TOKENS
+    if config and config.provider.lower() == "ollama":
+        window = min(window, OLLAMA_NUM_CTX)
+    return window
+
+
+def context_budget(model_name: str, reserve_tokens: Optional[int] = None, prompt_tokens: int = 0) -> int:
+    """Tokens available for retrieved context in a prompt to model_name."""
+    reserve = RAG_ANSWER_RESERVE_TOKENS if reserve_tokens is None else reserve_tokens
+    budget = context_window(model_name) - reserve - prompt_tokens - PROMPT_OVERHEAD_TOKENS
+    if RAG_CONTEXT_MAX_TOKENS > 0:
+        budget = min(budget, RAG_CONTEXT_MAX_TOKENS)
+    return max(budget, 0)
+
+
+@dataclass
+class PackedContext:
+    """Chunks selected for a prompt, with what was trimmed and dropped."""
+
+    budget_tokens: int
+    chunks: List[str] = field(default_factory=list)
+    indices: List[int] = field(default_factory=list)   # input positions of chunks
+    trimmed: List[int] = field(default_factory=list)   # input positions cut to fit
+    dropped: List[int] = field(default_factory=list)   # input positions left out
+    tokens: int = 0
+    input_tokens: int = 0
+
+    def text(self, separator: str = "\n\n") -> str:
+        return separator.join(self.chunks)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "context_tokens": self.tokens,
+            "input_tokens": self.input_tokens,
+            "chunks_packed": len(self.chunks),
+            "chunks_trimmed": self.trimmed,
+            "chunks_dropped": self.dropped,
+        }
+
+
+def _trim_to_tokens(text: str, max_tokens: int, tokens: int) -> Optional[str]:
+    max_chars = int(len(text) * max_tokens / max(tokens, 1))
+    for _ in range(3):
+        trimmed = trim_to_sentence(text, max_chars, TRIM_SUFFIX)
+        if count_tokens(trimmed) <= max_tokens:
+            return trimmed
+        max_chars = int(max_chars * 0.9)
+    return None
+
+
+def pack_context(
+    chunks: List[str],
+    model_name: str,
+    reserve_tokens: Optional[int] = None,
+    prompt_tokens: int = 0,
+    separator: str = "\n\n"
+) -> PackedContext:
+    """
+    Select and trim chunks (most relevant first) to fit the context budget
+    of model_name.
+
+    Args:
+        chunks: Retrieved chunk texts, most relevant first
+        model_name: Model the prompt is for
+        reserve_tokens: Tokens to keep for the answer (defaults to RAG_ANSWER_RESERVE_TOKENS)
+        prompt_tokens: Tokens of the prompt around the context
+        separator: String the chunks will be joined with
+    """
+    packed = PackedContext(budget_tokens=context_budget(model_name, reserve_tokens, prompt_tokens))
+    separator_tokens = count_tokens(separator)
+
+    for i, chunk in enumerate(chunks):
+        chunk = chunk or ""
+        tokens = count_tokens(chunk)
+        packed.input_tokens += tokens
+        overhead = separator_tokens if packed.chunks else 0
+        remaining = packed.budget_tokens - packed.tokens - overhead
+
+        text = chunk
+        if tokens > remaining:
+            text = _trim_to_tokens(chunk, remaining, tokens) if remaining >= MIN_TRIMMED_CHUNK_TOKENS else None
+            if not text:
+                packed.dropped.append(i)
+                continue
+            packed.trimmed.append(i)
+            tokens = count_tokens(text)
+
+        packed.chunks.append(text)
+        packed.indices.append(i)
+        packed.tokens += tokens + overhead
+
+    if packed.trimmed or packed.dropped:
+        logger.info(
+            f"Packed {len(packed.chunks)}/{len(chunks)} chunks for {model_name} "
+            f"({packed.tokens}/{packed.budget_tokens} tokens, {packed.input_tokens} retrieved); "
+            f"trimmed {packed.trimmed}, dropped {packed.dropped}"
+        )
+    return packed
@@ -0,0 +1,565 @@
+"""
+Document Catalog
+Persistent index of the source documents stored in each ChromaDB collection.
+
+Finding a document used to mean downloading every chunk of a collection and
+filtering in Python. The catalog keeps one entry per document in Redis, so
+listing, paging and looking documents up by ID or name are index reads, and
+chunk reads can push a `where` filter down to ChromaDB and page through only
+the matching chunks.
+
+An entry holds document_id (None for legacy chunks without one),
+document_name, chunk_count, page_count, content_hash (the source file hash
+written at ingest) and ingested_at.
+
+Redis layout:
+    catalog:collections         set   collections whose catalog is complete
+    catalog:{collection}:docs   hash  entry key -> JSON entry
+    catalog:{collection}:names  zset  "{lowercased name}\\0{entry key}", score 0 (sorted by name)
+    catalog:doc:{entry key}     set   collections holding the document
+    catalog:{collection}:test_plans  set  distinct test_plan_id values of the chunks
+    catalog:test_plan_collections    set  collections whose test_plans set is complete
+
+The entry key is the document_id, or "name:{document_name}" for legacy
+documents. Ingest records documents as it completes them; deleting and
+renaming collections drop and move their catalogs. Chunk-level writes through
+the vectordb API cannot tell which documents they complete, so they mark the
+collection's catalog stale and the next read rebuilds it from chunk metadata
+(as does the first read of a collection ingested before the catalog existed).
+The test_plans set is added to whenever chunks are written through the
+vectordb API and is never trimmed on delete, so it may name plans with no
+cards left; lookups use it only to choose which IDs to query ChromaDB for.
+Every update is a single MULTI/EXEC transaction; updates that read entries
+first WATCH them, so a concurrent update makes them retry rather than be lost.
+
+Redis errors are logged; reads then fall back to scanning chunk metadata.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger("DOCUMENT_CATALOG")
+
+CHROMA_PAGE_SIZE = int(os.getenv("CHROMA_PAGE_SIZE", "1000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_BUILT_KEY = "catalog:collections"
+_TEST_PLANS_BUILT_KEY = "catalog:test_plan_collections"
+_KEY_PREFIX = "catalog"
+
+
+def iter_collection_pages(
+    coll,
+    where: Optional[Dict[str, Any]] = None,
+    include: Optional[List[str]] = None,
+    page_size: int = CHROMA_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield collection.get() pages of at most page_size chunks matching where."""
+    include = include if include is not None else ["documents", "metadatas"]
+    offset = 0
+    while True:
+        page = coll.get(where=where, include=include, limit=page_size, offset=offset)
+        ids = page.get("ids") or []
+        if not ids:
+            return
+        yield page
+        if len(ids) < page_size:
+            return
+        offset += len(ids)
+
+
+def get_all_pages(
+    coll,
+    where: Optional[Dict[str, Any]] = None,
+    include: Optional[List[str]] = None,
+    page_size: int = CHROMA_PAGE_SIZE
+) -> Dict[str, List[Any]]:
+    """collection.get(where=...) read page by page; returns ids, documents, metadatas."""
+    result: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": []}
+    for page in iter_collection_pages(coll, where, include, page_size):
+        n = len(page["ids"])
+        result["ids"].extend(page["ids"])
+        result["documents"].extend(page.get("documents") or [None] * n)
+        result["metadatas"].extend(page.get("metadatas") or [None] * n)
+    return result
+
+
+def document_name_of(meta: Dict[str, Any]) -> Optional[str]:
+    return meta.get("document_name") or meta.get("filename") or meta.get("source")
+
+
+def entry_key(entry: Dict[str, Any]) -> str:
+    return entry["document_id"] or f"name:{entry['document_name']}"
+
+
+def summarize_chunks(metadatas: List[Optional[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Catalog entries, by entry key, for the documents the given chunk
+    metadatas belong to.
+    """
+    entries: Dict[str, Dict[str, Any]] = {}
+    for meta in metadatas:
+        meta = meta or {}
+        doc_id = meta.get("document_id") or None
+        name = document_name_of(meta)
+        # Documents with an ID are keyed by it alone; legacy ones by name
+        key = doc_id or f"name:{name}"
+        entry = entries.setdefault(key, {
+            "document_id": doc_id,
+            "document_name": name,
+            "chunk_count": 0,
+            "page_count": 0,
+            "content_hash": None,
+            "ingested_at": None,
+        })
+        entry["chunk_count"] += 1
+        if not entry["document_name"] and name:
+            entry["document_name"] = name
+        try:
+            entry["page_count"] = max(entry["page_count"], int(meta.get("page_number") or 0))
+        except (TypeError, ValueError):
+            pass
+        if meta.get("source_hash"):
+            entry["content_hash"] = meta["source_hash"]
+        timestamp = meta.get("timestamp")
+        if timestamp and (entry["ingested_at"] is None or str(timestamp) > entry["ingested_at"]):
+            entry["ingested_at"] = str(timestamp)
+    return entries
+
+
+def build_catalog(coll) -> List[Dict[str, Any]]:
+    """List the documents in a collection by scanning its chunk metadata."""
+    metadatas: List[Optional[Dict[str, Any]]] = []
+    for page in iter_collection_pages(coll, include=["metadatas"]):
+        metadatas.extend(page.get("metadatas") or [])
+    return list(summarize_chunks(metadatas).values())
+
+
+def match_documents(entries: List[Dict[str, Any]], ref: str) -> List[Dict[str, Any]]:
+    """
+    Entries a document reference picks out: the document with that ID, else
+    those with that exact name, else those whose name contains it (ignoring case).
+    """
+    hits = [d for d in entries if d["document_id"] == ref]
+    hits = hits or [d for d in entries if d["document_name"] == ref]
+    needle = ref.lower()
+    return hits or [d for d in entries if d["document_name"] and needle in str(d["document_name"]).lower()]
+
+
+def _lex_range(prefix: str) -> Tuple[bytes, bytes]:
+    """ZRANGEBYLEX bounds of the members starting with prefix."""
+    encoded = prefix.encode("utf-8")
+    return b"[" + encoded, b"[" + encoded + b"\xff"
+
+
+class DocumentCatalog:
+    """Redis-backed per-collection document catalog."""
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client if redis_client is not None else redis.from_url(REDIS_URL, decode_responses=True)
+
+    @staticmethod
+    def _docs(collection_name: str) -> str:
+        return f"{_KEY_PREFIX}:{collection_name}:docs"
+
+    @staticmethod
+    def _names(collection_name: str) -> str:
+        return f"{_KEY_PREFIX}:{collection_name}:names"
+
+    @staticmethod
+    def _test_plans(collection_name: str) -> str:
+        return f"{_KEY_PREFIX}:{collection_name}:test_plans"
+
+    @staticmethod
+    def _locations(key: str) -> str:
+        return f"{_KEY_PREFIX}:doc:{key}"
+
+    @staticmethod
+    def _name_member(entry: Dict[str, Any]) -> str:
+        return f"{str(entry['document_name'] or '').lower()}\x00{entry_key(entry)}"
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _queue_removals(self, pipe, collection_name: str, keys: List[str], raws: List[Optional[str]]) -> None:
+        if not keys:
+            return
+        for raw in raws:
+            if raw is not None:
+                pipe.zrem(self._names(collection_name), self._name_member(json.loads(raw)))
+        pipe.hdel(self._docs(collection_name), *keys)
+        for key in keys:
+            pipe.srem(self._locations(key), collection_name)
+
+    def put(self, collection_name: str, entries: List[Dict[str, Any]], replace: bool = False) -> None:
+        """
+        Record entries, overwriting existing entries with the same key. With
+        replace, the catalog becomes exactly these entries and is marked complete.
+        """
+        docs = self._docs(collection_name)
+        keys = [entry_key(e) for e in entries]
+
+        def _write(pipe):
+            # Drop the old name members of overwritten (or, with replace, all) entries
+            stale = list(pipe.hkeys(docs)) if replace else keys
+            raws = pipe.hmget(docs, stale) if stale else []
+            pipe.multi()
+            self._queue_removals(pipe, collection_name, stale, raws)
+            if entries:
+                pipe.hset(docs, mapping={k: json.dumps(e) for k, e in zip(keys, entries)})
+                pipe.zadd(self._names(collection_name), {self._name_member(e): 0 for e in entries})
+                for key in keys:
+                    pipe.sadd(self._locations(key), collection_name)
+            if replace:
+                pipe.sadd(_BUILT_KEY, collection_name)
+
+        # Retried if another writer changes the entries between the read and the write
+        self.redis.transaction(_write, docs)
+
+    def remove(self, collection_name: str, keys: List[str]) -> None:
+        if not keys:
+            return
+        docs = self._docs(collection_name)
+
+        def _remove(pipe):
+            raws = pipe.hmget(docs, keys)
+            pipe.multi()
+            self._queue_removals(pipe, collection_name, keys, raws)
+
+        self.redis.transaction(_remove, docs)
+
+    def drop(self, collection_name: str) -> None:
+        """Forget a deleted collection."""
+        docs = self._docs(collection_name)
+
+        def _drop(pipe):
+            keys = list(pipe.hkeys(docs))
+            pipe.multi()
+            for key in keys:
+                pipe.srem(self._locations(key), collection_name)
+            pipe.delete(docs, self._names(collection_name), self._test_plans(collection_name))
+            pipe.srem(_BUILT_KEY, collection_name)
+            pipe.srem(_TEST_PLANS_BUILT_KEY, collection_name)
+
+        self.redis.transaction(_drop, docs)
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        """Move a collection's catalog to its new name."""
+        old_docs, new_docs = self._docs(old_name), self._docs(new_name)
+
+        def _move(pipe):
+            entries = [json.loads(raw) for raw in pipe.hvals(old_docs)]
+            built = pipe.sismember(_BUILT_KEY, old_name)
+            plans_built = pipe.sismember(_TEST_PLANS_BUILT_KEY, old_name)
+            plan_ids = pipe.smembers(self._test_plans(old_name))
+            pipe.multi()
+            pipe.delete(new_docs, self._names(new_name), old_docs, self._names(old_name),
+                        self._test_plans(new_name), self._test_plans(old_name))
+            if plan_ids:
+                pipe.sadd(self._test_plans(new_name), *plan_ids)
+            if entries:
+                pipe.hset(new_docs, mapping={entry_key(e): json.dumps(e) for e in entries})
+                pipe.zadd(self._names(new_name), {self._name_member(e): 0 for e in entries})
+            for e in entries:
+                pipe.srem(self._locations(entry_key(e)), old_name)
+                pipe.sadd(self._locations(entry_key(e)), new_name)
+            pipe.srem(_BUILT_KEY, old_name)
+            if built:
+                pipe.sadd(_BUILT_KEY, new_name)
+            else:
+                pipe.srem(_BUILT_KEY, new_name)
+            pipe.srem(_TEST_PLANS_BUILT_KEY, old_name)
+            if plans_built:
+                pipe.sadd(_TEST_PLANS_BUILT_KEY, new_name)
+            else:
+                pipe.srem(_TEST_PLANS_BUILT_KEY, new_name)
+
+        self.redis.transaction(_move, old_docs, new_docs, self._test_plans(old_name),
+                               _BUILT_KEY, _TEST_PLANS_BUILT_KEY)
+
+    def add_test_plan_ids(self, collection_name: str, plan_ids: List[str]) -> None:
+        """Record test_plan_id values of chunks written to a collection."""
+        if plan_ids:
+            self.redis.sadd(self._test_plans(collection_name), *plan_ids)
+
+    def rebuild_test_plan_ids(self, coll) -> int:
+        """Fill a collection's test_plans set from its chunk metadata; returns the plans found."""
+        plan_ids = set()
+        for page in iter_collection_pages(coll, include=["metadatas"]):
+            plan_ids.update((meta or {}).get("test_plan_id") for meta in page.get("metadatas") or [])
+        plan_ids.discard(None)
+        plan_ids.discard("")
+        # Added to, not replaced: IDs recorded by writes during the scan are kept
+        pipe = self.redis.pipeline(transaction=True)
+        if plan_ids:
+            pipe.sadd(self._test_plans(coll.name), *plan_ids)
+        pipe.sadd(_TEST_PLANS_BUILT_KEY, coll.name)
+        pipe.execute()
+        logger.info(f"Rebuilt test plan index for '{coll.name}': {len(plan_ids)} test plans")
+        return len(plan_ids)
+
+    def invalidate(self, collection_name: str) -> None:
+        """Mark a collection's catalog stale; the next ensure() rebuilds it."""
+        self.redis.srem(_BUILT_KEY, collection_name)
+
+    def invalidate_test_plan_ids(self, collection_name: str) -> None:
+        """Mark a collection's test_plans set incomplete; the next read rebuilds it."""
+        self.redis.srem(_TEST_PLANS_BUILT_KEY, collection_name)
+
+    def rebuild(self, coll) -> int:
+        """Rebuild a collection's catalog from its chunk metadata; returns the document count."""
+        entries = build_catalog(coll)
+        self.put(coll.name, entries, replace=True)
+        logger.info(f"Rebuilt document catalog for '{coll.name}': {len(entries)} documents")
+        return len(entries)
+
+    def ensure(self, coll) -> None:
+        """Build a collection's catalog if it is missing or stale."""
+        if not self.redis.sismember(_BUILT_KEY, coll.name):
+            self.rebuild(coll)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def count(self, collection_name: str) -> int:
+        return self.redis.hlen(self._docs(collection_name))
+
+    def entries(self, collection_name: str) -> List[Dict[str, Any]]:
+        return [json.loads(raw) for raw in self.redis.hvals(self._docs(collection_name))]
+
+    def page(
+        self,
+        collection_name: str,
+        offset: int = 0,
+        limit: int = 50,
+        prefix: Optional[str] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        A page of entries sorted by document name, optionally only names
+        starting with prefix (ignoring case). Returns (total matching, page).
+        """
+        names = self._names(collection_name)
+        if prefix:
+            low, high = _lex_range(prefix.lower())
+            total = self.redis.zlexcount(names, low, high)
+            members = self.redis.zrangebylex(names, low, high, start=offset, num=limit)
+        else:
+            total = self.redis.zcard(names)
+            members = self.redis.zrange(names, offset, offset + limit - 1) if limit > 0 else []
+        keys = [m.split("\x00", 1)[1] for m in members]
+        raws = self.redis.hmget(self._docs(collection_name), keys) if keys else []
+        return total, [json.loads(raw) for raw in raws if raw is not None]
+
+    def find(self, collection_name: str, ref: str) -> List[Dict[str, Any]]:
+        """match_documents() against a collection's catalog, using its indexes."""
+        docs = self._docs(collection_name)
+        raw = self.redis.hget(docs, ref)
+        if raw is not None:
+            return [json.loads(raw)]
+        needle = ref.lower()
+        candidates = self.redis.zrangebylex(self._names(collection_name), *_lex_range(f"{needle}\x00"))
+        if not candidates:
+            # Substring match: scan the names, not the chunks
+            candidates = [m for m in self.redis.zrange(self._names(collection_name), 0, -1)
+                          if needle in m.split("\x00", 1)[0]]
+        keys = [m.split("\x00", 1)[1] for m in candidates]
+        entries = [json.loads(raw) for raw in (self.redis.hmget(docs, keys) if keys else []) if raw is not None]
+        return match_documents(entries, ref)
+
+    def test_plan_ids(self, coll) -> List[str]:
+        """Distinct test_plan_id values of a collection, building the set if needed."""
+        if not self.redis.sismember(_TEST_PLANS_BUILT_KEY, coll.name):
+            self.rebuild_test_plan_ids(coll)
+        return sorted(self.redis.smembers(self._test_plans(coll.name)))
+
+    def collections_with(self, key: str) -> List[str]:
+        """Collections holding the document with this entry key."""
+        return sorted(self.redis.smembers(self._locations(key)))
+
+
+_document_catalog: Optional[DocumentCatalog] = None
+_document_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> DocumentCatalog:
+    """Return the process-wide document catalog."""
+    global _document_catalog
+    if _document_catalog is None:
+        with _document_catalog_lock:
+            if _document_catalog is None:
+                _document_catalog = DocumentCatalog()
+    return _document_catalog
+
+
+# ----------------------------------------------------------------------
+# Maintenance hooks. Failures are logged, not raised: the collection write
+# has already succeeded, and a stale catalog can be rebuilt.
+# ----------------------------------------------------------------------
+
+def record_document(collection_name: str, entry: Dict[str, Any]) -> None:
+    """Record an ingested document, replacing any previous entry for it."""
+    try:
+        get_catalog().put(collection_name, [entry])
+    except Exception as e:
+        logger.warning(f"Could not record '{entry.get('document_name')}' in catalog of '{collection_name}': {e}")
+
+
+def record_test_plan_ids(collection_name: str, metadatas: Optional[List[Optional[Dict[str, Any]]]]) -> None:
+    """Record the test_plan_id values of chunks written to a collection."""
+    plan_ids = sorted({(meta or {}).get("test_plan_id") for meta in metadatas or []} - {None, ""})
+    if not plan_ids:
+        return
+    try:
+        get_catalog().add_test_plan_ids(collection_name, plan_ids)
+    except Exception as e:
+        logger.warning(f"Could not record test plans in catalog of '{collection_name}': {e}")
+        invalidate_test_plan_ids(collection_name)
+
+
+def invalidate_test_plan_ids(collection_name: str) -> None:
+    try:
+        get_catalog().invalidate_test_plan_ids(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not invalidate test plan index of '{collection_name}': {e}")
+
+
+def invalidate_catalog(collection_name: str) -> None:
+    try:
+        get_catalog().invalidate(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not invalidate catalog of '{collection_name}': {e}")
+
+
+def drop_catalog(collection_name: str) -> None:
+    try:
+        get_catalog().drop(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not drop catalog of '{collection_name}': {e}")
+
+
+def rename_catalog(old_name: str, new_name: str) -> None:
+    try:
+        get_catalog().rename(old_name, new_name)
+    except Exception as e:
+        logger.warning(f"Could not move catalog of '{old_name}' to '{new_name}': {e}")
+        invalidate_catalog(new_name)
+
+
+# ----------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------
+
+def get_document_catalog(coll) -> List[Dict[str, Any]]:
+    """All catalog entries of a collection, building the catalog if needed."""
+    try:
+        catalog = get_catalog()
+        catalog.ensure(coll)
+        return catalog.entries(coll.name)
+    except Exception as e:
+        logger.warning(f"Document catalog unavailable for '{coll.name}', scanning metadata: {e}")
+        return build_catalog(coll)
+
+
+def get_test_plan_ids(coll, scan_limit: int = CHROMA_PAGE_SIZE) -> List[str]:
+    """
+    Distinct test_plan_id values of a collection from its catalog. Without
+    Redis, falls back to the metadata of at most scan_limit chunks.
+    """
+    try:
+        return get_catalog().test_plan_ids(coll)
+    except Exception as e:
+        logger.warning(f"Test plan index unavailable for '{coll.name}', scanning {scan_limit} chunks: {e}")
+        page = coll.get(include=["metadatas"], limit=scan_limit)
+        return sorted({(meta or {}).get("test_plan_id") for meta in page.get("metadatas") or []} - {None, ""})
+
+
+def find_documents(coll, ref: str) -> List[Dict[str, Any]]:
+    """Catalog entries of a collection matching a document reference (see match_documents)."""
+    try:
+        catalog = get_catalog()
+        catalog.ensure(coll)
+        return catalog.find(coll.name, str(ref))
+    except Exception as e:
+        logger.warning(f"Document catalog unavailable for '{coll.name}', scanning metadata: {e}")
+        return match_documents(build_catalog(coll), str(ref))
+
+
+def locate_documents(client, ref: str, collection_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Find a document across collections (all of them by default). Returns
+    the matching catalog entries, each with its 'collection'.
+    """
+    names = collection_names if collection_names is not None else client.list_collections()
+    if collection_names is None:
+        # A document ID is its entry key; start with the collections known to hold it
+        try:
+            known = [n for n in get_catalog().collections_with(str(ref)) if n in names]
+        except Exception as e:
+            logger.warning(f"Document catalog unavailable, searching every collection: {e}")
+            known = []
+        for name in known:
+            hits = [e for e in find_documents(client.get_collection(name=name), ref) if e["document_id"] == ref]
+            if hits:
+                return [dict(e, collection=name) for e in hits]
+
+    located: List[Dict[str, Any]] = []
+    for name in names:
+        located.extend(dict(e, collection=name) for e in find_documents(client.get_collection(name=name), ref))
+    return located
+
+
+def resolve_documents(coll, refs: List[str]) -> List[Dict[str, Any]]:
+    """Resolve document references to catalog entries (see match_documents)."""
+    matched: List[Dict[str, Any]] = []
+    for ref in refs:
+        hits = find_documents(coll, str(ref))
+        if not hits:
+            logger.warning(f"No document in '{coll.name}' matches '{ref}'")
+        for d in hits:
+            if d not in matched:
+                matched.append(d)
+    return matched
+
+
+def _in(field: str, values: List[str]) -> Dict[str, Any]:
+    return {field: values[0]} if len(values) == 1 else {field: {"$in": values}}
+
+
+def document_where(documents: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """ChromaDB where clause selecting the chunks of the given catalog entries."""
+    ids = [d["document_id"] for d in documents if d["document_id"]]
+    names = [d["document_name"] for d in documents if not d["document_id"] and d["document_name"]]
+    clauses = [_in("document_id", ids)] if ids else []
+    if names:
+        # Legacy chunks carry their name in any of these fields
+        clauses += [_in(field, names) for field in ("document_name", "filename", "source")]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def get_document_chunks(
+    coll,
+    refs: Optional[List[str]],
+    include: Optional[List[str]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Read the chunks of the referenced documents (all chunks when refs is
+    empty), filtered in ChromaDB and paged.
+    """
+    if not refs:
+        return get_all_pages(coll, include=include)
+    documents = resolve_documents(coll, refs)
+    where = document_where(documents)
+    if where is None:
+        return {"ids": [], "documents": [], "metadatas": []}
+    logger.info(f"Reading {sum(d['chunk_count'] for d in documents)} chunks of {len(documents)} "
+                f"document(s) from '{coll.name}'")
+    return get_all_pages(coll, where=where, include=include)
@@ -6,9 +6,7 @@ Handles document processing, chunking, and embedding generation
 
 import os
 import chromadb
-from sentence_transformers import SentenceTransformer
-from langchain_ollama import OllamaEmbeddings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import redis
 import json
 import uuid
@@ -28,9 +26,31 @@ from dotenv import load_dotenv
 import cv2
 import asyncio
 import functools
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from zipfile import ZipFile
 from bs4 import BeautifulSoup
 
+from .image_description_cache import ImageDescriptionCache, hash_image_file
+from .parsed_pdf import ParsedPDF, parse_pdf
+from .progress_reporter import ProgressReporter
+from .lexical_index import get_lexical_index
+from .answer_cache import bump_collection_version
+from .document_catalog import find_documents, record_document, summarize_chunks
+from .embedding_service import (
+    get_embedding_service,
+    EmbeddingSpaceMismatch,
+    EMBEDDING_MODEL_NAME,
+    OLLAMA_EMBEDDING_MODEL
+)
+from .heading_chunking import (
+    chunk_pages,
+    split_oversized_chunks,
+    token_length_stats
+)
+
 # Position-aware image placement imports
 from .position_aware_extraction import (
     extract_images_with_positions,
@@ -62,6 +82,10 @@ VISION_CONFIG = {
         }
 MAX_LLAVA_IMAGES = int(os.getenv("VISION_MAX_LLAVA_IMAGES", "50"))
 MAX_LLAVA_TIMEOUTS = int(os.getenv("VISION_MAX_LLAVA_TIMEOUTS", "5"))
+# In-flight requests allowed per vision model; match Ollama's OLLAMA_NUM_PARALLEL
+VISION_CONCURRENCY_PER_MODEL = int(os.getenv("VISION_CONCURRENCY_PER_MODEL", "2"))
+# Seconds to wait for a single image description before counting it as a failure
+VISION_IMAGE_TIMEOUT = float(os.getenv("VISION_IMAGE_TIMEOUT", "60"))
 
 # Image storage directory
 IMAGES_DIR = os.getenv("IMAGES_STORAGE_DIR", os.path.join(os.getcwd(), "stored_images"))
@@ -78,6 +102,38 @@ except PermissionError as e:
     logger.info(f"Using fallback directory: {IMAGES_DIR}")
     os.makedirs(IMAGES_DIR, exist_ok=True)
 
+# Spool directory for uploaded files awaiting ingestion. Must be shared between
+# the API container and the Celery workers so workers can pick files up by path.
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", os.path.join(os.getcwd(), "ingest_spool"))
+# Lifetime of a per-request API key handed to the Celery worker via Redis
+INGEST_API_KEY_TTL = int(os.getenv("INGEST_API_KEY_TTL", "3600"))
+
+# Opt-in page-parallel PDF processing: when PDF_PAGE_WORKERS > 0, PDFs longer
+# than PDF_PAGE_SHARD_SIZE pages are parsed and chunked in page shards on a
+# process pool shared by all jobs in this worker process.
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "0"))
+PDF_PAGE_SHARD_SIZE = int(os.getenv("PDF_PAGE_SHARD_SIZE", "50"))
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def get_page_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared page process pool, or None if page-parallel mode is off."""
+    global _page_pool
+    if PDF_PAGE_WORKERS <= 0:
+        return None
+    with _page_pool_lock:
+        if _page_pool is None:
+            # spawn: the ingest worker is multi-threaded, so forking is unsafe,
+            # and pool workers only import the light parsing/chunking modules
+            _page_pool = ProcessPoolExecutor(
+                max_workers=PDF_PAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started page process pool with {PDF_PAGE_WORKERS} workers")
+        return _page_pool
+
 _hf_processor = None
 _hf_model = None
 
@@ -110,99 +166,18 @@ class LazyChromaClient:
 chroma_client = LazyChromaClient()
 
 # =============================================================================
-# Embedding Model with Fallback Support
+# Embedding Model (shared, lazily loaded; see services/embedding_service.py)
 # =============================================================================
 
-class HybridEmbeddingModel:
-    """
-    Embedding model with fallback support.
-    Primary: HuggingFace SentenceTransformer (works offline if cached)
-    Fallback: Ollama Snowflake Arctic Embed (fully local)
-    """
-
-    def __init__(self):
-        self._hf_model = None
-        self._ollama_model = None
-        self._use_ollama_fallback = False
-
-        # Configuration
-        self.hf_model_name = os.getenv(
-            "EMBEDDING_MODEL",
-            "sentence-transformers/multi-qa-mpnet-base-dot-v1"
-        )
-        self.ollama_url = os.getenv("OLLAMA_URL", "http://ollama:11434")
-        self.ollama_model_name = os.getenv(
-            "OLLAMA_EMBEDDING_MODEL",
-            "snowflake-arctic-embed2"
-        )
-
-        # Try to initialize HuggingFace model
-        self._init_hf_model()
-
-    def _init_hf_model(self):
-        """Try to initialize HuggingFace SentenceTransformer model."""
-        try:
-            logger.info(f"Initializing HuggingFace embedding model: {self.hf_model_name}")
-            self._hf_model = SentenceTransformer(self.hf_model_name)
-            logger.info("HuggingFace embedding model initialized successfully")
-        except Exception as e:
-            logger.warning(f"Failed to initialize HuggingFace model: {e}")
-            logger.info("Will use Ollama Snowflake Arctic Embed as fallback")
-            self._init_ollama_fallback()
-
-    def _init_ollama_fallback(self):
-        """Initialize Ollama embeddings as fallback."""
-        try:
-            logger.info(f"Initializing Ollama embedding model: {self.ollama_model_name}")
-            self._ollama_model = OllamaEmbeddings(
-                model=self.ollama_model_name,
-                base_url=self.ollama_url
-            )
-            self._use_ollama_fallback = True
-            logger.info("Ollama embedding model initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Ollama fallback model: {e}")
-            raise RuntimeError("No embedding model available - both HuggingFace and Ollama failed")
-
-    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32):
-        """
-        Encode texts to embeddings.
-        Compatible with SentenceTransformer.encode() interface.
-        """
-        if self._use_ollama_fallback:
-            return self._encode_with_ollama(texts, convert_to_numpy)
-
-        try:
-            return self._hf_model.encode(texts, convert_to_numpy=convert_to_numpy, batch_size=batch_size)
-        except Exception as e:
-            logger.warning(f"HuggingFace encoding failed: {e}, falling back to Ollama")
-            if self._ollama_model is None:
-                self._init_ollama_fallback()
-            return self._encode_with_ollama(texts, convert_to_numpy)
-
-    def _encode_with_ollama(self, texts: List[str], convert_to_numpy: bool = True):
-        """Encode using Ollama embeddings."""
-        embeddings = self._ollama_model.embed_documents(texts)
-        if convert_to_numpy:
-            return np.array(embeddings)
-        return embeddings
-
-
-# Embedding model (single instance with fallback support)
-EMBEDDING_MODEL_NAME = os.getenv(
-    "EMBEDDING_MODEL",
-    "sentence-transformers/multi-qa-mpnet-base-dot-v1"
-)
-OLLAMA_EMBEDDING_MODEL = os.getenv(
-    "OLLAMA_EMBEDDING_MODEL",
-    "snowflake-arctic-embed2"
-)
-embedding_model = HybridEmbeddingModel()
+embedding_model = get_embedding_service()
 
 # Redis for job tracking
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 redis_client = redis.from_url(REDIS_URL, decode_responses=True)
 
+# Content-addressed cache of vision model descriptions (shared across workers)
+vision_cache = ImageDescriptionCache(redis_client)
+
 # ChromaDB persistence directory (for legacy compatibility)
 PERSIST_DIR = os.getenv("PERSIST_DIRECTORY", "/chroma/chroma")
 
@@ -295,13 +270,21 @@ async def describe_with_openai_markitdown(image_path: str, api_key: str = openai
         logger.warning(f"OpenAI MarkItDown failed for {image_path}: {e}")
         return None
     
-def describe_with_ollama_vision(image_path: str, model_key: str = None) -> Optional[str]:
+def resolve_ollama_vision_model(model_key: Optional[str]) -> str:
+    """Map a vision model key (e.g. 'llava_7b') to its Ollama model name."""
+    if model_key and model_key in VISION_CONFIG.get("ollama_models", {}):
+        return VISION_CONFIG["ollama_models"][model_key]
+    return VISION_CONFIG['ollama_model']
+
+
+def describe_with_ollama_vision(image_path: str, model_key: str = None, timeout: float = VISION_IMAGE_TIMEOUT) -> Optional[str]:
     """Use Ollama vision model for image description
 
     Args:
         image_path: Path to the image file
         model_key: Key for the specific Ollama model (e.g., 'llava_7b', 'llava_13b', 'granite_vision_2b')
                    If None, uses the default model from VISION_CONFIG
+        timeout: Read timeout in seconds for the Ollama request
     """
     try:
         if not VISION_CONFIG["ollama_enabled"]:
@@ -312,10 +295,7 @@ def describe_with_ollama_vision(image_path: str, model_key: str = None) -> Optio
             return None
 
         # Determine which model to use
-        if model_key and model_key in VISION_CONFIG.get("ollama_models", {}):
-            model_name = VISION_CONFIG["ollama_models"][model_key]
-        else:
-            model_name = VISION_CONFIG['ollama_model']
+        model_name = resolve_ollama_vision_model(model_key)
 
         # Read and encode image
         with open(image_path, "rb") as img_file:
@@ -330,7 +310,7 @@ def describe_with_ollama_vision(image_path: str, model_key: str = None) -> Optio
                 "images": [img_data],
                 "stream": False
             },
-            timeout=(5, 20)
+            timeout=(5, timeout)
         )
 
         if response.status_code == 200:
@@ -536,16 +516,100 @@ def basic_image_analysis(image_path: str) -> str:
         logger.error(f"Basic image analysis failed for {image_path}: {e}")
         return f"Image file: {Path(image_path).name} (analysis failed)"
 
+class VisionStage:
+    """
+    Job-wide image description stage.
+
+    Owns one event loop (on a background thread) shared by every document in
+    an ingestion job, plus per-model semaphores that cap in-flight requests to
+    each vision model. Blocking work (HTTP calls, OpenCV/OCR) runs on the
+    loop's default thread pool so it never stalls the loop.
+
+    Usage:
+        with VisionStage() as stage:
+            future = stage.submit(describe_images_for_pages(pages, stage=stage))
+            ...  # chunk text while images are described
+            pages = future.result()
+    """
+
+    def __init__(self, per_model_limit: int = VISION_CONCURRENCY_PER_MODEL, image_timeout: float = VISION_IMAGE_TIMEOUT):
+        self.per_model_limit = max(1, per_model_limit)
+        self.image_timeout = image_timeout
+        # In-flight descriptions keyed by (content_hash, model_name) so the same
+        # banner on many pages is only sent to the model once at a time
+        self.inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.per_model_limit * 4, thread_name_prefix="vision")
+        )
+        self._thread = threading.Thread(target=self._loop.run_forever, name="vision-stage", daemon=True)
+        self._thread.start()
+
+    def semaphore(self, model_name: str) -> asyncio.Semaphore:
+        """Return the concurrency limit for a model (call from the stage loop only)."""
+        sem = self._semaphores.get(model_name)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_model_limit)
+            self._semaphores[model_name] = sem
+        return sem
+
+    def submit(self, coro):
+        """Schedule a coroutine on the stage loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        if self._thread.is_alive():
+            # Closing a running loop raises; the daemon thread exits with the process
+            logger.warning("Vision stage loop did not stop within 10s; leaving it running")
+            return
+        self._loop.run_until_complete(self._loop.shutdown_default_executor())
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 async def describe_images_for_pages(
     pages_data: List[Dict],
     api_key_override=None,
     run_all_models: bool = True,
     enabled_models: set[str] = frozenset(),
-    vision_flags: dict[str,bool] = {}
+    vision_flags: dict[str,bool] = {},
+    cache_stats: Optional[Dict[str, int]] = None,
+    stage: Optional[VisionStage] = None
 ) -> List[Dict]:
+    """
+    Describe every image in pages_data, storing results in page["image_descriptions"].
+
+    Images are described concurrently, bounded per vision model by the stage's
+    semaphores (or local ones when no stage is given), each bounded by the
+    HTTP request's read timeout.
+    Ollama vision descriptions are looked up in the content-addressed cache
+    first; only misses count towards the LLaVA attempt/failure circuit breaker.
+    If cache_stats is given, its "hits" and "misses" counters are incremented.
+    """
     llava_attempts = 0
     llava_failures = 0
     llava_disabled = False
+    image_hashes: Dict[str, Optional[str]] = {}
+    local_semaphores: Dict[str, asyncio.Semaphore] = {}
+    inflight = stage.inflight if stage is not None else {}
+    image_timeout = stage.image_timeout if stage is not None else VISION_IMAGE_TIMEOUT
+
+    def _semaphore(model_name: str) -> asyncio.Semaphore:
+        if stage is not None:
+            return stage.semaphore(model_name)
+        if model_name not in local_semaphores:
+            local_semaphores[model_name] = asyncio.Semaphore(max(1, VISION_CONCURRENCY_PER_MODEL))
+        return local_semaphores[model_name]
 
     def _llava_available() -> bool:
         if llava_disabled:
@@ -556,234 +620,138 @@ async def describe_images_for_pages(
             return False
         return True
 
-    for page in pages_data:
-        descs = []
-        for img_item in page["images"]:
-            # Handle both legacy (string path) and position-aware (dict) formats
-            if isinstance(img_item, dict):
-                # Position-aware format: extract storage_path from dictionary
-                img_path = img_item.get("storage_path", "")
-            else:
-                # Legacy format: img_item is already the path string
-                img_path = img_item
-
-            if not img_path:
-                logger.warning(f"Skipping image with no path: {img_item}")
-                descs.append("No image path available")
-                continue
-
-            if run_all_models:
-                all_desc = {}
-                for ollama_key in ["llava_7b", "llava_13b"]:
-                    if ollama_key in enabled_models and vision_flags.get(ollama_key, False) and _llava_available():
-                        llava_attempts += 1
-                        d = describe_with_ollama_vision(img_path, model_key=ollama_key)
-                        if d:
-                            all_desc[f"LLaVA_{ollama_key}"] = d
-                        else:
-                            llava_failures += 1
-
-                if not all_desc and _llava_available():
-                    llava_attempts += 1
-                    d = describe_with_ollama_vision(img_path, model_key="llava_7b")
-                    if d:
-                        all_desc["LLaVA_llava_7b"] = d
-                    else:
-                        llava_failures += 1
-
-                if llava_failures >= MAX_LLAVA_TIMEOUTS and not llava_disabled:
-                    llava_disabled = True
-                    logger.warning(
-                        "Disabling LLaVA for remaining images after %s failures",
-                        llava_failures,
-                    )
-
-                if "enhanced_local" in enabled_models and vision_flags.get("enhanced_local", False):
-                    d = enhanced_local_image_analysis(img_path)
-                    if d:
-                        all_desc["Enhanced Local"] = d
-
-                all_desc["Basic Fallback"] = basic_image_analysis(img_path)
-                descs.append(create_combined_description(all_desc, Path(img_path).name))
-
-            else:
-                d = None
-                for ollama_key in ["llava_7b", "llava_13b"]:
-                    if ollama_key in enabled_models and vision_flags.get(ollama_key, False) and _llava_available():
-                        llava_attempts += 1
-                        d = describe_with_ollama_vision(img_path, model_key=ollama_key)
-                        if d:
-                            break
-                        llava_failures += 1
-
-                if not d and _llava_available():
-                    llava_attempts += 1
-                    d = describe_with_ollama_vision(img_path, model_key="llava_7b")
-                    if not d:
-                        llava_failures += 1
-
-                if llava_failures >= MAX_LLAVA_TIMEOUTS and not llava_disabled:
-                    llava_disabled = True
-                    logger.warning(
-                        "Disabling LLaVA for remaining images after %s failures",
-                        llava_failures,
-                    )
-
-                if not d and "enhanced_local" in enabled_models and vision_flags.get("enhanced_local", False):
-                    d = enhanced_local_image_analysis(img_path)
-
-                descs.append(d or basic_image_analysis(img_path))
-
-        page["image_descriptions"] = descs
-    return pages_data
-
-def extract_headings_from_text(text: str) -> List[Dict[str, Any]]:
-    """
-    Detect headings using multiple heuristics:
-    - Numbered sections (1., 1.1, 1.1.1)
-    - ALL CAPS lines
-    - Bold/underline markers
-
-    Returns list of heading dictionaries with:
-    - text: heading text
-    - level: heading level (1-3)
-    - number: section number if applicable
-    - char_offset: character offset in text
-    - line_number: line number
-    - parent: parent heading text if applicable
-    """
-    import re
-
-    headings = []
-    lines = text.split('\n')
-
-    # Track heading hierarchy
-    h1_pattern = re.compile(r'^\s*(\d+)\.\s+([A-Z].*)')
-    h2_pattern = re.compile(r'^\s*(\d+\.\d+)\s+(.*)')
-    h3_pattern = re.compile(r'^\s*(\d+\.\d+\.\d+)\s+(.*)')
-    caps_pattern = re.compile(r'^[A-Z\s]{10,}$')  # All caps, 10+ chars
-
-    char_offset = 0
-    parent_stack = []
-
-    for line_num, line in enumerate(lines):
-        stripped = line.strip()
-        if not stripped:
-            char_offset += len(line) + 1
-            continue
-
-        heading = None
-        level = None
-
-        # Check numbered sections (most specific first)
-        if h3_pattern.match(stripped):
-            match = h3_pattern.match(stripped)
-            heading = {"text": match.group(2), "level": 3, "number": match.group(1)}
-        elif h2_pattern.match(stripped):
-            match = h2_pattern.match(stripped)
-            heading = {"text": match.group(2), "level": 2, "number": match.group(1)}
-        elif h1_pattern.match(stripped):
-            match = h1_pattern.match(stripped)
-            heading = {"text": match.group(2), "level": 1, "number": match.group(1)}
-        elif caps_pattern.match(stripped):
-            heading = {"text": stripped, "level": 1, "number": None}
-
-        if heading:
-            # Update parent stack
-            while parent_stack and parent_stack[-1]["level"] >= heading["level"]:
-                parent_stack.pop()
-
-            heading.update({
-                "char_offset": char_offset,
-                "line_number": line_num,
-                "parent": parent_stack[-1]["text"] if parent_stack else None
-            })
-
-            parent_stack.append(heading)
-            headings.append(heading)
-
-        char_offset += len(line) + 1
-
-    return headings
-
-
-def extract_structured_chunks(page_text: str, page_num: int) -> List[Dict[str, Any]]:
-    """
-    Extract chunks preserving page → heading → body hierarchy.
-
-    Returns:
-        List of chunks with types: 'heading' or 'body_text'
-    """
-    chunks = []
-
-    # 1. Extract headings using pattern matching
-    headings = extract_headings_from_text(page_text)
-
-    if not headings:
-        # No headings found - create a single body chunk for the entire page
-        if page_text.strip():
-            chunks.append({
-                "chunk_type": "body_text",
-                "page_number": page_num,
-                "heading_text": "",
-                "heading_level": 0,
-                "parent_heading": "",
-                "content": page_text.strip(),
-                "start_char_offset": 0,
-                "end_char_offset": len(page_text)
-            })
-        return chunks
-
-    # 2. For each heading, create heading chunk + body chunk
-    for idx, heading in enumerate(headings):
-        # Heading chunk
-        heading_text = heading["text"]
-        if heading.get("number"):
-            heading_text = f"{heading['number']} {heading['text']}"
-
-        chunks.append({
-            "chunk_type": "heading",
-            "page_number": page_num,
-            "heading_text": heading_text,
-            "heading_level": heading["level"],
-            "heading_index_on_page": idx,
-            "content": heading_text,
-            "parent_heading": heading.get("parent", ""),
-            "start_char_offset": heading["char_offset"]
-        })
+    def _count(field: str):
+        if cache_stats is not None:
+            cache_stats[field] = cache_stats.get(field, 0) + 1
+
+    async def _call_model(img_path: str, model_key: str, model_name: str) -> Optional[str]:
+        nonlocal llava_attempts, llava_failures, llava_disabled
+        async with _semaphore(model_name):
+            # Re-check after waiting: the breaker may have tripped meanwhile
+            if not _llava_available():
+                return None
+            _count("misses")
+            llava_attempts += 1
+            # The request's own read timeout bounds the call; the slot is held
+            # until the worker thread returns, so in-flight requests never
+            # exceed the per-model limit
+            d = await asyncio.to_thread(describe_with_ollama_vision, img_path, model_key, image_timeout)
+
+        if not d:
+            llava_failures += 1
+            if llava_failures >= MAX_LLAVA_TIMEOUTS and not llava_disabled:
+                llava_disabled = True
+                logger.warning(
+                    "Disabling LLaVA for remaining images after %s failures",
+                    llava_failures,
+                )
+        return d
 
-        # Body text chunk (text between this heading and next)
-        start_offset = heading["char_offset"] + len(page_text[heading["char_offset"]:].split('\n', 1)[0]) + 1
+    async def _describe_ollama(img_path: str, model_key: str) -> Optional[str]:
+        if img_path not in image_hashes:
+            image_hashes[img_path] = (
+                await asyncio.to_thread(hash_image_file, img_path) if vision_cache.enabled else None
+            )
+        content_hash = image_hashes[img_path]
+        model_name = resolve_ollama_vision_model(model_key)
+
+        cached = await asyncio.to_thread(vision_cache.get, content_hash, model_name)
+        if cached:
+            _count("hits")
+            return cached
+
+        key = (content_hash, model_name) if content_hash else None
+        if key is not None and key in inflight:
+            # Identical image already being described - share that result
+            d = await asyncio.shield(inflight[key])
+            if d:
+                _count("hits")
+            return d
+
+        if not _llava_available():
+            return None
 
-        # Find end offset (start of next heading or end of page)
-        if idx + 1 < len(headings):
-            end_offset = headings[idx + 1]["char_offset"]
+        pending = asyncio.get_running_loop().create_future() if key is not None else None
+        if key is not None:
+            inflight[key] = pending
+        d = None
+        try:
+            d = await _call_model(img_path, model_key, model_name)
+            if d:
+                await asyncio.to_thread(vision_cache.put, content_hash, model_name, d)
+        finally:
+            if key is not None:
+                inflight.pop(key, None)
+                pending.set_result(d)
+        return d
+
+    async def _describe_image(img_item) -> str:
+        # Handle both legacy (string path) and position-aware (dict) formats
+        if isinstance(img_item, dict):
+            # Position-aware format: extract storage_path from dictionary
+            img_path = img_item.get("storage_path", "")
         else:
-            end_offset = len(page_text)
-
-        body_text = page_text[start_offset:end_offset].strip()
-
-        if body_text:
-            chunks.append({
-                "chunk_type": "body_text",
-                "page_number": page_num,
-                "parent_heading": heading_text,
-                "heading_text": heading_text,
-                "heading_level": heading["level"],
-                "content": body_text,
-                "start_char_offset": start_offset,
-                "end_char_offset": end_offset
-            })
-
-    return chunks
-
+            # Legacy format: img_item is already the path string
+            img_path = img_item
+
+        if not img_path:
+            logger.warning(f"Skipping image with no path: {img_item}")
+            return "No image path available"
+
+        if run_all_models:
+            all_desc = {}
+            for ollama_key in ["llava_7b", "llava_13b"]:
+                if ollama_key in enabled_models and vision_flags.get(ollama_key, False):
+                    d = await _describe_ollama(img_path, ollama_key)
+                    if d:
+                        all_desc[f"LLaVA_{ollama_key}"] = d
+
+            if not all_desc:
+                d = await _describe_ollama(img_path, "llava_7b")
+                if d:
+                    all_desc["LLaVA_llava_7b"] = d
+
+            if "enhanced_local" in enabled_models and vision_flags.get("enhanced_local", False):
+                d = await asyncio.to_thread(enhanced_local_image_analysis, img_path)
+                if d:
+                    all_desc["Enhanced Local"] = d
+
+            all_desc["Basic Fallback"] = await asyncio.to_thread(basic_image_analysis, img_path)
+            return create_combined_description(all_desc, Path(img_path).name)
+
+        d = None
+        for ollama_key in ["llava_7b", "llava_13b"]:
+            if ollama_key in enabled_models and vision_flags.get(ollama_key, False):
+                d = await _describe_ollama(img_path, ollama_key)
+                if d:
+                    break
+
+        if not d:
+            d = await _describe_ollama(img_path, "llava_7b")
+
+        if not d and "enhanced_local" in enabled_models and vision_flags.get("enhanced_local", False):
+            d = await asyncio.to_thread(enhanced_local_image_analysis, img_path)
+
+        return d or await asyncio.to_thread(basic_image_analysis, img_path)
+
+    # Describe all images of all pages concurrently, preserving per-page order
+    page_results = await asyncio.gather(*(
+        asyncio.gather(*(_describe_image(img_item) for img_item in page["images"]))
+        for page in pages_data
+    ))
+    for page, descs in zip(pages_data, page_results):
+        page["image_descriptions"] = list(descs)
+    return pages_data
 
 def heading_based_chunking(
     pdf_path: str,
     document_id: str,
     enable_vision: bool = True,
     run_all_models: bool = False,
-    selected_models: set = None
+    selected_models: set = None,
+    parsed: Optional[ParsedPDF] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: int = 0
 ) -> tuple:
     """
     Extract chunks separated by heading and body text.
@@ -797,64 +765,44 @@ def heading_based_chunking(
         enable_vision: Whether to enable vision models for image description
         run_all_models: Whether to run all available vision models
         selected_models: Set of selected vision model keys
+        parsed: Pre-parsed PDF; when given, its page text is used and the
+            file is not reopened
+        max_tokens: Split body text longer than this many tokens into
+            sub-chunks (None = no splitting)
+        overlap_tokens: Tokens shared by consecutive sub-chunks
 
     Returns:
         Tuple of (chunks, images) where:
         - chunks: List of chunk dictionaries with heading/body separation
         - images: List of all extracted images across pages
     """
-    import pdfplumber
-
     if selected_models is None:
         selected_models = {"llava_7b"}
 
-    chunks = []
     all_images = []
-    chunk_index = 0  # Track chunk index for downstream compatibility
+    executor = get_page_pool()
 
     logger.info(f"Starting heading-based chunking for {pdf_path}")
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                # Extract text from page
-                page_text = page.extract_text() or ""
-
-                if not page_text.strip():
-                    logger.warning(f"Page {page_num} has no extractable text")
-                    # Still create a minimal chunk to preserve page structure
-                    chunks.append({
-                        "chunk_type": "body_text",
-                        "page_number": page_num,
-                        "heading_text": "",
-                        "heading_level": 0,
-                        "parent_heading": "",
-                        "content": f"[Page {page_num} - no extractable text]",
-                        "start_char_offset": 0,
-                        "end_char_offset": 0,
-                        "document_id": document_id,
-                        "chunk_index": chunk_index,
-                        "images": [],
-                        "has_images": False
-                    })
-                    chunk_index += 1
-                    continue
-
-                # Extract structured chunks with headings
-                page_chunks = extract_structured_chunks(page_text, page_num)
-
-                logger.info(f"Page {page_num}: Extracted {len(page_chunks)} chunks "
-                           f"({sum(1 for c in page_chunks if c['chunk_type'] == 'heading')} headings)")
-
-                # Add document_id and chunk_index to each chunk
-                for chunk in page_chunks:
-                    chunk["document_id"] = document_id
-                    chunk["chunk_index"] = chunk_index
-                    chunk["images"] = []
-                    chunk["has_images"] = False
-                    chunk_index += 1
+        if parsed is None:
+            parsed = parse_pdf(pdf_path, document_id, executor=executor, shard_size=PDF_PAGE_SHARD_SIZE)
+
+        # Pages are chunked independently (sharded across the page pool when
+        # enabled) and merged in order with a global chunk_index
+        chunks = chunk_pages(
+            [(p.page_number, p.text) for p in parsed.pages],
+            document_id,
+            executor=executor,
+            shard_size=PDF_PAGE_SHARD_SIZE
+        )
 
-                chunks.extend(page_chunks)
+        if max_tokens:
+            before = len(chunks)
+            chunks = split_oversized_chunks(chunks, max_tokens, overlap_tokens, embedding_model.count_tokens)
+            if len(chunks) != before:
+                logger.info(f"Sub-chunking split oversized bodies: {before} -> {len(chunks)} chunks "
+                            f"(max {max_tokens} tokens, overlap {overlap_tokens})")
 
         logger.info(f"Heading-based chunking completed: {len(chunks)} total chunks")
 
@@ -1016,7 +964,8 @@ def extract_images_with_position_support(
     filename: str,
     temp_dir: str,
     doc_id: str,
-    use_positions: bool = True
+    use_positions: bool = True,
+    parsed: Optional[ParsedPDF] = None
 ) -> List[Dict[str, Any]]:
     """
     Wrapper that supports both legacy and position-aware extraction.
@@ -1027,6 +976,7 @@ def extract_images_with_position_support(
         temp_dir: Temporary directory
         doc_id: Document ID
         use_positions: If True, use position-aware extraction
+        parsed: Pre-parsed PDF shared with chunking (skips re-reading the file)
 
     Returns:
         List of page data with images
@@ -1039,7 +989,8 @@ def extract_images_with_position_support(
                 filename=filename,
                 temp_dir=temp_dir,
                 doc_id=doc_id,
-                images_dir=IMAGES_DIR
+                images_dir=IMAGES_DIR,
+                parsed=parsed
             )
 
             # Add text anchors for better position matching
@@ -1060,8 +1011,11 @@ def extract_images_with_position_support(
     return extract_and_store_images_from_file(file_content, filename, temp_dir, doc_id)
 
 
-def extract_text_by_page(file_content: bytes, filename: str, temp_dir: str) -> List[Dict]:
-    """Extract text per page from a PDF using PyPDF2."""
+def extract_text_by_page(file_content: bytes, filename: str, temp_dir: str, parsed: Optional[ParsedPDF] = None) -> List[Dict]:
+    """Extract text per page from a PDF using PyPDF2, or from a pre-parsed PDF if given."""
+    if parsed is not None:
+        return [{"page": p.page_number, "text": p.text} for p in parsed.pages]
+
     texts: List[Dict] = []
     try:
         temp_pdf_path = os.path.join(temp_dir, filename)
@@ -1510,6 +1464,19 @@ def process_document_with_context_multi_model(file_content: bytes,
 
 
 
+def resolve_chunk_token_limits(chunk_size: int, chunk_overlap: int) -> Tuple[int, int]:
+    """
+    Map a request's chunk_size/chunk_overlap to PDF sub-chunk token limits.
+
+    Both are read as tokens. The size is capped at what the embedding model
+    embeds without truncation, and the overlap is kept under half a chunk.
+    """
+    model_limit = embedding_model.max_tokens
+    max_tokens = min(chunk_size, model_limit) if chunk_size > 0 else model_limit
+    overlap_tokens = max(0, min(chunk_overlap, max_tokens // 2))
+    return max_tokens, overlap_tokens
+
+
 def create_chunks_with_position_support(
     ext: str,
     pages_data: List[Dict],
@@ -1521,7 +1488,8 @@ def create_chunks_with_position_support(
     chunk_size: int,
     chunk_overlap: int,
     enable_ocr: bool,
-    use_positions: bool = True
+    use_positions: bool = True,
+    parsed: Optional[ParsedPDF] = None
 ) -> List[Dict[str, Any]]:
     """
     Create chunks with optional position preservation.
@@ -1537,10 +1505,11 @@ def create_chunks_with_position_support(
         tmp_dir: Temporary directory
         openai_api_key: OpenAI API key
         vision_models: List of vision models to use
-        chunk_size: Chunk size for text splitting
-        chunk_overlap: Chunk overlap for text splitting
+        chunk_size: Chunk size for text splitting (tokens per sub-chunk for PDFs)
+        chunk_overlap: Chunk overlap for text splitting (tokens for PDFs)
         enable_ocr: Whether OCR is enabled
         use_positions: Whether to use position-aware chunking
+        parsed: Pre-parsed PDF shared with image extraction
 
     Returns:
         List of chunk dictionaries
@@ -1554,13 +1523,18 @@ def create_chunks_with_position_support(
             with open(temp_pdf_path, 'wb') as f:
                 f.write(content)
 
-        # Use heading-based chunking
+        # Use heading-based chunking; long heading bodies are sub-chunked to the
+        # request's chunk_size/chunk_overlap (in tokens)
+        max_tokens, overlap_tokens = resolve_chunk_token_limits(chunk_size, chunk_overlap)
         chunks, _ = heading_based_chunking(
             pdf_path=temp_pdf_path,
             document_id=fname,
             enable_vision=len(vision_models) > 0,
             run_all_models=len(vision_models) > 1,
-            selected_models=set(vision_models)
+            selected_models=set(vision_models),
+            parsed=parsed,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens
         )
         logger.info(f"Heading-based chunking created {len(chunks)} chunks for {fname}")
     else:
@@ -1600,6 +1574,426 @@ def create_chunks_with_position_support(
     return chunks
 
 
+# Number of chunks embedded and written to ChromaDB per round-trip
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+
+# Stored on every chunk; bump whenever chunking output changes so incremental
+# re-ingest re-chunks files whose bytes have not changed
+CHUNKING_VERSION = "3"
+
+# Metadata keys that change on every ingest and are left out of content_hash
+VOLATILE_METADATA_KEYS = {"timestamp", "job_id", "document_id", "chunk_id", "text_hash", "content_hash"}
+
+
+def build_chunk_metadata(
+    c: Dict[str, Any],
+    document_id: str,
+    fname: str,
+    ext: str,
+    total_chunks: int,
+    store_images: bool,
+    job_id: str = "",
+    source_hash: str = "",
+    chunking_params: str = ""
+) -> Dict[str, Any]:
+    """
+    Build the ChromaDB metadata dict for a single chunk.
+
+    ChromaDB only accepts str, int, float and bool values (no None), so the
+    result is validated and coerced before being returned.
+    """
+    text = c["content"]
+    meta = {
+        "document_id": document_id,
+        "document_name": fname,
+        "file_type": ext,
+        "chunk_index": c.get("chunk_index", 0),
+        "total_chunks": total_chunks,
+        # New structure-preserving metadata - ensuring no None values
+        "section_title": c.get("section_title", ""),
+        "section_type": c.get("section_type", "chunk"),
+        "page_number": int(c.get("page_number", -1)),  # Force int, use -1 instead of None
+        "section_number": c.get("section_number", -1),  # Use -1 instead of None
+        # NEW HEADING METADATA (Phase 1)
+        "chunk_type": c.get("chunk_type", "page"),  # 'heading' or 'body_text' or 'page' (legacy)
+        "heading_text": c.get("heading_text", ""),
+        "heading_level": int(c.get("heading_level", 0)),
+        "parent_heading": c.get("parent_heading", ""),
+        "heading_index_on_page": int(c.get("heading_index_on_page", 0)),
+        # Sub-chunk position within an oversized heading body (count 0 = not split)
+        "sub_chunk_index": int(c.get("sub_chunk_index", 0)),
+        "sub_chunk_count": int(c.get("sub_chunk_count", 0)),
+        "sub_chunk_start": int(c.get("sub_chunk_start", 0)),
+        "sub_chunk_end": int(c.get("sub_chunk_end", 0)),
+        # Position information
+        "start_char_offset": int(c.get("start_char_offset", 0)),
+        "end_char_offset": int(c.get("end_char_offset", len(text))),
+        # Image metadata
+        "has_images": c.get("has_images", False),
+        "image_count": len(c.get("images", [])),
+        "start_position": c.get("start_position", 0),
+        "end_position": c.get("end_position", len(text)),
+        "images_stored": store_images,
+        "timestamp": datetime.now().isoformat(),
+        # Incremental re-ingest bookkeeping
+        "source_hash": source_hash,
+        "chunking_version": CHUNKING_VERSION,
+        "chunking_params": chunking_params,
+    }
+
+    # Safe extraction of image metadata (handles both string paths and dict objects)
+    images_list = c.get("images", [])
+    filenames = []
+    paths = []
+    descs = []
+
+    for img in images_list:
+        if isinstance(img, dict):
+            filenames.append(img.get("filename", ""))
+            paths.append(img.get("storage_path", ""))
+            descs.append(img.get("description", ""))
+        elif isinstance(img, str):
+            # Legacy: img is a path string (Path is imported at top of file)
+            filenames.append(Path(img).name)
+            paths.append(img)
+            descs.append("")
+        else:
+            logger.warning(f"Unexpected image type: {type(img)}")
+            continue
+
+    meta["image_filenames"]     = json.dumps(filenames)
+    meta["image_storage_paths"] = json.dumps(paths)
+    meta["image_descriptions"]  = json.dumps(descs)
+
+    # Store image positions if available (from position-aware chunking)
+    if "image_positions" in c:
+        meta["image_positions"] = json.dumps(c["image_positions"])
+        logger.debug(f"[{job_id}] Stored {len(c['image_positions'])} image positions for chunk {c.get('chunk_index', 0)}")
+    else:
+        # Legacy chunks without position data
+        meta["image_positions"] = json.dumps([])
+
+    # Derive which vision models were used from description prefixes
+    models_used = set()
+    for d in descs:
+        if not d:
+            continue
+        ld = d.lower()
+        if "llava" in ld:
+            models_used.add("llava")
+        elif ld.startswith("ollama vision"):
+            models_used.add("ollama")
+        elif ld.startswith("enhanced local"):
+            models_used.add("enhanced_local")
+        elif ld.startswith("basic fallback"):
+            models_used.add("basic")
+    meta["vision_models_used"] = json.dumps(sorted(models_used))
+    meta["openai_api_used"] = ("openai" in models_used)
+    meta["ocr_used"] = bool(c.get("ocr_used", False))
+
+    # Validate metadata to ensure ChromaDB compatibility (no None values)
+    validated_meta = {}
+    for key, value in meta.items():
+        if value is None:
+            logger.warning(f"[{job_id}] Replacing None value for key '{key}' with empty string")
+            validated_meta[key] = ""
+        elif isinstance(value, (str, int, float, bool)):
+            validated_meta[key] = value
+        else:
+            logger.warning(f"[{job_id}] Converting non-standard type {type(value)} for key '{key}' to string")
+            validated_meta[key] = str(value)
+    return validated_meta
+
+
+def write_chunk_batches(
+    coll,
+    records: List[Dict[str, Any]],
+    batch_size: int = INGEST_BATCH_SIZE,
+    on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    on_failed: Optional[Callable[[Dict[str, Any], Exception], None]] = None,
+    job_id: str = ""
+) -> Tuple[int, int]:
+    """
+    Embed and write chunk records to ChromaDB in batches.
+
+    Each batch is encoded with a single call in the collection's embedding
+    space (see embedding_service) and written with a single upsert. A failing batch is bisected until the bad
+    chunk is isolated, so one broken chunk does not take its neighbours down
+    with it. Upsert (rather than add) keeps the retried halves idempotent.
+    Written chunks are also added to the collection's lexical (BM25) index.
+
+    Args:
+        coll: ChromaDB collection to write to
+        records: List of {"id", "text", "metadata"} dicts
+        batch_size: Number of chunks per encode/upsert round-trip
+        on_written: Called with each batch that was written successfully
+        on_failed: Called with each single record that could not be written
+        job_id: Job identifier used for log messages
+
+    Returns:
+        Tuple of (written_count, failed_count)
+    """
+    written = 0
+    failed = 0
+    lexical_index = get_lexical_index(coll.name)
+
+    def _flush(batch: List[Dict[str, Any]]):
+        nonlocal written, failed
+        try:
+            texts = [r["text"] for r in batch]
+            embeddings = embedding_model.encode_for_collection(
+                coll,
+                texts,
+                batch_size=len(texts)
+            ).tolist()
+            coll.upsert(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=[r["metadata"] for r in batch],
+                ids=[r["id"] for r in batch],
+            )
+        except EmbeddingSpaceMismatch:
+            # Affects every batch equally; bisecting cannot help
+            raise
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"[{job_id}] Error writing chunk {batch[0]['id']}: {e}")
+                failed += 1
+                if on_failed:
+                    on_failed(batch[0], e)
+                return
+            mid = len(batch) // 2
+            logger.warning(f"[{job_id}] Batch of {len(batch)} chunks failed ({e}), bisecting")
+            _flush(batch[:mid])
+            _flush(batch[mid:])
+            return
+
+        if lexical_index is not None:
+            try:
+                lexical_index.upsert([r["id"] for r in batch], [r["text"] for r in batch])
+            except Exception as e:
+                logger.warning(f"[{job_id}] Lexical index update failed for {len(batch)} chunks: {e}")
+        bump_collection_version(coll.name)
+
+        written += len(batch)
+        if on_written:
+            on_written(batch)
+
+    batch_size = max(1, batch_size)
+    for start in range(0, len(records), batch_size):
+        _flush(records[start:start + batch_size])
+
+    return written, failed
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of a source file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def add_content_hashes(meta: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """
+    Stamp a chunk's metadata with text_hash (the embedded text only) and
+    content_hash (text plus non-volatile metadata). Incremental re-ingest
+    compares these to decide whether a chunk needs re-embedding, a metadata
+    update, or nothing at all.
+    """
+    stable = {k: v for k, v in meta.items() if k not in VOLATILE_METADATA_KEYS}
+    meta["text_hash"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    meta["content_hash"] = hashlib.sha256(
+        (meta["text_hash"] + json.dumps(stable, sort_keys=True)).encode("utf-8")
+    ).hexdigest()
+    return meta
+
+
+def resolve_stored_document_id(coll, fname: str) -> Optional[str]:
+    """
+    ID of the stored document named fname, or None if there is none. Also
+    None if several stored documents share the name: an upload is never
+    merged into one of them by filename alone (pass its document_id instead).
+    """
+    ids = {
+        d["document_id"] for d in find_documents(coll, fname)
+        if d.get("document_name") == fname and d.get("document_id")
+    }
+    if len(ids) > 1:
+        logger.warning(f"{len(ids)} stored documents are named {fname}; ingesting it as a new document")
+        return None
+    return next(iter(ids), None)
+
+
+def load_stored_document(coll, document_id: str) -> Dict[str, Dict[str, Any]]:
+    """Fetch the stored chunk metadata of a document: {chunk_id: metadata}."""
+    result = coll.get(where={"document_id": document_id}, include=["metadatas"])
+    return dict(zip(result.get("ids", []), result.get("metadatas", [])))
+
+
+def hash_chunking_params(chunk_size: int, chunk_overlap: int, vision_models: List[str], enable_ocr: bool) -> str:
+    """
+    SHA-256 hex digest of the request settings that shape a document's
+    chunks: chunk_size/chunk_overlap as given (text chunking) and as resolved
+    to PDF token limits (which also depend on the embedding model), the
+    vision models and the OCR flag.
+    """
+    max_tokens, overlap_tokens = resolve_chunk_token_limits(chunk_size, chunk_overlap)
+    params = {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "max_tokens": max_tokens,
+        "overlap_tokens": overlap_tokens,
+        "vision_models": sorted(vision_models or []),
+        "enable_ocr": bool(enable_ocr),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_document_unchanged(stored: Dict[str, Dict[str, Any]], source_hash: str, chunking_params: str) -> bool:
+    """True if every stored chunk came from these bytes with the current chunker and settings."""
+    return bool(stored) and all(
+        m.get("source_hash") == source_hash
+        and m.get("chunking_version") == CHUNKING_VERSION
+        and m.get("chunking_params") == chunking_params
+        for m in stored.values()
+    )
+
+
+def diff_chunk_records(
+    records: List[Dict[str, Any]],
+    stored: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Diff freshly built chunk records against the stored chunk metadata.
+
+    Chunk IDs are positional, so an edit early in a document shifts the IDs
+    of every later chunk. Stored chunks are therefore also indexed by
+    text_hash: a record whose text is stored under another ID keeps that
+    chunk's embedding instead of being re-embedded.
+
+    Returns a dict with:
+        embed: records whose text is not stored anywhere (re-embed + upsert)
+        reuse: records whose text is stored under a different ID; each
+            carries "source_id", the stored chunk whose embedding to copy
+        update: records whose text is unchanged but metadata (including
+            the chunking settings) differs
+        unchanged: records identical to what is stored
+        stale_ids: stored chunk IDs no longer produced by chunking
+    """
+    by_text_hash: Dict[str, str] = {}
+    for chunk_id, meta in stored.items():
+        text_hash = (meta or {}).get("text_hash")
+        if text_hash:
+            by_text_hash.setdefault(text_hash, chunk_id)
+
+    embed, reuse, update, unchanged = [], [], [], []
+    for r in records:
+        old = stored.get(r["id"])
+        text_hash = r["metadata"]["text_hash"]
+        if old is None or old.get("text_hash") != text_hash:
+            source_id = by_text_hash.get(text_hash)
+            if source_id is None:
+                embed.append(r)
+            else:
+                reuse.append({**r, "source_id": source_id})
+        elif (old.get("content_hash") != r["metadata"]["content_hash"]
+              or old.get("chunking_params") != r["metadata"].get("chunking_params")):
+            update.append(r)
+        else:
+            unchanged.append(r)
+
+    new_ids = {r["id"] for r in records}
+    stale_ids = [chunk_id for chunk_id in stored if chunk_id not in new_ids]
+    return {"embed": embed, "reuse": reuse, "update": update, "unchanged": unchanged, "stale_ids": stale_ids}
+
+
+def write_reused_chunks(coll, records: List[Dict[str, Any]], job_id: str = "") -> List[Dict[str, Any]]:
+    """
+    Upsert chunk records under new IDs with the stored embeddings of their
+    "source_id" chunks (same text, so the same vector), skipping the encoder.
+    Must run before stale chunks are deleted, since sources may be among them.
+
+    Returns the records that could not be written this way (source embedding
+    missing or the upsert failed); callers embed those normally.
+    """
+    if not records:
+        return []
+    source_ids = list(dict.fromkeys(r["source_id"] for r in records))
+    try:
+        result = coll.get(ids=source_ids, include=["embeddings"])
+        ids = result.get("ids")
+        embeddings = result.get("embeddings")
+        embedding_by_id = dict(zip(ids if ids is not None else [], embeddings if embeddings is not None else []))
+    except Exception as e:
+        logger.warning(f"[{job_id}] Could not fetch stored embeddings for {len(source_ids)} chunks: {e}")
+        return records
+
+    ready = [r for r in records if embedding_by_id.get(r["source_id"]) is not None]
+    missing = [r for r in records if embedding_by_id.get(r["source_id"]) is None]
+    if not ready:
+        return missing
+    try:
+        coll.upsert(
+            documents=[r["text"] for r in ready],
+            embeddings=[list(embedding_by_id[r["source_id"]]) for r in ready],
+            metadatas=[r["metadata"] for r in ready],
+            ids=[r["id"] for r in ready],
+        )
+    except Exception as e:
+        logger.warning(f"[{job_id}] Upsert of {len(ready)} reused chunks failed ({e}), re-embedding them")
+        return records
+
+    lexical_index = get_lexical_index(coll.name)
+    if lexical_index is not None:
+        try:
+            lexical_index.upsert([r["id"] for r in ready], [r["text"] for r in ready])
+        except Exception as e:
+            logger.warning(f"[{job_id}] Lexical index update failed for {len(ready)} chunks: {e}")
+    bump_collection_version(coll.name)
+    return missing
+
+
+def spool_job_dir(job_id: str) -> str:
+    """Return (and create) the spool directory for an ingestion job."""
+    job_dir = os.path.join(INGEST_SPOOL_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    return job_dir
+
+
+def cleanup_spooled_job(job_id: str) -> None:
+    """Remove a job's spooled uploads once ingestion has finished."""
+    import shutil
+    job_dir = os.path.join(INGEST_SPOOL_DIR, job_id)
+    if os.path.isdir(job_dir):
+        shutil.rmtree(job_dir, ignore_errors=True)
+        logger.info(f"[{job_id}] Removed spooled uploads at {job_dir}")
+
+
+def _job_api_key_key(job_id: str) -> str:
+    return f"job:{job_id}:openai_api_key"
+
+
+def stash_job_api_key(job_id: str, api_key: Optional[str]) -> None:
+    """
+    Hand a per-request API key to the job's worker through a short-lived
+    Redis key, so the secret never appears in Celery task arguments.
+    """
+    if api_key:
+        redis_client.set(_job_api_key_key(job_id), api_key, ex=INGEST_API_KEY_TTL)
+
+
+def load_job_api_key(job_id: str) -> Optional[str]:
+    """The job's per-request API key, or None if none was given (or it expired)."""
+    return redis_client.get(_job_api_key_key(job_id))
+
+
+def discard_job_api_key(job_id: str) -> None:
+    """Delete a job's per-request API key once ingestion has finished."""
+    try:
+        redis_client.delete(_job_api_key_key(job_id))
+    except Exception as e:
+        # The key still expires after INGEST_API_KEY_TTL
+        logger.warning(f"[{job_id}] Could not delete the job's API key: {e}")
+
+
 def run_ingest_job(
     job_id: str,
     payloads: List[Dict[str, Any]],
@@ -1610,23 +2004,50 @@ def run_ingest_job(
     vision_models: List[str],
     openai_api_key: Optional[str],
     enable_ocr: bool,
+    incremental: bool = False,
 ):
+    """
+    Ingest a batch of documents into a ChromaDB collection.
+
+    Each payload is {"filename", "path"} for uploads spooled to disk (the
+    Celery path) or {"filename", "content"} with raw bytes, optionally with
+    the "document_id" of a stored document to re-ingest. Progress is
+    written to job:{job_id}:progress and job:{job_id}:doc:{i}.
+
+    With incremental=True, a document already in the collection (the one
+    with the payload's "document_id", else the only stored document with
+    that filename) keeps its document ID; its chunks alone are diffed. It is skipped outright if its bytes, the
+    chunking version and the chunking settings (chunk size/overlap, vision
+    models, OCR) are unchanged; otherwise it is re-chunked and only
+    new or changed chunks are embedded, and stale chunk IDs are deleted.
+
+    Progress writes are buffered by a ProgressReporter and sent in Redis
+    pipelines; status transitions are flushed immediately.
+    """
     # initialize a hash: status + zeroed counters
     progress_key = f"job:{job_id}:progress"
-    redis_client.set(job_id, "running")
+    progress = ProgressReporter(redis_client, name=f"ingest job {job_id}")
+    progress.set(job_id, "running")
 
     # initialize the hash strictly on the "progress" key
-    redis_client.hset(progress_key, mapping={
+    progress.hset(progress_key, mapping={
         "total_chunks":     0,
         "processed_chunks": 0,
         "total_documents": len(payloads),
-        "processed_documents": 0
+        "processed_documents": 0,
+        "vision_cache_hits": 0,
+        "vision_cache_misses": 0,
+        "documents_unchanged": 0,
+        "chunks_embedded": 0,
+        "chunks_metadata_updated": 0,
+        "chunks_unchanged": 0,
+        "chunks_deleted": 0
     })
 
     # Initialize document status tracking
     for i, payload in enumerate(payloads):
         doc_status_key = f"job:{job_id}:doc:{i}"
-        redis_client.hset(doc_status_key, mapping={
+        progress.hset(doc_status_key, mapping={
             "filename": payload["filename"],
             "status": "pending",  # pending, processing, completed, failed
             "chunks_total": 0,
@@ -1635,10 +2056,14 @@ def run_ingest_job(
             "end_time": "",
             "error_message": ""
         })
+    progress.flush()
 
     # decide thread-pool size
     max_workers = min(4, os.cpu_count() or 1)
 
+    # Same for every document in the job; stored on each chunk for incremental re-ingest
+    chunking_params = hash_chunking_params(chunk_size, chunk_overlap, vision_models, enable_ocr)
+
     def get_chromadb_collection():
         # Use the module-level chroma_client (HttpClient is thread-safe)
         return chroma_client.get_collection(name=collection_name)
@@ -1646,28 +2071,78 @@ def run_ingest_job(
     def process_one(item_with_index):
         item, doc_index = item_with_index
         fname = item["filename"]
-        content = item["content"]
-        document_id =  uuid.uuid4().hex 
+        # Derive the document ID from the job so a redelivered task upserts the
+        # same chunk IDs instead of duplicating the document
+        document_id = uuid.uuid5(uuid.NAMESPACE_URL, f"ingest:{job_id}:{doc_index}").hex
         doc_status_key = f"job:{job_id}:doc:{doc_index}"
 
         # Update document status to processing
-        redis_client.hset(doc_status_key, mapping={
+        progress.hset(doc_status_key, mapping={
             "status": "processing",
             "start_time": datetime.now().isoformat()
         })
+        progress.flush()
 
         try:
+            # Spooled uploads are passed by path; raw bytes are still accepted
+            content = item.get("content")
+            if content is None:
+                with open(item["path"], "rb") as f:
+                    content = f.read()
+
+            source_hash = hash_bytes(content)
+            stored: Dict[str, Dict[str, Any]] = {}
+            if incremental:
+                coll = get_chromadb_collection()
+                stored_document_id = item.get("document_id") or resolve_stored_document_id(coll, fname)
+                if stored_document_id:
+                    stored = load_stored_document(coll, stored_document_id)
+                if is_document_unchanged(stored, source_hash, chunking_params):
+                    logger.info(f"[{job_id}] {fname} unchanged ({len(stored)} chunks), skipping")
+                    progress.hset(doc_status_key, mapping={
+                        "status": "completed",
+                        "chunks_total": len(stored),
+                        "chunks_processed": len(stored),
+                        "end_time": datetime.now().isoformat()
+                    })
+                    progress.hincrby(progress_key, "total_chunks", len(stored))
+                    progress.hincrby(progress_key, "processed_chunks", len(stored))
+                    progress.hincrby(progress_key, "chunks_unchanged", len(stored))
+                    progress.hincrby(progress_key, "documents_unchanged", 1)
+                    progress.hincrby(progress_key, "processed_documents", 1)
+                    progress.flush()
+                    return fname
+                if stored_document_id:
+                    # Keep chunk IDs stable so unchanged chunks can be diffed in place
+                    document_id = stored_document_id
+
             ext = Path(fname).suffix.lower()
             # 1) extract images and process document within same temp directory
             with tempfile.TemporaryDirectory() as tmp_dir:
+                parsed = None
                 if ext == ".pdf":
+                    # Parse the PDF once; text, layout and images are shared by
+                    # extraction and chunking below
+                    temp_pdf_path = os.path.join(tmp_dir, fname)
+                    with open(temp_pdf_path, 'wb') as f:
+                        f.write(content)
+                    try:
+                        parsed = parse_pdf(
+                            temp_pdf_path, fname, IMAGES_DIR,
+                            executor=get_page_pool(),
+                            shard_size=PDF_PAGE_SHARD_SIZE
+                        )
+                    except Exception as e:
+                        logger.warning(f"[{job_id}] Single-pass parse failed for {fname}, using per-stage readers: {e}")
+
                     # Use position-aware extraction wrapper (falls back to legacy if needed)
                     pages_data = extract_images_with_position_support(
                         file_content=content,
                         filename=fname,
                         temp_dir=tmp_dir,
                         doc_id=fname,
-                        use_positions=True  # Can be controlled per-request if needed
+                        use_positions=True,  # Can be controlled per-request if needed
+                        parsed=parsed
                     )
 
                 elif ext == ".docx":
@@ -1683,18 +2158,50 @@ def run_ingest_job(
                     # txt, csv, pptx, etc → no images
                     pages_data = [{"page": 1, "images": [], "text": None}]
 
-                # 2) describe images
-                pages_data = asyncio.new_event_loop().run_until_complete(
+                # 2) describe images on the job's shared vision stage; this runs
+                # concurrently with chunking below since chunk text does not
+                # depend on the descriptions
+                cache_stats = {"hits": 0, "misses": 0}
+                describe_future = vision_stage.submit(
                     describe_images_for_pages(
                         pages_data,
                         api_key_override=openai_api_key,
                         run_all_models=len(vision_models) > 1,
                         enabled_models=set(vision_models),
                         vision_flags={m: (m in vision_models) for m in vision_models},
+                        cache_stats=cache_stats,
+                        stage=vision_stage,
                     )
                 )
 
-                # 2b) Merge descriptions back into image dicts for position-aware chunking
+                # 3) Build chunks using position-aware wrapper
+                try:
+                    chunks = create_chunks_with_position_support(
+                        ext=ext,
+                        pages_data=pages_data,
+                        fname=fname,
+                        content=content,
+                        tmp_dir=tmp_dir,
+                        openai_api_key=openai_api_key,
+                        vision_models=vision_models,
+                        chunk_size=chunk_size,
+                        chunk_overlap=chunk_overlap,
+                        enable_ocr=enable_ocr,
+                        use_positions=True,
+                        parsed=parsed
+                    )
+                except Exception:
+                    describe_future.cancel()
+                    raise
+
+                pages_data = describe_future.result()
+                if cache_stats["hits"] or cache_stats["misses"]:
+                    progress.hincrby(progress_key, "vision_cache_hits", cache_stats["hits"])
+                    progress.hincrby(progress_key, "vision_cache_misses", cache_stats["misses"])
+                    logger.info(f"[{job_id}] Vision cache for {fname}: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+                # 3b) Merge descriptions back into image dicts (shared by reference
+                # with position-aware chunks)
                 for page in pages_data:
                     images = page.get("images", [])
                     descriptions = page.get("image_descriptions", [])
@@ -1704,26 +2211,11 @@ def run_ingest_job(
                         if isinstance(img, dict) and i < len(descriptions):
                             img["description"] = descriptions[i]
 
-                # 3) Build chunks using position-aware wrapper
-                chunks = create_chunks_with_position_support(
-                    ext=ext,
-                    pages_data=pages_data,
-                    fname=fname,
-                    content=content,
-                    tmp_dir=tmp_dir,
-                    openai_api_key=openai_api_key,
-                    vision_models=vision_models,
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                    enable_ocr=enable_ocr,
-                    use_positions=True
-                )
-
                 # Validate chunks were created
                 if not chunks:
                     msg = f"No chunks created for {fname}, skipping document"
                     logger.error(msg)
-                    redis_client.hset(doc_status_key, mapping={
+                    progress.hset(doc_status_key, mapping={
                         "status": "failed",
                         "end_time": datetime.now().isoformat(),
                         "error_message": msg
@@ -1731,153 +2223,126 @@ def run_ingest_job(
                     # Raise to abort processing this document (continue is invalid here)
                     raise RuntimeError(msg)
 
-                # Update document chunk count
-                redis_client.hset(doc_status_key, "chunks_total", len(chunks))
+                # Update document chunk count and token-length distribution
+                token_stats = token_length_stats(
+                    embedding_model.count_tokens([c["content"] for c in chunks]),
+                    embedding_model.max_tokens
+                )
+                progress.hset(doc_status_key, mapping={
+                    "chunks_total": len(chunks),
+                    "token_stats": json.dumps(token_stats)
+                })
+                logger.info(f"[{job_id}] Chunk tokens for {fname}: {token_stats}")
 
                 # bump our total_chunks counter by however many we're about to insert
-                redis_client.hincrby(progress_key, "total_chunks", len(chunks))
+                progress.hincrby(progress_key, "total_chunks", len(chunks))
                 coll = get_chromadb_collection()
-                
+
+                # build metadata up front; a chunk with bad metadata is skipped on its own
+                records = []
                 for c in chunks:
                     try:
-                        text = c["content"]
-                        # Debug: Log available fields in chunk
-                        logger.debug(f"[{job_id}] Chunk {c.get('chunk_index', 'unknown')} fields: {list(c.keys())}")
-                        # build metadata dict for this chunk - ChromaDB only accepts str, int, float, bool (NO None values)
-                        meta = {
-                            "document_id": document_id,
-                            "document_name": fname,
-                            "file_type": ext,
-                            "chunk_index": c.get("chunk_index", 0),
-                            "total_chunks": len(chunks),
-                            # New structure-preserving metadata - ensuring no None values
-                            "section_title": c.get("section_title", ""),
-                            "section_type": c.get("section_type", "chunk"),
-                            "page_number": int(c.get("page_number", -1)),  # Force int, use -1 instead of None
-                            "section_number": c.get("section_number", -1),  # Use -1 instead of None
-                            # NEW HEADING METADATA (Phase 1)
-                            "chunk_type": c.get("chunk_type", "page"),  # 'heading' or 'body_text' or 'page' (legacy)
-                            "heading_text": c.get("heading_text", ""),
-                            "heading_level": int(c.get("heading_level", 0)),
-                            "parent_heading": c.get("parent_heading", ""),
-                            "heading_index_on_page": int(c.get("heading_index_on_page", 0)),
-                            # Position information
-                            "start_char_offset": int(c.get("start_char_offset", 0)),
-                            "end_char_offset": int(c.get("end_char_offset", len(text))),
-                            # Image metadata
-                            "has_images": c.get("has_images", False),
-                            "image_count": len(c.get("images", [])),
-                            "start_position": c.get("start_position", 0),
-                            "end_position": c.get("end_position", len(text)),
-                            "images_stored": store_images,
-                            "timestamp": datetime.now().isoformat(),
-                        }
-                        
-                        # Safe extraction of image metadata (handles both string paths and dict objects)
-                        images_list = c.get("images", [])
-                        filenames = []
-                        paths = []
-                        descs = []
-
-                        for img in images_list:
-                            if isinstance(img, dict):
-                                filenames.append(img.get("filename", ""))
-                                paths.append(img.get("storage_path", ""))
-                                descs.append(img.get("description", ""))
-                            elif isinstance(img, str):
-                                # Legacy: img is a path string (Path is imported at top of file)
-                                filenames.append(Path(img).name)
-                                paths.append(img)
-                                descs.append("")
-                            else:
-                                logger.warning(f"Unexpected image type: {type(img)}")
-                                continue
-
-                        meta["image_filenames"]     = json.dumps(filenames)
-                        meta["image_storage_paths"] = json.dumps(paths)
-                        meta["image_descriptions"]  = json.dumps(descs)
-
-                        # Store image positions if available (from position-aware chunking)
-                        if "image_positions" in c:
-                            meta["image_positions"] = json.dumps(c["image_positions"])
-                            logger.debug(f"[{job_id}] Stored {len(c['image_positions'])} image positions for chunk {c.get('chunk_index', 0)}")
-                        else:
-                            # Legacy chunks without position data
-                            meta["image_positions"] = json.dumps([])
-
-                        # Derive which vision models were used from description prefixes
-                        models_used = set()
-                        for d in descs:
-                            if not d:
-                                continue
-                            ld = d.lower()
-                            if "llava" in ld:
-                                models_used.add("llava")
-                            elif ld.startswith("ollama vision"):
-                                models_used.add("ollama")
-                            elif ld.startswith("enhanced local"):
-                                models_used.add("enhanced_local")
-                            elif ld.startswith("basic fallback"):
-                                models_used.add("basic")
-                        meta["vision_models_used"] = json.dumps(sorted(models_used))
-                        meta["openai_api_used"] = ("openai" in models_used)
-                        meta["ocr_used"] = bool(c.get("ocr_used", False))
-                        
-                        # Validate metadata to ensure ChromaDB compatibility (no None values)
-                        validated_meta = {}
-                        for key, value in meta.items():
-                            if value is None:
-                                logger.warning(f"[{job_id}] Replacing None value for key '{key}' with empty string")
-                                validated_meta[key] = ""
-                            elif isinstance(value, (str, int, float, bool)):
-                                validated_meta[key] = value
-                            else:
-                                logger.warning(f"[{job_id}] Converting non-standard type {type(value)} for key '{key}' to string")
-                                validated_meta[key] = str(value)
-                        meta = validated_meta
-                        
-                        # embed one chunk at a time
-                        emb = embedding_model.encode([text], 
-                                                    convert_to_numpy=True, 
-                                                    batch_size=1).tolist()
+                        meta = build_chunk_metadata(
+                            c,
+                            document_id=document_id,
+                            fname=fname,
+                            ext=ext,
+                            total_chunks=len(chunks),
+                            store_images=store_images,
+                            job_id=job_id,
+                            source_hash=source_hash,
+                            chunking_params=chunking_params
+                        )
                         chunk_id = f"{document_id}_chunk_{c.get('chunk_index', 0)}"
                         meta["chunk_id"] = chunk_id
-                        coll.add(
-                            documents=[text],
-                            embeddings=emb,
-                            metadatas=[meta],
-                            ids=[chunk_id],
-                        )
-                        redis_client.hincrby(progress_key, "processed_chunks", 1)
-                        redis_client.hincrby(doc_status_key, "chunks_processed", 1)
-                        logger.info(f"[{job_id}] Ingested chunk {c['chunk_index']} for {fname} with {len(c.get('images', []))} images")
-                    
+                        add_content_hashes(meta, c["content"])
+                        records.append({"id": chunk_id, "text": c["content"], "metadata": meta})
                     except Exception as chunk_error:
                         logger.error(f"[{job_id}] Error processing chunk {c.get('chunk_index', 'unknown')} for {fname}: {chunk_error}")
-                        # Mark this chunk as failed but continue with others
-                        redis_client.hincrby(doc_status_key, "chunks_failed", 1)
-                        continue
+                        progress.hincrby(doc_status_key, "chunks_failed", 1)
+
+                def _on_written(batch):
+                    progress.hincrby(progress_key, "processed_chunks", len(batch))
+                    progress.hincrby(doc_status_key, "chunks_processed", len(batch))
+                    logger.info(f"[{job_id}] Ingested {len(batch)} chunks for {fname}")
+
+                def _on_failed(record, error):
+                    # Mark this chunk as failed but continue with others
+                    progress.hincrby(doc_status_key, "chunks_failed", 1)
+
+                catalog_entry = summarize_chunks([r["metadata"] for r in records]).get(document_id)
+
+                if incremental and stored:
+                    diff = diff_chunk_records(records, stored)
+                    # Text moved to a new chunk ID keeps its stored embedding;
+                    # done before the stale delete, which may remove the source
+                    unreused = write_reused_chunks(coll, diff["reuse"], job_id=job_id)
+                    unreused_ids = {r["id"] for r in unreused}
+                    reused = [r for r in diff["reuse"] if r["id"] not in unreused_ids]
+                    records = diff["embed"] + [
+                        {k: v for k, v in r.items() if k != "source_id"} for r in unreused
+                    ]
+                    settled = reused + diff["update"] + diff["unchanged"]
+                    if diff["update"]:
+                        # Text (and so the embedding) is unchanged; rewrite metadata only
+                        coll.update(
+                            ids=[r["id"] for r in diff["update"]],
+                            metadatas=[r["metadata"] for r in diff["update"]],
+                        )
+                        bump_collection_version(collection_name)
+                    if diff["stale_ids"]:
+                        coll.delete(ids=diff["stale_ids"])
+                        lexical_index = get_lexical_index(collection_name)
+                        if lexical_index is not None:
+                            lexical_index.delete(diff["stale_ids"])
+                        bump_collection_version(collection_name)
+                    progress.hincrby(progress_key, "chunks_reused", len(reused))
+                    progress.hincrby(progress_key, "chunks_metadata_updated", len(diff["update"]))
+                    progress.hincrby(progress_key, "chunks_unchanged", len(diff["unchanged"]))
+                    progress.hincrby(progress_key, "chunks_deleted", len(diff["stale_ids"]))
+                    progress.hincrby(progress_key, "processed_chunks", len(settled))
+                    progress.hincrby(doc_status_key, "chunks_processed", len(settled))
+                    logger.info(f"[{job_id}] {fname}: {len(records)} to embed, {len(reused)} reused embeddings, "
+                                f"{len(diff['update'])} metadata updates, "
+                                f"{len(diff['unchanged'])} unchanged, {len(diff['stale_ids'])} stale deleted")
+
+                written, failed = write_chunk_batches(
+                    coll,
+                    records,
+                    batch_size=INGEST_BATCH_SIZE,
+                    on_written=_on_written,
+                    on_failed=_on_failed,
+                    job_id=job_id
+                )
+                progress.hincrby(progress_key, "chunks_embedded", written)
+                if catalog_entry is not None:
+                    catalog_entry["chunk_count"] -= failed
+                    record_document(collection_name, catalog_entry)
 
             # Document completed successfully
-            redis_client.hset(doc_status_key, mapping={
+            progress.hset(doc_status_key, mapping={
                 "status": "completed",
                 "end_time": datetime.now().isoformat()
             })
-            redis_client.hincrby(progress_key, "processed_documents", 1)
+            progress.hincrby(progress_key, "processed_documents", 1)
+            progress.flush()
             return fname
             
         except Exception as e:
             # Document failed
-            redis_client.hset(doc_status_key, mapping={
+            progress.hset(doc_status_key, mapping={
                 "status": "failed",
                 "end_time": datetime.now().isoformat(),
                 "error_message": str(e)
             })
+            progress.flush()
             logger.error(f"[{job_id}] Error processing document {fname}: {e}")
             raise
 
-    # launch threads
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+    # launch threads; all documents share one vision stage so per-model
+    # concurrency limits apply across the whole job. Leaving the reporter
+    # flushes any buffered progress even if the job raises.
+    with progress, VisionStage() as vision_stage, ThreadPoolExecutor(max_workers=max_workers) as pool:
         futures = { pool.submit(process_one, (p, i)): p["filename"] for i, p in enumerate(payloads) }
         for fut in as_completed(futures):
             fname = futures[fut]
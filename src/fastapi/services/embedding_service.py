@@ -0,0 +1,302 @@
+"""
+Embedding Service
+Shared, lazily loaded embedding models with per-collection embedding spaces.
+
+Every vector in a ChromaDB collection must come from the same model. The
+service records the model name and dimension on each collection's metadata
+when it is first written, and routes both ingestion and query embeddings to
+that model, so a query is never compared against vectors from a different
+embedding space.
+
+Model keys:
+    sentence-transformers/<name>  (any HuggingFace SentenceTransformer name)
+    ollama:<name>                 (an Ollama embedding model)
+    chroma:default                (ChromaDB's built-in all-MiniLM-L6-v2, used by
+                                   collections written without embeddings)
+"""
+
+import os
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from .heading_chunking import estimate_tokens
+
+logger = logging.getLogger("EMBEDDING_SERVICE")
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/multi-qa-mpnet-base-dot-v1")
+OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "snowflake-arctic-embed2")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+# Load the primary model in a background thread at startup instead of on first use
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"
+# Token limit assumed for the Ollama fallback, whose tokenizer is not available locally
+EMBEDDING_FALLBACK_MAX_TOKENS = int(os.getenv("EMBEDDING_FALLBACK_MAX_TOKENS", "512"))
+
+OLLAMA_PREFIX = "ollama:"
+CHROMA_DEFAULT_MODEL = "chroma:default"
+
+# Collection metadata keys
+COLLECTION_MODEL_KEY = "embedding_model"
+COLLECTION_DIMENSION_KEY = "embedding_dimension"
+
+
+class EmbeddingSpaceMismatch(Exception):
+    """Raised when text cannot be embedded in the space a collection was built with."""
+
+
+@dataclass(frozen=True)
+class EmbeddingSpace:
+    model: str
+    dimension: int
+
+
+class EmbeddingService:
+    """
+    Embedding models keyed by model name, loaded on first use.
+
+    The primary model is the configured SentenceTransformer; if it cannot be
+    loaded, the Ollama model becomes the active model for new collections.
+    Collections already stamped with a model always get that model.
+    """
+
+    def __init__(
+        self,
+        hf_model_name: str = EMBEDDING_MODEL_NAME,
+        ollama_model_name: str = OLLAMA_EMBEDDING_MODEL,
+        ollama_url: str = OLLAMA_URL
+    ):
+        self.hf_model_name = hf_model_name
+        self.ollama_model_name = ollama_model_name
+        self.ollama_url = ollama_url
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, object] = {}
+        self._failed: Dict[str, str] = {}
+        self._dimensions: Dict[str, int] = {}
+        self._collection_spaces: Dict[str, EmbeddingSpace] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Model loading
+    # ------------------------------------------------------------------
+
+    def _load(self, model: str):
+        """Return the loaded backend for a model key, loading it once."""
+        backend = self._models.get(model)
+        if backend is not None:
+            return backend
+
+        with self._lock:
+            backend = self._models.get(model)
+            if backend is not None:
+                return backend
+            if model in self._failed:
+                raise EmbeddingSpaceMismatch(f"Embedding model {model} unavailable: {self._failed[model]}")
+
+            try:
+                if model.startswith(OLLAMA_PREFIX):
+                    from langchain_ollama import OllamaEmbeddings
+                    backend = OllamaEmbeddings(model=model[len(OLLAMA_PREFIX):], base_url=self.ollama_url)
+                elif model == CHROMA_DEFAULT_MODEL:
+                    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                    backend = DefaultEmbeddingFunction()
+                else:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading SentenceTransformer embedding model: {model}")
+                    backend = SentenceTransformer(model)
+                    self._dimensions[model] = int(backend.get_sentence_embedding_dimension())
+            except Exception as e:
+                self._failed[model] = str(e)
+                logger.warning(f"Failed to load embedding model {model}: {e}")
+                raise EmbeddingSpaceMismatch(f"Embedding model {model} unavailable: {e}") from e
+
+            self._models[model] = backend
+            logger.info(f"Embedding model ready: {model}")
+            return backend
+
+    def warm_up(self, background: bool = True) -> None:
+        """Load the active model now (optionally on a daemon thread)."""
+        def _run():
+            try:
+                model = self.active_model
+                self.space(model)
+            except Exception as e:
+                logger.warning(f"Embedding warm-up failed: {e}")
+
+        if not background:
+            _run()
+            return
+        if self._warmup_thread is None or not self._warmup_thread.is_alive():
+            self._warmup_thread = threading.Thread(target=_run, name="embedding-warmup", daemon=True)
+            self._warmup_thread.start()
+
+    @property
+    def active_model(self) -> str:
+        """Model used for collections that have no embedding space yet."""
+        try:
+            self._load(self.hf_model_name)
+            return self.hf_model_name
+        except EmbeddingSpaceMismatch:
+            return OLLAMA_PREFIX + self.ollama_model_name
+
+    def space(self, model: str) -> EmbeddingSpace:
+        """Return the embedding space (model + dimension) of a model key."""
+        if model not in self._dimensions:
+            self._dimensions[model] = len(self._embed(model, ["dimension probe"])[0])
+        return EmbeddingSpace(model=model, dimension=self._dimensions[model])
+
+    # ------------------------------------------------------------------
+    # Embedding
+    # ------------------------------------------------------------------
+
+    def _embed(self, model: str, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        backend = self._load(model)
+        if model.startswith(OLLAMA_PREFIX):
+            return np.array(backend.embed_documents(list(texts)))
+        if model == CHROMA_DEFAULT_MODEL:
+            return np.array(backend(list(texts)))
+        return backend.encode(list(texts), convert_to_numpy=True, batch_size=batch_size)
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32, model: Optional[str] = None):
+        """
+        Encode texts with the given model (default: the active model).
+        Compatible with SentenceTransformer.encode() for existing callers.
+        """
+        embeddings = self._embed(model or self.active_model, texts, batch_size)
+        return embeddings if convert_to_numpy else embeddings.tolist()
+
+    def embed_query(self, query: str, model: Optional[str] = None) -> List[float]:
+        """Embed a single query with the given model (default: the active model)."""
+        model = model or self.active_model
+        if model.startswith(OLLAMA_PREFIX):
+            return list(self._load(model).embed_query(query))
+        return self._embed(model, [query])[0].tolist()
+
+    @property
+    def max_tokens(self) -> int:
+        """Longest input, in tokens, the active model embeds without truncating."""
+        model = self.active_model
+        if model.startswith(OLLAMA_PREFIX) or model == CHROMA_DEFAULT_MODEL:
+            return EMBEDDING_FALLBACK_MAX_TOKENS
+        # max_seq_length includes the [CLS]/[SEP] special tokens
+        return int(self._load(model).max_seq_length) - 2
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """Token counts under the active model's tokenizer (estimated for Ollama)."""
+        if not texts:
+            return []
+        model = self.active_model
+        if not model.startswith(OLLAMA_PREFIX):
+            try:
+                ids = self._load(model).tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+                return [len(i) for i in ids]
+            except Exception as e:
+                logger.debug(f"Tokenizer unavailable, estimating token counts: {e}")
+        return estimate_tokens(texts)
+
+    # ------------------------------------------------------------------
+    # Collection embedding spaces
+    # ------------------------------------------------------------------
+
+    def collection_space(self, coll) -> Optional[EmbeddingSpace]:
+        """
+        Return the embedding space a collection was built with.
+
+        Uses the stamped collection metadata; for older collections the
+        dimension of a stored vector is matched against the known models.
+        Returns None for an empty, unstamped collection.
+        """
+        meta = coll.metadata or {}
+        if meta.get(COLLECTION_MODEL_KEY):
+            return EmbeddingSpace(meta[COLLECTION_MODEL_KEY], int(meta.get(COLLECTION_DIMENSION_KEY, 0)))
+
+        cached = self._collection_spaces.get(coll.name)
+        if cached:
+            return cached
+
+        sample = coll.get(limit=1, include=["embeddings"])
+        embeddings = sample.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None
+        dimension = len(embeddings[0])
+
+        for model in (self.hf_model_name, OLLAMA_PREFIX + self.ollama_model_name, CHROMA_DEFAULT_MODEL):
+            try:
+                if self.space(model).dimension == dimension:
+                    space = EmbeddingSpace(model, dimension)
+                    logger.info(f"Collection '{coll.name}' has no embedding metadata; inferred {model} ({dimension}d)")
+                    self._collection_spaces[coll.name] = space
+                    return space
+            except EmbeddingSpaceMismatch:
+                continue
+
+        raise EmbeddingSpaceMismatch(
+            f"Collection '{coll.name}' holds {dimension}-dimensional vectors from an unknown embedding model"
+        )
+
+    def stamp_collection(self, coll, space: EmbeddingSpace) -> None:
+        """Record the embedding model and dimension on a collection's metadata."""
+        meta = dict(coll.metadata or {})
+        if any(k.startswith("hnsw:") for k in meta):
+            # ChromaDB rejects modify() calls that carry index settings
+            logger.warning(f"Collection '{coll.name}' has index metadata; not stamping embedding model")
+            self._collection_spaces[coll.name] = space
+            return
+        meta.update({COLLECTION_MODEL_KEY: space.model, COLLECTION_DIMENSION_KEY: space.dimension})
+        coll.modify(metadata=meta)
+        logger.info(f"Collection '{coll.name}' embedding space set to {space.model} ({space.dimension}d)")
+
+    def encode_for_collection(self, coll, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode documents in the collection's embedding space, stamping the
+        active model onto collections that have none yet.
+        """
+        space = self.collection_space(coll)
+        if space is None:
+            space = self.space(self.active_model)
+            self.stamp_collection(coll, space)
+        return self._embed(space.model, texts, batch_size)
+
+    def embed_query_for_collection(self, coll, query: str) -> List[float]:
+        """
+        Embed a query in the collection's embedding space.
+
+        Raises EmbeddingSpaceMismatch if that model cannot be loaded, rather
+        than comparing vectors from different spaces.
+        """
+        space = self.collection_space(coll)
+        embedding = self.embed_query(query, space.model if space else None)
+        if space and space.dimension and len(embedding) != space.dimension:
+            raise EmbeddingSpaceMismatch(
+                f"Query embedding has {len(embedding)} dimensions; collection '{coll.name}' expects {space.dimension}"
+            )
+        return embedding
+
+    def embed_queries_for_collection(self, coll, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in the collection's embedding space with one encoder call."""
+        if not queries:
+            return []
+        space = self.collection_space(coll)
+        embeddings = self._embed(space.model if space else self.active_model, queries)
+        if space and space.dimension and embeddings.shape[1] != space.dimension:
+            raise EmbeddingSpaceMismatch(
+                f"Query embeddings have {embeddings.shape[1]} dimensions; collection '{coll.name}' expects {space.dimension}"
+            )
+        return embeddings.tolist()
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service."""
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
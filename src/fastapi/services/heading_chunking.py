@@ -0,0 +1,394 @@
+"""
+Heading-Based Chunking
+Heading detection and per-page structured chunking for PDFs, plus the merge
+step that turns per-page chunk lists into one document-ordered list.
+
+Kept free of model and database imports so page shards can be chunked in
+process pool workers.
+"""
+
+import logging
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+logger = logging.getLogger("HEADING_CHUNKING")
+
+
+def extract_headings_from_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Detect headings using multiple heuristics:
+    - Numbered sections (1., 1.1, 1.1.1)
+    - ALL CAPS lines
+    - Bold/underline markers
+
+    Returns list of heading dictionaries with:
+    - text: heading text
+    - level: heading level (1-3)
+    - number: section number if applicable
+    - char_offset: character offset in text
+    - line_number: line number
+    - parent: parent heading text if applicable
+    """
+    import re
+
+    headings = []
+    lines = text.split('\n')
+
+    # Track heading hierarchy
+    h1_pattern = re.compile(r'^\s*(\d+)\.\s+([A-Z].*)')
+    h2_pattern = re.compile(r'^\s*(\d+\.\d+)\s+(.*)')
+    h3_pattern = re.compile(r'^\s*(\d+\.\d+\.\d+)\s+(.*)')
+    caps_pattern = re.compile(r'^[A-Z\s]{10,}$')  # All caps, 10+ chars
+
+    char_offset = 0
+    parent_stack = []
+
+    for line_num, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            char_offset += len(line) + 1
+            continue
+
+        heading = None
+
+        # Check numbered sections (most specific first)
+        if h3_pattern.match(stripped):
+            match = h3_pattern.match(stripped)
+            heading = {"text": match.group(2), "level": 3, "number": match.group(1)}
+        elif h2_pattern.match(stripped):
+            match = h2_pattern.match(stripped)
+            heading = {"text": match.group(2), "level": 2, "number": match.group(1)}
+        elif h1_pattern.match(stripped):
+            match = h1_pattern.match(stripped)
+            heading = {"text": match.group(2), "level": 1, "number": match.group(1)}
+        elif caps_pattern.match(stripped):
+            heading = {"text": stripped, "level": 1, "number": None}
+
+        if heading:
+            # Update parent stack
+            while parent_stack and parent_stack[-1]["level"] >= heading["level"]:
+                parent_stack.pop()
+
+            heading.update({
+                "char_offset": char_offset,
+                "line_number": line_num,
+                "parent": parent_stack[-1]["text"] if parent_stack else None
+            })
+
+            parent_stack.append(heading)
+            headings.append(heading)
+
+        char_offset += len(line) + 1
+
+    return headings
+
+
+def extract_structured_chunks(page_text: str, page_num: int) -> List[Dict[str, Any]]:
+    """
+    Extract chunks preserving page → heading → body hierarchy.
+
+    Returns:
+        List of chunks with types: 'heading' or 'body_text'
+    """
+    chunks = []
+
+    # 1. Extract headings using pattern matching
+    headings = extract_headings_from_text(page_text)
+
+    if not headings:
+        # No headings found - create a single body chunk for the entire page
+        if page_text.strip():
+            chunks.append({
+                "chunk_type": "body_text",
+                "page_number": page_num,
+                "heading_text": "",
+                "heading_level": 0,
+                "parent_heading": "",
+                "content": page_text.strip(),
+                "start_char_offset": 0,
+                "end_char_offset": len(page_text)
+            })
+        return chunks
+
+    # 2. For each heading, create heading chunk + body chunk
+    for idx, heading in enumerate(headings):
+        # Heading chunk
+        heading_text = heading["text"]
+        if heading.get("number"):
+            heading_text = f"{heading['number']} {heading['text']}"
+
+        chunks.append({
+            "chunk_type": "heading",
+            "page_number": page_num,
+            "heading_text": heading_text,
+            "heading_level": heading["level"],
+            "heading_index_on_page": idx,
+            "content": heading_text,
+            "parent_heading": heading.get("parent", ""),
+            "start_char_offset": heading["char_offset"]
+        })
+
+        # Body text chunk (text between this heading and next)
+        start_offset = heading["char_offset"] + len(page_text[heading["char_offset"]:].split('\n', 1)[0]) + 1
+
+        # Find end offset (start of next heading or end of page)
+        if idx + 1 < len(headings):
+            end_offset = headings[idx + 1]["char_offset"]
+        else:
+            end_offset = len(page_text)
+
+        body_text = page_text[start_offset:end_offset].strip()
+
+        if body_text:
+            chunks.append({
+                "chunk_type": "body_text",
+                "page_number": page_num,
+                "parent_heading": heading_text,
+                "heading_text": heading_text,
+                "heading_level": heading["level"],
+                "content": body_text,
+                "start_char_offset": start_offset,
+                "end_char_offset": end_offset
+            })
+
+    return chunks
+
+
+def chunk_page(page_num: int, page_text: str) -> List[Dict[str, Any]]:
+    """
+    Chunk a single page. Pages without extractable text get a placeholder
+    chunk so page structure is preserved.
+    """
+    if not page_text.strip():
+        logger.warning(f"Page {page_num} has no extractable text")
+        return [{
+            "chunk_type": "body_text",
+            "page_number": page_num,
+            "heading_text": "",
+            "heading_level": 0,
+            "parent_heading": "",
+            "content": f"[Page {page_num} - no extractable text]",
+            "start_char_offset": 0,
+            "end_char_offset": 0
+        }]
+
+    page_chunks = extract_structured_chunks(page_text, page_num)
+    logger.info(f"Page {page_num}: Extracted {len(page_chunks)} chunks "
+               f"({sum(1 for c in page_chunks if c['chunk_type'] == 'heading')} headings)")
+    return page_chunks
+
+
+def chunk_page_range(pages: List[Tuple[int, str]]) -> List[List[Dict[str, Any]]]:
+    """Chunk a shard of (page_num, page_text) pairs; runs in pool workers."""
+    return [chunk_page(page_num, page_text) for page_num, page_text in pages]
+
+
+def merge_page_chunks(page_chunk_lists: List[List[Dict[str, Any]]], document_id: str) -> List[Dict[str, Any]]:
+    """
+    Merge per-page chunk lists (in page order) into one document chunk list.
+
+    Assigns the global chunk_index and carries the open heading hierarchy
+    across page boundaries: a heading at the top of a page gets its parent
+    from earlier pages, and body text on a page without headings is attached
+    to the last heading seen.
+    """
+    chunks = []
+    heading_stack: List[Tuple[int, str]] = []  # (level, heading_text)
+    chunk_index = 0
+
+    for page_chunks in page_chunk_lists:
+        for chunk in page_chunks:
+            if chunk["chunk_type"] == "heading":
+                level = chunk["heading_level"]
+                while heading_stack and heading_stack[-1][0] >= level:
+                    heading_stack.pop()
+                if not chunk.get("parent_heading") and heading_stack:
+                    chunk["parent_heading"] = heading_stack[-1][1]
+                heading_stack.append((level, chunk["heading_text"]))
+            elif not chunk.get("parent_heading") and heading_stack:
+                chunk["parent_heading"] = heading_stack[-1][1]
+
+            chunk["document_id"] = document_id
+            chunk["chunk_index"] = chunk_index
+            chunk["images"] = []
+            chunk["has_images"] = False
+            chunk_index += 1
+            chunks.append(chunk)
+
+    return chunks
+
+
+def chunk_pages(
+    pages: List[Tuple[int, str]],
+    document_id: str,
+    executor: Optional[Executor] = None,
+    shard_size: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Chunk (page_num, page_text) pairs and merge them in page order.
+
+    With an executor and shard_size, shards of pages are chunked in parallel;
+    the merge is the same either way, so the output does not depend on how
+    pages were sharded.
+    """
+    if executor is not None and shard_size and len(pages) > shard_size:
+        shards = [pages[i:i + shard_size] for i in range(0, len(pages), shard_size)]
+        page_chunk_lists = []
+        for shard_result in executor.map(chunk_page_range, shards):
+            page_chunk_lists.extend(shard_result)
+    else:
+        page_chunk_lists = chunk_page_range(pages)
+
+    return merge_page_chunks(page_chunk_lists, document_id)
+
+
+def estimate_tokens(texts: List[str]) -> List[int]:
+    """Rough token counts (about 4 characters per token) when no tokenizer is available."""
+    return [(len(t) + 3) // 4 for t in texts]
+
+
+def split_text_by_tokens(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    count_tokens: Callable[[List[str]], List[int]] = estimate_tokens
+) -> List[Tuple[int, int]]:
+    """
+    Split text into (start, end) character spans of at most max_tokens tokens.
+
+    Spans break on word boundaries, preferring the last sentence end in the
+    second half of the window, and consecutive spans share up to
+    overlap_tokens tokens. A single word longer than max_tokens becomes its
+    own span.
+    """
+    import re
+
+    units = [(m.start(), m.end()) for m in re.finditer(r'\S+\s*', text)]
+    if not units:
+        return []
+    counts = count_tokens([text[s:e] for s, e in units])
+    sentence_end = re.compile(r'[.!?;:]["\')\]]?\s*$')
+
+    spans = []
+    i = 0
+    while i < len(units):
+        total = 0
+        j = i
+        while j < len(units) and (j == i or total + counts[j] <= max_tokens):
+            total += counts[j]
+            j += 1
+
+        if j < len(units):
+            for k in range(j - 1, i + (j - i) // 2, -1):
+                if sentence_end.search(text[units[k][0]:units[k][1]]):
+                    j = k + 1
+                    break
+
+        last_start, last_end = units[j - 1]
+        spans.append((units[i][0], last_start + len(text[last_start:last_end].rstrip())))
+        if j >= len(units):
+            break
+
+        # Step back from j so the next span repeats up to overlap_tokens tokens
+        k = j
+        back = 0
+        while k - 1 > i and back + counts[k - 1] <= overlap_tokens:
+            k -= 1
+            back += counts[k]
+        i = k
+
+    return spans
+
+
+def split_oversized_chunks(
+    chunks: List[Dict[str, Any]],
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    count_tokens: Callable[[List[str]], List[int]] = estimate_tokens
+) -> List[Dict[str, Any]]:
+    """
+    Split body_text chunks longer than max_tokens into sub-chunks.
+
+    Each sub-chunk keeps the original heading metadata (parent_heading,
+    heading_text, page_number, ...) and gains sub_chunk_index,
+    sub_chunk_count and sub_chunk_start/sub_chunk_end (offsets within the
+    original body text); start/end_char_offset are shifted to match.
+    chunk_index is renumbered so it stays sequential across the document.
+    """
+    bodies = [c for c in chunks if c["chunk_type"] == "body_text"]
+    body_tokens = dict(zip(map(id, bodies), count_tokens([c["content"] for c in bodies])))
+
+    result = []
+    for chunk in chunks:
+        if body_tokens.get(id(chunk), 0) <= max_tokens:
+            result.append(chunk)
+            continue
+
+        text = chunk["content"]
+        spans = split_text_by_tokens(text, max_tokens, overlap_tokens, count_tokens)
+        base = chunk.get("start_char_offset", 0)
+        for n, (start, end) in enumerate(spans):
+            piece = dict(chunk)
+            piece.update({
+                "content": text[start:end],
+                "start_char_offset": base + start,
+                "end_char_offset": base + end,
+                "sub_chunk_index": n,
+                "sub_chunk_count": len(spans),
+                "sub_chunk_start": start,
+                "sub_chunk_end": end,
+            })
+            result.append(piece)
+
+    for index, chunk in enumerate(result):
+        chunk["chunk_index"] = index
+    return result
+
+
+def join_sub_chunks(pieces: List[Tuple[Dict[str, Any], str]]) -> List[str]:
+    """
+    Regroup stored chunks into body texts.
+
+    Takes (metadata, text) pairs for one heading group, orders them by
+    chunk_index, and stitches consecutive sub-chunks of the same body back
+    into one text using their offsets (dropping the overlapped prefix).
+    Chunks that were never split pass through unchanged.
+    """
+    ordered = sorted(pieces, key=lambda p: (int(p[0].get("chunk_index", 0)), int(p[0].get("sub_chunk_index", 0))))
+
+    texts: List[str] = []
+    prev_end = None
+    for meta, text in ordered:
+        count = int(meta.get("sub_chunk_count", 0) or 0)
+        index = int(meta.get("sub_chunk_index", 0) or 0)
+        if count > 1 and index > 0 and prev_end is not None and texts:
+            start = int(meta.get("sub_chunk_start", 0))
+            texts[-1] += text[max(0, prev_end - start):] if prev_end > start else " " + text
+        else:
+            texts.append(text)
+        prev_end = int(meta.get("sub_chunk_end", 0)) if count > 1 else None
+
+    return texts
+
+
+def token_length_stats(token_counts: List[int], max_tokens: int = 0) -> Dict[str, Any]:
+    """Summarise a document's chunk token lengths (count, min/mean/percentiles/max)."""
+    if not token_counts:
+        return {"chunks": 0}
+    ordered = sorted(token_counts)
+
+    def pct(p: float) -> int:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    stats = {
+        "chunks": len(ordered),
+        "min": ordered[0],
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p50": pct(0.5),
+        "p90": pct(0.9),
+        "p99": pct(0.99),
+        "max": ordered[-1],
+    }
+    if max_tokens:
+        stats["over_limit"] = sum(1 for t in ordered if t > max_tokens)
+    return stats
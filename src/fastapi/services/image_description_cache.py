@@ -0,0 +1,92 @@
+"""
+Image Description Cache
+Content-addressed cache for vision model descriptions, shared through Redis.
+
+Standards PDFs repeat the same logos, headers and classification banners on
+every page. Descriptions are keyed by the SHA-256 of the image bytes plus the
+vision model, so identical pixels are described once across pages, documents
+and re-ingests. The cache is capped at a fixed number of entries and evicts
+the least recently used ones.
+"""
+
+import os
+import time
+import hashlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger("IMAGE_DESCRIPTION_CACHE")
+
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+VISION_CACHE_MAX_ENTRIES = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "20000"))
+
+_KEY_PREFIX = "vision_desc"
+_LRU_KEY = f"{_KEY_PREFIX}:lru"
+
+
+def hash_image_file(image_path: str) -> Optional[str]:
+    """Return the SHA-256 hex digest of an image file, or None if unreadable."""
+    try:
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    except OSError as e:
+        logger.warning(f"Could not hash image {image_path}: {e}")
+        return None
+
+
+class ImageDescriptionCache:
+    """
+    Redis-backed LRU cache of image descriptions.
+
+    Entries live in plain string keys (vision_desc:{model}:{sha256}); a sorted
+    set scored by last-access time tracks recency for eviction. Redis errors
+    are logged and treated as misses so ingestion never fails on the cache.
+    """
+
+    def __init__(self, redis_client, max_entries: int = VISION_CACHE_MAX_ENTRIES, enabled: bool = VISION_CACHE_ENABLED):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+    @staticmethod
+    def _entry_key(content_hash: str, model_name: str) -> str:
+        return f"{_KEY_PREFIX}:{model_name}:{content_hash}"
+
+    def get(self, content_hash: Optional[str], model_name: str) -> Optional[str]:
+        """Return the cached description and refresh its recency, or None."""
+        if not self.enabled or not content_hash:
+            return None
+        key = self._entry_key(content_hash, model_name)
+        try:
+            description = self.redis.get(key)
+            if description is None:
+                return None
+            self.redis.zadd(_LRU_KEY, {key: time.time()})
+            return description
+        except Exception as e:
+            logger.debug(f"Vision cache lookup failed for {key}: {e}")
+            return None
+
+    def put(self, content_hash: Optional[str], model_name: str, description: str) -> None:
+        """Store a description and evict the oldest entries beyond the cap."""
+        if not self.enabled or not content_hash or not description:
+            return
+        key = self._entry_key(content_hash, model_name)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, description)
+            pipe.zadd(_LRU_KEY, {key: time.time()})
+            pipe.zcard(_LRU_KEY)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [member for member, _ in self.redis.zpopmin(_LRU_KEY, overflow)]
+                if evicted:
+                    self.redis.delete(*evicted)
+                    logger.info(f"Vision cache evicted {len(evicted)} least recently used entries")
+        except Exception as e:
+            logger.debug(f"Vision cache store failed for {key}: {e}")
@@ -0,0 +1,270 @@
+"""
+Lexical Index
+BM25 inverted index kept alongside each ChromaDB collection, stored in Redis.
+
+Dense retrieval handles exact identifiers ("4.2.1", "REQ-01", "RFC 9293")
+poorly. This index scores chunks with Okapi BM25 so retrieval can fuse
+lexical and vector rankings (see reciprocal_rank_fusion). It is updated
+incrementally whenever chunks are upserted or deleted through ingestion or
+the vectordb API, and can be rebuilt from a collection's stored documents.
+
+Redis layout, per collection:
+    bm25:v2:{collection}:stats       hash  docs, total_len
+    bm25:v2:{collection}:len         hash  chunk_id -> token count
+    bm25:v2:{collection}:tf          hash  chunk_id -> JSON {term: tf} (for removal)
+    bm25:v2:{collection}:p:{term}    zset  chunk_id scored by tf (postings)
+
+Writes read the stored term frequencies under WATCH on the tf hash, so
+concurrent writers of the same chunks never apply the same stats change
+twice. Queries read only the BM25_POSTINGS_LIMIT highest-tf postings of each
+term, so common terms do not cost a scan of the whole collection.
+
+Indexes written with the v1 layout (hash postings) are not read; rebuild
+them with POST /vectordb/collection/lexical-index/rebuild.
+"""
+
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger("LEXICAL_INDEX")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+LEXICAL_INDEX_ENABLED = os.getenv("LEXICAL_INDEX_ENABLED", "true").lower() == "true"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+# Postings read per query term, highest tf first
+BM25_POSTINGS_LIMIT = int(os.getenv("BM25_POSTINGS_LIMIT", "1000"))
+
+_KEY_PREFIX = "bm25"
+# Part of every key; bump when the Redis layout changes
+_LAYOUT_VERSION = 2
+
+# Identifiers keep their internal separators: "4.2.1", "req-01", "tcp/ip"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[./_-][a-z0-9]+)*")
+_PART_RE = re.compile(r"[./_-]")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can for from has have if in into is it its
+may must not of on or shall should such that the their then there these they
+this to was were which will with within without would
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Compound tokens such as "4.2.1" or "REQ-01" are kept whole so identifier
+    lookups match exactly; their alphabetic parts ("req") are indexed too.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if _PART_RE.search(token):
+            terms.extend(
+                part for part in _PART_RE.split(token)
+                if len(part) > 1 and not part.isdigit() and part not in _STOPWORDS
+            )
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(id) = sum(1 / (k + rank)), best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class BM25Index:
+    """Incrementally maintained BM25 index for one collection."""
+
+    def __init__(self, redis_client, collection_name: str):
+        self.redis = redis_client
+        self.collection_name = collection_name
+        self.prefix = f"{_KEY_PREFIX}:v{_LAYOUT_VERSION}:{collection_name}"
+
+    def _posting_key(self, term: str) -> str:
+        return f"{self.prefix}:p:{term}"
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _queue_removal(self, pipe, ids: List[str], stored_tfs: List[Optional[str]]) -> None:
+        removed, removed_len = [], 0
+        for chunk_id, tf_json in zip(ids, stored_tfs):
+            if tf_json is None:
+                continue
+            tf = json.loads(tf_json)
+            for term in tf:
+                pipe.zrem(self._posting_key(term), chunk_id)
+            removed.append(chunk_id)
+            removed_len += sum(tf.values())
+        if removed:
+            pipe.hdel(f"{self.prefix}:tf", *removed)
+            pipe.hdel(f"{self.prefix}:len", *removed)
+            pipe.hincrby(f"{self.prefix}:stats", "docs", -len(removed))
+            pipe.hincrby(f"{self.prefix}:stats", "total_len", -removed_len)
+
+    def upsert(self, ids: List[str], texts: List[str]) -> None:
+        """Index chunks, replacing any previous version of the same IDs."""
+        if not ids:
+            return
+        # Last text wins for an ID repeated within the batch
+        texts_by_id = dict(zip(ids, texts))
+        ids = list(texts_by_id)
+        tfs = {chunk_id: Counter(tokenize(text or "")) for chunk_id, text in texts_by_id.items()}
+        lengths = {chunk_id: sum(tf.values()) for chunk_id, tf in tfs.items()}
+        tf_key = f"{self.prefix}:tf"
+
+        def _write(pipe):
+            stored = pipe.hmget(tf_key, ids)
+            pipe.multi()
+            self._queue_removal(pipe, ids, stored)
+            for chunk_id, tf in tfs.items():
+                for term, count in tf.items():
+                    pipe.zadd(self._posting_key(term), {chunk_id: count})
+            pipe.hset(f"{self.prefix}:len", mapping=lengths)
+            pipe.hset(tf_key, mapping={chunk_id: json.dumps(tf) for chunk_id, tf in tfs.items()})
+            pipe.hincrby(f"{self.prefix}:stats", "docs", len(ids))
+            pipe.hincrby(f"{self.prefix}:stats", "total_len", sum(lengths.values()))
+
+        # Retried if another writer changes the stored term frequencies
+        # between the read and the write
+        self.redis.transaction(_write, tf_key)
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks from the index (unknown IDs are ignored)."""
+        if not ids:
+            return
+        tf_key = f"{self.prefix}:tf"
+
+        def _remove(pipe):
+            stored = pipe.hmget(tf_key, ids)
+            pipe.multi()
+            self._queue_removal(pipe, ids, stored)
+
+        self.redis.transaction(_remove, tf_key)
+
+    def _keys(self) -> List[str]:
+        return list(self.redis.scan_iter(match=f"{self.prefix}:*", count=1000))
+
+    def drop(self) -> None:
+        """Delete the whole index."""
+        keys = self._keys()
+        for start in range(0, len(keys), 1000):
+            self.redis.delete(*keys[start:start + 1000])
+
+    def rebuild(self, coll, batch_size: int = 500) -> int:
+        """
+        Rebuild the index from every document stored in a ChromaDB collection.
+
+        Chunks are re-upserted over the live index first and entries for
+        chunks no longer in the collection are pruned afterwards, so queries
+        during a rebuild never see an empty or partial index.
+        """
+        total, offset = 0, 0
+        seen = set()
+        while True:
+            page = coll.get(include=["documents"], limit=batch_size, offset=offset)
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            self.upsert(ids, page.get("documents") or [""] * len(ids))
+            seen.update(ids)
+            total += len(ids)
+            offset += len(ids)
+
+        stale = [chunk_id for chunk_id in self.redis.hkeys(f"{self.prefix}:tf") if chunk_id not in seen]
+        pruned = 0
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            # Keep chunks added to the collection while the rebuild ran
+            present = set(coll.get(ids=batch, include=[]).get("ids") or [])
+            gone = [chunk_id for chunk_id in batch if chunk_id not in present]
+            self.delete(gone)
+            pruned += len(gone)
+
+        logger.info(f"Rebuilt lexical index for '{self.collection_name}' ({total} chunks, {pruned} pruned)")
+        return total
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def size(self) -> int:
+        return int(self.redis.hget(f"{self.prefix}:stats", "docs") or 0)
+
+    def search(self, query: str, n_results: int) -> List[Tuple[str, float]]:
+        """
+        Return up to n_results (chunk_id, bm25_score), best first.
+
+        Each term contributes only to its BM25_POSTINGS_LIMIT highest-tf
+        chunks; its document frequency (for idf) is exact.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        limit = max(BM25_POSTINGS_LIMIT, n_results)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget(f"{self.prefix}:stats", ["docs", "total_len"])
+        for term in terms:
+            pipe.zcard(self._posting_key(term))
+            pipe.zrevrange(self._posting_key(term), 0, limit - 1, withscores=True)
+        (docs, total_len), *replies = pipe.execute()
+        doc_freqs, postings = replies[0::2], replies[1::2]
+
+        n_docs = int(docs or 0)
+        if n_docs <= 0:
+            return []
+        avg_len = max(int(total_len or 0) / n_docs, 1.0)
+
+        candidates = sorted({chunk_id for p in postings for chunk_id, _ in p})
+        if not candidates:
+            return []
+        lengths = dict(zip(candidates, self.redis.hmget(f"{self.prefix}:len", candidates)))
+
+        scores: Dict[str, float] = {}
+        for doc_freq, posting in zip(doc_freqs, postings):
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            for chunk_id, tf in posting:
+                tf = int(tf)
+                doc_len = int(lengths.get(chunk_id) or 0)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:n_results]
+
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: str) -> Optional[BM25Index]:
+    """Return the lexical index of a collection, or None when disabled."""
+    global _redis_client
+    if not LEXICAL_INDEX_ENABLED:
+        return None
+    if _redis_client is None:
+        with _redis_client_lock:
+            if _redis_client is None:
+                _redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    return BM25Index(_redis_client, collection_name)
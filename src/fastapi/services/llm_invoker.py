@@ -5,11 +5,16 @@ This module provides a unified interface for invoking LLMs across all services,
 with consistent error handling, response normalization, and token tracking.
 """
 
+import asyncio
 import logging
 import time
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Iterator, AsyncIterator
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from services.llm_utils import get_llm
+from services.context_packer import pack_context, count_tokens
+from services.async_stage_executor import get_stage_executor
+from services.llm_rate_limiter import get_rate_limiter, rate_limit_delay
+from services.llm_response_cache import get_response_cache
 from services.error_handling import LLMServiceError
 
 logger = logging.getLogger(__name__)
@@ -27,7 +32,8 @@ class LLMInvoker:
         max_tokens: Optional[int] = None,
         timeout: Optional[int] = None,
         retry_count: int = 0,
-        log_timing: bool = True
+        log_timing: bool = True,
+        cache: Optional[bool] = None
     ) -> str:
         """
         Invoke an LLM with a prompt and return the normalized response.
@@ -35,6 +41,7 @@ class LLMInvoker:
         This method:
         - Gets the appropriate LLM instance for the model
         - Constructs the message chain (system + user message)
+        - Waits for the shared rate limiter (services.llm_rate_limiter)
         - Invokes the LLM
         - Normalizes the response (handles different response types)
         - Logs timing information
@@ -49,6 +56,9 @@ class LLMInvoker:
             timeout: Optional timeout in seconds
             retry_count: Number of retries on failure (default: 0)
             log_timing: Whether to log timing information
+            cache: Response cache use (services.llm_response_cache): None caches
+                deterministic requests when the cache is enabled, True also
+                caches sampled ones, False bypasses it
 
         Returns:
             Normalized string response from the LLM
@@ -64,34 +74,45 @@ class LLMInvoker:
             )
         """
         start_time = time.time()
+
+        # Repeated requests are answered from the response cache, if enabled
+        response_cache = get_response_cache()
+        cache_key, cached = response_cache.lookup(model_name, prompt, system_prompt, temperature, max_tokens, force=cache)
+        if cached is not None:
+            return cached
+
         attempts = 0
         last_error = None
 
         while attempts <= retry_count:
             try:
-                # Get LLM instance with temperature and max_tokens if provided
+                # Get the (shared, cached) LLM instance for these parameters;
                 # get_llm will handle model-specific parameter support
                 llm = get_llm(
                     model_name=model_name,
                     temperature=temperature,
-                    max_tokens=max_tokens
+                    max_tokens=max_tokens,
+                    timeout=timeout
                 )
 
-                # Apply timeout if provided
-                if timeout is not None:
-                    llm.request_timeout = timeout
-
                 # Construct message chain
                 messages = []
                 if system_prompt:
                     messages.append(SystemMessage(content=system_prompt))
                 messages.append(HumanMessage(content=prompt))
 
-                # Invoke LLM
-                response = llm.invoke(messages)
+                # Invoke LLM once the shared rate limiter admits the call
+                limiter = get_rate_limiter()
+                lease = limiter.acquire(model_name, LLMInvoker._rate_limit_tokens(model_name, system_prompt, prompt, max_tokens))
+                try:
+                    response = llm.invoke(messages)
+                    LLMInvoker._record_usage(lease, response)
+                finally:
+                    limiter.release(lease)
 
                 # Normalize response
                 normalized_response = LLMInvoker._normalize_response(response)
+                response_cache.store_response(cache_key, model_name, normalized_response, time.time() - start_time)
 
                 # Log timing
                 if log_timing:
@@ -101,9 +122,14 @@ class LLMInvoker:
                 return normalized_response
 
             except Exception as e:
+                # The limiter already waited LLM_RATE_LIMIT_MAX_WAIT; surface
+                # LLM_RATE_LIMITED as is rather than retrying it
+                if isinstance(e, LLMServiceError) and e.error_code == "LLM_RATE_LIMITED":
+                    raise
                 attempts += 1
                 last_error = e
                 logger.error(f"LLM invocation failed (attempt {attempts}/{retry_count + 1}): {e}")
+                retry_delay = LLMInvoker._retry_delay(model_name, e, attempts)
 
                 if attempts > retry_count:
                     elapsed_ms = int((time.time() - start_time) * 1000)
@@ -117,8 +143,278 @@ class LLMInvoker:
                         }
                     )
 
-                # Wait before retry (exponential backoff)
-                time.sleep(2 ** attempts)
+                # Wait before retry: the provider's Retry-After on a 429,
+                # else exponential backoff
+                time.sleep(retry_delay)
+
+    @staticmethod
+    async def ainvoke(
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[int] = None,
+        retry_count: int = 0,
+        log_timing: bool = True,
+        cache: Optional[bool] = None
+    ) -> str:
+        """
+        Async counterpart of invoke(), using the LangChain async API.
+
+        Each attempt holds a slot of the stage executor's global and
+        per-provider concurrency limits (see services.async_stage_executor)
+        while the request is in flight; retries wait without holding one.
+        timeout also bounds each attempt's model call as a whole. Other
+        arguments, return value and errors are as for invoke().
+
+        Example:
+            response = await LLMInvoker.ainvoke(
+                model_name="gpt-4",
+                prompt="What is the capital of France?"
+            )
+        """
+        start_time = time.time()
+
+        response_cache = get_response_cache()
+        cache_key, cached = None, None
+        if response_cache.enabled or cache:
+            cache_key, cached = await asyncio.to_thread(
+                response_cache.lookup, model_name, prompt, system_prompt, temperature, max_tokens, cache
+            )
+        if cached is not None:
+            return cached
+
+        attempts = 0
+        last_error = None
+
+        while attempts <= retry_count:
+            try:
+                llm = get_llm(
+                    model_name=model_name,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout
+                )
+
+                messages = []
+                if system_prompt:
+                    messages.append(SystemMessage(content=system_prompt))
+                messages.append(HumanMessage(content=prompt))
+
+                # Local concurrency slot first, so a call queued in this
+                # process does not hold a cluster-wide in-flight lease
+                limiter = get_rate_limiter()
+                async with get_stage_executor().llm_slot(model_name):
+                    lease = await limiter.aacquire(model_name, LLMInvoker._rate_limit_tokens(model_name, system_prompt, prompt, max_tokens))
+                    try:
+                        # The timeout covers the model call only, not the
+                        # wait for a rate limit lease or concurrency slot
+                        response = await asyncio.wait_for(llm.ainvoke(messages), timeout)
+                        LLMInvoker._record_usage(lease, response)
+                    finally:
+                        await asyncio.to_thread(limiter.release, lease)
+
+                normalized_response = LLMInvoker._normalize_response(response)
+                if cache_key is not None:
+                    await asyncio.to_thread(
+                        response_cache.store_response, cache_key, model_name, normalized_response, time.time() - start_time
+                    )
+
+                if log_timing:
+                    elapsed_ms = int((time.time() - start_time) * 1000)
+                    logger.info(f"Async LLM invocation completed in {elapsed_ms}ms (model: {model_name})")
+
+                return normalized_response
+
+            except Exception as e:
+                # The limiter already waited LLM_RATE_LIMIT_MAX_WAIT; surface
+                # LLM_RATE_LIMITED as is rather than retrying it
+                if isinstance(e, LLMServiceError) and e.error_code == "LLM_RATE_LIMITED":
+                    raise
+                attempts += 1
+                last_error = e
+                logger.error(f"Async LLM invocation failed (attempt {attempts}/{retry_count + 1}): {e}")
+                retry_delay = LLMInvoker._retry_delay(model_name, e, attempts)
+
+                if attempts > retry_count:
+                    elapsed_ms = int((time.time() - start_time) * 1000)
+                    raise LLMServiceError(
+                        f"LLM invocation failed after {attempts} attempts: {str(last_error)}",
+                        error_code="LLM_INVOCATION_FAILED",
+                        details={
+                            "model_name": model_name,
+                            "attempts": attempts,
+                            "elapsed_ms": elapsed_ms
+                        }
+                    )
+
+                await asyncio.sleep(retry_delay)
+
+    @staticmethod
+    def stream(
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[int] = None,
+        cache: Optional[bool] = None
+    ) -> Iterator[str]:
+        """
+        Stream the response as the model generates it (LangChain .stream()).
+
+        Yields text chunks which, joined, are what invoke() would return; a
+        cached response is yielded as a single chunk. The rate limit lease
+        is held until the stream ends. There are no retries, since part of
+        the response may already have been consumed.
+
+        Raises:
+            LLMServiceError: If the LLM call fails
+        """
+        start_time = time.time()
+        response_cache = get_response_cache()
+        cache_key, cached = response_cache.lookup(model_name, prompt, system_prompt, temperature, max_tokens, force=cache)
+        if cached is not None:
+            yield cached
+            return
+
+        limiter = get_rate_limiter()
+        parts: List[str] = []
+        first_token_ms = None
+        try:
+            llm = get_llm(model_name=model_name, temperature=temperature, max_tokens=max_tokens, timeout=timeout)
+            lease = limiter.acquire(model_name, LLMInvoker._rate_limit_tokens(model_name, system_prompt, prompt, max_tokens))
+            try:
+                for chunk in llm.stream(LLMInvoker._messages(system_prompt, prompt)):
+                    text = LLMInvoker._normalize_response(chunk)
+                    LLMInvoker._record_usage(lease, chunk)
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start_time) * 1000)
+                        parts.append(text)
+                        yield text
+            finally:
+                limiter.release(lease)
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            raise LLMInvoker._stream_error(model_name, e, start_time)
+
+        response_cache.store_response(cache_key, model_name, "".join(parts), time.time() - start_time)
+        logger.info(f"LLM stream completed in {int((time.time() - start_time) * 1000)}ms, "
+                    f"first token after {first_token_ms}ms (model: {model_name})")
+
+    @staticmethod
+    async def astream(
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[int] = None,
+        cache: Optional[bool] = None
+    ) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream(), using LangChain .astream().
+
+        Holds a stage executor concurrency slot (see ainvoke()) for as long
+        as the stream runs. Arguments, chunks and errors are as for stream().
+
+        Example:
+            async for text in LLMInvoker.astream(model_name="gpt-4", prompt="Hello!"):
+                print(text, end="")
+        """
+        start_time = time.time()
+        response_cache = get_response_cache()
+        cache_key, cached = None, None
+        if response_cache.enabled or cache:
+            cache_key, cached = await asyncio.to_thread(
+                response_cache.lookup, model_name, prompt, system_prompt, temperature, max_tokens, cache
+            )
+        if cached is not None:
+            yield cached
+            return
+
+        limiter = get_rate_limiter()
+        parts: List[str] = []
+        first_token_ms = None
+        try:
+            llm = get_llm(model_name=model_name, temperature=temperature, max_tokens=max_tokens, timeout=timeout)
+            async with get_stage_executor().llm_slot(model_name):
+                lease = await limiter.aacquire(model_name, LLMInvoker._rate_limit_tokens(model_name, system_prompt, prompt, max_tokens))
+                try:
+                    async for chunk in llm.astream(LLMInvoker._messages(system_prompt, prompt)):
+                        text = LLMInvoker._normalize_response(chunk)
+                        LLMInvoker._record_usage(lease, chunk)
+                        if text:
+                            if first_token_ms is None:
+                                first_token_ms = int((time.time() - start_time) * 1000)
+                            parts.append(text)
+                            yield text
+                finally:
+                    await asyncio.to_thread(limiter.release, lease)
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            raise LLMInvoker._stream_error(model_name, e, start_time)
+
+        if cache_key is not None:
+            await asyncio.to_thread(
+                response_cache.store_response, cache_key, model_name, "".join(parts), time.time() - start_time
+            )
+        logger.info(f"Async LLM stream completed in {int((time.time() - start_time) * 1000)}ms, "
+                    f"first token after {first_token_ms}ms (model: {model_name})")
+
+    @staticmethod
+    def _messages(system_prompt: Optional[str], prompt: str) -> List[Any]:
+        messages = []
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+        messages.append(HumanMessage(content=prompt))
+        return messages
+
+    @staticmethod
+    def _stream_error(model_name: str, error: Exception, start_time: float) -> LLMServiceError:
+        logger.error(f"LLM stream failed: {error}")
+        delay = rate_limit_delay(error)
+        if delay is not None:
+            get_rate_limiter().block(model_name, delay)
+        return LLMServiceError(
+            f"LLM stream failed: {str(error)}",
+            error_code="LLM_INVOCATION_FAILED",
+            details={
+                "model_name": model_name,
+                "elapsed_ms": int((time.time() - start_time) * 1000)
+            }
+        )
+
+    @staticmethod
+    def _rate_limit_tokens(model_name: str, system_prompt: Optional[str], prompt: str, max_tokens: Optional[int]) -> int:
+        """Tokens to charge against tokens/minute limits (0 when none apply)."""
+        limiter = get_rate_limiter()
+        if not limiter.counts_tokens(model_name):
+            return 0
+        return limiter.estimate_tokens(count_tokens((system_prompt or "") + prompt), max_tokens)
+
+    @staticmethod
+    def _record_usage(lease, response: Any) -> None:
+        """Attach the provider-reported token usage, if any, to a rate limit lease."""
+        usage = getattr(response, "usage_metadata", None)
+        if lease is not None and usage and usage.get("total_tokens") is not None:
+            lease.used_tokens = usage["total_tokens"]
+
+    @staticmethod
+    def _retry_delay(model_name: str, error: Exception, attempts: int) -> float:
+        """
+        Seconds to wait before retrying. A provider 429 also holds the
+        model's calls in every worker for its Retry-After delay.
+        """
+        delay = rate_limit_delay(error)
+        if delay is None:
+            return 2 ** attempts
+        get_rate_limiter().block(model_name, delay)
+        return delay
 
     @staticmethod
     def invoke_with_template(
@@ -182,10 +478,14 @@ class LLMInvoker:
         """
         Invoke an LLM with query and context documents (RAG pattern).
 
+        Documents are packed most relevant first into the model's context
+        budget (leaving max_tokens for the answer); ones that do not fit are
+        trimmed or dropped.
+
         Args:
             model_name: Name of the model to use
             query: User query
-            context_documents: List of context document strings
+            context_documents: List of context document strings, most relevant first
             system_prompt: Optional system prompt
             temperature: Optional temperature override
             max_tokens: Optional max tokens override
@@ -201,10 +501,16 @@ class LLMInvoker:
                 system_prompt="Answer based on the provided context."
             )
         """
-        # Construct context section
+        # Construct context section from the documents that fit
+        packed = pack_context(
+            context_documents,
+            model_name,
+            reserve_tokens=max_tokens,
+            prompt_tokens=count_tokens((system_prompt or "") + query) + 10 + 5 * len(context_documents)
+        )
         context_text = "\n\n".join([
             f"Document {i + 1}:\n{doc}"
-            for i, doc in enumerate(context_documents)
+            for i, doc in enumerate(packed.chunks)
         ])
 
         # Build full prompt
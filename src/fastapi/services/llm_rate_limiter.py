@@ -0,0 +1,491 @@
+"""
+LLM Rate Limiter
+Redis-coordinated request, token and in-flight limits for LLM calls.
+
+Concurrency toward a provider used to be whatever the nested section, agent
+and test-card pools produced, multiplied by the number of uvicorn and Celery
+workers. LLMInvoker now acquires from this limiter before every call. Limits
+are kept in Redis so they hold across processes, and are checked per
+provider and per model scope:
+
+    requests/minute   token bucket, capacity = rpm, refilled continuously
+    tokens/minute     token bucket, charged the estimated prompt + completion
+                      tokens up front and corrected with reported usage
+    in-flight calls   leases with an expiry, renewed while the call runs,
+                      so a crashed worker's calls free their slots within
+                      LLM_RATE_LIMIT_LEASE_TTL
+
+A limit of 0 means unlimited. Provider limits come from
+LLM_RATE_LIMIT_<PROVIDER>_RPM / _TPM / _MAX_IN_FLIGHT; per-model limits
+from LLM_MODEL_RATE_LIMITS, a JSON object such as
+{"gpt-4": {"rpm": 500, "tpm": 30000, "max_in_flight": 8}}.
+
+When a provider answers 429, the invoker calls block() with the
+Retry-After delay (or LLM_RATE_LIMIT_DEFAULT_BACKOFF), and every worker
+holds that model's calls until it has passed.
+
+Redis layout (all keys expire when idle):
+    llm_rl:{scope}:bucket    hash  req, tok, ts (ms)
+    llm_rl:{scope}:inflight  zset  lease id -> expiry (ms)
+    llm_rl:{scope}:blocked   string  blocked-until (ms), set from Retry-After
+    llm_rl:{scope}:waiting   counter of calls queued on the limiter
+with scope "provider:{provider}" or "model:{model}".
+
+Waiters poll the script, so the queue is not strictly FIFO. If Redis is
+unavailable the limiter fails open: calls proceed and a warning is logged.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from services.llm_utils import get_model_config
+from services.error_handling import LLMServiceError
+
+logger = logging.getLogger("LLM_RATE_LIMITER")
+
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+PROVIDER_RATE_LIMITS = {
+    provider: {
+        "rpm": int(os.getenv(f"LLM_RATE_LIMIT_{provider.upper()}_RPM", rpm)),
+        "tpm": int(os.getenv(f"LLM_RATE_LIMIT_{provider.upper()}_TPM", tpm)),
+        "max_in_flight": int(os.getenv(f"LLM_RATE_LIMIT_{provider.upper()}_MAX_IN_FLIGHT", in_flight)),
+    }
+    for provider, rpm, tpm, in_flight in (
+        ("ollama", "0", "0", "4"),
+        ("openai", "500", "30000", "0"),
+        ("anthropic", "50", "40000", "0"),
+    )
+}
+MODEL_RATE_LIMITS: Dict[str, Dict[str, int]] = json.loads(os.getenv("LLM_MODEL_RATE_LIMITS", "") or "{}")
+# Longest a call waits for the limiter before failing
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "300"))
+# Completion tokens assumed for the tokens/minute charge when max_tokens is not set
+LLM_RATE_LIMIT_OUTPUT_ESTIMATE = int(os.getenv("LLM_RATE_LIMIT_OUTPUT_ESTIMATE", "512"))
+# Cooldown after a 429 without a Retry-After header
+LLM_RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_DEFAULT_BACKOFF", "5"))
+LLM_RATE_LIMIT_LEASE_TTL = int(os.getenv("LLM_RATE_LIMIT_LEASE_TTL", "600"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_KEY_PREFIX = "llm_rl"
+_POLL_MS = 100
+_IDLE_TTL_MS = 120000
+
+# KEYS: bucket, inflight, blocked for each scope
+# ARGV: now_ms, lease_id, lease_expiry_ms, tokens, poll_ms, idle_ttl_ms,
+#       then rpm, tpm, max_in_flight for each scope
+# Returns 0 when the call was admitted, else the milliseconds to wait.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = tonumber(ARGV[4])
+local poll = tonumber(ARGV[5])
+local idle = tonumber(ARGV[6])
+local wait = 0
+local state = {}
+for i = 1, #KEYS / 3 do
+    local bucket, inflight, blocked = KEYS[3 * i - 2], KEYS[3 * i - 1], KEYS[3 * i]
+    local rpm = tonumber(ARGV[3 * i + 4])
+    local tpm = tonumber(ARGV[3 * i + 5])
+    local max_in_flight = tonumber(ARGV[3 * i + 6])
+
+    local blocked_until = tonumber(redis.call('GET', blocked) or '0')
+    if blocked_until > now then
+        wait = math.max(wait, blocked_until - now)
+    end
+
+    local req, tok, need = 0, 0, 0
+    if rpm > 0 or tpm > 0 then
+        local h = redis.call('HMGET', bucket, 'req', 'tok', 'ts')
+        local elapsed = math.max(0, now - (tonumber(h[3]) or now))
+        if rpm > 0 then
+            req = math.min(rpm, (tonumber(h[1]) or rpm) + elapsed * rpm / 60000)
+            if req < 1 then
+                wait = math.max(wait, math.ceil((1 - req) * 60000 / rpm))
+            end
+        end
+        if tpm > 0 then
+            need = math.min(tokens, tpm)
+            tok = math.min(tpm, (tonumber(h[2]) or tpm) + elapsed * tpm / 60000)
+            if tok < need then
+                wait = math.max(wait, math.ceil((need - tok) * 60000 / tpm))
+            end
+        end
+    end
+    if max_in_flight > 0 then
+        redis.call('ZREMRANGEBYSCORE', inflight, '-inf', now)
+        if redis.call('ZCARD', inflight) >= max_in_flight then
+            wait = math.max(wait, poll)
+        end
+    end
+    state[i] = {rpm, tpm, max_in_flight, req, tok, need}
+end
+if wait > 0 then
+    return wait
+end
+for i = 1, #KEYS / 3 do
+    local s = state[i]
+    if s[1] > 0 or s[2] > 0 then
+        redis.call('HSET', KEYS[3 * i - 2], 'req', s[4] - 1, 'tok', s[5] - s[6], 'ts', now)
+        redis.call('PEXPIRE', KEYS[3 * i - 2], idle)
+    end
+    if s[3] > 0 then
+        redis.call('ZADD', KEYS[3 * i - 1], tonumber(ARGV[3]), ARGV[2])
+        redis.call('PEXPIRE', KEYS[3 * i - 1], math.max(idle, tonumber(ARGV[3]) - now))
+    end
+end
+return 0
+"""
+
+
+def _scope_key(scope: str, name: str) -> str:
+    return f"{_KEY_PREFIX}:{scope}:{name}"
+
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """
+    Seconds to back off if error is a provider rate-limit (HTTP 429) error,
+    from its Retry-After / retry-after-ms header when present; None for any
+    other error. Checks the error's causes too, since clients wrap them.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if status == 429 or type(error).__name__ == "RateLimitError":
+            headers = getattr(response, "headers", None) or {}
+            try:
+                if headers.get("retry-after-ms"):
+                    return float(headers["retry-after-ms"]) / 1000
+                retry_after = headers.get("retry-after")
+                if retry_after:
+                    try:
+                        return max(0.0, float(retry_after))
+                    except ValueError:
+                        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+            return LLM_RATE_LIMIT_DEFAULT_BACKOFF
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class RateLimitLease:
+    """Admission to make one LLM call; give it back with LLMRateLimiter.release()."""
+
+    def __init__(self, lease_id: Optional[str], scopes: List[Tuple[str, Dict[str, int]]], tokens: int):
+        self.lease_id = lease_id
+        self.scopes = scopes
+        self.tokens = tokens
+        # Set from the provider's reported usage to correct the tokens/minute charge
+        self.used_tokens: Optional[int] = None
+
+
+class LLMRateLimiter:
+    """Process-side client of the Redis-coordinated LLM limits."""
+
+    def __init__(
+        self,
+        redis_client=None,
+        provider_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        model_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_wait: float = LLM_RATE_LIMIT_MAX_WAIT,
+        enabled: bool = LLM_RATE_LIMIT_ENABLED
+    ):
+        self.redis = redis_client if redis_client is not None else redis.from_url(REDIS_URL, decode_responses=True)
+        self.provider_limits = provider_limits if provider_limits is not None else PROVIDER_RATE_LIMITS
+        self.model_limits = model_limits if model_limits is not None else MODEL_RATE_LIMITS
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._acquire = self.redis.register_script(_ACQUIRE_SCRIPT)
+
+        self._lock = threading.Lock()
+        # Held leases with in-flight slots, renewed by a background thread
+        self._held: Dict[str, RateLimitLease] = {}
+        self._renewer: Optional[threading.Thread] = None
+        self._waiting: Dict[str, int] = {}
+        self._acquired = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._rate_limited = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._last_error_log = 0.0
+
+    # ------------------------------------------------------------------
+    # Limits
+    # ------------------------------------------------------------------
+
+    def scopes(self, model_name: str) -> List[Tuple[str, Dict[str, int]]]:
+        """(scope, limits) pairs that apply to a model: its provider, then the model itself."""
+        config = get_model_config(model_name)
+        provider = config.provider.lower() if config else "unknown"
+        return [
+            (f"provider:{provider}", self._limits(self.provider_limits.get(provider))),
+            (f"model:{model_name}", self._limits(self.model_limits.get(model_name))),
+        ]
+
+    @staticmethod
+    def _limits(limits: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        limits = limits or {}
+        return {key: int(limits.get(key, 0) or 0) for key in ("rpm", "tpm", "max_in_flight")}
+
+    def counts_tokens(self, model_name: str) -> bool:
+        """Whether a tokens/minute limit applies, i.e. callers need to estimate tokens."""
+        return self.enabled and any(limits["tpm"] > 0 for _, limits in self.scopes(model_name))
+
+    @staticmethod
+    def estimate_tokens(prompt_tokens: int, max_tokens: Optional[int]) -> int:
+        return prompt_tokens + (max_tokens or LLM_RATE_LIMIT_OUTPUT_ESTIMATE)
+
+    # ------------------------------------------------------------------
+    # Acquire / release
+    # ------------------------------------------------------------------
+
+    def _try_acquire(self, lease: RateLimitLease) -> int:
+        """One admission attempt: 0 if admitted, else milliseconds to wait."""
+        now_ms = int(time.time() * 1000)
+        keys, args = [], [now_ms, lease.lease_id, now_ms + LLM_RATE_LIMIT_LEASE_TTL * 1000, lease.tokens, _POLL_MS, _IDLE_TTL_MS]
+        for scope, limits in lease.scopes:
+            keys += [_scope_key(scope, "bucket"), _scope_key(scope, "inflight"), _scope_key(scope, "blocked")]
+            args += [limits["rpm"], limits["tpm"], limits["max_in_flight"]]
+        return int(self._acquire(keys=keys, args=args))
+
+    def _new_lease(self, model_name: str, tokens: int) -> Optional[RateLimitLease]:
+        if not self.enabled:
+            return None
+        return RateLimitLease(uuid.uuid4().hex, self.scopes(model_name), tokens)
+
+    def _set_waiting(self, lease: RateLimitLease, delta: int) -> None:
+        with self._lock:
+            for scope, _ in lease.scopes:
+                self._waiting[scope] = self._waiting.get(scope, 0) + delta
+        try:
+            pipe = self.redis.pipeline()
+            for scope, _ in lease.scopes:
+                pipe.incrby(_scope_key(scope, "waiting"), delta)
+                pipe.pexpire(_scope_key(scope, "waiting"), _IDLE_TTL_MS)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def _hold(self, lease: RateLimitLease) -> None:
+        """Keep renewing the lease's in-flight slots until it is released."""
+        if not any(limits["max_in_flight"] > 0 for _, limits in lease.scopes):
+            return
+        with self._lock:
+            self._held[lease.lease_id] = lease
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew_leases, name="llm-lease-renewer", daemon=True)
+                self._renewer.start()
+
+    def _renew_leases(self) -> None:
+        """Push back the expiry of every held lease, a few times per TTL."""
+        interval = max(1.0, LLM_RATE_LIMIT_LEASE_TTL / 3)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                leases = list(self._held.values())
+            if not leases:
+                continue
+            expiry_ms = int(time.time() * 1000) + LLM_RATE_LIMIT_LEASE_TTL * 1000
+            try:
+                pipe = self.redis.pipeline()
+                for lease in leases:
+                    for scope, limits in lease.scopes:
+                        if limits["max_in_flight"] > 0:
+                            # XX: a lease released meanwhile is not re-added
+                            pipe.zadd(_scope_key(scope, "inflight"), {lease.lease_id: expiry_ms}, xx=True)
+                            pipe.pexpire(_scope_key(scope, "inflight"), max(_IDLE_TTL_MS, LLM_RATE_LIMIT_LEASE_TTL * 1000))
+                pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Could not renew {len(leases)} rate limit lease(s): {e}")
+
+    def _record(self, waited: float, throttled: bool) -> None:
+        with self._lock:
+            self._acquired += 1
+            if throttled:
+                self._throttled += 1
+                self._wait_seconds += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+    def _fail_open(self, model_name: str, error: Exception) -> None:
+        with self._lock:
+            self._errors += 1
+            log = time.time() - self._last_error_log > 60
+            if log:
+                self._last_error_log = time.time()
+        if log:
+            logger.warning(f"Rate limiter unavailable, not limiting {model_name}: {error}")
+
+    def _timed_out(self, model_name: str, waited: float) -> LLMServiceError:
+        with self._lock:
+            self._timeouts += 1
+        return LLMServiceError(
+            f"Rate limit wait for {model_name} exceeded {self.max_wait:.0f}s",
+            error_code="LLM_RATE_LIMITED",
+            details={"model_name": model_name, "waited_seconds": round(waited, 3)}
+        )
+
+    def acquire(self, model_name: str, tokens: int = 0) -> Optional[RateLimitLease]:
+        """
+        Block until a call to model_name is admitted by every scope's limits.
+
+        Returns:
+            Lease to release() after the call; None if limiting is disabled
+            or Redis is unavailable
+
+        Raises:
+            LLMServiceError: If admission takes longer than max_wait
+        """
+        lease = self._new_lease(model_name, tokens)
+        if lease is None:
+            return None
+        start = time.monotonic()
+        queued = False
+        try:
+            while True:
+                wait_ms = self._try_acquire(lease)
+                waited = time.monotonic() - start
+                if wait_ms <= 0:
+                    self._record(waited, queued)
+                    self._hold(lease)
+                    return lease
+                if waited + wait_ms / 1000 > self.max_wait:
+                    raise self._timed_out(model_name, waited)
+                if not queued:
+                    queued = True
+                    self._set_waiting(lease, 1)
+                time.sleep(wait_ms / 1000)
+        except redis.RedisError as e:
+            self._fail_open(model_name, e)
+            return None
+        finally:
+            if queued:
+                self._set_waiting(lease, -1)
+
+    async def aacquire(self, model_name: str, tokens: int = 0) -> Optional[RateLimitLease]:
+        """acquire() for coroutines: Redis calls run off the loop, waits use asyncio.sleep."""
+        lease = self._new_lease(model_name, tokens)
+        if lease is None:
+            return None
+        start = time.monotonic()
+        queued = False
+        try:
+            while True:
+                wait_ms = await asyncio.to_thread(self._try_acquire, lease)
+                waited = time.monotonic() - start
+                if wait_ms <= 0:
+                    self._record(waited, queued)
+                    self._hold(lease)
+                    return lease
+                if waited + wait_ms / 1000 > self.max_wait:
+                    raise self._timed_out(model_name, waited)
+                if not queued:
+                    queued = True
+                    await asyncio.to_thread(self._set_waiting, lease, 1)
+                await asyncio.sleep(wait_ms / 1000)
+        except redis.RedisError as e:
+            self._fail_open(model_name, e)
+            return None
+        finally:
+            if queued:
+                await asyncio.to_thread(self._set_waiting, lease, -1)
+
+    def release(self, lease: Optional[RateLimitLease]) -> None:
+        """Free the lease's in-flight slots and settle its tokens/minute charge."""
+        if lease is None:
+            return
+        with self._lock:
+            self._held.pop(lease.lease_id, None)
+        try:
+            pipe = self.redis.pipeline()
+            for scope, limits in lease.scopes:
+                if limits["max_in_flight"] > 0:
+                    pipe.zrem(_scope_key(scope, "inflight"), lease.lease_id)
+                if limits["tpm"] > 0 and lease.used_tokens is not None:
+                    charged = min(lease.tokens, limits["tpm"])
+                    pipe.hincrbyfloat(_scope_key(scope, "bucket"), "tok", charged - lease.used_tokens)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not release rate limit lease {lease.lease_id}: {e}")
+
+    def block(self, model_name: str, seconds: float) -> None:
+        """Hold every worker's calls to model_name for seconds (after a 429)."""
+        with self._lock:
+            self._rate_limited += 1
+        if not self.enabled or seconds <= 0:
+            return
+        until_ms = int((time.time() + seconds) * 1000)
+        try:
+            key = _scope_key(f"model:{model_name}", "blocked")
+            current = int(self.redis.get(key) or 0)
+            if until_ms > current:
+                self.redis.set(key, until_ms, px=int(seconds * 1000) + 1000)
+            logger.warning(f"{model_name} rate limited by provider, holding calls for {seconds:.1f}s")
+        except redis.RedisError as e:
+            logger.warning(f"Could not record rate limit for {model_name}: {e}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Local counters plus cluster-wide queue depth and in-flight calls per configured scope."""
+        with self._lock:
+            stats = {
+                "enabled": self.enabled,
+                "acquired": self._acquired,
+                "throttled": self._throttled,
+                "wait_seconds_total": round(self._wait_seconds, 3),
+                "wait_seconds_avg": round(self._wait_seconds / self._throttled, 3) if self._throttled else 0.0,
+                "wait_seconds_max": round(self._max_wait_seconds, 3),
+                "provider_429s": self._rate_limited,
+                "wait_timeouts": self._timeouts,
+                "redis_errors": self._errors,
+                "local_queue_depth": {scope: n for scope, n in self._waiting.items() if n},
+            }
+
+        scopes = [f"provider:{p}" for p in self.provider_limits] + [f"model:{m}" for m in self.model_limits]
+        try:
+            pipe = self.redis.pipeline()
+            now_ms = int(time.time() * 1000)
+            for scope in scopes:
+                pipe.get(_scope_key(scope, "waiting"))
+                pipe.zcount(_scope_key(scope, "inflight"), now_ms, "+inf")
+                pipe.get(_scope_key(scope, "blocked"))
+            values = pipe.execute()
+            stats["scopes"] = {
+                scope: {
+                    "queue_depth": max(0, int(values[3 * i] or 0)),
+                    "in_flight": int(values[3 * i + 1] or 0),
+                    "blocked_for_seconds": round(max(0, int(values[3 * i + 2] or 0) - now_ms) / 1000, 1),
+                }
+                for i, scope in enumerate(scopes)
+            }
+        except redis.RedisError as e:
+            stats["scopes_error"] = str(e)
+        return stats
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the process-wide LLM rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = LLMRateLimiter()
+    return _rate_limiter
@@ -0,0 +1,314 @@
+"""
+LLM Response Cache
+Prompt-level cache of LLM responses for repeated, deterministic requests.
+
+Regenerating a test plan or re-running a failed pipeline sends the same
+requests again for every section that did not change. LLMInvoker looks
+responses up by a SHA-256 of the fully rendered request (provider, model id,
+endpoint, system prompt, prompt, and the temperature and max_tokens actually
+sent) before calling the model, so unchanged requests cost no LLM time.
+
+Only deterministic requests (temperature 0) are cached by default; sampled
+ones are bypassed unless the caller passes cache=True or
+LLM_RESPONSE_CACHE_INCLUDE_SAMPLED is set (e.g. for a regeneration run
+where reproducing the previous output is the point).
+
+Backends (LLM_RESPONSE_CACHE_BACKEND):
+    redis  llmresp:{sha256} JSON entries expiring after LLM_RESPONSE_CACHE_TTL,
+           llmresp:index zset of entries by store time, trimmed to
+           LLM_RESPONSE_CACHE_MAX_ENTRIES (shared by every worker)
+    disk   {LLM_RESPONSE_CACHE_DIR}/{sha[:2]}/{sha}.json, expired by mtime and
+           pruned to LLM_RESPONSE_CACHE_MAX_ENTRIES / _MAX_MB, oldest first
+
+The cache is opt-in (LLM_RESPONSE_CACHE_ENABLED). Backend errors are logged
+and treated as misses.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import redis
+
+from services.llm_utils import resolve_llm_params
+
+logger = logging.getLogger("LLM_RESPONSE_CACHE")
+
+LLM_RESPONSE_CACHE_ENABLED = os.getenv("LLM_RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+LLM_RESPONSE_CACHE_INCLUDE_SAMPLED = os.getenv("LLM_RESPONSE_CACHE_INCLUDE_SAMPLED", "false").lower() == "true"
+LLM_RESPONSE_CACHE_BACKEND = os.getenv("LLM_RESPONSE_CACHE_BACKEND", "redis").lower()
+LLM_RESPONSE_CACHE_TTL = int(os.getenv("LLM_RESPONSE_CACHE_TTL", "604800"))
+LLM_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+LLM_RESPONSE_CACHE_DIR = os.getenv("LLM_RESPONSE_CACHE_DIR", "/tmp/llm_response_cache")
+LLM_RESPONSE_CACHE_MAX_MB = int(os.getenv("LLM_RESPONSE_CACHE_MAX_MB", "512"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_KEY_PREFIX = "llmresp"
+# Part of every key; bump to drop all entries when the request format changes
+_KEY_VERSION = 1
+# Disk stores between prunes
+_DISK_PRUNE_EVERY = 200
+
+
+class RedisResponseStore:
+    """Entries as JSON strings with a TTL, plus a store-time index for the size limit."""
+
+    def __init__(self, redis_client=None, ttl: int = LLM_RESPONSE_CACHE_TTL, max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES):
+        self.redis = redis_client if redis_client is not None else redis.from_url(REDIS_URL, decode_responses=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[str]:
+        return self.redis.get(f"{_KEY_PREFIX}:{key}")
+
+    def put(self, key: str, value: str) -> None:
+        index = f"{_KEY_PREFIX}:index"
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(f"{_KEY_PREFIX}:{key}", value, ex=self.ttl)
+        pipe.zadd(index, {key: time.time()})
+        # Forget index entries whose values have expired, then evict the oldest
+        pipe.zremrangebyscore(index, "-inf", time.time() - self.ttl)
+        pipe.zcard(index)
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            oldest = self.redis.zrange(index, 0, count - self.max_entries - 1)
+            if oldest:
+                pipe = self.redis.pipeline(transaction=True)
+                pipe.delete(*[f"{_KEY_PREFIX}:{k}" for k in oldest])
+                pipe.zrem(index, *oldest)
+                pipe.execute()
+
+    def clear(self) -> int:
+        keys = self.redis.zrange(f"{_KEY_PREFIX}:index", 0, -1)
+        if keys:
+            self.redis.delete(*[f"{_KEY_PREFIX}:{k}" for k in keys])
+        self.redis.delete(f"{_KEY_PREFIX}:index")
+        return len(keys)
+
+
+class DiskResponseStore:
+    """One JSON file per entry; expiry by mtime, size limits enforced by periodic pruning."""
+
+    def __init__(
+        self,
+        directory: str = LLM_RESPONSE_CACHE_DIR,
+        ttl: int = LLM_RESPONSE_CACHE_TTL,
+        max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = LLM_RESPONSE_CACHE_MAX_MB * 1024 * 1024
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial entry
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(value, encoding="utf-8")
+        os.replace(tmp, path)
+        with self._lock:
+            self._puts += 1
+            prune = self._puts % _DISK_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired entries, then the oldest until within both size limits."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+class LLMResponseCache:
+    """Response cache consulted by LLMInvoker; tracks hits and the LLM time they saved."""
+
+    def __init__(
+        self,
+        store=None,
+        enabled: bool = LLM_RESPONSE_CACHE_ENABLED,
+        include_sampled: bool = LLM_RESPONSE_CACHE_INCLUDE_SAMPLED
+    ):
+        if store is None:
+            store = DiskResponseStore() if LLM_RESPONSE_CACHE_BACKEND == "disk" else RedisResponseStore()
+        self.store = store
+        self.enabled = enabled
+        self.include_sampled = include_sampled
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bypassed = 0
+        self.errors = 0
+        self.saved_seconds = 0.0
+
+    def _key(self, model_name, prompt, system_prompt, temperature, max_tokens, force: Optional[bool]) -> Optional[str]:
+        """
+        Cache key of a request, or None if it should not be cached: the
+        cache is off, the model is unknown, or the request is sampled
+        (temperature > 0 or not settable) and not forced.
+        """
+        if force is False or not (self.enabled or force):
+            return None
+        try:
+            params = resolve_llm_params(model_name, temperature, max_tokens)
+        except Exception:
+            return None
+        deterministic = params["temperature"] is not None and params["temperature"] <= 0
+        if not (deterministic or force or self.include_sampled):
+            with self._lock:
+                self.bypassed += 1
+            return None
+
+        request = {
+            "v": _KEY_VERSION,
+            "provider": params["provider"],
+            "model_id": params["model_id"],
+            "base_url": params["base_url"],
+            "temperature": params["temperature"],
+            "max_tokens": params["max_tokens"],
+            "system_prompt": system_prompt or "",
+            "prompt": prompt,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def lookup(
+        self,
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        force: Optional[bool] = None
+    ):
+        """
+        Find a cached response for a request.
+
+        Args:
+            force: True caches the request even if sampled or the cache is
+                disabled, False bypasses the cache, None follows the settings
+
+        Returns:
+            (key, response): key is None if the request is not cacheable,
+            response is None on a miss. Pass the key to store_response().
+        """
+        key = self._key(model_name, prompt, system_prompt, temperature, max_tokens, force)
+        if key is None:
+            return None, None
+        try:
+            raw = self.store.get(key)
+            entry = json.loads(raw) if raw is not None else None
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"LLM response cache lookup failed: {e}")
+            return key, None
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return key, None
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += entry.get("elapsed_seconds", 0.0)
+        logger.info(f"LLM response cache hit for {model_name} (saved {entry.get('elapsed_seconds', 0.0):.1f}s)")
+        return key, entry["response"]
+
+    def store_response(self, key: Optional[str], model_name: str, response: str, elapsed_seconds: float) -> None:
+        if key is None or not response:
+            return
+        entry = {
+            "model_name": model_name,
+            "response": response,
+            "elapsed_seconds": round(elapsed_seconds, 3),
+            "stored_at": time.time(),
+        }
+        try:
+            self.store.put(key, json.dumps(entry))
+            with self._lock:
+                self.stores += 1
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"LLM response cache store failed: {e}")
+
+    def clear(self) -> int:
+        return self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.store).__name__,
+                "include_sampled": self.include_sampled,
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "bypassed_sampled": self.bypassed,
+                "errors": self.errors,
+                "llm_seconds_saved": round(self.saved_seconds, 1),
+            }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Return the process-wide LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = LLMResponseCache()
+    return _response_cache
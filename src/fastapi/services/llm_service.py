@@ -4,6 +4,8 @@ from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
 from services.llm_utils import get_llm
 from services.llm_invoker import LLMInvoker
+from services.llm_rate_limiter import get_rate_limiter
+from services.context_packer import count_tokens
 from llm_config.llm_config import get_model_config, list_supported_models
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
@@ -79,7 +81,13 @@ class LLMService:
         chain = create_retrieval_chain(retriever=retriever, combine_docs_chain=document_chain)
 
         start_time = time.time()
-        result = chain.invoke({"input": query})
+        # The chain calls the model directly, so take the shared rate limit here
+        limiter = get_rate_limiter()
+        lease = limiter.acquire(model_name, limiter.estimate_tokens(count_tokens(query), None) if limiter.counts_tokens(model_name) else 0)
+        try:
+            result = chain.invoke({"input": query})
+        finally:
+            limiter.release(lease)
         response_time_ms = int((time.time() - start_time) * 1000)
 
         # Save chat history (optional)
@@ -1,8 +1,17 @@
 import os
+import logging
+import threading
+from collections import OrderedDict
 from langchain_openai import ChatOpenAI
 import sys
 from pathlib import Path
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 # Make sure the shared llm_config package is importable in both local and container contexts
 _CURRENT_FILE = Path(__file__).resolve()
 for _candidate in (_CURRENT_FILE.parents[2], _CURRENT_FILE.parents[1]):
@@ -17,55 +26,58 @@ os.environ["LANGCHAIN_TRACING_V2"] = "false"
 os.environ["LANGCHAIN_ENDPOINT"] = ""
 os.environ["LANGCHAIN_API_KEY"] = ""
 
-def get_llm(model_name: str, temperature: float = None, max_tokens: int = None):
-    """
-    Get an LLM instance for the specified model.
-
-    Args:
-        model_name: Name of the model (e.g., "gpt-4", "claude-3-sonnet")
-        temperature: Optional temperature override (will be ignored if model doesn't support it)
-        max_tokens: Optional max_tokens override
-
-    Returns:
-        Configured LLM instance
-
-    Raises:
-        ValueError: If model is invalid or API keys are missing
-    """
-    # Validate model exists
-    is_valid, error = validate_model(model_name)
-    if not is_valid:
-        raise ValueError(error)
+logger = logging.getLogger("LLM_UTILS")
 
-    # Get model configuration
-    model_config = get_model_config(model_name)
-    resolved_model_id = model_config.model_id
-    provider = model_config.provider.lower()
+# Process-wide LLM client registry. Chat model objects are safe to share across
+# threads, so get_llm returns one instance per configuration instead of building
+# new HTTP clients (and re-validating settings) on every call. OpenAI instances
+# share one keep-alive connection pool per base URL; other providers keep one
+# per cached instance.
+LLM_CLIENT_CACHE_ENABLED = os.getenv("LLM_CLIENT_CACHE_ENABLED", "true").lower() == "true"
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "64"))
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+# Optional OpenAI-compatible endpoint (default: api.openai.com)
+LLM_OPENAI_BASE_URL = os.getenv("LLM_OPENAI_BASE_URL") or None
 
-    # Validate API keys for provider
-    keys_valid, key_error = llm_env.validate_provider_keys(provider)
-    if not keys_valid:
-        raise ValueError(f"{key_error}. Please configure the required API key.")
+_llm_clients: "OrderedDict[tuple, object]" = OrderedDict()
+_http_pools: dict = {}
+_llm_clients_lock = threading.Lock()
+_llm_client_stats = {"hits": 0, "misses": 0, "evictions": 0}
 
-    # Determine temperature to use
-    if temperature is None:
-        # Use model-specific default if available, otherwise global default
-        temperature = model_config.default_temperature if model_config.default_temperature is not None else llm_env.default_temperature
 
-    # Build kwargs for LLM initialization
-    llm_kwargs = {"model": resolved_model_id}
+def _http_pool(provider: str, base_url: str):
+    """
+    Shared httpx transport (connection pool) for a provider endpoint. Only
+    OpenAI clients use it: the ollama package passes client_kwargs to both its
+    sync and async httpx clients, and an async client cannot use a sync
+    transport, so each Ollama client gets its own pools with these limits
+    instead. Callers hold _llm_clients_lock.
+    """
+    key = (provider, base_url)
+    if key not in _http_pools:
+        _http_pools[key] = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _http_pools[key]
 
-    # Add temperature only if model supports it
-    if model_config.supports_temperature:
-        llm_kwargs["temperature"] = temperature
 
-    # Add max_tokens if provided and model supports it
-    if max_tokens is not None and model_config.supports_max_tokens:
-        llm_kwargs["max_tokens"] = max_tokens
+def _build_llm(provider: str, model_name: str, llm_kwargs: dict, base_url: str, timeout: float = None):
+    """Construct the LangChain model object for a provider. Callers hold _llm_clients_lock."""
+    pooled = LLM_CLIENT_CACHE_ENABLED and HTTPX_AVAILABLE
 
     # OpenAI Chat models
     if provider == "openai":
         llm_kwargs["openai_api_key"] = llm_env.openai_api_key
+        if base_url:
+            llm_kwargs["base_url"] = base_url
+        if timeout is not None:
+            llm_kwargs["timeout"] = timeout
+        if pooled:
+            llm_kwargs["http_client"] = httpx.Client(transport=_http_pool(provider, base_url or ""))
         return ChatOpenAI(**llm_kwargs)
 
     # Anthropic Claude models
@@ -76,6 +88,8 @@ def get_llm(model_name: str, temperature: float = None, max_tokens: int = None):
             # Remove 'model' key and use the correct parameter name
             model_id = llm_kwargs.pop("model")
             llm_kwargs["model_name"] = model_id if "claude" in model_id else model_id
+            if timeout is not None:
+                llm_kwargs["default_request_timeout"] = timeout
             return ChatAnthropic(**llm_kwargs)
         except ImportError:
             raise ValueError(
@@ -85,10 +99,21 @@ def get_llm(model_name: str, temperature: float = None, max_tokens: int = None):
 
     # Ollama models - local CPU-based inference
     elif provider == "ollama":
-        ollama_host = os.getenv("LLM_OLLAMA_HOST", "http://ollama:11434")
         try:
             from langchain_ollama import OllamaLLM
-            llm_kwargs["base_url"] = ollama_host
+            llm_kwargs["base_url"] = base_url
+            client_kwargs = {}
+            if timeout is not None:
+                client_kwargs["timeout"] = timeout
+            if pooled:
+                # Passed through to both the sync and the async httpx client,
+                # so this cannot be a shared (sync) transport
+                client_kwargs["limits"] = httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE
+                )
+            if client_kwargs:
+                llm_kwargs["client_kwargs"] = client_kwargs
             return OllamaLLM(**llm_kwargs)
         except ImportError:
             raise ValueError(
@@ -101,3 +126,113 @@ def get_llm(model_name: str, temperature: float = None, max_tokens: int = None):
             f"Unsupported provider: {provider} for model {model_name}. "
             f"Currently supported providers: openai, anthropic, ollama"
         )
+
+
+
+def resolve_llm_params(model_name: str, temperature: float = None, max_tokens: int = None) -> dict:
+    """
+    Provider, model id, endpoint, and the temperature and max_tokens that
+    get_llm would actually send for a known model (None where the model does
+    not take the parameter).
+    """
+    model_config = get_model_config(model_name)
+    provider = model_config.provider.lower()
+
+    # Determine temperature to use
+    if temperature is None:
+        # Use model-specific default if available, otherwise global default
+        temperature = model_config.default_temperature if model_config.default_temperature is not None else llm_env.default_temperature
+
+    if provider == "ollama":
+        base_url = os.getenv("LLM_OLLAMA_HOST", "http://ollama:11434")
+    elif provider == "openai":
+        base_url = LLM_OPENAI_BASE_URL
+    else:
+        base_url = None
+
+    return {
+        "provider": provider,
+        "model_id": model_config.model_id,
+        "base_url": base_url,
+        # Temperature only if model supports it
+        "temperature": temperature if model_config.supports_temperature else None,
+        # max_tokens if provided and model supports it
+        "max_tokens": max_tokens if max_tokens is not None and model_config.supports_max_tokens else None,
+    }
+
+
+def get_llm(model_name: str, temperature: float = None, max_tokens: int = None, timeout: float = None):
+    """
+    Get an LLM instance for the specified model.
+
+    Instances are cached per (provider, model, temperature, max_tokens,
+    base_url, timeout) and shared between callers and threads, so treat the
+    returned object as read-only (use .bind() or a new get_llm call to vary
+    parameters).
+
+    Args:
+        model_name: Name of the model (e.g., "gpt-4", "claude-3-sonnet")
+        temperature: Optional temperature override (will be ignored if model doesn't support it)
+        max_tokens: Optional max_tokens override
+        timeout: Optional request timeout in seconds
+
+    Returns:
+        Configured LLM instance
+
+    Raises:
+        ValueError: If model is invalid or API keys are missing
+    """
+    # Validate model exists
+    is_valid, error = validate_model(model_name)
+    if not is_valid:
+        raise ValueError(error)
+
+    params = resolve_llm_params(model_name, temperature, max_tokens)
+    provider = params["provider"]
+    resolved_model_id = params["model_id"]
+    base_url = params["base_url"]
+
+    # Validate API keys for provider
+    keys_valid, key_error = llm_env.validate_provider_keys(provider)
+    if not keys_valid:
+        raise ValueError(f"{key_error}. Please configure the required API key.")
+
+    # Build kwargs for LLM initialization
+    llm_kwargs = {"model": resolved_model_id}
+    if params["temperature"] is not None:
+        llm_kwargs["temperature"] = params["temperature"]
+    if params["max_tokens"] is not None:
+        llm_kwargs["max_tokens"] = params["max_tokens"]
+
+    if not LLM_CLIENT_CACHE_ENABLED:
+        return _build_llm(provider, model_name, llm_kwargs, base_url, timeout)
+
+    key = (provider, resolved_model_id, llm_kwargs.get("temperature"), llm_kwargs.get("max_tokens"), base_url, timeout)
+    with _llm_clients_lock:
+        llm = _llm_clients.get(key)
+        if llm is not None:
+            _llm_clients.move_to_end(key)
+            _llm_client_stats["hits"] += 1
+            return llm
+
+        llm = _build_llm(provider, model_name, llm_kwargs, base_url, timeout)
+        _llm_clients[key] = llm
+        _llm_client_stats["misses"] += 1
+        if len(_llm_clients) > LLM_CLIENT_CACHE_SIZE:
+            _llm_clients.popitem(last=False)
+            _llm_client_stats["evictions"] += 1
+        logger.info(f"Created LLM client for {model_name} ({provider}, temperature={llm_kwargs.get('temperature')}, "
+                    f"max_tokens={llm_kwargs.get('max_tokens')}); {len(_llm_clients)} cached")
+        return llm
+
+
+def llm_client_stats() -> dict:
+    """Counters of the LLM client registry."""
+    with _llm_clients_lock:
+        return dict(_llm_client_stats, cached=len(_llm_clients), connection_pools=len(_http_pools))
+
+
+def clear_llm_clients() -> None:
+    """Drop cached LLM clients (e.g. after changing provider settings); shared pools are kept."""
+    with _llm_clients_lock:
+        _llm_clients.clear()
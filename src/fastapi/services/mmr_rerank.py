@@ -0,0 +1,132 @@
+"""
+MMR Re-ranking
+Diversifies retrieved chunks before they are packed into a prompt.
+
+Heading-aware chunking stores each heading as its own chunk next to the body
+chunk under it, and repeated section preambles embed almost identically, so
+the raw top-k often spends several slots on one passage. Re-ranking
+over-fetches RAG_MMR_FETCH_MULTIPLIER x k candidates, folds each heading
+chunk into the body chunk of its section when both were retrieved, and picks
+k chunks by maximal marginal relevance over their stored embeddings:
+
+    MMR(d) = lambda * sim(q, d) - (1 - lambda) * max(sim(d, s) for s already selected)
+
+with cosine similarity; lambda = 1 is plain relevance order, lower values
+trade relevance for diversity.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("MMR_RERANK")
+
+# Re-ranking applied after retrieval: none (raw top-k) or mmr
+RAG_RERANK = os.getenv("RAG_RERANK", "none").lower()
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+# Candidates retrieved before re-ranking, as a multiple of top_k
+RAG_MMR_FETCH_MULTIPLIER = int(os.getenv("RAG_MMR_FETCH_MULTIPLIER", "4"))
+
+RERANK_MODES = ("none", "mmr")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = RAG_MMR_LAMBDA
+) -> List[int]:
+    """
+    Indices of k embeddings chosen greedily by MMR, in selection order.
+
+    Each step costs one matrix-vector product: the running maximum
+    similarity to the selected set is updated with the newest pick only.
+    """
+    if k <= 0 or len(embeddings) == 0:
+        return []
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+    relevance = matrix @ _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, len(matrix))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * penalty
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, matrix @ matrix[pick])
+    return selected
+
+
+def section_key(meta: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    """(document, page, heading) of a heading-chunked chunk, or None."""
+    meta = meta or {}
+    if meta.get("chunk_type") not in ("heading", "body_text") or not meta.get("heading_text"):
+        return None
+    document = meta.get("document_id") or meta.get("document_name")
+    return document, meta.get("page_number"), meta.get("heading_text")
+
+
+def collapse_heading_pairs(metadatas: List[Optional[Dict[str, Any]]]) -> List[int]:
+    """
+    Positions to keep after dropping every heading chunk whose section's
+    body chunk is also among the candidates; the body moves up to the
+    better-ranked of the two positions. Returned in that rank order.
+    """
+    bodies: Dict[Tuple[Any, ...], int] = {}
+    for i, meta in enumerate(metadatas):
+        key = section_key(meta)
+        if key is not None and meta.get("chunk_type") == "body_text":
+            bodies.setdefault(key, i)
+
+    rank = {}
+    for i, meta in enumerate(metadatas):
+        key = section_key(meta)
+        if key is not None and meta.get("chunk_type") == "heading" and key in bodies:
+            body = bodies[key]
+            rank[body] = min(rank.get(body, body), i)
+        else:
+            rank.setdefault(i, i)
+    return sorted(rank, key=lambda i: (rank[i], i))
+
+
+def mmr_rerank(
+    query_embedding: Sequence[float],
+    retrieved: Tuple[List, List, List, List],
+    embeddings: Dict[str, Any],
+    k: int,
+    lambda_mult: float = RAG_MMR_LAMBDA
+) -> Tuple[List, List, List, List]:
+    """
+    Re-rank one query's (ids, documents, metadatas, distances) candidates
+    down to k. Candidates without a stored embedding keep their retrieval
+    order after the MMR picks.
+    """
+    ids, documents, metadatas, distances = retrieved
+    order = collapse_heading_pairs(list(metadatas))
+    with_embedding = [i for i in order if embeddings.get(ids[i]) is not None]
+    without = [i for i in order if embeddings.get(ids[i]) is None]
+
+    picks = maximal_marginal_relevance(
+        query_embedding, [embeddings[ids[i]] for i in with_embedding], k, lambda_mult
+    )
+    chosen = ([with_embedding[p] for p in picks] + without)[:k]
+    if len(ids) > len(chosen):
+        logger.debug(f"MMR kept {len(chosen)} of {len(ids)} candidates "
+                     f"({len(ids) - len(order)} heading chunks folded into their bodies)")
+    return (
+        [ids[i] for i in chosen],
+        [documents[i] for i in chosen],
+        [metadatas[i] for i in chosen],
+        [distances[i] for i in chosen],
+    )
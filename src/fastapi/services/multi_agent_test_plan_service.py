@@ -32,6 +32,10 @@ from string import Formatter
 
 # Import LLMInvoker for direct invocation with system prompt support
 from services.llm_invoker import LLMInvoker
+from services.async_stage_executor import get_stage_executor
+from services.heading_chunking import join_sub_chunks
+from services.progress_reporter import ProgressReporter
+from services.document_catalog import get_document_chunks
 
 from services.llm_service import LLMService
 from config.agent_registry import get_agent_registry
@@ -245,9 +249,9 @@ class MultiAgentTestPlanService:
             if db is not None:
                 db.close()
 
-    def _execute_agent_by_id(self, agent_id: int, section_title: str, section_content: str, context_vars: Dict[str, str] = None) -> Optional[ActorResult]:
+    def _prepare_agent_call(self, agent_id: int, section_title: str, section_content: str, context_vars: Dict[str, str] = None) -> Optional[Dict[str, Any]]:
         """
-        Execute a single agent by database ID
+        Load an agent by database ID and build its LLM call
 
         Args:
             agent_id: Database ID of the agent to execute
@@ -256,7 +260,8 @@ class MultiAgentTestPlanService:
             context_vars: Dictionary of context variables for prompt formatting
 
         Returns:
-            ActorResult with agent's output or None if failed
+            Dict with the agent's name and model and the LLMInvoker arguments,
+            or None if the agent is missing or inactive
         """
         db = None
         try:
@@ -281,103 +286,121 @@ class MultiAgentTestPlanService:
             agent_user_prompt_template = agent.user_prompt_template
             agent_temperature = agent.temperature
             agent_max_tokens = agent.max_tokens
+        finally:
+            # CRITICAL: Close database session BEFORE making LLM call (which can take a long time)
+            if db is not None:
+                db.close()
 
-            # Close database session BEFORE making LLM call (which can take a long time)
-            db.close()
-            db = None
+        # Prepare prompt based on agent's template
+        # Build format variables with defaults
+        format_vars = {
+            'section_title': section_title,
+            'section_content': section_content,
+            'context': context_vars.get('context', '') if context_vars else '',
+            'actor_outputs': context_vars.get('actor_outputs', '') if context_vars else '',
+            'critic_output': context_vars.get('critic_output', '') if context_vars else '',
+            'actor_outputs_summary': context_vars.get('actor_outputs_summary', '') if context_vars else '',
+            'synthesized_rules': context_vars.get('synthesized_rules', '') if context_vars else '',
+            'previous_sections_summary': context_vars.get('previous_sections_summary', '') if context_vars else '',
+        }
 
-            start_time = time.time()
+        logger.debug(f"Agent {agent_id} template variables available: {list(format_vars.keys())}")
+        logger.debug(f"Agent {agent_id} context_vars keys: {list(context_vars.keys()) if context_vars else 'None'}")
 
-            # Prepare prompt based on agent's template
-            # Build format variables with defaults
-            format_vars = {
-                'section_title': section_title,
-                'section_content': section_content,
-                'context': context_vars.get('context', '') if context_vars else '',
-                'actor_outputs': context_vars.get('actor_outputs', '') if context_vars else '',
-                'critic_output': context_vars.get('critic_output', '') if context_vars else '',
-                'actor_outputs_summary': context_vars.get('actor_outputs_summary', '') if context_vars else '',
-                'synthesized_rules': context_vars.get('synthesized_rules', '') if context_vars else '',
-                'previous_sections_summary': context_vars.get('previous_sections_summary', '') if context_vars else '',
-            }
+        # Use simple string replacement instead of .format() to avoid issues with JSON in templates
+        # Templates may contain JSON examples with curly braces that conflict with .format()
+        user_prompt = agent_user_prompt_template
+        for key, value in format_vars.items():
+            # Replace {key} with the actual value
+            user_prompt = user_prompt.replace(f'{{{key}}}', str(value))
 
-            logger.debug(f"Agent {agent_id} template variables available: {list(format_vars.keys())}")
-            logger.debug(f"Agent {agent_id} context_vars keys: {list(context_vars.keys()) if context_vars else 'None'}")
-
-            # Use simple string replacement instead of .format() to avoid issues with JSON in templates
-            # Templates may contain JSON examples with curly braces that conflict with .format()
-            user_prompt = agent_user_prompt_template
-            for key, value in format_vars.items():
-                # Replace {key} with the actual value
-                user_prompt = user_prompt.replace(f'{{{key}}}', str(value))
-
-            # Execute agent via LLM service
-            logger.info(f"Executing agent: {agent_name} (ID: {agent_id}, Type: {agent_type}, Model: {agent_model_name})")
-
-            # Dynamic token limit adjustment to prevent context length errors
-            adjusted_max_tokens = self._calculate_safe_max_tokens(
-                model_name=agent_model_name,
-                system_prompt=agent_system_prompt,
-                user_prompt=user_prompt,
-                requested_max_tokens=agent_max_tokens
-            )
+        logger.info(f"Executing agent: {agent_name} (ID: {agent_id}, Type: {agent_type}, Model: {agent_model_name})")
 
-            if adjusted_max_tokens < agent_max_tokens:
-                logger.warning(
-                    f"Agent {agent_id} max_tokens reduced from {agent_max_tokens} to {adjusted_max_tokens} "
-                    f"to prevent context length error (input is large)"
-                )
+        # Dynamic token limit adjustment to prevent context length errors
+        adjusted_max_tokens = self._calculate_safe_max_tokens(
+            model_name=agent_model_name,
+            system_prompt=agent_system_prompt,
+            user_prompt=user_prompt,
+            requested_max_tokens=agent_max_tokens
+        )
 
-            response = LLMInvoker.invoke(
-                model_name=agent_model_name,
-                prompt=user_prompt,
-                system_prompt=agent_system_prompt,
-                temperature=agent_temperature,
-                max_tokens=adjusted_max_tokens
+        if adjusted_max_tokens < agent_max_tokens:
+            logger.warning(
+                f"Agent {agent_id} max_tokens reduced from {agent_max_tokens} to {adjusted_max_tokens} "
+                f"to prevent context length error (input is large)"
             )
 
-            processing_time = time.time() - start_time
+        return {
+            "agent_name": agent_name,
+            "invoke_args": {
+                "model_name": agent_model_name,
+                "prompt": user_prompt,
+                "system_prompt": agent_system_prompt,
+                "temperature": agent_temperature,
+                "max_tokens": adjusted_max_tokens,
+            },
+        }
 
-            # Return as ActorResult for compatibility
-            # LLMInvoker.invoke() returns a string directly
-            return ActorResult(
-                agent_id=f"agent_{agent_id}_{uuid.uuid4().hex[:8]}",
-                model_name=agent_model_name,
-                section_title=section_title,
-                rules_extracted=response,  # Already a string from LLMInvoker
-                processing_time=processing_time
-            )
+    def _execute_agent_by_id(self, agent_id: int, section_title: str, section_content: str, context_vars: Dict[str, str] = None) -> Optional[ActorResult]:
+        """
+        Execute a single agent by database ID
+
+        Args:
+            agent_id: Database ID of the agent to execute
+            section_title: Section title for context
+            section_content: Section content to process
+            context_vars: Dictionary of context variables for prompt formatting
+
+        Returns:
+            ActorResult with agent's output or None if failed
+        """
+        try:
+            call = self._prepare_agent_call(agent_id, section_title, section_content, context_vars)
+            if call is None:
+                return None
+
+            start_time = time.time()
+            response = LLMInvoker.invoke(**call["invoke_args"])
+            return self._agent_result(agent_id, call, section_title, response, time.time() - start_time)
 
         except Exception as e:
             import traceback
             logger.error(f"Failed to execute agent ID {agent_id}: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
-        finally:
-            # CRITICAL: Close database session to prevent connection pool exhaustion
-            if db is not None:
-                db.close()
 
-    def _execute_stage(self, stage: Dict[str, Any], section_title: str, section_content: str, all_stage_outputs: Dict[str, List[ActorResult]] = None) -> List[ActorResult]:
-        """
-        Execute a single stage from agent set configuration
+    async def _aexecute_agent_by_id(self, agent_id: int, section_title: str, section_content: str, context_vars: Dict[str, str] = None, timeout: Optional[int] = None) -> Optional[ActorResult]:
+        """Async _execute_agent_by_id(): the database read runs off the loop, the LLM call (bounded by timeout) via LLMInvoker.ainvoke"""
+        try:
+            call = await asyncio.to_thread(self._prepare_agent_call, agent_id, section_title, section_content, context_vars)
+            if call is None:
+                return None
 
-        Args:
-            stage: Stage configuration dict with agent_ids, execution_mode, etc.
-            section_title: Section title for context
-            section_content: Section content to process
-            all_stage_outputs: Dictionary mapping stage names to their outputs (for building context)
+            start_time = time.time()
+            response = await LLMInvoker.ainvoke(**call["invoke_args"], timeout=timeout)
+            return self._agent_result(agent_id, call, section_title, response, time.time() - start_time)
 
-        Returns:
-            List of ActorResult from this stage
-        """
-        agent_ids = stage.get('agent_ids', [])
-        execution_mode = stage.get('execution_mode', 'parallel')
-        stage_name = stage.get('stage_name', 'unnamed_stage')
+        except Exception as e:
+            import traceback
+            logger.error(f"Failed to execute agent ID {agent_id}: {e}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return None
 
-        logger.info(f"Executing stage '{stage_name}' with {len(agent_ids)} agent(s) in {execution_mode} mode")
+    @staticmethod
+    def _agent_result(agent_id: int, call: Dict[str, Any], section_title: str, response: str, processing_time: float) -> ActorResult:
+        # Return as ActorResult for compatibility
+        # LLMInvoker returns a string directly
+        return ActorResult(
+            agent_id=f"agent_{agent_id}_{uuid.uuid4().hex[:8]}",
+            model_name=call["invoke_args"]["model_name"],
+            section_title=section_title,
+            rules_extracted=response,
+            processing_time=processing_time
+        )
 
-        # Build context variables based on previous stage outputs
+    @staticmethod
+    def _build_stage_context(all_stage_outputs: Dict[str, List[ActorResult]] = None) -> Dict[str, str]:
+        """Build prompt context variables from previous stage outputs"""
         context_vars = {}
 
         if all_stage_outputs:
@@ -408,32 +431,65 @@ class MultiAgentTestPlanService:
             context_vars['context'] = all_outputs_text
             context_vars['previous_sections_summary'] = ""  # TODO: Track previous sections if needed
 
+        return context_vars
+
+    def _execute_stage(self, stage: Dict[str, Any], section_title: str, section_content: str, all_stage_outputs: Dict[str, List[ActorResult]] = None) -> List[ActorResult]:
+        """
+        Execute a single stage from agent set configuration
+
+        The stage runs on the shared stage executor's event loop (see
+        services.async_stage_executor); this call blocks until it completes.
+
+        Args:
+            stage: Stage configuration dict with agent_ids, execution_mode, etc.
+            section_title: Section title for context
+            section_content: Section content to process
+            all_stage_outputs: Dictionary mapping stage names to their outputs (for building context)
+
+        Returns:
+            List of ActorResult from this stage
+        """
+        return get_stage_executor().run(
+            self._aexecute_stage(stage, section_title, section_content, all_stage_outputs)
+        )
+
+    async def _aexecute_stage(self, stage: Dict[str, Any], section_title: str, section_content: str, all_stage_outputs: Dict[str, List[ActorResult]] = None) -> List[ActorResult]:
+        """Async _execute_stage(): parallel agents are awaited together instead of on a thread pool"""
+        agent_ids = stage.get('agent_ids', [])
+        execution_mode = stage.get('execution_mode', 'parallel')
+        stage_name = stage.get('stage_name', 'unnamed_stage')
+
+        logger.info(f"Executing stage '{stage_name}' with {len(agent_ids)} agent(s) in {execution_mode} mode")
+
+        # Build context variables based on previous stage outputs
+        context_vars = self._build_stage_context(all_stage_outputs)
+
         results = []
 
         if execution_mode == 'parallel':
-            # Execute agents in parallel
-            with ThreadPoolExecutor(max_workers=len(agent_ids)) as executor:
-                futures = []
-                for agent_id in agent_ids:
-                    future = executor.submit(
-                        self._execute_agent_by_id,
-                        agent_id, section_title, section_content, context_vars
-                    )
-                    futures.append(future)
+            # Execute agents concurrently; LLM concurrency is bounded by the stage executor
+            outcomes = await get_stage_executor().gather(
+                self._aexecute_agent_by_id(
+                    agent_id, section_title, section_content, context_vars,
+                    timeout=180  # 3 minute timeout per agent LLM call
+                )
+                for agent_id in agent_ids
+            )
 
-                # Collect results
-                for future in as_completed(futures):
-                    try:
-                        result = future.result(timeout=180)  # 3 minute timeout per agent
-                        if result:
-                            results.append(result)
-                    except Exception as e:
-                        logger.error(f"Stage '{stage_name}' agent failed: {e}")
+            # Collect results
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    logger.error(f"Stage '{stage_name}' agent failed: {outcome!r}")
+                elif outcome:
+                    results.append(outcome)
 
         elif execution_mode == 'sequential':
             # Execute agents one after another
             for agent_id in agent_ids:
-                result = self._execute_agent_by_id(agent_id, section_title, section_content, context_vars)
+                result = await self._aexecute_agent_by_id(
+                    agent_id, section_title, section_content, context_vars,
+                    timeout=180  # 3 minute timeout per agent LLM call
+                )
                 if result:
                     results.append(result)
                     # Update context vars with latest result for next agent
@@ -442,7 +498,7 @@ class MultiAgentTestPlanService:
         elif execution_mode == 'batched':
             # Execute in batches (not fully implemented, fallback to parallel)
             logger.warning(f"Batched execution mode not fully implemented for stage '{stage_name}', using parallel")
-            return self._execute_stage({**stage, 'execution_mode': 'parallel'}, section_title, section_content, all_stage_outputs)
+            return await self._aexecute_stage({**stage, 'execution_mode': 'parallel'}, section_title, section_content, all_stage_outputs)
 
         logger.info(f"Stage '{stage_name}' completed: {len(results)} successful agent executions")
         return results
@@ -629,13 +685,13 @@ class MultiAgentTestPlanService:
                 chroma_client = get_chroma_client()
                 collection = chroma_client.get_collection(collection_name)
 
-                # Get all documents from collection
-                result = collection.get()
+                # Get the chunks of the requested documents (filtered in ChromaDB)
+                result = get_document_chunks(collection, source_doc_ids)
                 docs = result.get("documents", [])
                 metas = result.get("metadatas", [])
                 ids = result.get("ids", [])
 
-                logger.info(f"Collection {collection_name} has {len(docs)} documents")
+                logger.info(f"Collection {collection_name}: {len(docs)} chunks for the requested documents")
 
                 # Group by document and section with improved metadata handling
                 document_sections: Dict[str, List[str]] = {}
@@ -652,13 +708,6 @@ class MultiAgentTestPlanService:
                         or f"Section {meta.get('page_number', meta.get('page', 'Unknown'))}"
                     )
 
-                    # Filter by explicit IDs if specified
-                    if source_doc_ids:
-                        if original_doc_id not in source_doc_ids and not any(
-                            str(x) in str(doc_name) for x in source_doc_ids
-                        ):
-                            continue
-
                     key = f"{doc_name} - {section_title}"
                     document_sections.setdefault(key, [])
                     document_sections[key].append(doc)
@@ -696,13 +745,13 @@ class MultiAgentTestPlanService:
                 chroma_client = get_chroma_client()
                 collection = chroma_client.get_collection(collection_name)
 
-                # Get all documents from collection
-                result = collection.get()
+                # Get the chunks of the requested documents (filtered in ChromaDB)
+                result = get_document_chunks(collection, source_doc_ids)
                 docs = result.get("documents", [])
                 metas = result.get("metadatas", [])
                 ids = result.get("ids", [])
 
-                logger.info(f"Collection {collection_name} has {len(docs)} documents")
+                logger.info(f"Collection {collection_name}: {len(docs)} chunks for the requested documents")
 
                 # Group by original page/section structure instead of artificial chunks
                 grouped: Dict[str, Dict[str, object]] = {}
@@ -714,12 +763,6 @@ class MultiAgentTestPlanService:
                         or original_doc_id
                     )
 
-                    if source_doc_ids:
-                        if original_doc_id not in source_doc_ids and not any(
-                            str(x) in str(doc_name) for x in source_doc_ids
-                        ):
-                            continue
-
                     # Extract page number from metadata (multiple sources)
                     page_number = (
                         meta.get("page_number") or
@@ -812,36 +855,15 @@ class MultiAgentTestPlanService:
                 chroma_client = get_chroma_client()
                 collection = chroma_client.get_collection(collection_name)
 
-                # Get all documents from collection
-                result = collection.get(include=["documents", "metadatas"])
+                # Get the chunks of the requested documents; the document
+                # filter runs in ChromaDB and results are paged
+                result = get_document_chunks(collection, source_doc_ids, include=["documents", "metadatas"])
                 docs = result.get("documents", [])
                 metas = result.get("metadatas", [])
-                ids = result.get("ids", [])
-
-                logger.info(f"Collection {collection_name} has {len(docs)} chunks")
-
-                # Filter by source_doc_ids if specified
-                filtered_data = []
-                for doc_id, doc, meta in zip(ids, docs, metas):
-                    meta = meta or {}
-                    original_doc_id = meta.get("document_id") or doc_id
-                    doc_name = (
-                        meta.get("document_name") or
-                        meta.get("filename") or
-                        meta.get("source") or
-                        original_doc_id
-                    )
 
-                    # Filter by source_doc_ids
-                    if source_doc_ids:
-                        if original_doc_id not in source_doc_ids and not any(
-                            str(x) in str(doc_name) for x in source_doc_ids
-                        ):
-                            continue
-
-                    filtered_data.append((doc, meta))
+                filtered_data = [(doc, meta or {}) for doc, meta in zip(docs, metas)]
 
-                logger.info(f"Filtered to {len(filtered_data)} chunks matching document IDs")
+                logger.info(f"Collection {collection_name}: {len(filtered_data)} chunks for the requested documents")
 
                 # Group chunks by page, then by heading
                 pages = defaultdict(lambda: defaultdict(list))
@@ -891,9 +913,11 @@ class MultiAgentTestPlanService:
                         else:
                             heading_meta = chunks[0]["metadata"]
 
-                        # Combine all content (heading + body)
+                        # Combine all content (heading + body) in chunk order,
+                        # stitching sub-chunks of a split body back together
                         combined_content = "\n\n".join(
-                            c["content"] for c in chunks if c["content"] and c["content"].strip()
+                            text for text in join_sub_chunks([(c["metadata"], c["content"]) for c in chunks])
+                            if text and text.strip()
                         )
 
                         # Skip if content is too short
@@ -1221,62 +1245,52 @@ class MultiAgentTestPlanService:
         else:
             logger.info(f"Deploying agents for {len(sections)} sections using default orchestration")
 
-        section_results = []
-
         # Use max_workers from profile (CPU-friendly settings)
         max_workers = getattr(self._current_profile, 'max_workers', 4)
-        logger.info(f"Using {max_workers} concurrent workers (from profile: {self._current_profile.display_name})")
+        logger.info(f"Using {max_workers} concurrent sections (from profile: {self._current_profile.display_name})")
+
+        # Handle both List[SectionWithMetadata] and Dict[str, str]
+        if isinstance(sections, list):
+            # New path: List[SectionWithMetadata]
+            section_items = [(s.section_key, s.content, s) for s in sections]
+        else:
+            # Legacy path: Dict[str, str]
+            section_items = [(title, content, None) for title, content in sections.items()]
+
+        # Process each section with its agent set as a coroutine on the stage
+        # executor's loop; at most max_workers sections are in flight, and LLM
+        # concurrency is bounded by the executor as well
+        coros = []
+        titles = []
+        for idx, (section_title, section_content, section_metadata) in enumerate(section_items):
+            # Respect abort flag: stop submitting new work
+            if self._is_aborted(pipeline_id):
+                logger.warning(f"Abort requested for pipeline {pipeline_id}; stopping new submissions at section {idx}")
+                # Mark remaining sections as aborted
+                self.redis_client.hset(f"pipeline:{pipeline_id}:section:{idx}", "status", "ABORTED")
+                break
+            coros.append(self._aprocess_section_with_multi_agents(
+                pipeline_id, idx, section_title, section_content, agent_set_config, section_metadata
+            ))
+            titles.append(section_title)
 
-        # Process each section with multiple actor agents + critic
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_section = {}
+        executor = get_stage_executor()
+        outcomes = executor.run(executor.gather(coros, limit=max_workers))
 
-            # Handle both List[SectionWithMetadata] and Dict[str, str]
-            if isinstance(sections, list):
-                # New path: List[SectionWithMetadata]
-                for idx, section in enumerate(sections):
-                    # Respect abort flag: stop submitting new work
-                    if self._is_aborted(pipeline_id):
-                        logger.warning(f"Abort requested for pipeline {pipeline_id}; stopping new submissions at section {idx}")
-                        # Mark remaining sections as aborted
-                        self.redis_client.hset(f"pipeline:{pipeline_id}:section:{idx}", "status", "ABORTED")
-                        break
-                    future = executor.submit(
-                        self._process_section_with_multi_agents,
-                        pipeline_id, idx, section.section_key, section.content, agent_set_config, section
-                    )
-                    future_to_section[future] = section.section_key
+        # Collect results in section order
+        section_results = []
+        for section_title, outcome in zip(titles, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Section processing error for '{section_title}': {outcome!r}")
+            elif outcome:
+                section_results.append(outcome)
+                logger.info(f"Section completed: {section_title}")
             else:
-                # Legacy path: Dict[str, str]
-                for idx, (section_title, section_content) in enumerate(sections.items()):
-                    # Respect abort flag: stop submitting new work
-                    if self._is_aborted(pipeline_id):
-                        logger.warning(f"Abort requested for pipeline {pipeline_id}; stopping new submissions at section {idx}")
-                        # Mark remaining sections as aborted
-                        self.redis_client.hset(f"pipeline:{pipeline_id}:section:{idx}", "status", "ABORTED")
-                        break
-                    future = executor.submit(
-                        self._process_section_with_multi_agents,
-                        pipeline_id, idx, section_title, section_content, agent_set_config, None
-                    )
-                    future_to_section[future] = section_title
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_section):
-                section_title = future_to_section[future]
-                try:
-                    critic_result = future.result(timeout=300)  # 5 minute timeout per section
-                    if critic_result:
-                        section_results.append(critic_result)
-                        logger.info(f"Section completed: {section_title}")
-                    else:
-                        logger.warning(f"Section failed or aborted: {section_title}")
-                except Exception as e:
-                    logger.error(f"Section processing error for '{section_title}': {e}")
-        
+                logger.warning(f"Section failed or aborted: {section_title}")
+
         logger.info(f"Completed processing {len(section_results)} sections")
         return section_results
-    
+
     def _process_section_with_multi_agents(self,
                                          pipeline_id: str,
                                          section_idx: int,
@@ -1287,6 +1301,9 @@ class MultiAgentTestPlanService:
         """
         Process a single section with agents from agent set configuration
 
+        Runs _aprocess_section_with_multi_agents() on the shared stage
+        executor's event loop; this call blocks until it completes.
+
         Args:
             pipeline_id: Unique pipeline identifier
             section_idx: Section index number
@@ -1298,39 +1315,82 @@ class MultiAgentTestPlanService:
         Returns:
             CriticResult or None if aborted/failed
         """
+        return get_stage_executor().run(self._aprocess_section_with_multi_agents(
+            pipeline_id, section_idx, section_title, section_content, agent_set_config, section_metadata
+        ))
+
+    async def _aprocess_section_with_multi_agents(self,
+                                                pipeline_id: str,
+                                                section_idx: int,
+                                                section_title: str,
+                                                section_content: str,
+                                                agent_set_config: Dict[str, Any],
+                                                section_metadata: Optional[SectionWithMetadata] = None) -> Optional[CriticResult]:
+        """Async _process_section_with_multi_agents(): stages are awaited, Redis writes run off the loop"""
+        section_key = f"pipeline:{pipeline_id}:section:{section_idx}"
 
         # Respect abort flag early
-        if self._is_aborted(pipeline_id):
-            self.redis_client.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "ABORTED")
+        if await asyncio.to_thread(self._is_aborted, pipeline_id):
+            await asyncio.to_thread(self.redis_client.hset, section_key, "status", "ABORTED")
             return None
 
         # Update section status
-        self.redis_client.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "PROCESSING")
+        await asyncio.to_thread(self.redis_client.hset, section_key, "status", "PROCESSING")
 
         try:
-            # Execute agents based on agent_set_config
-            if 'stages' not in agent_set_config:
-                raise ValueError("Agent set configuration must contain 'stages'")
+            actor_results = await self._arun_section_stages(section_title, section_content, agent_set_config)
+        except Exception as e:
+            logger.error(f"Error processing section {section_title}: {e}")
+            await asyncio.to_thread(self.redis_client.hset, section_key, "status", "FAILED")
+            return None
 
-            if agent_set_config and 'stages' in agent_set_config:
-                logger.info(f"Using custom agent set orchestration with {len(agent_set_config['stages'])} stages")
+        return await asyncio.to_thread(
+            self._record_section_results, pipeline_id, section_idx, section_title, actor_results, section_metadata
+        )
+
+    async def _arun_section_stages(self,
+                                   section_title: str,
+                                   section_content: str,
+                                   agent_set_config: Dict[str, Any]) -> List[ActorResult]:
+        """Run the agent set's stages on a section in sequence, passing context between them"""
+        # Execute agents based on agent_set_config
+        if not agent_set_config or 'stages' not in agent_set_config:
+            raise ValueError("Agent set configuration must contain 'stages'")
+
+        logger.info(f"Using custom agent set orchestration with {len(agent_set_config['stages'])} stages")
 
-                # Execute stages in sequence, passing context between them
-                all_stage_results = []
-                all_stage_outputs = {}  # Track outputs by stage name for context building
+        all_stage_results = []
+        all_stage_outputs = {}  # Track outputs by stage name for context building
 
-                for stage_idx, stage in enumerate(agent_set_config['stages']):
-                    stage_name = stage.get('stage_name', f'stage_{stage_idx}')
-                    logger.info(f"Executing stage {stage_idx + 1}/{len(agent_set_config['stages'])}: {stage_name}")
+        for stage_idx, stage in enumerate(agent_set_config['stages']):
+            stage_name = stage.get('stage_name', f'stage_{stage_idx}')
+            logger.info(f"Executing stage {stage_idx + 1}/{len(agent_set_config['stages'])}: {stage_name}")
 
-                    stage_results = self._execute_stage(stage, section_title, section_content, all_stage_outputs)
-                    all_stage_results.extend(stage_results)
+            stage_results = await self._aexecute_stage(stage, section_title, section_content, all_stage_outputs)
+            all_stage_results.extend(stage_results)
 
-                    # Track this stage's outputs by name for future stages
-                    all_stage_outputs[stage_name] = stage_results
+            # Track this stage's outputs by name for future stages
+            all_stage_outputs[stage_name] = stage_results
 
-                # Use the last stage's results as final actor results
-                actor_results = all_stage_results if all_stage_results else []
+        return all_stage_results
+
+    def _record_section_results(self,
+                                pipeline_id: str,
+                                section_idx: int,
+                                section_title: str,
+                                actor_results: List[ActorResult],
+                                section_metadata: Optional[SectionWithMetadata] = None) -> Optional[CriticResult]:
+        """Build the section's CriticResult and store the section results in Redis"""
+        critic_result = None
+        try:
+            # Section results are buffered and written in one pipeline on exit
+            with ProgressReporter(self.redis_client, name=f"pipeline {pipeline_id} section {section_idx}") as progress:
+                try:
+                    critic_result = self._build_section_critic_result(section_title, actor_results, section_metadata)
+                except Exception as e:
+                    logger.error(f"Error processing section {section_title}: {e}")
+                    progress.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "FAILED")
+                    return None
 
                 # Store all stage results in Redis
                 for result in actor_results:
@@ -1342,46 +1402,12 @@ class MultiAgentTestPlanService:
                         "rules_extracted": result.rules_extracted,
                         "processing_time": result.processing_time
                     }
-                    self.redis_client.hset(result_key, mapping=result_data)
-
-                # For agent sets, use the final stage output as the synthesized result
-                # Create a CriticResult from the final outputs
-                if actor_results:
-                    final_output = "\n\n".join([r.rules_extracted for r in actor_results])
-
-                    # Use heading_text from metadata if available, otherwise use section_title
-                    display_title = section_metadata.heading_text if section_metadata else section_title
-
-                    # Extract test procedures, dependencies, and conflicts from the combined output
-                    test_procedures = self._extract_test_procedures_from_markdown(final_output)
-                    dependencies = self._extract_dependencies_from_markdown(final_output)
-                    conflicts = self._extract_conflicts_from_markdown(final_output)
-
-                    logger.info(f"Agent set section '{display_title}': Extracted {len(test_procedures)} test procedures")
-
-                    critic_result = CriticResult(
-                        section_title=display_title,
-                        synthesized_rules=final_output,
-                        dependencies=dependencies,
-                        conflicts=conflicts,
-                        test_procedures=test_procedures,
-                        actor_count=len(actor_results),
-                        source_section_key=section_title  # Preserve original section key
-                    )
+                    progress.hset(result_key, mapping=result_data)
 
-                    # Attach metadata for JSON conversion
-                    if section_metadata:
-                        critic_result._metadata = section_metadata
-                        logger.info(
-                            f"Attached metadata to CriticResult: page={section_metadata.page_number}, "
-                            f"level={section_metadata.heading_level}, parent='{section_metadata.parent_heading}'"
-                        )
-                else:
-                    logger.warning(f"No results from agent set stages for section: {section_title}")
-                    critic_result = None
-            
-            # Store critic result in Redis
-            if critic_result:
+                if critic_result is None:
+                    return None
+
+                # Store critic result in Redis
                 critic_key = f"pipeline:{pipeline_id}:critic:{section_idx}"
                 critic_data = {
                     "section_title": critic_result.section_title,
@@ -1391,23 +1417,60 @@ class MultiAgentTestPlanService:
                     "test_procedures": json.dumps(critic_result.test_procedures),
                     "actor_count": critic_result.actor_count
                 }
-                self.redis_client.hset(critic_key, mapping=critic_data)
-                
+                progress.hset(critic_key, mapping=critic_data)
+
                 # Update section status
-                self.redis_client.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "COMPLETED")
+                progress.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "COMPLETED")
                 # Increment processed counter on meta
-                try:
-                    self.redis_client.hincrby(f"pipeline:{pipeline_id}:meta", "sections_processed", 1)
-                except Exception:
-                    pass
-                
-                return critic_result
-            
+                progress.hincrby(f"pipeline:{pipeline_id}:meta", "sections_processed", 1)
         except Exception as e:
-            logger.error(f"Error processing section {section_title}: {e}")
-            self.redis_client.hset(f"pipeline:{pipeline_id}:section:{section_idx}", "status", "FAILED")
-        
-        return None
+            # Progress writes are best-effort; a Redis failure must not fail the section
+            logger.warning(f"Could not store progress for section {section_title}: {e}")
+
+        return critic_result
+
+    def _build_section_critic_result(self,
+                                     section_title: str,
+                                     actor_results: List[ActorResult],
+                                     section_metadata: Optional[SectionWithMetadata] = None) -> Optional[CriticResult]:
+        """Combine the agent set's stage outputs into the section's CriticResult"""
+        # For agent sets, use the final stage output as the synthesized result
+        # Create a CriticResult from the final outputs
+        if not actor_results:
+            logger.warning(f"No results from agent set stages for section: {section_title}")
+            return None
+
+        final_output = "\n\n".join([r.rules_extracted for r in actor_results])
+
+        # Use heading_text from metadata if available, otherwise use section_title
+        display_title = section_metadata.heading_text if section_metadata else section_title
+
+        # Extract test procedures, dependencies, and conflicts from the combined output
+        test_procedures = self._extract_test_procedures_from_markdown(final_output)
+        dependencies = self._extract_dependencies_from_markdown(final_output)
+        conflicts = self._extract_conflicts_from_markdown(final_output)
+
+        logger.info(f"Agent set section '{display_title}': Extracted {len(test_procedures)} test procedures")
+
+        critic_result = CriticResult(
+            section_title=display_title,
+            synthesized_rules=final_output,
+            dependencies=dependencies,
+            conflicts=conflicts,
+            test_procedures=test_procedures,
+            actor_count=len(actor_results),
+            source_section_key=section_title  # Preserve original section key
+        )
+
+        # Attach metadata for JSON conversion
+        if section_metadata:
+            critic_result._metadata = section_metadata
+            logger.info(
+                f"Attached metadata to CriticResult: page={section_metadata.page_number}, "
+                f"level={section_metadata.heading_level}, parent='{section_metadata.parent_heading}'"
+            )
+
+        return critic_result
 
     def _is_aborted(self, pipeline_id: str) -> bool:
         try:
@@ -6,7 +6,9 @@ Based on test_card_gen.ipynb's synthesize_pairwise_test_plan approach.
 
 import logging
 from typing import Dict, List, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.llm_invoker import LLMInvoker
+from services.async_stage_executor import get_stage_executor
 
 logger = logging.getLogger(__name__)
 
@@ -98,32 +100,8 @@ class PairwiseSynthesisService:
                 logger.warning("No valid pairs created")
                 return sections
 
-            # Process pairs in parallel
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_pair = {
-                    executor.submit(
-                        self._synthesize_pair,
-                        s1,
-                        s2,
-                        content1,
-                        content2
-                    ): (s1, s2)
-                    for s1, s2, content1, content2 in pairs
-                }
-
-                completed = 0
-                total = len(future_to_pair)
-                for future in as_completed(future_to_pair):
-                    s1, s2 = future_to_pair[future]
-                    completed += 1
-                    try:
-                        combined_content = future.result()
-                        pairwise_results[s1] = combined_content
-                        logger.info(f" [{completed}/{total}] Synthesized pair: {s1} + {s2}")
-                    except Exception as e:
-                        logger.error(f" [{completed}/{total}] Failed to synthesize {s1} + {s2}: {e}")
-                        # Fallback: keep original first section
-                        pairwise_results[s1] = sections.get(s1, "")
+            # Process pairs concurrently on the shared stage executor
+            pairwise_results.update(self._run_pairs(pairs, max_workers, "Synthesized pair"))
 
             logger.info(f"Completed pairwise synthesis: {len(pairwise_results)} combined sections")
             return pairwise_results
@@ -189,32 +167,8 @@ class PairwiseSynthesisService:
                 logger.warning("No valid pairs created")
                 return sections
 
-            # Process pairs in parallel
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_pair = {
-                    executor.submit(
-                        self._synthesize_pair,
-                        s1,
-                        s2,
-                        content1,
-                        content2
-                    ): (s1, s2)
-                    for s1, s2, content1, content2 in pairs
-                }
-
-                completed = 0
-                total = len(future_to_pair)
-                for future in as_completed(future_to_pair):
-                    s1, s2 = future_to_pair[future]
-                    completed += 1
-                    try:
-                        combined_content = future.result()
-                        pairwise_results[s1] = combined_content
-                        logger.info(f" [{completed}/{total}] Synthesized consecutive: {s1} + {s2}")
-                    except Exception as e:
-                        logger.error(f" [{completed}/{total}] Failed to synthesize {s1} + {s2}: {e}")
-                        # Fallback: keep original first section
-                        pairwise_results[s1] = sections.get(s1, "")
+            # Process pairs concurrently on the shared stage executor
+            pairwise_results.update(self._run_pairs(pairs, max_workers, "Synthesized consecutive"))
 
             logger.info(f"Completed consecutive synthesis: {len(pairwise_results)} combined sections")
             return pairwise_results
@@ -223,6 +177,41 @@ class PairwiseSynthesisService:
             logger.error(f"Consecutive synthesis failed: {e}")
             return sections
 
+    def _run_pairs(
+        self,
+        pairs: List[Tuple[str, str, str, str]],
+        max_workers: int,
+        label: str
+    ) -> Dict[str, str]:
+        """
+        Synthesize (s1, s2, content1, content2) pairs, at most max_workers at
+        a time, via LLMInvoker.ainvoke on the stage executor's event loop.
+
+        Returns:
+            Dictionary of first_section_name -> synthesized_content
+        """
+        total = len(pairs)
+        progress = {"completed": 0}
+
+        async def _one(s1, s2, content1, content2):
+            combined_content = await self._asynthesize_pair(s1, s2, content1, content2)
+            progress["completed"] += 1
+            logger.info(f" [{progress['completed']}/{total}] {label}: {s1} + {s2}")
+            return combined_content
+
+        executor = get_stage_executor()
+        outcomes = executor.run(executor.gather((_one(*pair) for pair in pairs), limit=max_workers))
+
+        results = {}
+        for (s1, s2, content1, _), outcome in zip(pairs, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f" Failed to synthesize {s1} + {s2}: {outcome}")
+                # Fallback: keep original first section
+                results[s1] = content1
+            else:
+                results[s1] = outcome
+        return results
+
     def _synthesize_pair(
         self,
         section1_name: str,
@@ -243,7 +232,54 @@ class PairwiseSynthesisService:
         Returns:
             Combined synthesized content
         """
-        prompt = f"""You are a senior QA documentation engineer.
+        prompt = self._pair_prompt(section1_name, section2_name, content1, content2)
+
+        try:
+            logger.debug(f"Synthesizing: {section1_name} + {section2_name}")
+
+            response = self.llm_service.query_direct(
+                model_name="gpt-4",
+                query=prompt
+            )
+
+            # Log success with preview
+            preview = response[:100] + "..." if len(response) > 100 else response
+            logger.debug(f"Synthesized successfully. Preview: {preview}")
+
+            return response
+
+        except Exception as e:
+            logger.error(f"Pair synthesis failed for {section1_name} + {section2_name}: {e}")
+            return self._pair_fallback(section1_name, section2_name, content1, content2)
+
+    async def _asynthesize_pair(
+        self,
+        section1_name: str,
+        section2_name: str,
+        content1: str,
+        content2: str
+    ) -> str:
+        """Async _synthesize_pair() via LLMInvoker.ainvoke (same prompt and fallback)"""
+        prompt = self._pair_prompt(section1_name, section2_name, content1, content2)
+
+        try:
+            logger.debug(f"Synthesizing: {section1_name} + {section2_name}")
+
+            response = await LLMInvoker.ainvoke(model_name="gpt-4", prompt=prompt)
+
+            # Log success with preview
+            preview = response[:100] + "..." if len(response) > 100 else response
+            logger.debug(f"Synthesized successfully. Preview: {preview}")
+
+            return response
+
+        except Exception as e:
+            logger.error(f"Pair synthesis failed for {section1_name} + {section2_name}: {e}")
+            return self._pair_fallback(section1_name, section2_name, content1, content2)
+
+    @staticmethod
+    def _pair_prompt(section1_name: str, section2_name: str, content1: str, content2: str) -> str:
+        return f"""You are a senior QA documentation engineer.
 
 Given the DETAILED test rules for two consecutive sections, synthesize a single, logically organized, highly detailed test plan section.
 
@@ -274,29 +310,15 @@ Content:
 
 Output ONLY the combined test plan section in the described format. Do not add any preamble or explanation."""
 
-        try:
-            logger.debug(f"Synthesizing: {section1_name} + {section2_name}")
-
-            response = self.llm_service.query_direct(
-                model_name="gpt-4",
-                query=prompt
-            )[0]
-
-            # Log success with preview
-            preview = response[:100] + "..." if len(response) > 100 else response
-            logger.debug(f"Synthesized successfully. Preview: {preview}")
-
-            return response
-
-        except Exception as e:
-            logger.error(f"Pair synthesis failed for {section1_name} + {section2_name}: {e}")
-            # Fallback: concatenate with separator
-            fallback = f"## Combined: {section1_name} & {section2_name}\n\n"
-            fallback += f"### {section1_name}\n\n{content1}\n\n"
-            fallback += f"---\n\n"
-            fallback += f"### {section2_name}\n\n{content2}\n\n"
-            logger.warning(f"Using fallback concatenation for {section1_name} + {section2_name}")
-            return fallback
+    @staticmethod
+    def _pair_fallback(section1_name: str, section2_name: str, content1: str, content2: str) -> str:
+        # Fallback: concatenate with separator
+        fallback = f"## Combined: {section1_name} & {section2_name}\n\n"
+        fallback += f"### {section1_name}\n\n{content1}\n\n"
+        fallback += f"---\n\n"
+        fallback += f"### {section2_name}\n\n{content2}\n\n"
+        logger.warning(f"Using fallback concatenation for {section1_name} + {section2_name}")
+        return fallback
 
     def synthesize_with_redis_pipeline(
         self,
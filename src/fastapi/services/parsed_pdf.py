@@ -0,0 +1,208 @@
+"""
+Single-Pass PDF Parsing
+Parses a PDF once with pdfplumber and exposes per-page text, page geometry and
+image placements to every ingestion stage (image extraction, heading-based
+chunking, position-aware placement, legacy text-by-page).
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Tuple
+
+import pdfplumber
+from pdfminer.image import ImageWriter
+from pdfminer.layout import LTImage
+from PIL import Image
+
+logger = logging.getLogger("PARSED_PDF")
+
+
+@dataclass
+class ParsedImage:
+    """An image placed on a page, already written to the image store"""
+    filename: str
+    storage_path: str
+    page_number: int
+    page_sequence: int
+    bbox: List[float]  # [x0, y0, x1, y1] in PDF coordinates (y0 = bottom)
+    width_pts: float
+    height_pts: float
+    width_px: int
+    height_px: int
+
+
+@dataclass
+class ParsedPage:
+    """Text and layout for one page"""
+    page_number: int
+    text: str
+    width: float
+    height: float
+    images: List[ParsedImage] = field(default_factory=list)
+
+
+@dataclass
+class ParsedPDF:
+    """A PDF parsed once; shared by all stages that read the same file"""
+    path: str
+    doc_id: str
+    pages: List[ParsedPage] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def image_count(self) -> int:
+        return sum(len(p.images) for p in self.pages)
+
+
+def _store_image(raw: Dict[str, Any], page_number: int, doc_id: str, images_dir: str, scratch_dir: str) -> Optional[str]:
+    """
+    Decode an image stream and store it as JPEG/PNG in images_dir.
+
+    Returns the stored path, or None if the image cannot be decoded into a
+    format PIL can read (e.g. JBIG2 masks), matching the legacy extractor
+    which discarded images that failed verification.
+    """
+    lt_image = LTImage(raw["name"], raw["stream"], (raw["x0"], raw["y0"], raw["x1"], raw["y1"]))
+    exported = ImageWriter(scratch_dir).export_image(lt_image)
+    exported_path = os.path.join(scratch_dir, exported)
+    ext = os.path.splitext(exported)[1].lower()
+
+    base_name = f"{doc_id}_page_{page_number}_{raw['name']}"
+    try:
+        if ext in (".jpg", ".jpeg"):
+            with Image.open(exported_path) as img:
+                img.verify()
+            storage_path = os.path.join(images_dir, f"{base_name}.jpg")
+            shutil.move(exported_path, storage_path)
+        else:
+            storage_path = os.path.join(images_dir, f"{base_name}.png")
+            with Image.open(exported_path) as img:
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                img.save(storage_path, format="PNG")
+        return storage_path
+    except Exception as e:
+        logger.warning(f"Skipping undecodable image {raw['name']} on page {page_number} ({ext}): {e}")
+        return None
+    finally:
+        if os.path.exists(exported_path):
+            os.remove(exported_path)
+
+
+def _parse_page_range(pdf_path: str, doc_id: str, images_dir: Optional[str], first: int, last: int) -> List[ParsedPage]:
+    """
+    Parse pages first..last (1-based, inclusive) of a PDF.
+
+    Module-level so it can run in a process pool worker; each call opens its
+    own pdfplumber handle.
+    """
+    pages: List[ParsedPage] = []
+
+    with tempfile.TemporaryDirectory() as scratch_dir, pdfplumber.open(pdf_path) as pdf:
+        for page_number in range(first, last + 1):
+            page = pdf.pages[page_number - 1]
+            try:
+                page_text = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Text extraction failed for page {page_number}: {e}")
+                page_text = ""
+
+            parsed_page = ParsedPage(
+                page_number=page_number,
+                text=page_text,
+                width=float(page.width),
+                height=float(page.height),
+            )
+
+            if images_dir:
+                for raw in page.images:
+                    try:
+                        storage_path = _store_image(raw, page_number, doc_id, images_dir, scratch_dir)
+                        if not storage_path:
+                            continue
+                        with Image.open(storage_path) as img:
+                            width_px, height_px = img.size
+                        parsed_page.images.append(ParsedImage(
+                            filename=os.path.basename(storage_path),
+                            storage_path=storage_path,
+                            page_number=page_number,
+                            page_sequence=len(parsed_page.images),
+                            bbox=[float(raw["x0"]), float(raw["y0"]), float(raw["x1"]), float(raw["y1"])],
+                            width_pts=float(raw["width"]),
+                            height_pts=float(raw["height"]),
+                            width_px=width_px,
+                            height_px=height_px,
+                        ))
+                    except Exception as e:
+                        logger.error(f"Failed to extract image {raw.get('name')} from page {page_number}: {e}")
+
+            pages.append(parsed_page)
+            # Drop pdfplumber's per-page object cache to keep peak memory flat
+            page.close()
+
+    return pages
+
+
+def page_shards(page_count: int, shard_size: int) -> List[Tuple[int, int]]:
+    """Split 1..page_count into contiguous (first, last) ranges of shard_size pages."""
+    shard_size = max(1, shard_size)
+    return [(first, min(first + shard_size - 1, page_count)) for first in range(1, page_count + 1, shard_size)]
+
+
+def parse_pdf(
+    pdf_path: str,
+    doc_id: str,
+    images_dir: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    shard_size: int = 0
+) -> ParsedPDF:
+    """
+    Parse a PDF in a single pass.
+
+    Extracts per-page text (the same pdfplumber text heading-based chunking
+    uses), page dimensions and image placements with real bounding boxes.
+    When images_dir is given, images are decoded and stored there while the
+    page is open, so no PDF streams are held after parsing.
+
+    With an executor and shard_size, pages are split into contiguous shards
+    parsed in parallel (e.g. a ProcessPoolExecutor) and merged back in page
+    order. Output is identical to the sequential parse.
+
+    Args:
+        pdf_path: Path to the PDF file
+        doc_id: Document identifier used to name stored images
+        images_dir: Directory to store extracted images (None skips images)
+        executor: Optional executor to shard pages across
+        shard_size: Pages per shard when an executor is given
+
+    Returns:
+        ParsedPDF with one ParsedPage per page
+    """
+    parsed = ParsedPDF(path=pdf_path, doc_id=doc_id)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    shards = page_shards(page_count, shard_size) if executor is not None and shard_size else [(1, page_count)]
+    logger.info(f"Parsing {pdf_path} ({page_count} pages, {len(shards)} shard(s))")
+
+    if len(shards) > 1:
+        futures = [
+            executor.submit(_parse_page_range, pdf_path, doc_id, images_dir, first, last)
+            for first, last in shards
+        ]
+        # Collect in submission order so pages stay in document order
+        for future in futures:
+            parsed.pages.extend(future.result())
+    elif page_count:
+        parsed.pages.extend(_parse_page_range(pdf_path, doc_id, images_dir, 1, page_count))
+
+    logger.info(f"Parsed {pdf_path}: {parsed.page_count} pages, {parsed.image_count} images")
+    return parsed
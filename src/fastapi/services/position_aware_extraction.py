@@ -5,12 +5,14 @@ Captures precise image positions from PDFs for accurate document reconstruction
 
 import os
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
 from PyPDF2 import PdfReader
 from PIL import Image
 import io
 
+from .parsed_pdf import ParsedPDF
+
 logger = logging.getLogger("POSITION_AWARE_EXTRACTION")
 
 
@@ -19,11 +21,15 @@ def extract_images_with_positions(
     filename: str,
     temp_dir: str,
     doc_id: str,
-    images_dir: str
+    images_dir: str,
+    parsed: Optional[ParsedPDF] = None
 ) -> List[Dict[str, Any]]:
     """
     Extract images from PDF with complete position metadata.
 
+    If a ParsedPDF from the single-pass parser is given, its pages (and the
+    images it already stored) are used directly and the file is not re-read.
+
     Returns a list of page_data dicts, each containing:
     {
         "page": page_number,
@@ -45,6 +51,9 @@ def extract_images_with_positions(
         ]
     }
     """
+    if parsed is not None:
+        return pages_data_from_parsed(parsed)
+
     pages_data = []
 
     try:
@@ -212,6 +221,44 @@ def extract_images_with_positions(
     return pages_data
 
 
+def pages_data_from_parsed(parsed: ParsedPDF) -> List[Dict[str, Any]]:
+    """
+    Convert a ParsedPDF into the page_data format returned by
+    extract_images_with_positions. Bounding boxes come from the page layout,
+    so char_offset and placement_hint reflect where the image really sits.
+    """
+    pages_data = []
+
+    for page in parsed.pages:
+        page_data = {
+            "page": page.page_number,
+            "text": page.text,
+            "images": []
+        }
+
+        for image in page.images:
+            page_data["images"].append({
+                "filename": image.filename,
+                "storage_path": image.storage_path,
+                "page_number": image.page_number,
+                "page_sequence": image.page_sequence,
+                "bbox": image.bbox,
+                "width_pts": image.width_pts,
+                "height_pts": image.height_pts,
+                "width_px": image.width_px,
+                "height_px": image.height_px,
+                "char_offset": estimate_char_offset(image.bbox, page.text, page.height),
+                "text_before": "",  # Will be filled during chunking
+                "text_after": "",   # Will be filled during chunking
+                "placement_hint": determine_placement_hint(image.bbox, page.width, page.height)
+            })
+
+        pages_data.append(page_data)
+
+    logger.info(f"Total images extracted with positions: {parsed.image_count} (single-pass parse)")
+    return pages_data
+
+
 def extract_image_position_from_pdf(
     page,
     xobj,
@@ -300,9 +347,10 @@ def determine_placement_hint(
     width = x1 - x0
     height = y1 - y0
 
-    # Calculate position ratios
+    # Calculate position ratios (PDF coords: 0 = bottom, so measure the
+    # image's top edge from the top of the page, as estimate_char_offset does)
     x_ratio = x0 / page_width if page_width > 0 else 0.5
-    y_ratio = y0 / page_height if page_height > 0 else 0.5
+    y_ratio = 1 - (y1 / page_height) if page_height > 0 else 0.5
     width_ratio = width / page_width if page_width > 0 else 0.5
 
     # Full-width images
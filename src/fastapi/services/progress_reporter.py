@@ -0,0 +1,171 @@
+"""
+Progress Reporter
+Buffers job progress writes (HSET/HINCRBY/SET/EXPIRE) and sends them to Redis
+in pipelines, instead of one round-trip per update.
+
+Updates are coalesced while buffered: repeated HSETs to the same hash merge
+into one HSET, and HINCRBYs on the same field are summed. The buffer is
+flushed PROGRESS_FLUSH_INTERVAL seconds after the oldest buffered update (by
+a timer, so progress is published even when the job goes quiet), or as soon
+as PROGRESS_FLUSH_MAX_PENDING commands are waiting; on an explicit flush();
+and always on close() / leaving the context manager (including on error). Callers flush() at status transitions that must
+be visible before the next long-running step.
+
+    with ProgressReporter(redis_client) as progress:
+        progress.hset(key, mapping={"status": "running"})
+        progress.hincrby(key, "processed", 10)
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("PROGRESS_REPORTER")
+
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "0.5"))
+PROGRESS_FLUSH_MAX_PENDING = int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", "100"))
+
+
+class ProgressReporter:
+    """Thread-safe, coalescing Redis progress writer."""
+
+    def __init__(
+        self,
+        redis_client,
+        flush_interval: float = PROGRESS_FLUSH_INTERVAL,
+        max_pending: int = PROGRESS_FLUSH_MAX_PENDING,
+        name: str = ""
+    ):
+        self.redis = redis_client
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.name = name
+
+        self._lock = threading.RLock()
+        # Insertion-ordered: (op, key[, field]) -> value
+        self._pending: Dict[Tuple, Any] = {}
+        self._oldest_pending: Optional[float] = None
+        # Flushes the buffer flush_interval after its oldest update
+        self._timer: Optional[threading.Timer] = None
+
+        # Measurement: updates requested vs. commands and round-trips sent
+        self.updates = 0
+        self.commands_sent = 0
+        self.round_trips = 0
+
+    # ------------------------------------------------------------------
+    # Buffered operations
+    # ------------------------------------------------------------------
+
+    def hset(self, key: str, field: Optional[str] = None, value: Any = None, mapping: Optional[Dict[str, Any]] = None):
+        """Buffer an HSET; later values for the same field win."""
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        with self._lock:
+            if any(("hincrby", key, f) in self._pending for f in fields):
+                self._flush_locked()
+            self._pending.setdefault(("hset", key), {}).update(fields)
+            self._record_update()
+
+    def hincrby(self, key: str, field: str, amount: int = 1):
+        """Buffer an HINCRBY; increments on the same field are summed."""
+        with self._lock:
+            if field in self._pending.get(("hset", key), {}):
+                self._flush_locked()
+            op = ("hincrby", key, field)
+            self._pending[op] = self._pending.get(op, 0) + amount
+            self._record_update()
+
+    def set(self, key: str, value: Any):
+        """Buffer a SET."""
+        with self._lock:
+            self._pending.pop(("set", key), None)
+            self._pending[("set", key)] = value
+            self._record_update()
+
+    def expire(self, key: str, seconds: int):
+        """Buffer an EXPIRE (applied after the key's other buffered writes)."""
+        with self._lock:
+            self._pending.pop(("expire", key), None)
+            self._pending[("expire", key)] = seconds
+            self._record_update()
+
+    def _record_update(self):
+        self.updates += 1
+        now = time.monotonic()
+        if self._oldest_pending is None:
+            self._oldest_pending = now
+        if len(self._pending) >= self.max_pending or now - self._oldest_pending >= self.flush_interval:
+            self._flush_locked()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Send all buffered updates in one pipeline; returns commands sent."""
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        self._oldest_pending = None
+        pipe = self.redis.pipeline(transaction=False)
+        for op, value in pending.items():
+            kind, key = op[0], op[1]
+            if kind == "hset":
+                pipe.hset(key, mapping=value)
+            elif kind == "hincrby":
+                pipe.hincrby(key, op[2], value)
+            elif kind == "set":
+                pipe.set(key, value)
+            elif kind == "expire":
+                pipe.expire(key, value)
+
+        try:
+            pipe.execute()
+        except Exception as e:
+            # Progress is best-effort; a failed flush must not fail the job
+            logger.warning(f"Progress flush{f' for {self.name}' if self.name else ''} failed: {e}")
+            return 0
+
+        self.commands_sent += len(pending)
+        self.round_trips += 1
+        return len(pending)
+
+    def close(self):
+        """Flush remaining updates and log how many Redis commands were saved."""
+        self.flush()
+        if self.updates:
+            logger.info(
+                f"Progress{f' for {self.name}' if self.name else ''}: {self.updates} updates sent as "
+                f"{self.commands_sent} commands in {self.round_trips} round-trips"
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"updates": self.updates, "commands_sent": self.commands_sent, "round_trips": self.round_trips}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
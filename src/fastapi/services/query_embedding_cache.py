@@ -0,0 +1,242 @@
+"""
+Query Embedding Cache
+Two-tier cache for query embeddings used by retrieval.
+
+RAG checks, debates and multi-agent pipelines embed the same query many times,
+often from different uvicorn and Celery worker processes. Embeddings are
+cached under (embedding model, normalized query):
+
+    tier 1: a bounded in-process LRU (QUERY_EMBEDDING_CACHE_SIZE entries)
+    tier 2: Redis, shared by every worker (qemb:{model}:{sha256}, float32 bytes,
+            expiring after QUERY_EMBEDDING_CACHE_TTL seconds)
+
+Queries are normalized by Unicode NFC and whitespace collapsing only; case is
+kept because the embedding models are case-sensitive. Redis errors are logged
+and treated as misses so retrieval never fails on the cache.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import redis
+
+logger = logging.getLogger("QUERY_EMBEDDING_CACHE")
+
+QUERY_EMBEDDING_CACHE_ENABLED = os.getenv("QUERY_EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "604800"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_KEY_PREFIX = "qemb"
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for cache keys (NFC, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU in front of a shared Redis cache of query embeddings.
+
+    Tracks hits per tier, misses, and the embedding time saved by hits
+    (estimated from the mean time of the misses this process computed).
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        max_entries: int = QUERY_EMBEDDING_CACHE_SIZE,
+        ttl: int = QUERY_EMBEDDING_CACHE_TTL,
+        enabled: bool = QUERY_EMBEDDING_CACHE_ENABLED
+    ):
+        # Vectors are stored as raw bytes, so this client must not decode responses
+        self.redis = redis_client if redis_client is not None else redis.from_url(REDIS_URL)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+        self.embed_seconds = 0.0
+        self.lookup_seconds = 0.0
+
+    @staticmethod
+    def _key(model: str, normalized_query: str) -> str:
+        digest = hashlib.sha256(normalized_query.encode("utf-8")).hexdigest()
+        return f"{_KEY_PREFIX}:{model}:{digest}"
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        with self._lock:
+            self._local[key] = embedding
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get_or_compute(self, model: str, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Return the embedding of query under model, calling compute(normalized_query)
+        on a miss in both tiers and storing the result in both.
+        """
+        normalized = normalize_query(query)
+        if not self.enabled:
+            return compute(normalized)
+
+        key = self._key(model, normalized)
+        start = time.perf_counter()
+
+        with self._lock:
+            embedding = self._local.get(key)
+            if embedding is not None:
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                self.lookup_seconds += time.perf_counter() - start
+                return embedding
+
+        try:
+            raw = self.redis.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.debug(f"Query embedding cache lookup failed for {key}: {e}")
+            raw = None
+
+        if raw is not None:
+            embedding = np.frombuffer(raw, dtype=np.float32).tolist()
+            self._remember(key, embedding)
+            with self._lock:
+                self.redis_hits += 1
+                self.lookup_seconds += time.perf_counter() - start
+            return embedding
+
+        embedding = [float(x) for x in compute(normalized)]
+        with self._lock:
+            self.misses += 1
+            self.embed_seconds += time.perf_counter() - start
+
+        self._remember(key, embedding)
+        try:
+            self.redis.set(key, np.asarray(embedding, dtype=np.float32).tobytes(), ex=self.ttl)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.debug(f"Query embedding cache store failed for {key}: {e}")
+        return embedding
+
+    def get_many_or_compute(
+        self,
+        model: str,
+        queries: List[str],
+        compute_many: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Batch form of get_or_compute: one Redis MGET for the local misses and
+        one compute_many(normalized_queries) call for the remaining misses.
+        """
+        normalized = [normalize_query(q) for q in queries]
+        if not self.enabled:
+            return [list(e) for e in compute_many(normalized)] if normalized else []
+
+        keys = [self._key(model, q) for q in normalized]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        start = time.perf_counter()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                embedding = self._local.get(key)
+                if embedding is not None:
+                    self._local.move_to_end(key)
+                    results[i] = embedding
+                    self.local_hits += 1
+
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            try:
+                raws = self.redis.mget([keys[i] for i in pending])
+            except Exception as e:
+                self.redis_errors += 1
+                logger.debug(f"Query embedding cache batch lookup failed: {e}")
+                raws = [None] * len(pending)
+            for i, raw in zip(pending, raws):
+                if raw is not None:
+                    results[i] = np.frombuffer(raw, dtype=np.float32).tolist()
+                    self._remember(keys[i], results[i])
+                    with self._lock:
+                        self.redis_hits += 1
+        hit_seconds = time.perf_counter() - start
+
+        # Compute each distinct missing query once
+        missing = list(dict.fromkeys(normalized[i] for i, r in enumerate(results) if r is None))
+        if missing:
+            compute_start = time.perf_counter()
+            computed = dict(zip(missing, ([float(x) for x in e] for e in compute_many(missing))))
+            with self._lock:
+                self.misses += len(missing)
+                self.embed_seconds += time.perf_counter() - compute_start
+            for q, embedding in computed.items():
+                self._remember(self._key(model, q), embedding)
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for q, embedding in computed.items():
+                    pipe.set(self._key(model, q), np.asarray(embedding, dtype=np.float32).tobytes(), ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                self.redis_errors += 1
+                logger.debug(f"Query embedding cache batch store failed: {e}")
+            for i, r in enumerate(results):
+                if r is None:
+                    results[i] = computed[normalized[i]]
+
+        with self._lock:
+            self.lookup_seconds += hit_seconds
+        return results
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rates and estimated latency saved by this process's cache."""
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            lookups = hits + self.misses
+            mean_embed = self.embed_seconds / self.misses if self.misses else 0.0
+            mean_hit = self.lookup_seconds / hits if hits else 0.0
+            return {
+                "enabled": self.enabled,
+                "lookups": lookups,
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "local_entries": len(self._local),
+                "max_local_entries": self.max_entries,
+                "redis_errors": self.redis_errors,
+                "mean_embed_ms": round(mean_embed * 1000, 2),
+                "mean_hit_ms": round(mean_hit * 1000, 3),
+                "latency_saved_seconds": round(max(mean_embed - mean_hit, 0.0) * hits, 3),
+            }
+
+
+_query_embedding_cache: Optional[QueryEmbeddingCache] = None
+_query_embedding_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query embedding cache."""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        with _query_embedding_cache_lock:
+            if _query_embedding_cache is None:
+                _query_embedding_cache = QueryEmbeddingCache()
+    return _query_embedding_cache
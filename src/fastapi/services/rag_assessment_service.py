@@ -131,10 +131,14 @@ class RAGAssessmentService:
         include_quality_assessment: bool = True,
         include_alignment_assessment: bool = True,
         include_classification_metrics: bool = True,
-        session_id: str = None
+        session_id: str = None,
+        retrieved: Optional[Tuple[List[str], bool, List[Dict[str, Any]]]] = None
     ) -> Tuple[str, RAGPerformanceMetrics, Optional[RAGQualityAssessment], Optional[RAGAlignmentAssessment], Optional[RAGClassificationMetrics]]:
         """
         Perform a RAG query with comprehensive performance and quality assessment.
+
+        retrieved is an optional pre-fetched retrieval result for the query
+        (see RAGService.get_relevant_documents_batch).
         
         Returns:
             Tuple of (response, performance_metrics, quality_assessment, alignment_assessment, classification_metrics)
@@ -152,11 +156,12 @@ class RAGAssessmentService:
             retrieval_start = time.time()
             
             # Get retrieval results from RAG service
-            response, total_time_ms = self.rag_service.process_query_with_rag(
+            response, total_time_ms, _, _ = self.rag_service.process_query_with_rag(
                 query_text=query,
                 collection_name=collection_name,
                 model_name=model_name,
-                top_k=top_k
+                top_k=top_k,
+                retrieved=retrieved
             )
             
             retrieval_time = (time.time() - retrieval_start) * 1000
@@ -1053,19 +1058,32 @@ class RAGAssessmentService:
             configurations: List of config dicts with keys like 'model_name', 'top_k', etc.
         """
         benchmark_results = {}
+
+        # Retrieve for the whole query set once per distinct top_k: one
+        # encoder call and one ChromaDB round-trip instead of one per query
+        retrievals: Dict[int, List[Any]] = {}
+        for top_k in {config.get('top_k', 5) for config in configurations}:
+            retrievals[top_k] = self.rag_service.get_relevant_documents_batch(
+                queries=query_set,
+                collection_name=collection_name,
+                top_k=top_k,
+                include_metadata=True
+            )
         
         for i, config in enumerate(configurations):
             config_id = f"config_{i}"
             config_metrics = []
+            top_k = config.get('top_k', 5)
             
-            for query in query_set:
+            for query, retrieved in zip(query_set, retrievals[top_k]):
                 try:
-                    response, performance, quality = self.assess_rag_query(
+                    response, performance, quality, _, _ = self.assess_rag_query(
                         query=query,
                         collection_name=collection_name,
                         model_name=config.get('model_name', 'gpt-3.5-turbo'),
-                        top_k=config.get('top_k', 5),
-                        include_quality_assessment=True
+                        top_k=top_k,
+                        include_quality_assessment=True,
+                        retrieved=retrieved
                     )
                     
                     config_metrics.append({
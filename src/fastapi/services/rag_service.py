@@ -1,19 +1,30 @@
 import os
 import uuid
 import time
-import hashlib
 import json
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+import threading
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
 from sqlalchemy.orm import Session
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
+import numpy as np
 import chromadb
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.schema import Document
-from langchain_ollama import OllamaEmbeddings
+from services.embedding_service import get_embedding_service
+from services.query_embedding_cache import get_query_embedding_cache
+from services.lexical_index import get_lexical_index, reciprocal_rank_fusion, tokenize
 from services.llm_utils import get_llm
 from services.llm_invoker import LLMInvoker
+from services.async_stage_executor import get_stage_executor
+from services.llm_rate_limiter import get_rate_limiter
+from services.context_packer import (
+    pack_context, count_tokens, trim_to_sentence, context_window,
+    RAG_CONTEXT_MAX_TOKENS, RAG_ANSWER_RESERVE_TOKENS
+)
+from services.answer_cache import get_answer_cache
+from services.mmr_rerank import RAG_RERANK, RAG_MMR_LAMBDA, RAG_MMR_FETCH_MULTIPLIER, mmr_rerank
 
 from core.database import SessionLocal
 from models.agent import ComplianceAgent
@@ -34,6 +45,123 @@ from services.database import (
 
 logger = logging.getLogger("RAG_SERVICE_LOGGER")
 
+# How multi-agent RAG checks and debates retrieve context:
+#   per_agent - every agent retrieves for its own query (default)
+#   shared    - retrieve once per session and give every agent the same results
+#   adaptive  - reuse the session's results until the effective query's embedding
+#               falls below RAG_REQUERY_SIMILARITY cosine similarity to the last
+#               retrieved query, then re-query
+RAG_RETRIEVAL_POLICY = os.getenv("RAG_RETRIEVAL_POLICY", "per_agent").lower()
+RAG_REQUERY_SIMILARITY = float(os.getenv("RAG_REQUERY_SIMILARITY", "0.9"))
+RETRIEVAL_POLICIES = ("per_agent", "shared", "adaptive")
+
+# Retrieval mode: vector (default), or hybrid (BM25 + vector fused by reciprocal
+# rank). Hybrid falls back to vector for collections without a lexical index,
+# so build the indexes (lexical-index/rebuild) before switching it on.
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "vector").lower()
+# Candidates taken from each ranking before fusion, as a multiple of top_k
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "3"))
+
+# Cross-collection retrieval: collections queried concurrently, and chunks whose
+# token sets overlap by at least this Jaccard similarity count as duplicates
+RAG_MULTI_COLLECTION_WORKERS = int(os.getenv("RAG_MULTI_COLLECTION_WORKERS", "8"))
+RAG_DEDUPE_SIMILARITY = float(os.getenv("RAG_DEDUPE_SIMILARITY", "0.9"))
+
+
+class RetrievalSession:
+    """
+    Retrieval results shared by the agents of one RAG check or debate.
+
+    retrieve() has the same return shape as
+    get_relevant_documents(include_metadata=True) and is thread-safe, so
+    agents running in parallel share a single ChromaDB query.
+    """
+
+    def __init__(self, rag_service: "RAGService", collection_name: str,
+                 policy: str = RAG_RETRIEVAL_POLICY, threshold: float = RAG_REQUERY_SIMILARITY):
+        if policy not in RETRIEVAL_POLICIES:
+            logger.warning(f"Unknown RAG_RETRIEVAL_POLICY '{policy}', using per_agent")
+            policy = "per_agent"
+        self.rag_service = rag_service
+        self.collection_name = collection_name
+        self.policy = policy
+        self.threshold = threshold
+
+        self._lock = threading.Lock()
+        self._result: Optional[Tuple[List[str], bool, List[Dict[str, Any]]]] = None
+        self._embedding: Optional[np.ndarray] = None
+        self.queries = 0
+        self.reused = 0
+
+    def _similarity(self, embedding: np.ndarray) -> float:
+        denom = np.linalg.norm(embedding) * np.linalg.norm(self._embedding)
+        return float(np.dot(embedding, self._embedding) / denom) if denom else 0.0
+
+    def retrieve(self, query: str) -> Tuple[List[str], bool, List[Dict[str, Any]]]:
+        """Return (documents, found, metadata_list) for query under the session policy."""
+        if self.policy == "per_agent":
+            self.queries += 1
+            return self.rag_service.get_relevant_documents(
+                query=query, collection_name=self.collection_name, include_metadata=True
+            )
+
+        with self._lock:
+            if self.policy == "shared" and self._result is not None:
+                self.reused += 1
+                return self._result
+
+            embedding = None
+            if self.policy == "adaptive":
+                try:
+                    collection = self.rag_service.chroma_client.get_collection(self.collection_name)
+                    embedding = np.asarray(self.rag_service._get_cached_embedding(collection, query))
+                except Exception as e:
+                    logger.warning(f"Could not embed query for re-query check: {e}")
+                if (self._result is not None and embedding is not None and self._embedding is not None
+                        and self._similarity(embedding) >= self.threshold):
+                    self.reused += 1
+                    return self._result
+
+            result = self.rag_service.get_relevant_documents(
+                query=query,
+                collection_name=self.collection_name,
+                include_metadata=True,
+                query_embedding=embedding.tolist() if embedding is not None else None
+            )
+            self.queries += 1
+            self._result, self._embedding = result, embedding
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"policy": self.policy, "queries": self.queries, "reused": self.reused}
+
+
+
+def source_document_names(metadata_list: Optional[List[Dict[str, Any]]]) -> List[str]:
+    """Distinct document names of retrieved chunks, in retrieval order."""
+    names = []
+    for meta in metadata_list or []:
+        doc_name = meta.get("metadata", {}).get("document_name", "")
+        if doc_name and doc_name not in names:
+            names.append(doc_name)
+    return names
+
+
+def save_chat_entry(**entry) -> None:
+    """
+    Save a chat history entry in a session of its own (streaming responses
+    outlive the request's session). Failures are logged, not raised.
+    """
+    db = SessionLocal()
+    try:
+        ChatRepository(db).create_chat_entry(**entry)
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Failed to save streamed response to chat history: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 class RAGService:
     def __init__(self, max_retries: int = 5, retry_delay: int = 3):
         # Replace HTTP URL with direct client
@@ -43,13 +171,12 @@ class RAGService:
         self._max_retries = max_retries
         self._retry_delay = retry_delay
 
-        # Embedding function using Ollama (Snowflake Arctic Embed - local model)
-        ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
-        ollama_embedding_model = os.getenv("OLLAMA_EMBEDDING_MODEL", "snowflake-arctic-embed2")
-        self.embedding_function = OllamaEmbeddings(
-            model=ollama_embedding_model,
-            base_url=ollama_url
-        )
+        # Shared embedding service; queries are embedded with the model each
+        # collection was built with
+        self.embedding_service = get_embedding_service()
+        # Process-wide LRU backed by Redis; RAGService is created per request
+        self.query_cache = get_query_embedding_cache()
+        self.answer_cache = get_answer_cache()
 
         self.n_results = int(os.getenv("N_RESULTS", "5"))
 
@@ -87,19 +214,19 @@ class RAGService:
             return {"Authorization": f"Bearer {auth_token}"}
         return {}
 
-    @lru_cache(maxsize=1000)
-    def _get_cached_embedding(self, query_hash: str, query: str) -> List[float]:
+    def _get_cached_embedding(self, collection, query: str) -> List[float]:
         """
-        Generate and cache query embeddings.
-        Uses LRU cache with query hash as key for better performance.
+        Embed a query in the collection's embedding space, through the
+        two-tier query embedding cache keyed by (model, normalized query).
         """
-        logger.debug(f"Generating embedding for query: {query[:50]}...")
-        embedding = self.embedding_function.embed_query(query)
-        return embedding
+        space = self.embedding_service.collection_space(collection)
+        model = space.model if space else self.embedding_service.active_model
+
+        def _embed(normalized_query: str) -> List[float]:
+            logger.debug(f"Generating embedding for query: {normalized_query[:50]}...")
+            return self.embedding_service.embed_query_for_collection(collection, normalized_query)
 
-    def _generate_query_hash(self, query: str) -> str:
-        """Generate a hash for query caching."""
-        return hashlib.md5(query.encode('utf-8')).hexdigest()
+        return self.query_cache.get_or_compute(model, query, _embed)
 
     def _extract_excerpt(self, doc_text: str, max_length: int = 1500) -> str:
         """
@@ -213,18 +340,8 @@ class RAGService:
         if substantial_lines:
             # Take first ~1500 chars of substantial content
             excerpt_text = '\n'.join(substantial_lines)
-            if len(excerpt_text) > 1500:
-                # Find a good breaking point (sentence or paragraph)
-                truncated = excerpt_text[:1500]
-                last_period = truncated.rfind('.')
-                last_newline = truncated.rfind('\n\n')
-
-                if last_period > 1000:
-                    excerpt_text = excerpt_text[:last_period + 1] + "\n\n[...continued]"
-                elif last_newline > 1000:
-                    excerpt_text = excerpt_text[:last_newline] + "\n\n[...continued]"
-                else:
-                    excerpt_text = truncated + "...\n\n[...continued]"
+            # Break at a sentence or paragraph end if there is one past 1000 chars
+            excerpt_text = trim_to_sentence(excerpt_text, 1500, "\n\n[...continued]")
 
             return excerpt_text.strip()
 
@@ -306,6 +423,13 @@ class RAGService:
             # Add relevance assessment
             citation_entry.append(f"   Relevance: {quality_tier} (Distance: {distance:.2f} - {distance_explanation})")
 
+            # Add source collection for cross-collection retrieval
+            if meta.get('collection'):
+                source_info = f"   Collection: {meta['collection']}"
+                if meta.get('also_in'):
+                    source_info += f" (also in: {', '.join(meta['also_in'])})"
+                citation_entry.append(source_info)
+
             # Add location within document
             location_info = f"   Location: Chunk {chunk_index + 1} of {total_chunks}"
             if start_pos and end_pos:
@@ -389,7 +513,8 @@ class RAGService:
         model_name: str,
         top_k: Optional[int] = None,
         where: Optional[Dict] = None,
-        include_citations: bool = True
+        include_citations: bool = True,
+        retrieved: Optional[Tuple[List[str], bool, List[Dict[str, Any]]]] = None
     ) -> Tuple[str, int, List[Dict[str, Any]], str]:
         """
         1) Pulls the top-k docs from ChromaDB via your API
@@ -403,23 +528,75 @@ class RAGService:
             top_k: Number of documents to retrieve (optional, uses self.n_results if not specified)
             where: Optional filter dict for document filtering (e.g., {"document_name": "contract.pdf"})
             include_citations: If True, returns citation metadata separately
+            retrieved: Result of an earlier get_relevant_documents(include_metadata=True)
+                or get_relevant_documents_batch call for this query; skips retrieval
 
         Returns:
             Tuple of (answer, response_time_ms, metadata_list, formatted_citations)
         """
-        # 1) fetch docs with metadata
-        docs, found, metadata_list = self.get_relevant_documents(
-            query=query,
-            collection_name=collection_name,
-            top_k=top_k,
-            where=where,
-            include_metadata=True
-        )
-        if not found:
+        prepared = self._prepare_rag_chain(query, collection_name, model_name, top_k, where, retrieved)
+        if prepared is None:
             return "No relevant documents found.", 0, [], ""
+        chain, chain_input, metadata_list, tokens = prepared
 
-        # 2) wrap for LangChain
-        lc_docs = [Document(page_content=d) for d in docs]
+        start = time.time()
+        # The chain calls the model directly, so take the shared rate limit here
+        limiter = get_rate_limiter()
+        lease = limiter.acquire(model_name, tokens)
+        try:
+            result = chain.invoke(chain_input)
+        finally:
+            limiter.release(lease)
+        # Extract text content from result (handles both string and message types)
+        answer = result.content if hasattr(result, 'content') else str(result)
+        rt_ms = int((time.time() - start) * 1000)
+
+        # 4) Format citations separately (don't append to answer)
+        formatted_citations = ""
+        if include_citations and metadata_list:
+            formatted_citations = self._format_document_citations(metadata_list)
+
+        return answer, rt_ms, metadata_list, formatted_citations
+
+    def _prepare_rag_chain(
+        self,
+        query: str,
+        collection_name: str,
+        model_name: str,
+        top_k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        retrieved: Optional[Tuple[List[str], bool, List[Dict[str, Any]]]] = None
+    ) -> Optional[Tuple[Any, Dict[str, Any], List[Dict[str, Any]], int]]:
+        """
+        Retrieval, context packing and chain construction for run_rag_chain.
+
+        Returns:
+            (chain, chain_input, metadata_list, rate_limit_tokens), or None if
+            no relevant documents were found
+        """
+        # 1) fetch docs with metadata
+        if retrieved is not None:
+            docs, found, metadata_list = retrieved
+        else:
+            docs, found, metadata_list = self.get_relevant_documents(
+                query=query,
+                collection_name=collection_name,
+                top_k=top_k,
+                where=where,
+                include_metadata=True
+            )
+        if not found:
+            return None
+
+        # 2) fit the most relevant docs into the model's context budget and
+        #    wrap them for LangChain; citations cover only what was packed
+        packed = pack_context(docs, model_name, prompt_tokens=count_tokens(query) + 30)
+        lc_docs = [Document(page_content=d) for d in packed.chunks]
+        metadata_list = [
+            dict(metadata_list[i], document_index=n)
+            for n, i in enumerate(packed.indices, 1)
+            if i < len(metadata_list)
+        ]
 
         # 3) build a modern LCEL QA chain
         llm = get_llm(model_name=model_name)
@@ -443,19 +620,104 @@ Answer:""")
             | llm
         )
 
+        limiter = get_rate_limiter()
+        tokens = limiter.estimate_tokens(packed.tokens + count_tokens(query) + 30, None) if limiter.counts_tokens(model_name) else 0
+        return chain, {"documents": lc_docs, "question": query}, metadata_list, tokens
+
+    async def astream_rag_chain(
+        self,
+        query: str,
+        collection_name: str,
+        model_name: str,
+        top_k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        include_citations: bool = True
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming run_rag_chain: retrieval runs off the event loop, then the
+        answer is streamed from the chain's .astream().
+
+        Yields:
+            ("token", text) for each chunk of the answer, then ("done", dict)
+            with answer, response_time_ms, time_to_first_token_ms,
+            metadata_list and formatted_citations
+        """
+        prepared = await asyncio.to_thread(
+            self._prepare_rag_chain, query, collection_name, model_name, top_k, where
+        )
+        if prepared is None:
+            answer = "No relevant documents found."
+            yield "token", answer
+            yield "done", {"answer": answer, "response_time_ms": 0, "time_to_first_token_ms": 0,
+                           "metadata_list": [], "formatted_citations": ""}
+            return
+        chain, chain_input, metadata_list, tokens = prepared
+
         start = time.time()
-        result = chain.invoke({"documents": lc_docs, "question": query})
-        # Extract text content from result (handles both string and message types)
-        answer = result.content if hasattr(result, 'content') else str(result)
-        rt_ms = int((time.time() - start) * 1000)
+        first_token_ms = None
+        parts = []
+        limiter = get_rate_limiter()
+        async with get_stage_executor().llm_slot(model_name):
+            lease = await limiter.aacquire(model_name, tokens)
+            try:
+                async for chunk in chain.astream(chain_input):
+                    text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.time() - start) * 1000)
+                        parts.append(text)
+                        yield "token", text
+            finally:
+                await asyncio.to_thread(limiter.release, lease)
 
-        # 4) Format citations separately (don't append to answer)
         formatted_citations = ""
         if include_citations and metadata_list:
             formatted_citations = self._format_document_citations(metadata_list)
+        yield "done", {
+            "answer": "".join(parts),
+            "response_time_ms": int((time.time() - start) * 1000),
+            "time_to_first_token_ms": first_token_ms,
+            "metadata_list": metadata_list,
+            "formatted_citations": formatted_citations,
+        }
 
-        return answer, rt_ms, metadata_list, formatted_citations
 
+    async def astream_query_with_rag(
+        self,
+        query_text: str,
+        collection_name: str,
+        model_name: str,
+        session_id: str,
+        query_type: str = "rag",
+        top_k: Optional[int] = None,
+        where: Optional[Dict] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming process_query_with_rag: yields astream_rag_chain's events
+        and saves the complete answer to chat history before the final
+        ("done", dict) event, which also carries session_id and
+        source_documents.
+        """
+        async for event, data in self.astream_rag_chain(
+            query=query_text, collection_name=collection_name, model_name=model_name, top_k=top_k, where=where
+        ):
+            if event != "done":
+                yield event, data
+                continue
+
+            await asyncio.to_thread(
+                save_chat_entry,
+                user_query=query_text,
+                response=data["answer"],
+                model_used=model_name,
+                collection_name=collection_name,
+                query_type=query_type,
+                response_time_ms=data["response_time_ms"],
+                session_id=session_id
+            )
+            logger.info(f"Streamed RAG response in rag_service: {data['answer'][:200]}... "
+                        f"(first token {data['time_to_first_token_ms']} ms, took {data['response_time_ms']} ms)")
+            yield "done", dict(data, session_id=session_id, source_documents=source_document_names(data["metadata_list"]))
 
     def process_query_with_rag(
         self,
@@ -464,7 +726,8 @@ Answer:""")
         model_name: str,
         top_k: Optional[int] = None,
         where: Optional[Dict] = None,
-        include_citations: bool = True
+        include_citations: bool = True,
+        retrieved: Optional[Tuple[List[str], bool, List[Dict[str, Any]]]] = None
     ) -> Tuple[str, int, List[Dict[str, Any]], str]:
         """
         Simple RAG entrypoint that:
@@ -479,6 +742,7 @@ Answer:""")
             top_k: Number of documents to retrieve (optional)
             where: Optional filter dict for document filtering (e.g., {"document_name": "contract.pdf"})
             include_citations: If True, returns document citations separately
+            retrieved: Optional pre-fetched retrieval result (see run_rag_chain)
 
         Returns:
             Tuple of (answer_string, response_time_ms, metadata_list, formatted_citations)
@@ -490,11 +754,83 @@ Answer:""")
             model_name=model_name,
             top_k=top_k,
             where=where,
-            include_citations=include_citations
+            include_citations=include_citations,
+            retrieved=retrieved
         )
         logger.info(f"RAG response in rag_service: {answer[:200]}... (took {rt_ms} ms)")
 
         return answer, rt_ms, metadata_list, formatted_citations
+
+    def process_query_with_rag_cached(
+        self,
+        query_text: str,
+        collection_name: str,
+        model_name: str,
+        top_k: Optional[int] = None,
+        where: Optional[Dict] = None,
+        include_citations: bool = True,
+        use_answer_cache: Optional[bool] = None
+    ) -> Tuple[str, int, List[Dict[str, Any]], str, bool]:
+        """
+        process_query_with_rag behind the semantic answer cache.
+
+        A stored answer is reused when an earlier query against the same
+        collection version, model and retrieval parameters embeds within
+        ANSWER_CACHE_SIMILARITY of this one; otherwise the answer is
+        generated and stored.
+
+        Args:
+            use_answer_cache: Use the cache for this call (defaults to ANSWER_CACHE_ENABLED)
+            (others as for process_query_with_rag)
+
+        Returns:
+            Tuple of (answer_string, response_time_ms, metadata_list, formatted_citations, cache_hit)
+        """
+        use_cache = self.answer_cache.enabled if use_answer_cache is None else use_answer_cache
+        if not use_cache:
+            return (*self.process_query_with_rag(
+                query_text=query_text, collection_name=collection_name, model_name=model_name,
+                top_k=top_k, where=where, include_citations=include_citations
+            ), False)
+
+        start = time.time()
+        params = {
+            "top_k": top_k or self.n_results,
+            "where": where,
+            "mode": RAG_RETRIEVAL_MODE,
+            "rerank": RAG_RERANK,
+            "include_citations": include_citations,
+            # Context packing budget: the answer depends on how much context fit
+            "context": [context_window(model_name), RAG_CONTEXT_MAX_TOKENS, RAG_ANSWER_RESERVE_TOKENS],
+        }
+        if RAG_RERANK == "mmr":
+            params["mmr"] = [RAG_MMR_LAMBDA, RAG_MMR_FETCH_MULTIPLIER]
+        bucket = self.answer_cache.bucket(collection_name, model_name, params)
+        query_embedding = None
+        if bucket is not None:
+            try:
+                collection = self.chroma_client.get_collection(collection_name)
+                query_embedding = self._get_cached_embedding(collection, query_text)
+            except Exception as e:
+                logger.warning(f"Could not embed query for answer cache lookup: {e}")
+
+        if query_embedding is not None:
+            entry = self.answer_cache.lookup(bucket, query_embedding)
+            if entry is not None:
+                rt_ms = int((time.time() - start) * 1000)
+                logger.info(f"Answer cache hit for '{collection_name}' (similarity {entry['similarity']}, "
+                            f"cached query: {entry['query'][:100]!r})")
+                return entry["answer"], rt_ms, entry["metadata_list"], entry["formatted_citations"], True
+
+        answer, rt_ms, metadata_list, formatted_citations = self.process_query_with_rag(
+            query_text=query_text, collection_name=collection_name, model_name=model_name,
+            top_k=top_k, where=where, include_citations=include_citations
+        )
+        if query_embedding is not None and metadata_list:
+            self.answer_cache.store(
+                bucket, query_text, query_embedding, answer, metadata_list, formatted_citations
+            )
+        return answer, rt_ms, metadata_list, formatted_citations, False
         
         
         
@@ -520,6 +856,169 @@ Answer:""")
             return []
 
 
+    @staticmethod
+    def _vector_query_batch(collection, query_embeddings: List[List[float]], n_results: int, where: Optional[Dict]):
+        """
+        Nearest-neighbour query for several embeddings in one ChromaDB call.
+        Returns one (ids, documents, metadatas, distances) tuple per embedding.
+        """
+        results = collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        empty = [[] for _ in query_embeddings]
+        return list(zip(
+            results["ids"] or empty,
+            results["documents"] or empty,
+            results["metadatas"] or empty,
+            results["distances"] or empty,
+        ))
+
+    @staticmethod
+    def _embedding_distance(collection, query_embedding: List[float], embedding) -> float:
+        """Distance between two vectors in the collection's HNSW space, as ChromaDB reports it."""
+        q, e = np.asarray(query_embedding, dtype=float), np.asarray(embedding, dtype=float)
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "ip":
+            return float(1.0 - np.dot(q, e))
+        if space == "cosine":
+            denom = np.linalg.norm(q) * np.linalg.norm(e)
+            return float(1.0 - np.dot(q, e) / denom) if denom else 1.0
+        return float(np.sum((q - e) ** 2))
+
+    def _hybrid_query_batch(self, collection, queries: List[str], query_embeddings: List[List[float]],
+                            n_results: int, where: Optional[Dict]):
+        """
+        Fuse BM25 and vector rankings with reciprocal rank fusion, per query.
+
+        All queries share one vector query and one fetch of lexical-only hits.
+        Chunks found only lexically get their vector distance computed from
+        their stored embedding so citations keep a comparable score.
+        Returns one (ids, documents, metadatas, distances) tuple per query.
+        """
+        index = get_lexical_index(collection.name)
+        candidates = n_results * max(1, HYBRID_CANDIDATE_MULTIPLIER)
+        lexical: List[List[str]] = []
+        for query in queries:
+            try:
+                lexical.append([chunk_id for chunk_id, _ in index.search(query, candidates)] if index is not None else [])
+            except Exception as e:
+                logger.warning(f"Lexical search failed for '{collection.name}', using vector only: {e}")
+                lexical.append([])
+        if not any(lexical):
+            return self._vector_query_batch(collection, query_embeddings, n_results, where)
+
+        vector = self._vector_query_batch(collection, query_embeddings, candidates, where)
+
+        # Fetch lexical hits (applying the same metadata filter) that the
+        # vector query did not return for their query
+        missing = set()
+        for lexical_ids, (vec_ids, _, _, _) in zip(lexical, vector):
+            missing.update(set(lexical_ids) - set(vec_ids))
+        fetched = {}
+        if missing:
+            got = collection.get(ids=sorted(missing), where=where, include=["documents", "metadatas", "embeddings"])
+            fetched = {i: (d, m, e) for i, d, m, e in zip(got["ids"], got["documents"], got["metadatas"], got["embeddings"])}
+
+        results = []
+        for lexical_ids, query_embedding, (vec_ids, vec_docs, vec_metas, vec_dists) in zip(lexical, query_embeddings, vector):
+            if not lexical_ids:
+                results.append((vec_ids[:n_results], vec_docs[:n_results], vec_metas[:n_results], vec_dists[:n_results]))
+                continue
+            rows = {i: (d, m, dist) for i, d, m, dist in zip(vec_ids, vec_docs, vec_metas, vec_dists)}
+            for chunk_id in lexical_ids:
+                if chunk_id not in rows and chunk_id in fetched:
+                    d, m, e = fetched[chunk_id]
+                    rows[chunk_id] = (d, m, self._embedding_distance(collection, query_embedding, e))
+            lexical_ids = [chunk_id for chunk_id in lexical_ids if chunk_id in rows]
+
+            fused = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([vec_ids, lexical_ids])][:n_results]
+            results.append((
+                fused,
+                [rows[i][0] for i in fused],
+                [rows[i][1] for i in fused],
+                [rows[i][2] for i in fused],
+            ))
+        return results
+
+    def _format_retrieval(self, query: str, collection_name: str, retrieved, include_metadata: bool):
+        """Shape (ids, documents, metadatas, distances) as get_relevant_documents returns it."""
+        ids, documents, metadatas, distances = retrieved
+
+        # Return tuple format for RAG chain (with metadata for citations)
+        if include_metadata:
+            found = len(documents) > 0
+
+            # Build metadata list with citation info
+            metadata_list = []
+            for idx, (doc, meta, dist) in enumerate(zip(documents, metadatas, distances), 1):
+                metadata_list.append({
+                    'document_index': idx,
+                    'distance': dist,
+                    'quality_tier': self._get_quality_tier_from_distance(dist),
+                    'distance_explanation': f"Similarity score: {1 - (dist / 100):.2%}",
+                    'metadata': meta,
+                    'document_text': doc
+                })
+
+            return documents, found, metadata_list
+
+        # Return dict format for API compatibility
+        return {
+            "status": "success",
+            "query": query,
+            "collection": collection_name,
+            "results": {
+                "ids": ids,
+                "documents": documents,
+                "metadatas": metadatas,
+                "distances": distances
+            }
+        }
+
+    @staticmethod
+    def _retrieval_error(query: str, collection_name: str, error: Exception, include_metadata: bool):
+        if include_metadata:
+            return [], False, []
+        return {
+            "status": "error",
+            "message": str(error),
+            "query": query,
+            "collection": collection_name
+        }
+
+    @staticmethod
+    def _mmr_rerank_batch(collection, query_embeddings: List[List[float]], retrieved, n_results: int):
+        """
+        Re-rank each query's over-fetched candidates to n_results diverse
+        chunks (see services.mmr_rerank), reading the candidates' stored
+        embeddings in one call.
+        """
+        candidate_ids = sorted({chunk_id for ids, _, _, _ in retrieved for chunk_id in ids})
+        embeddings = {}
+        if candidate_ids:
+            got = collection.get(ids=candidate_ids, include=["embeddings"])
+            embeddings = dict(zip(got["ids"], got["embeddings"]))
+        return [
+            mmr_rerank(query_embedding, r, embeddings, n_results)
+            for query_embedding, r in zip(query_embeddings, retrieved)
+        ]
+
+    def _query_collection(self, collection, queries: List[str], query_embeddings: List[List[float]],
+                          n_results: int, where: Optional[Dict], mode: Optional[str],
+                          rerank: Optional[str] = None):
+        rerank = rerank or RAG_RERANK
+        fetch = n_results * max(1, RAG_MMR_FETCH_MULTIPLIER) if rerank == "mmr" else n_results
+        if (mode or RAG_RETRIEVAL_MODE) == "hybrid":
+            retrieved = self._hybrid_query_batch(collection, queries, query_embeddings, fetch, where)
+        else:
+            retrieved = self._vector_query_batch(collection, query_embeddings, fetch, where)
+        if rerank == "mmr":
+            retrieved = self._mmr_rerank_batch(collection, query_embeddings, retrieved, n_results)
+        return retrieved
+
     def get_relevant_documents(
         self,
         query: str,
@@ -527,7 +1026,10 @@ Answer:""")
         top_k: int = None,
         n_results: int = None,
         where: Optional[Dict] = None,
-        include_metadata: bool = False
+        include_metadata: bool = False,
+        query_embedding: Optional[List[float]] = None,
+        mode: Optional[str] = None,
+        rerank: Optional[str] = None
     ):
         """
         Query ChromaDB directly and return results.
@@ -539,6 +1041,9 @@ Answer:""")
             n_results: Number of results
             where: Optional filter
             include_metadata: If True, returns tuple format with metadata for citations
+            query_embedding: Precomputed embedding of query in the collection's space
+            mode: "vector" or "hybrid" (defaults to RAG_RETRIEVAL_MODE)
+            rerank: "none" or "mmr" (defaults to RAG_RERANK)
 
         Returns:
             If include_metadata=True: Tuple of (documents, found, metadata_list)
@@ -548,65 +1053,205 @@ Answer:""")
             # Get collection
             collection = self.chroma_client.get_collection(collection_name)
 
-            # Generate query embedding
-            query_embedding = self.embedding_function.embed_query(query)
+            # Generate (or reuse) the query embedding in the collection's
+            # embedding space (raises EmbeddingSpaceMismatch rather than mixing models)
+            if query_embedding is None:
+                query_embedding = self._get_cached_embedding(collection, query)
 
             # Use top_k if provided, otherwise n_results, otherwise default
             num_results = top_k or n_results or self.n_results
 
-            # Query collection (native method - much faster)
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=num_results,
-                where=where,
-                include=["documents", "metadatas", "distances"]
+            retrieved = self._query_collection(collection, [query], [query_embedding], num_results, where, mode, rerank)[0]
+            return self._format_retrieval(query, collection_name, retrieved, include_metadata)
+        except Exception as e:
+            return self._retrieval_error(query, collection_name, e, include_metadata)
+
+    def get_relevant_documents_batch(
+        self,
+        queries: List[str],
+        collection_name: str,
+        top_k: int = None,
+        where: Optional[Dict] = None,
+        include_metadata: bool = False,
+        mode: Optional[str] = None,
+        rerank: Optional[str] = None,
+        raise_errors: bool = False
+    ) -> List[Any]:
+        """
+        Retrieve for many queries against one collection.
+
+        Query embeddings missing from the query embedding cache are computed
+        in a single encoder call, and all queries go to ChromaDB in a single
+        collection.query call.
+
+        Args:
+            queries: Search queries
+            collection_name: Name of collection
+            top_k: Number of results per query
+            where: Optional filter applied to every query
+            include_metadata: If True, each result is (documents, found, metadata_list)
+            mode: "vector" or "hybrid" (defaults to RAG_RETRIEVAL_MODE)
+            rerank: "none" or "mmr" (defaults to RAG_RERANK)
+            raise_errors: If True, a failed retrieval raises instead of
+                returning an empty ("not found") result for every query
+
+        Returns:
+            One result per query, in order, shaped as get_relevant_documents returns it
+        """
+        if not queries:
+            return []
+        try:
+            collection = self.chroma_client.get_collection(collection_name)
+            space = self.embedding_service.collection_space(collection)
+            model = space.model if space else self.embedding_service.active_model
+            query_embeddings = self.query_cache.get_many_or_compute(
+                model, queries,
+                lambda missing: self.embedding_service.embed_queries_for_collection(collection, missing)
             )
 
-            documents = results["documents"][0] if results["documents"] else []
-            metadatas = results["metadatas"][0] if results["metadatas"] else []
-            distances = results["distances"][0] if results["distances"] else []
-
-            # Return tuple format for RAG chain (with metadata for citations)
-            if include_metadata:
-                found = len(documents) > 0
-
-                # Build metadata list with citation info
-                metadata_list = []
-                for idx, (doc, meta, dist) in enumerate(zip(documents, metadatas, distances), 1):
-                    metadata_list.append({
-                        'document_index': idx,
-                        'distance': dist,
-                        'quality_tier': self._get_quality_tier_from_distance(dist),
-                        'distance_explanation': f"Similarity score: {1 - (dist / 100):.2%}",
-                        'metadata': meta,
-                        'document_text': doc
-                    })
+            num_results = top_k or self.n_results
+            retrieved = self._query_collection(collection, queries, query_embeddings, num_results, where, mode, rerank)
+            return [
+                self._format_retrieval(query, collection_name, r, include_metadata)
+                for query, r in zip(queries, retrieved)
+            ]
+        except Exception as e:
+            logger.error(f"Batch retrieval from '{collection_name}' failed: {e}")
+            if raise_errors:
+                raise
+            return [self._retrieval_error(query, collection_name, e, include_metadata) for query in queries]
+
+    def _retrieve_from_collection(self, query: str, collection_name: str, n_results: int,
+                                  where: Optional[Dict], mode: Optional[str], rerank: Optional[str] = None):
+        """Retrieve from one collection; returns ((model, hnsw space), (ids, documents, metadatas, distances))."""
+        collection = self.chroma_client.get_collection(collection_name)
+        space = self.embedding_service.collection_space(collection)
+        query_embedding = self._get_cached_embedding(collection, query)
+        retrieved = self._query_collection(collection, [query], [query_embedding], n_results, where, mode, rerank)[0]
+        space_key = (
+            space.model if space else self.embedding_service.active_model,
+            (collection.metadata or {}).get("hnsw:space", "l2"),
+        )
+        return space_key, retrieved
 
-                return documents, found, metadata_list
+    def get_relevant_documents_multi(
+        self,
+        query: str,
+        collection_names: List[str],
+        top_k: int = None,
+        where: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        dedupe_similarity: float = RAG_DEDUPE_SIMILARITY,
+        rerank: Optional[str] = None
+    ) -> Tuple[List[str], bool, List[Dict[str, Any]]]:
+        """
+        Retrieve from several collections concurrently and merge into a global top-k.
 
-            # Return dict format for API compatibility
-            return {
-                "status": "success",
-                "query": query,
-                "collection": collection_name,
-                "results": {
-                    "ids": results["ids"][0] if results["ids"] else [],
-                    "documents": documents,
-                    "metadatas": metadatas,
-                    "distances": distances
-                }
+        Each collection returns its own top_k; the candidates are merged by
+        distance when every collection shares an embedding model and distance
+        metric and was ranked by vector distance alone, and by reciprocal rank
+        fusion of the per-collection rankings otherwise (distances from
+        different spaces are not comparable, and hybrid or MMR rankings are
+        not distance orders). Near-duplicate chunks (token
+        Jaccard similarity >= dedupe_similarity) keep only their best-ranked
+        copy, which lists the collections of the dropped copies.
+
+        Args:
+            query: Search query
+            collection_names: Collections to search
+            top_k: Number of results overall (defaults to self.n_results)
+            where: Optional filter applied in every collection
+            mode: "vector" or "hybrid" (defaults to RAG_RETRIEVAL_MODE)
+            dedupe_similarity: Jaccard threshold for near-duplicates (> 1 disables)
+            rerank: "none" or "mmr", applied within each collection (defaults to RAG_RERANK)
+
+        Returns:
+            Tuple of (documents, found, metadata_list) as get_relevant_documents
+            returns it, with 'collection' (and 'also_in' for removed duplicates)
+            added to each metadata entry
+        """
+        collection_names = list(dict.fromkeys(collection_names))
+        if not collection_names:
+            return [], False, []
+        num_results = top_k or self.n_results
+
+        per_collection: Dict[str, Tuple[Tuple[str, str], Tuple[List, List, List, List]]] = {}
+        workers = max(1, min(RAG_MULTI_COLLECTION_WORKERS, len(collection_names)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._retrieve_from_collection, query, name, num_results, where, mode, rerank): name
+                for name in collection_names
             }
-        except Exception as e:
-            if include_metadata:
-                return [], False, []
-            return {
-                "status": "error",
-                "message": str(e),
-                "query": query,
-                "collection": collection_name
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    per_collection[name] = future.result()
+                except Exception as e:
+                    logger.warning(f"Retrieval from '{name}' failed, skipping it: {e}")
+
+        # Candidates in collection order so ties break deterministically
+        candidates = []
+        for name in collection_names:
+            if name not in per_collection:
+                continue
+            _, (ids, documents, metadatas, distances) = per_collection[name]
+            for rank, (chunk_id, doc, meta, dist) in enumerate(zip(ids, documents, metadatas, distances)):
+                candidates.append({"collection": name, "id": chunk_id, "rank": rank,
+                                   "document": doc, "metadata": meta, "distance": dist})
+
+        # Each collection's list is in rank order. Only plain vector results are
+        # ranked by distance; hybrid (RRF) and MMR orders would be lost by a
+        # distance sort, so those are merged by their per-collection ranks
+        ranked_by_distance = (mode or RAG_RETRIEVAL_MODE) != "hybrid" and (rerank or RAG_RERANK) != "mmr"
+        if ranked_by_distance and len({space_key for space_key, _ in per_collection.values()}) <= 1:
+            candidates.sort(key=lambda c: c["distance"])
+        else:
+            fused = reciprocal_rank_fusion(
+                [[(c["collection"], c["id"]) for c in candidates if c["collection"] == name]
+                 for name in collection_names if name in per_collection]
+            )
+            order = {key: position for position, (key, _) in enumerate(fused)}
+            candidates.sort(key=lambda c: order[(c["collection"], c["id"])])
+
+        kept: List[Dict[str, Any]] = []
+        kept_terms: List[set] = []
+        for candidate in candidates:
+            terms = set(tokenize(candidate["document"] or ""))
+            duplicate_of = None
+            for i, other in enumerate(kept_terms):
+                union = len(terms | other)
+                if (terms == other) or (union and len(terms & other) / union >= dedupe_similarity):
+                    duplicate_of = i
+                    break
+            if duplicate_of is not None:
+                kept[duplicate_of].setdefault("also_in", []).append(candidate["collection"])
+                continue
+            kept.append(candidate)
+            kept_terms.append(terms)
+            if len(kept) >= num_results:
+                break
+
+        documents, metadata_list = [], []
+        for idx, c in enumerate(kept, 1):
+            documents.append(c["document"])
+            entry = {
+                'document_index': idx,
+                'distance': c["distance"],
+                'quality_tier': self._get_quality_tier_from_distance(c["distance"]),
+                'distance_explanation': f"Similarity score: {1 - (c['distance'] / 100):.2%}",
+                'metadata': c["metadata"],
+                'document_text': c["document"],
+                'collection': c["collection"],
             }
-        
-        
+            if c.get("also_in"):
+                entry['also_in'] = sorted(set(c["also_in"]) - {c["collection"]})
+            metadata_list.append(entry)
+
+        logger.info(
+            f"Cross-collection retrieval: {len(per_collection)}/{len(collection_names)} collections, "
+            f"{len(candidates)} candidates -> {len(documents)} results"
+        )
+        return documents, len(documents) > 0, metadata_list
 
     def get_llm_service(self, model_name: str):
         """Get LLM service for the specified model"""
@@ -619,7 +1264,11 @@ Answer:""")
             raise ValueError(f"Unsupported model: {model_name}")
 
         
-    def process_agent_with_rag(self, agent: Dict[str, Any], query_text: str, collection_name: str, session_id: str, db: Session, include_citations: bool = True) -> Dict[str, Any]:
+    def retrieval_session(self, collection_name: str, policy: Optional[str] = None) -> RetrievalSession:
+        """Create a RetrievalSession whose results are shared by a session's agents."""
+        return RetrievalSession(self, collection_name, policy=policy or RAG_RETRIEVAL_POLICY)
+
+    def process_agent_with_rag(self, agent: Dict[str, Any], query_text: str, collection_name: str, session_id: str, db: Session, include_citations: bool = True, retrieval: Optional[RetrievalSession] = None) -> Dict[str, Any]:
         """
         Process query with agent using RAG via API with document citations.
 
@@ -630,6 +1279,7 @@ Answer:""")
             session_id: Session ID for logging
             db: Database session
             include_citations: If True, includes document citations with similarity scores
+            retrieval: Optional session to share retrieved documents with other agents
 
         Returns:
             Dict with agent response and metadata
@@ -637,23 +1287,65 @@ Answer:""")
         start_time = time.time()
 
         try:
-            logger.info(f"Processing with agent: {agent['name']} using model: {agent['model_name']}")
+            call = self._prepare_agent_rag_call(agent, query_text, collection_name, include_citations, retrieval)
+            # Use LLMInvoker for clean invocation
+            response = LLMInvoker.invoke(model_name=agent['model_name'], prompt=call["prompt"])
+            return self._finish_agent_rag_call(agent, query_text, collection_name, session_id, include_citations, call, response, start_time)
+
+        except Exception as e:
+            return self._agent_rag_error(agent, e, start_time)
+
+    async def aprocess_agent_with_rag(self, agent: Dict[str, Any], query_text: str, collection_name: str, session_id: str, db: Session, include_citations: bool = True, retrieval: Optional[RetrievalSession] = None) -> Dict[str, Any]:
+        """
+        Async process_agent_with_rag(): retrieval and logging run off the
+        event loop, the LLM call goes through LLMInvoker.ainvoke.
+        """
+        start_time = time.time()
 
-            # Try to get relevant documents via API with metadata
+        try:
+            call = await asyncio.to_thread(
+                self._prepare_agent_rag_call, agent, query_text, collection_name, include_citations, retrieval
+            )
+            response = await LLMInvoker.ainvoke(model_name=agent['model_name'], prompt=call["prompt"])
+            return await asyncio.to_thread(
+                self._finish_agent_rag_call, agent, query_text, collection_name, session_id, include_citations, call, response, start_time
+            )
+
+        except Exception as e:
+            return self._agent_rag_error(agent, e, start_time)
+
+    def _prepare_agent_rag_call(self, agent: Dict[str, Any], query_text: str, collection_name: str, include_citations: bool, retrieval: Optional[RetrievalSession]) -> Dict[str, Any]:
+        """Retrieve and pack context for an agent and build its prompt"""
+        logger.info(f"Processing with agent: {agent['name']} using model: {agent['model_name']}")
+
+        # Try to get relevant documents via API with metadata
+        if retrieval is not None:
+            relevant_docs, docs_found, metadata_list = retrieval.retrieve(query_text)
+        else:
             relevant_docs, docs_found, metadata_list = self.get_relevant_documents(
                 query=query_text,
                 collection_name=collection_name,
                 include_metadata=include_citations
             )
 
-            if docs_found and relevant_docs:
-                logger.info(f"Using RAG mode with {len(relevant_docs)} documents")
-
-                # Create context from retrieved documents
-                context = "\n\n---DOCUMENT SEPARATOR---\n\n".join(relevant_docs)
-
-                # Enhanced RAG prompt
-                enhanced_content = f"""KNOWLEDGE BASE CONTEXT:
+        if docs_found and relevant_docs:
+            logger.info(f"Using RAG mode with {len(relevant_docs)} documents")
+
+            # Create context from the retrieved documents that fit the
+            # agent model's context budget
+            separator = "\n\n---DOCUMENT SEPARATOR---\n\n"
+            prompt_tokens = count_tokens(agent['system_prompt'] + agent["user_prompt_template"] + query_text) + 120
+            packed = pack_context(relevant_docs, agent['model_name'], prompt_tokens=prompt_tokens, separator=separator)
+            context = packed.text(separator)
+            if metadata_list:
+                metadata_list = [
+                    dict(metadata_list[i], document_index=n)
+                    for n, i in enumerate(packed.indices, 1)
+                    if i < len(metadata_list)
+                ]
+
+            # Enhanced RAG prompt
+            enhanced_content = f"""KNOWLEDGE BASE CONTEXT:
 {context}
 
 USER QUERY: {query_text}
@@ -665,95 +1357,163 @@ INSTRUCTIONS:
 4. If the context is not directly relevant, acknowledge this and proceed with your general knowledge
 5. Provide a comprehensive analysis that combines context information with your expertise"""
 
-                formatted_user_prompt = agent["user_prompt_template"].replace("{data_sample}", enhanced_content)
+            formatted_user_prompt = agent["user_prompt_template"].replace("{data_sample}", enhanced_content)
+            packed_count = len(packed.chunks)
+        else:
+            logger.info(f"Using Direct LLM mode - no relevant documents found")
 
-                full_prompt = f"{agent['system_prompt']}\n\n{formatted_user_prompt}"
+            formatted_user_prompt = agent["user_prompt_template"].replace("{data_sample}", query_text)
+            context = None
+            packed_count = 0
 
-                # Use LLMInvoker for clean invocation
-                final_response = LLMInvoker.invoke(model_name=agent['model_name'], prompt=full_prompt)
+        return {
+            "prompt": f"{agent['system_prompt']}\n\n{formatted_user_prompt}",
+            "rag": bool(docs_found and relevant_docs),
+            "docs_found": docs_found,
+            "documents_found": len(relevant_docs) if docs_found else 0,
+            "metadata_list": metadata_list,
+            "context": context,
+            "packed_count": packed_count,
+        }
 
-                response_time_ms = int((time.time() - start_time) * 1000)
-                processing_method = f"rag_enhanced_{agent['model_name']}"
+    def _finish_agent_rag_call(self, agent: Dict[str, Any], query_text: str, collection_name: str, session_id: str, include_citations: bool, call: Dict[str, Any], final_response: str, start_time: float) -> Dict[str, Any]:
+        """Append citations to an agent's response and log it"""
+        response_time_ms = int((time.time() - start_time) * 1000)
+        metadata_list = call["metadata_list"]
 
-                # Append document citations instead of simple info
-                if include_citations and metadata_list:
-                    citations = self._format_document_citations(metadata_list)
-                    final_response = final_response + citations
-                else:
-                    # Fallback to simple info if citations not requested
-                    rag_info = f"\n\n---\n**RAG Information**: Used {len(relevant_docs)} relevant documents from collection '{collection_name}' with {agent['model_name']} model."
-                    final_response = final_response + rag_info
+        if call["rag"]:
+            processing_method = f"rag_enhanced_{agent['model_name']}"
 
+            # Append document citations instead of simple info
+            if include_citations and metadata_list:
+                citations = self._format_document_citations(metadata_list)
+                final_response = final_response + citations
             else:
-                logger.info(f"Using Direct LLM mode - no relevant documents found")
+                # Fallback to simple info if citations not requested
+                rag_info = f"\n\n---\n**RAG Information**: Used {call['packed_count']} relevant documents from collection '{collection_name}' with {agent['model_name']} model."
+                final_response = final_response + rag_info
+        else:
+            processing_method = f"direct_{agent['model_name']}"
 
-                formatted_user_prompt = agent["user_prompt_template"].replace("{data_sample}", query_text)
-                full_prompt = f"{agent['system_prompt']}\n\n{formatted_user_prompt}"
+            direct_info = f"\n\n---\n**Direct LLM Information**: No relevant documents found in collection '{collection_name}'. Used {agent['model_name']} model directly."
+            final_response = final_response + direct_info
 
-                # Use LLMInvoker for clean invocation
-                final_response = LLMInvoker.invoke(model_name=agent['model_name'], prompt=full_prompt)
+        # Log agent response and get the response ID
+        agent_response_id = log_agent_response(
+            session_id=session_id,
+            agent_id=agent["id"],
+            response_text=final_response,
+            processing_method=processing_method,
+            response_time_ms=response_time_ms,
+            model_used=agent["model_name"],
+            rag_used=call["docs_found"],
+            documents_found=call["documents_found"],
+            rag_context=call["context"]
+        )
 
-                response_time_ms = int((time.time() - start_time) * 1000)
-                processing_method = f"direct_{agent['model_name']}"
+        # Log RAG citations if available and response was logged
+        if agent_response_id and include_citations and metadata_list:
+            log_rag_citations(agent_response_id, metadata_list)
+            logger.info(f"Logged {len(metadata_list)} citations for agent response {agent_response_id}")
+
+        log_compliance_result(
+            agent_id=agent["id"],
+            data_sample=query_text,
+            confidence_score=None,
+            reason="RAG analysis completed",
+            raw_response=final_response,
+            processing_method=processing_method,
+            response_time_ms=response_time_ms,
+            model_used=agent["model_name"],
+            session_id=session_id
+        )
 
-                direct_info = f"\n\n---\n**Direct LLM Information**: No relevant documents found in collection '{collection_name}'. Used {agent['model_name']} model directly."
-                final_response = final_response + direct_info
+        return {
+            "agent_id": agent["id"],
+            "agent_name": agent["name"],
+            "response": final_response,
+            "processing_method": processing_method,
+            "response_time_ms": response_time_ms,
+            "rag_used": call["docs_found"],
+            "documents_found": call["documents_found"]
+        }
 
-            # Log agent response and get the response ID
-            agent_response_id = log_agent_response(
-                session_id=session_id,
-                agent_id=agent["id"],
-                response_text=final_response,
-                processing_method=processing_method,
-                response_time_ms=response_time_ms,
-                model_used=agent["model_name"],
-                rag_used=docs_found,
-                documents_found=len(relevant_docs) if docs_found else 0,
-                rag_context=context if docs_found and relevant_docs else None
-            )
+    @staticmethod
+    def _agent_rag_error(agent: Dict[str, Any], error: Exception, start_time: float) -> Dict[str, Any]:
+        response_time_ms = int((time.time() - start_time) * 1000)
+        error_response = f"Error processing with agent {agent['name']}: {str(error)}"
+        logger.error(f"Error in process_agent_with_rag: {error}", exc_info=True)
 
-            # Log RAG citations if available and response was logged
-            if agent_response_id and include_citations and metadata_list:
-                log_rag_citations(agent_response_id, metadata_list)
-                logger.info(f"Logged {len(metadata_list)} citations for agent response {agent_response_id}")
-
-            log_compliance_result(
-                agent_id=agent["id"],
-                data_sample=query_text,
-                confidence_score=None,
-                reason="RAG analysis completed",
-                raw_response=final_response,
-                processing_method=processing_method,
-                response_time_ms=response_time_ms,
-                model_used=agent["model_name"],
-                session_id=session_id
-            )
+        return {
+            "agent_id": agent["id"],
+            "agent_name": agent["name"],
+            "response": error_response,
+            "processing_method": "error",
+            "response_time_ms": response_time_ms,
+            "rag_used": False,
+            "documents_found": 0
+        }
 
-            return {
-                "agent_id": agent["id"],
-                "agent_name": agent["name"],
-                "response": final_response,
-                "processing_method": processing_method,
-                "response_time_ms": response_time_ms,
-                "rag_used": docs_found,
-                "documents_found": len(relevant_docs) if docs_found else 0
-            }
 
-        except Exception as e:
-            response_time_ms = int((time.time() - start_time) * 1000)
-            error_response = f"Error processing with agent {agent['name']}: {str(e)}"
-            logger.error(f"Error in process_agent_with_rag: {e}", exc_info=True)
+    async def astream_agent_with_rag(self, agent: Dict[str, Any], query_text: str, collection_name: str, include_citations: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Single-agent RAG analysis with the agent's response streamed as it is
+        generated. Retrieval, prompt building and logging are as in
+        process_agent_with_rag, in a session of its own.
 
-            return {
-                "agent_id": agent["id"],
-                "agent_name": agent["name"],
-                "response": error_response,
-                "processing_method": "error",
-                "response_time_ms": response_time_ms,
-                "rag_used": False,
-                "documents_found": 0
-            }
+        Args:
+            agent: Agent dict from get_compliance_agent()
 
+        Yields:
+            ("session", dict) with session_id and agent, then ("token", text)
+            for each chunk of the response, then ("done", dict) with the
+            process_agent_with_rag result and formatted_citations
+        """
+        session_id = str(uuid.uuid4())
+        start_time = time.time()
+        await asyncio.to_thread(
+            log_agent_session,
+            session_id=session_id,
+            session_type=SessionType.RAG_ANALYSIS,
+            analysis_type=AnalysisType.RAG_ENHANCED,
+            user_query=query_text,
+            collection_name=collection_name
+        )
+        yield "session", {"session_id": session_id, "agent_id": agent["id"], "agent_name": agent["name"]}
+
+        try:
+            call = await asyncio.to_thread(
+                self._prepare_agent_rag_call, agent, query_text, collection_name, include_citations, None
+            )
+            parts = []
+            async for text in LLMInvoker.astream(model_name=agent['model_name'], prompt=call["prompt"]):
+                parts.append(text)
+                yield "token", text
+            result = await asyncio.to_thread(
+                self._finish_agent_rag_call, agent, query_text, collection_name, session_id, include_citations,
+                call, "".join(parts), start_time
+            )
+            status, error_message = 'completed', None
+        except Exception as e:
+            result = self._agent_rag_error(agent, e, start_time)
+            status, error_message = 'failed', str(e)
+
+        await asyncio.to_thread(
+            complete_agent_session,
+            session_id=session_id,
+            overall_result={
+                "agent_responses": {result["agent_name"]: result["response"]},
+                "collection_used": collection_name
+            },
+            agent_count=1,
+            total_response_time_ms=int((time.time() - start_time) * 1000),
+            status=status,
+            error_message=error_message
+        )
+        formatted_citations = ""
+        if status == 'completed' and include_citations and call["metadata_list"]:
+            formatted_citations = self._format_document_citations(call["metadata_list"])
+        yield "done", dict(result, session_id=session_id, formatted_citations=formatted_citations)
 
     def run_rag_check(self, query_text: str, collection_name: str, agent_ids: List[int], db: Session) -> Dict[str, Any]:
         """Run RAG check with multiple agents and enhanced logging"""
@@ -771,24 +1531,24 @@ INSTRUCTIONS:
 
         self.load_selected_compliance_agents(agent_ids)
 
-        # Get consolidated citations for the collection query (run once for all agents)
-        _, _, metadata_list = self.get_relevant_documents(
-            query=query_text,
-            collection_name=collection_name,
-            include_metadata=True
-        )
+        # Get consolidated citations for the collection query; with a shared
+        # retrieval policy the agents reuse this result instead of re-querying
+        retrieval = self.retrieval_session(collection_name)
+        _, _, metadata_list = retrieval.retrieve(query_text)
         formatted_citations = self._format_document_citations(metadata_list) if metadata_list else ""
 
+        # Agents run concurrently on the shared stage executor
+        executor = get_stage_executor()
+        agent_results = executor.run(executor.gather(
+            self.aprocess_agent_with_rag(agent, query_text, collection_name, session_id, db, retrieval=retrieval)
+            for agent in self.compliance_agents
+        ))
         results = {}
-        with ThreadPoolExecutor() as executor:
-            futures = {
-                executor.submit(self.process_agent_with_rag, agent, query_text, collection_name, session_id, db): i
-                for i, agent in enumerate(self.compliance_agents)
-            }
-            for future in as_completed(futures):
-                idx = futures[future]
-                result = future.result()
-                results[result["agent_name"]] = result["response"]
+        for result in agent_results:
+            if isinstance(result, BaseException):
+                raise result
+            results[result["agent_name"]] = result["response"]
+        logger.info(f"RAG check {session_id} retrieval: {retrieval.stats()}")
         
         total_time = int((time.time() - start_time) * 1000)
         complete_agent_session(
@@ -852,12 +1612,10 @@ INSTRUCTIONS:
             collection_name=collection_name
         )
 
-        # Get consolidated citations for the collection query (run once for all agents)
-        _, _, metadata_list = self.get_relevant_documents(
-            query=query_text,
-            collection_name=collection_name,
-            include_metadata=True
-        )
+        # Get consolidated citations for the collection query; later rounds
+        # re-query only when the retrieval policy says the context has drifted
+        retrieval = self.retrieval_session(collection_name)
+        _, _, metadata_list = retrieval.retrieve(query_text)
         formatted_citations = self._format_document_citations(metadata_list) if metadata_list else ""
 
         # NOTE: DebateSession table was removed in Phase 5
@@ -888,7 +1646,8 @@ INSTRUCTIONS:
             current_input = cumulative_context if i > 0 else query_text
             
             # Process with RAG
-            result = self.process_agent_with_rag(agent, current_input, collection_name, session_id, db)
+            result = self.process_agent_with_rag(agent, current_input, collection_name, session_id, db,
+                                                 retrieval=retrieval)
             
             agent_response_id = self._update_agent_response_sequence_order(session_id, agent["id"], i + 1)
             
@@ -904,6 +1663,7 @@ INSTRUCTIONS:
             })
             
             cumulative_context += f"--- Agent {agent['name']} Analysis ---\n{result['response']}\n\n"
+        logger.info(f"RAG debate {session_id} retrieval: {retrieval.stats()}")
         
         total_time = int((time.time() - start_time) * 1000)
         complete_agent_session(
@@ -950,18 +1710,28 @@ INSTRUCTIONS:
 
     def load_selected_compliance_agents(self, agent_ids: List[int]):
         """Load selected compliance agents"""
+        self.compliance_agents = self._load_compliance_agents(agent_ids)
+
+    def get_compliance_agent(self, agent_id: int) -> Optional[Dict[str, Any]]:
+        """Load one compliance agent (None if it does not exist)"""
+        agents = self._load_compliance_agents([agent_id])
+        return agents[0] if agents else None
+
+    @staticmethod
+    def _load_compliance_agents(agent_ids: List[int]) -> List[Dict[str, Any]]:
         session = SessionLocal()
         try:
-            self.compliance_agents = []
             agents = session.query(ComplianceAgent).filter(ComplianceAgent.id.in_(agent_ids)).all()
-            for agent in agents:
-                self.compliance_agents.append({
+            return [
+                {
                     "id": agent.id,
                     "name": agent.name,
                     "model_name": agent.model_name.lower(),
                     "system_prompt": agent.system_prompt,
                     "user_prompt_template": agent.user_prompt_template
-                })
+                }
+                for agent in agents
+            ]
         finally:
             session.close()
 
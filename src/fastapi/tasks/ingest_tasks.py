@@ -0,0 +1,111 @@
+"""
+Celery tasks for document ingestion.
+"""
+
+from celery_app import celery_app
+from celery.signals import worker_process_init
+from tasks.test_card_tasks import CallbackTask
+from services.embedding_service import get_embedding_service, EMBEDDING_WARMUP
+from services.document_ingestion_service import (
+    run_ingest_job,
+    cleanup_spooled_job,
+    load_job_api_key,
+    discard_job_api_key,
+    redis_client,
+    openai_api_key as default_openai_api_key,
+)
+import logging
+from datetime import datetime
+
+logger = logging.getLogger("INGEST_TASKS")
+
+
+@worker_process_init.connect
+def warm_embedding_model(**kwargs):
+    """Load the embedding model in each worker process before the first task."""
+    if EMBEDDING_WARMUP:
+        get_embedding_service().warm_up(background=True)
+
+
+@celery_app.task(
+    base=CallbackTask,
+    bind=True,
+    name="tasks.ingest_tasks.ingest_documents",
+    soft_time_limit=12600,  # 3.5 hours - large PDF batches with vision models are slow on CPU
+    time_limit=14400,  # 4 hours hard limit - must stay below the broker visibility_timeout
+)
+def ingest_documents(
+    self,
+    job_id: str,
+    payloads: list,
+    collection_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    store_images: bool,
+    vision_models: list,
+    enable_ocr: bool = False,
+    incremental: bool = False
+):
+    """
+    Celery task to ingest spooled uploads into a ChromaDB collection.
+
+    Args:
+        self: Celery task instance (bound)
+        job_id: Unique job identifier (also the key of the job:{id}:progress hash)
+        payloads: List of {"filename", "path"} dicts pointing into the spool directory
+        collection_name: Target ChromaDB collection
+        chunk_size: Chunk size for text splitting
+        chunk_overlap: Chunk overlap for text splitting
+        store_images: Whether extracted images are stored
+        vision_models: Vision model keys used for image descriptions
+        enable_ocr: Whether OCR is enabled
+        incremental: Only embed new/changed chunks of documents already in the collection
+
+    Returns:
+        dict: Result summary
+    """
+    try:
+        logger.info(f"[{job_id}] Starting ingestion of {len(payloads)} file(s) (Celery Task ID: {self.request.id})")
+        redis_client.set(f"job:{job_id}:celery_task_id", self.request.id)
+
+        run_ingest_job(
+            job_id,
+            payloads,
+            collection_name,
+            chunk_size,
+            chunk_overlap,
+            store_images,
+            vision_models,
+            # Per-request key stashed by the API (see stash_job_api_key), else the worker's own
+            load_job_api_key(job_id) or default_openai_api_key,
+            enable_ocr,
+            incremental=incremental,
+        )
+
+        logger.info(f"[{job_id}] Ingestion completed")
+        return {
+            "job_id": job_id,
+            "collection_name": collection_name,
+            "documents": len(payloads),
+            "status": "completed"
+        }
+
+    except Exception as e:
+        logger.error(f"[{job_id}] Ingestion failed: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+
+        redis_client.set(job_id, "failed")
+        redis_client.hset(f"job:{job_id}:progress", mapping={
+            "error": str(e),
+            "failed_at": datetime.now().isoformat()
+        })
+
+        # Re-raise exception for Celery to mark task as failed
+        raise
+
+    finally:
+        # A worker crash never reaches this point, so the spool survives for
+        # the redelivered task (task_acks_late + task_reject_on_worker_lost)
+        cleanup_spooled_job(job_id)
+        discard_job_api_key(job_id)
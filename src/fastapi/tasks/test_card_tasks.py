@@ -51,6 +51,13 @@ def generate_test_cards(
     Returns:
         dict: Result summary with generated test cards
     """
+    # Get Redis connection for progress updates. Every update here is a phase
+    # change the UI must see at once, so they are written directly; only the
+    # final result and status go out together in one pipeline
+    redis_host = os.getenv("REDIS_HOST", "redis")
+    redis_port = int(os.getenv("REDIS_PORT", 6379))
+    redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
+
     try:
         logger.info(f"[{job_id}] Starting test card generation (Celery Task ID: {self.request.id})")
 
@@ -61,11 +68,6 @@ def generate_test_cards(
         llm_service = LLMService()  # Initialize without db for Celery context
         test_card_service = TestCardService(llm_service)
 
-        # Get Redis connection for progress updates
-        redis_host = os.getenv("REDIS_HOST", "redis")
-        redis_port = int(os.getenv("REDIS_PORT", 6379))
-        redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
-
         # Update status to processing
         redis_client.hset(f"testcard_job:{job_id}:meta", mapping={
             "status": "processing",
@@ -212,11 +214,12 @@ def generate_test_cards(
             "chromadb_saved": str(save_result.get("saved", False)),
             "collection_name": save_result.get("collection_name", "test_cards")
         }
-        redis_client.hset(f"testcard_job:{job_id}:result", mapping=result_data)
-        redis_client.expire(f"testcard_job:{job_id}:result", 604800)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(f"testcard_job:{job_id}:result", mapping=result_data)
+        pipe.expire(f"testcard_job:{job_id}:result", 604800)
 
         # Update final status with complete counts
-        redis_client.hset(f"testcard_job:{job_id}:meta", mapping={
+        pipe.hset(f"testcard_job:{job_id}:meta", mapping={
             "status": "completed",
             "sections_processed": str(sections_completed),
             "total_sections": str(sections_completed),  # Match final count
@@ -225,6 +228,7 @@ def generate_test_cards(
             "completed_at": datetime.now().isoformat(),
             "last_updated_at": datetime.now().isoformat()
         })
+        pipe.execute()
 
         logger.info(f"[{job_id}] Test card generation completed successfully")
 
@@ -242,10 +246,6 @@ def generate_test_cards(
         logger.error(traceback.format_exc())
 
         # Update status to failed
-        redis_host = os.getenv("REDIS_HOST", "redis")
-        redis_port = int(os.getenv("REDIS_PORT", 6379))
-        redis_client = redis.Redis(host=redis_host, port=redis_port, decode_responses=True)
-
         redis_client.hset(f"testcard_job:{job_id}:meta", mapping={
             "status": "failed",
             "error": str(e),
@@ -858,31 +858,17 @@ def render_sidebyside_editor():
                 output_collections = {"test_plan_drafts", "generated_test_plan", "json_test_plans", "generated_documents", "test_cards"}
                 source_collections_to_check = [c for c in available_collections if c not in output_collections]
 
-                # Check each collection for the source document
-                for coll in source_collections_to_check:
-                    try:
-                        docs_response = api_client.get(
-                            f"{config.fastapi_url}/api/vectordb/documents",
-                            params={"collection_name": coll},
-                            timeout=10,
-                            show_errors=False
-                        )
-                        doc_ids = docs_response.get("ids", [])
-                        doc_metadatas = docs_response.get("metadatas", [])
-
-                        # Check if source document exists in this collection
-                        for i, doc_id in enumerate(doc_ids):
-                            meta = doc_metadatas[i] if i < len(doc_metadatas) else {}
-                            doc_name = meta.get("document_name", "")
-
-                            if source_doc_id == doc_id or source_doc_id == doc_name or source_doc_id in doc_id or doc_id in source_doc_id:
-                                source_collection = coll
-                                break
-
-                        if source_collection:
-                            break
-                    except:
-                        continue
+                # Look the source document up in the document catalog of those collections
+                if source_collections_to_check:
+                    locate_response = api_client.get(
+                        f"{config.fastapi_url}/api/vectordb/catalog/locate",
+                        params={"document": source_doc_id, "collection_name": source_collections_to_check},
+                        timeout=10,
+                        show_errors=False
+                    )
+                    matches = locate_response.get("matches", [])
+                    if matches:
+                        source_collection = matches[0]["collection"]
             except:
                 pass
 